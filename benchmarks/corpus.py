@@ -0,0 +1,206 @@
+"""
+Synthetic paper corpus for benchmarks: PDFs and HTML pages the size of real papers.
+
+Every paper is generated from its number, so a corpus is the same on every
+run and every commit, and papers with different numbers never share an
+extraction or summary cache entry.
+"""
+
+import random
+import html
+
+# Section headings in the order they appear, with their share of the body text
+SECTIONS = (
+    ('1 Introduction', 0.12),
+    ('2 Related Work', 0.10),
+    ('3 Method', 0.22),
+    ('4 Experiments', 0.20),
+    ('5 Results', 0.14),
+    ('6 Discussion', 0.10),
+    ('7 Conclusion', 0.04),
+    ('References', 0.08),
+)
+
+WORDS = (
+    'model', 'training', 'latency', 'throughput', 'baseline', 'dataset', 'accuracy', 'network', 'layer',
+    'attention', 'gradient', 'benchmark', 'evaluation', 'parameter', 'inference', 'cache', 'memory', 'token',
+    'sequence', 'objective', 'loss', 'sample', 'distribution', 'estimate', 'variance', 'kernel', 'scheduler',
+    'workload', 'cluster', 'request', 'queue', 'batch', 'pipeline', 'stage', 'compression', 'index', 'query',
+    'we', 'propose', 'show', 'that', 'the', 'a', 'of', 'and', 'in', 'with', 'for', 'our', 'on', 'is', 'this',
+    'improves', 'reduces', 'outperforms', 'compared', 'prior', 'work', 'results', 'significantly', 'across',
+)
+
+# Characters per line and lines per page, close to a two-column conference paper
+LINE_CHARS = 90
+PAGE_LINES = 52
+
+
+def _sentence(rng):
+    """Generate one sentence of paper-like filler text."""
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 22))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _wrap(sentences):
+    """Wrap sentences into lines of paragraph text."""
+    lines = []
+    line = ''
+    for sentence in sentences:
+        for word in sentence.split():
+            if len(line) + len(word) + 1 > LINE_CHARS:
+                lines.append(line)
+                line = ''
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def paper_text(number, pages=16):
+    """
+    Generate the text of a paper.
+
+    Args:
+        number (int): Paper number, the seed of its text
+        pages (int): Length of the paper in PDF pages
+
+    Returns:
+        tuple: (title, abstract, sections), where sections is a list of (heading, lines)
+    """
+    rng = random.Random(number)
+    title = f"Benchmark Paper {number}: " + ' '.join(rng.choice(WORDS) for _ in range(6)).title()
+    abstract = ' '.join(_sentence(rng) for _ in range(6))
+
+    body_lines = pages * PAGE_LINES - len(_wrap([abstract])) - 4
+    sections = []
+    for heading, share in SECTIONS:
+        count = max(1, int(body_lines * share))
+        if heading == 'References':
+            lines = [f"[{i + 1}] {_sentence(rng)[:LINE_CHARS - 6]}" for i in range(count)]
+        else:
+            lines = []
+            while len(lines) < count:
+                lines.extend(_wrap(_sentence(rng) for _ in range(5)))
+            lines = lines[:count]
+        sections.append((heading, lines))
+    return title, abstract, sections
+
+
+def _page_lines(number, pages):
+    """Lay out a paper as pages of lines."""
+    title, abstract, sections = paper_text(number, pages)
+    lines = [title, '', 'Abstract'] + _wrap([abstract])
+    for heading, section_lines in sections:
+        lines += ['', heading] + section_lines
+    return [lines[i:i + PAGE_LINES] for i in range(0, len(lines), PAGE_LINES)]
+
+
+def _escape_pdf(text):
+    """Escape a string for use in a PDF literal string."""
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(number, pages=16, figures=4, figure_kb=200):
+    """
+    Build a paper PDF with text pages and uncompressed figures.
+
+    Figures are random grey images, so the file has the size of a paper
+    with plots while its text stays cheap to generate.
+
+    Args:
+        number (int): Paper number
+        pages (int): Number of pages
+        figures (int): Number of figures, placed on the first pages
+        figure_kb (int): Size of each figure in kilobytes
+
+    Returns:
+        bytes: PDF document
+    """
+    page_lines = _page_lines(number, pages)
+    rng = random.Random(f"figures-{number}")
+    page_count = len(page_lines)
+    font_id = 3 + 2 * page_count
+    first_image_id = font_id + 1
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            ' '.join(f"{3 + 2 * i} 0 R" for i in range(page_count)), page_count
+        )).encode()
+    ]
+
+    for i, lines in enumerate(page_lines):
+        content = "BT /F1 9 Tf 13 TL 50 760 Td " + ' '.join(
+            f"({_escape_pdf(line)}) Tj T*" for line in lines
+        ) + " ET"
+        resources = f"/Font << /F1 {font_id} 0 R >>"
+        if i < figures:
+            content += " q 240 0 0 160 300 80 cm /Im1 Do Q"
+            resources += f" /XObject << /Im1 {first_image_id + i} 0 R >>"
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << {resources} >> /Contents {4 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(
+            f"<< /Length {len(content)} >>\nstream\n".encode() + content.encode('latin-1') + b"\nendstream"
+        )
+
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    width = 512
+    height = max(1, figure_kb * 1024 // width)
+    for _ in range(min(figures, page_count)):
+        pixels = rng.randbytes(width * height)
+        objects.append(
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray "
+            f"/BitsPerComponent 8 /Length {len(pixels)} >>\nstream\n".encode() + pixels + b"\nendstream"
+        )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for object_number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{object_number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def make_html(number, pages=16, boilerplate_kb=150):
+    """
+    Build a paper as an HTML page, with the navigation and script clutter of a publisher site.
+
+    Args:
+        number (int): Paper number
+        pages (int): Length of the paper in PDF pages
+        boilerplate_kb (int): Size of the scripts, styles and navigation around the paper
+
+    Returns:
+        bytes: HTML document
+    """
+    title, abstract, sections = paper_text(number, pages)
+    parts = [
+        "<!DOCTYPE html><html><head>",
+        f"<title>{html.escape(title)}</title>",
+        f'<meta name="citation_title" content="{html.escape(title)}">',
+        f'<meta name="description" content="{html.escape(abstract)}">',
+        "<style>" + "body{font-family:serif}" * (boilerplate_kb * 1024 // 2 // 22) + "</style>",
+        "</head><body>",
+        "<nav>" + ''.join(f'<a href="/section/{i}">Section {i}</a>' for i in range(200)) + "</nav>",
+        f"<h1>{html.escape(title)}</h1>",
+        f'<div class="abstract"><h2>Abstract</h2><p>{html.escape(abstract)}</p></div>',
+        "<article>",
+    ]
+    for heading, lines in sections:
+        parts.append(f"<h2>{html.escape(heading)}</h2>")
+        # Paragraphs of about ten lines
+        for i in range(0, len(lines), 10):
+            parts.append(f"<p>{html.escape(' '.join(lines[i:i + 10]))}</p>")
+    parts.append("</article>")
+    parts.append("<script>" + "var x=0;" * (boilerplate_kb * 1024 // 2 // 8) + "</script>")
+    parts.append("</body></html>")
+    return '\n'.join(parts).encode('utf-8')
+
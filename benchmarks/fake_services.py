@@ -0,0 +1,338 @@
+"""
+Local stand-ins for the services the bot talks to: paper hosts, the OpenAI API and the Slack Web API.
+
+Each server runs on a random port of 127.0.0.1 in a background thread and
+answers like the real service closely enough for the bot's clients, with
+configurable latency, so benchmarks measure the bot rather than the network.
+"""
+
+import json
+import time
+import random
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from corpus import WORDS, make_pdf, make_html
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Dispatches requests to the handle() method of the fake service."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.service.handle(self)
+
+    def do_POST(self):
+        self.server.service.handle(self)
+
+    def log_message(self, format, *args):
+        """Keep request logs out of the benchmark output."""
+
+    def read_body(self):
+        """Read the request body."""
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def send_body(self, body, content_type, status=200):
+        """Send a complete response."""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, payload, status=200):
+        """Send a JSON response."""
+        self.send_body(json.dumps(payload).encode('utf-8'), 'application/json', status)
+
+
+class FakeService:
+    """A local HTTP server for one fake service."""
+
+    def __init__(self):
+        """Initialize the service; start() binds the port."""
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def url(self):
+        """Base URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving on a free port."""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.service = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def handle(self, handler):
+        """Answer a request."""
+        with self._lock:
+            self.requests += 1
+        self.respond(handler)
+
+    def respond(self, handler):
+        """Answer a request; implemented by the services."""
+        raise NotImplementedError
+
+
+class PaperServer(FakeService):
+    """
+    Serves the benchmark corpus at /papers/<number>.pdf and /papers/<number>.html.
+
+    Papers are generated on first request and kept in a small LRU, so
+    generation stays out of the measured download times.
+    """
+
+    def __init__(self, pages=16, figures=4, figure_kb=200, latency=0.05, cached_papers=64):
+        """
+        Initialize the paper server.
+
+        Args:
+            pages (int): Pages per paper
+            figures (int): Figures per PDF
+            figure_kb (int): Size of each figure in kilobytes
+            latency (float): Seconds before the response starts
+            cached_papers (int): Generated papers kept in memory
+        """
+        super().__init__()
+        self.pages = pages
+        self.figures = figures
+        self.figure_kb = figure_kb
+        self.latency = latency
+        self.cached_papers = cached_papers
+        self.bytes_sent = 0
+        self._papers = OrderedDict()
+
+    def paper_url(self, number, kind='pdf'):
+        """Return the URL of a paper of the corpus."""
+        return f"{self.url}/papers/{number}.{kind}"
+
+    def paper(self, number, kind):
+        """Return the bytes of a paper, generating it if needed."""
+        key = (number, kind)
+        with self._lock:
+            if key in self._papers:
+                self._papers.move_to_end(key)
+                return self._papers[key]
+        if kind == 'pdf':
+            body = make_pdf(number, self.pages, self.figures, self.figure_kb)
+        else:
+            body = make_html(number, self.pages)
+        with self._lock:
+            self._papers[key] = body
+            while len(self._papers) > self.cached_papers:
+                self._papers.popitem(last=False)
+        return body
+
+    def respond(self, handler):
+        """Serve a paper."""
+        name = urlparse(handler.path).path.rsplit('/', 1)[-1]
+        number, _, kind = name.partition('.')
+        if not number.isdigit() or kind not in ('pdf', 'html'):
+            handler.send_body(b'Not found', 'text/plain', status=404)
+            return
+        body = self.paper(int(number), kind)
+        time.sleep(self.latency)
+        handler.send_body(body, 'application/pdf' if kind == 'pdf' else 'text/html; charset=utf-8')
+        with self._lock:
+            self.bytes_sent += len(body)
+
+
+class FakeOpenAI(FakeService):
+    """
+    Answers /v1/chat/completions with filler text, streamed or not.
+
+    The first token comes after `latency` seconds and the rest at
+    `tokens_per_second`, which is how a loaded model endpoint behaves.
+    """
+
+    def __init__(self, latency=0.5, tokens_per_second=80, completion_tokens=600):
+        """
+        Initialize the fake OpenAI API.
+
+        Args:
+            latency (float): Seconds before the first token
+            tokens_per_second (float): Rate at which the completion is generated
+            completion_tokens (int): Completion length when the request sets no smaller max_tokens
+        """
+        super().__init__()
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.prompt_tokens = 0
+        self.generated_tokens = 0
+
+    def respond(self, handler):
+        """Answer a chat completion request."""
+        if urlparse(handler.path).path != '/v1/chat/completions':
+            handler.send_json({'error': {'message': 'Not found'}}, status=404)
+            return
+        body = json.loads(handler.read_body() or b'{}')
+        # About four characters per token, like the bot's own estimate without tiktoken
+        prompt_tokens = sum(len(message.get('content') or '') for message in body.get('messages', [])) // 4
+        tokens = min(body.get('max_tokens') or self.completion_tokens, self.completion_tokens)
+        rng = random.Random(prompt_tokens)
+        words = [rng.choice(WORDS) for _ in range(tokens)]
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.generated_tokens += tokens
+
+        time.sleep(self.latency)
+        if body.get('stream'):
+            self._stream(handler, body.get('model'), words)
+            return
+
+        time.sleep(tokens / self.tokens_per_second)
+        handler.send_json({
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ' '.join(words)},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': tokens,
+                'total_tokens': prompt_tokens + tokens
+            }
+        })
+
+    def _stream(self, handler, model, words):
+        """Send the completion as server-sent events, a few tokens at a time."""
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+        handler.close_connection = True
+
+        # Tokens are sent every 50ms, as a real stream batches them
+        per_event = max(1, int(self.tokens_per_second * 0.05))
+        for start in range(0, len(words), per_event):
+            time.sleep(len(words[start:start + per_event]) / self.tokens_per_second)
+            self._send_event(handler, model, {'content': ' '.join(words[start:start + per_event]) + ' '}, None)
+        self._send_event(handler, model, {}, 'stop')
+        handler.wfile.write(b'data: [DONE]\n\n')
+        handler.wfile.flush()
+
+    @staticmethod
+    def _send_event(handler, model, delta, finish_reason):
+        """Send one chat.completion.chunk event."""
+        chunk = {
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+        }
+        handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        handler.wfile.flush()
+
+
+class FakeSlack(FakeService):
+    """
+    Answers the Slack Web API methods the bot calls, under /api/, and slash command response URLs.
+
+    Messages are kept in memory, so a benchmark can check what the bot posted.
+    """
+
+    def __init__(self, latency=0.02):
+        """
+        Initialize the fake Slack API.
+
+        Args:
+            latency (float): Seconds before each response
+        """
+        super().__init__()
+        self.latency = latency
+        self.calls = {}
+        # ts -> message
+        self.messages = {}
+        # (channel, thread_ts) -> parent message text
+        self.threads = {}
+        self._next_ts = 0
+
+    @property
+    def api_url(self):
+        """Base URL of the Web API, for SlackClient."""
+        return f"{self.url}/api/"
+
+    @property
+    def response_url(self):
+        """URL slash commands are acknowledged at."""
+        return f"{self.url}/response"
+
+    def add_thread(self, channel, thread_ts, text):
+        """Create a thread whose parent message has the given text."""
+        with self._lock:
+            self.threads[(channel, thread_ts)] = text
+
+    def replies(self, channel, thread_ts):
+        """Return the texts the bot posted in a thread, with their latest edits, in posting order."""
+        with self._lock:
+            return [
+                message['text'] for message in self.messages.values()
+                if message['channel'] == channel and message.get('thread_ts') == thread_ts
+            ]
+
+    def respond(self, handler):
+        """Answer a Web API call."""
+        parsed = urlparse(handler.path)
+        body = handler.read_body()
+        time.sleep(self.latency)
+        if parsed.path == '/response':
+            handler.send_body(b'ok', 'text/plain')
+            return
+
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        if body:
+            if handler.headers.get('Content-Type', '').startswith('application/json'):
+                params.update(json.loads(body))
+            else:
+                params.update({key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()})
+
+        method = parsed.path[len('/api/'):]
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            result = self._call(method, params)
+        handler.send_json(result)
+
+    def _call(self, method, params):
+        """Apply a Web API call to the stored messages. Caller holds the lock."""
+        channel = params.get('channel')
+        if method == 'chat.postMessage':
+            self._next_ts += 1
+            ts = f"{int(time.time())}.{self._next_ts:06d}"
+            message = {'channel': channel, 'ts': ts, 'thread_ts': params.get('thread_ts'), 'text': params.get('text')}
+            self.messages[ts] = message
+            return {'ok': True, 'channel': channel, 'ts': ts, 'message': message}
+        if method == 'chat.update':
+            message = self.messages.get(params.get('ts'))
+            if message is None:
+                return {'ok': False, 'error': 'message_not_found'}
+            message['text'] = params.get('text')
+            return {'ok': True, 'channel': channel, 'ts': message['ts'], 'text': message['text']}
+        if method in ('conversations.replies', 'conversations.history'):
+            thread_ts = params.get('ts') or params.get('latest')
+            text = self.threads.get((channel, thread_ts))
+            if text is None:
+                return {'ok': False, 'error': 'thread_not_found'}
+            return {'ok': True, 'messages': [{'type': 'message', 'ts': thread_ts, 'text': text}], 'has_more': False}
+        return {'ok': False, 'error': 'unknown_method'}
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the /summary command against local stand-ins for paper hosts, OpenAI and Slack.
+
+The Flask app is started in this process with its Slack and OpenAI clients
+pointed at the fake services. Signed /summary commands are sent at a fixed
+concurrency, each for its own thread and paper, and a request counts as done
+when its background job finishes. The report has the latency percentiles and
+throughput of the requests, the timings of every pipeline stage and the peak
+memory use, and is written as JSON so runs on different commits can be compared.
+
+Usage:
+    python benchmarks/run_benchmark.py --requests 50 --concurrency 8
+    python benchmarks/run_benchmark.py --baseline benchmarks/results/abc1234.json
+"""
+
+import os
+import sys
+import hmac
+import json
+import math
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+import platform
+import threading
+import subprocess
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from fake_services import PaperServer, FakeOpenAI, FakeSlack
+from metrics import add_stage_listener, remove_stage_listener
+from paper_processor import peak_rss_mb
+
+logger = logging.getLogger('benchmark')
+
+SIGNING_SECRET = 'benchmark-signing-secret'
+
+# Paper numbers of warm-up requests, far from the measured ones so they share no cache entries
+WARMUP_OFFSET = 1000000
+
+
+def percentile(values, fraction):
+    """
+    Return a percentile by the nearest-rank method.
+
+    Args:
+        values (list): Measurements
+        fraction (float): Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The percentile, or None without measurements
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(values):
+    """Return the count, mean and p50/p95/p99/max of durations in seconds."""
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values) if values else None,
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': max(values) if values else None
+    }
+
+
+def current_rss_mb():
+    """Return the resident set size of this process now, or its peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+class StageRecorder:
+    """Collects the duration, errors and memory use of every finished stage."""
+
+    def __init__(self):
+        """Initialize the recorder."""
+        self._lock = threading.Lock()
+        self.durations = {}
+        self.errors = {}
+        self.rss = {}
+        self.recording = False
+        # user ID -> event set when the user's summary request finishes
+        self.finished = {}
+
+    def __call__(self, stage, seconds, error, attributes):
+        """Record a finished stage; called by the metrics module."""
+        rss = current_rss_mb()
+        with self._lock:
+            if self.recording:
+                self.durations.setdefault(stage, []).append(seconds)
+                self.errors[stage] = self.errors.get(stage, 0) + int(error)
+                self.rss[stage] = max(self.rss.get(stage, 0.0), rss)
+            done = self.finished.get(attributes.get('user')) if stage == 'summary_request' else None
+        if done is not None:
+            done.set()
+
+    def expect(self, user):
+        """Return an event set when the summary request of a user finishes."""
+        done = threading.Event()
+        with self._lock:
+            self.finished[user] = done
+        return done
+
+    def report(self):
+        """Return the latency percentiles, errors and peak RSS of each stage."""
+        with self._lock:
+            return {
+                stage: {
+                    **summarize_latencies(durations),
+                    'errors': self.errors[stage],
+                    'peak_rss_mb': round(self.rss[stage], 1)
+                }
+                for stage, durations in sorted(self.durations.items())
+            }
+
+
+class BenchmarkRun:
+    """Sends /summary commands to the app and waits for them to finish."""
+
+    def __init__(self, app_url, slack, papers, recorder, kind='pdf', timeout=300):
+        """
+        Initialize the run.
+
+        Args:
+            app_url (str): Base URL of the app under test
+            slack (FakeSlack): Fake Slack API the app posts to
+            papers (PaperServer): Server of the corpus
+            recorder (StageRecorder): Recorder notified when requests finish
+            kind (str): Papers to request: 'pdf', 'html' or 'mixed'
+            timeout (float): Seconds to wait for each request
+        """
+        self.app_url = app_url
+        self.slack = slack
+        self.papers = papers
+        self.recorder = recorder
+        self.kind = kind
+        self.timeout = timeout
+
+    def paper_url(self, number):
+        """Return the URL of the paper a request asks for."""
+        kind = self.kind if self.kind != 'mixed' else ('pdf', 'html')[number % 2]
+        return self.papers.paper_url(number, kind)
+
+    def request(self, index, number):
+        """
+        Send one /summary command in a new thread and wait for its summary.
+
+        Args:
+            index (int): Request number, used for the channel, user and thread
+            number (int): Paper number
+
+        Returns:
+            dict: Acknowledgement and end-to-end latency and whether a summary was posted
+        """
+        channel, user, thread_ts = f"C{index:06d}", f"U{index:06d}", f"1700000000.{index:06d}"
+        self.slack.add_thread(channel, thread_ts, f"Worth a read: {self.paper_url(number)}")
+        done = self.recorder.expect(user)
+
+        body = urlencode({
+            'command': '/summary', 'channel_id': channel, 'user_id': user, 'thread_ts': thread_ts,
+            'response_url': self.slack.response_url
+        })
+        timestamp = str(int(time.time()))
+        signature = 'v0=' + hmac.new(
+            SIGNING_SECRET.encode(), f"v0:{timestamp}:{body}".encode(), hashlib.sha256
+        ).hexdigest()
+
+        start = time.perf_counter()
+        response = requests.post(
+            f"{self.app_url}/slack/commands/summary", data=body,
+            headers={
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-Slack-Request-Timestamp': timestamp,
+                'X-Slack-Signature': signature
+            }
+        )
+        acknowledged = time.perf_counter() - start
+        finished = response.ok and 'Processing' in response.text and done.wait(self.timeout)
+        latency = time.perf_counter() - start
+
+        replies = self.slack.replies(channel, thread_ts)
+        ok = bool(finished) and any("Here's the summary" in text for text in replies)
+        if not ok:
+            logger.warning(f"Request {index} for {self.paper_url(number)} failed: {replies[-1:] or response.text}")
+        return {'ack_seconds': acknowledged, 'seconds': latency, 'ok': ok}
+
+    def run(self, count, concurrency, papers=0, first_number=0):
+        """
+        Send requests, keeping `concurrency` of them in flight.
+
+        Args:
+            count (int): Number of requests
+            concurrency (int): Requests in flight at once
+            papers (int): Distinct papers to cycle through, 0 for a new paper per request
+            first_number (int): Number of the first paper
+
+        Returns:
+            tuple: (results, seconds the requests took)
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='benchmark-client') as executor:
+            futures = [
+                executor.submit(self.request, first_number + index, first_number + (index % papers if papers else index))
+                for index in range(count)
+            ]
+            results = [future.result() for future in futures]
+        return results, time.perf_counter() - start
+
+
+def git_commit():
+    """Return the current commit and whether the tree has local changes, or None outside a checkout."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR, capture_output=True, text=True
+        ).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure_environment(args, openai, slack, workdir):
+    """Point the app's configuration at the fake services and a scratch directory."""
+    os.environ.update({
+        'SLACK_BOT_TOKEN': 'xoxb-benchmark',
+        'SLACK_SIGNING_SECRET': SIGNING_SECRET,
+        'SLACK_API_URL': slack.api_url,
+        'OPENAI_API_KEY': 'sk-benchmark',
+        'OPENAI_BASE_URL': f"{openai.url}/v1",
+        'EXTRACTION_CACHE_PATH': os.path.join(workdir, 'extraction_cache.sqlite3'),
+        'SUMMARY_CACHE_PATH': os.path.join(workdir, 'summary_cache.sqlite3'),
+        'OPENAI_RATE_LIMIT_PATH': os.path.join(workdir, 'openai_rate_limit.sqlite3'),
+        'JOB_QUEUE_PATH': os.path.join(workdir, 'jobs.sqlite3'),
+        'JOB_QUEUE_MAX_SIZE': str(max(100, args.requests + args.warmup)),
+        'JOB_WORKERS': str(args.workers),
+        'PREFETCH_CHANNELS': '',
+    })
+    # Tuning the run does not set is left to the environment, with benchmark-friendly defaults
+    os.environ.setdefault('OPENAI_RPM', '0')
+    os.environ.setdefault('SLACK_UPDATE_INTERVAL', '0.5')
+
+
+def compare(result, baseline):
+    """Print the change of the headline numbers against a baseline run."""
+    rows = [('requests/s', result['requests_per_second'], baseline.get('requests_per_second'))]
+    for key in ('p50', 'p95', 'p99'):
+        rows.append((f"latency {key}", result['latency'][key], baseline.get('latency', {}).get(key)))
+    rows.append(('peak RSS MB', result['peak_rss_mb'], baseline.get('peak_rss_mb')))
+    for stage, stats in result['stages'].items():
+        rows.append((f"{stage} p95", stats['p95'], baseline.get('stages', {}).get(stage, {}).get('p95')))
+
+    print(f"\nCompared with {(baseline.get('git') or {}).get('commit', 'the baseline')}:")
+    for name, new, old in rows:
+        if new is None or old is None:
+            print(f"  {name:<32} {'-' if old is None else f'{old:.4f}':>10} -> "
+                  f"{'-' if new is None else f'{new:.4f}':>10}")
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+        print(f"  {name:<32} {old:>10.4f} -> {new:>10.4f} ({change})")
+
+
+def print_report(result):
+    """Print the headline numbers and the stage table."""
+    latency = result['latency']
+    print(
+        f"\n{result['completed']} of {result['requests']} requests summarized in {result['duration_seconds']:.1f}s "
+        f"({result['requests_per_second']:.2f} requests/s), peak RSS {result['peak_rss_mb']:.0f} MB"
+    )
+    if latency['count']:
+        print(f"Latency: p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  p99 {latency['p99']:.2f}s")
+    print(f"\n  {'stage':<24} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7} {'RSS MB':>8}")
+    for stage, stats in result['stages'].items():
+        print(
+            f"  {stage:<24} {stats['count']:>6} {stats['p50']:>9.4f} {stats['p95']:>9.4f} {stats['p99']:>9.4f} "
+            f"{stats['errors']:>7} {stats['peak_rss_mb']:>8.0f}"
+        )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark /summary end to end against local fake services")
+    parser.add_argument('--requests', type=int, default=20, help="Measured requests")
+    parser.add_argument('--concurrency', type=int, default=4, help="Requests in flight at once")
+    parser.add_argument('--warmup', type=int, default=2, help="Unmeasured requests sent first")
+    parser.add_argument('--workers', type=int, default=4, help="Job queue workers of the app (JOB_WORKERS)")
+    parser.add_argument('--papers', type=int, default=0,
+                        help="Distinct papers to cycle through; 0 requests a new paper every time")
+    parser.add_argument('--kind', choices=['pdf', 'html', 'mixed'], default='pdf', help="Papers to request")
+    parser.add_argument('--pages', type=int, default=16, help="Pages per paper")
+    parser.add_argument('--figures', type=int, default=4, help="Figures per PDF")
+    parser.add_argument('--figure-kb', type=int, default=200, help="Size of each figure in kilobytes")
+    parser.add_argument('--paper-latency', type=float, default=0.05, help="Seconds before a paper download starts")
+    parser.add_argument('--openai-latency', type=float, default=0.5, help="Seconds to the first OpenAI token")
+    parser.add_argument('--openai-tokens-per-second', type=float, default=80, help="OpenAI generation rate")
+    parser.add_argument('--openai-completion-tokens', type=int, default=600, help="Tokens per OpenAI completion")
+    parser.add_argument('--slack-latency', type=float, default=0.02, help="Seconds per Slack API call")
+    parser.add_argument('--timeout', type=float, default=300, help="Seconds to wait for each request")
+    parser.add_argument('--output', '-o', help="JSON report path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--baseline', help="JSON report of an earlier run to compare with")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Show the app's logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    papers = PaperServer(args.pages, args.figures, args.figure_kb, latency=args.paper_latency).start()
+    openai = FakeOpenAI(args.openai_latency, args.openai_tokens_per_second, args.openai_completion_tokens).start()
+    slack = FakeSlack(latency=args.slack_latency).start()
+    workdir = tempfile.mkdtemp(prefix='paper-summarizer-benchmark-')
+    configure_environment(args, openai, slack, workdir)
+
+    # Imported only now, as the app configures itself from the environment on import
+    import app as slack_app
+    from werkzeug.serving import make_server
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    server = make_server('127.0.0.1', 0, slack_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='benchmark-app', daemon=True).start()
+    recorder = StageRecorder()
+    add_stage_listener(recorder)
+    run = BenchmarkRun(
+        f"http://127.0.0.1:{server.server_port}", slack, papers, recorder, kind=args.kind, timeout=args.timeout
+    )
+
+    try:
+        if args.warmup:
+            print(f"Warming up with {args.warmup} requests...")
+            run.run(args.warmup, args.concurrency, first_number=WARMUP_OFFSET)
+        print(f"Sending {args.requests} requests, {args.concurrency} at a time...")
+        recorder.recording = True
+        results, duration = run.run(args.requests, args.concurrency, papers=args.papers)
+        recorder.recording = False
+    finally:
+        remove_stage_listener(recorder)
+        server.shutdown()
+        slack_app.job_queue.shutdown(timeout=5)
+        for service in (papers, openai, slack):
+            service.stop()
+
+    completed = [result for result in results if result['ok']]
+    result = {
+        'git': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline', 'verbose')},
+        'requests': len(results),
+        'completed': len(completed),
+        'duration_seconds': duration,
+        'requests_per_second': len(completed) / duration if duration else 0.0,
+        'latency': summarize_latencies([result['seconds'] for result in completed]),
+        'ack_latency': summarize_latencies([result['ack_seconds'] for result in results]),
+        'stages': recorder.report(),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'services': {
+            'paper_bytes_sent': papers.bytes_sent,
+            'openai_requests': openai.requests,
+            'openai_prompt_tokens': openai.prompt_tokens,
+            'openai_completion_tokens': openai.generated_tokens,
+            'slack_calls': slack.calls
+        }
+    }
+
+    output = args.output
+    if not output:
+        name = (result['git'] or {}).get('commit') or datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(BENCHMARK_DIR, 'results', f"{name}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+    print_report(result)
+    print(f"\nWrote {output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(result, json.load(f))
+
+    return 0 if len(completed) == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of finding paper links in channel messages.
+
+Every message of a channel is scanned for paper links when it is posted, to
+prefetch the paper, so link extraction runs far more often than extraction
+or summarization. This benchmark generates a corpus of chat messages, some
+with paper links, other links and lookalike hosts, and times
+PaperProcessor.extract_paper_url against the substring matching it replaced.
+
+Usage:
+    python benchmarks/url_scan_benchmark.py --messages 200000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from corpus import WORDS
+from paper_processor import PaperProcessor
+from url_utils import scan_urls, classify_url
+
+# Domains of the substring matching extract_paper_url used before the host lookup
+SUBSTRING_DOMAINS = [
+    'arxiv.org', 'ieee.org', 'acm.org', 'springer.com',
+    'sciencedirect.com', 'nature.com', 'researchgate.net',
+    'ssrn.com', 'biorxiv.org', 'medrxiv.org', 'pnas.org',
+    'acs.org', 'wiley.com', 'tandfonline.com', 'sagepub.com',
+    'oup.com', 'frontiersin.org', 'mdpi.com', 'plos.org',
+    'hindawi.com', 'elsevier.com', 'semanticscholar.org'
+]
+
+LINK_TEMPLATES = (
+    'https://arxiv.org/abs/{year}{month:02d}.{number:05d}',
+    'https://arxiv.org/pdf/{year}{month:02d}.{number:05d}v2.pdf',
+    'https://doi.org/10.1145/{number}.{month}',
+    'https://www.nature.com/articles/s41586-0{month:02d}-{number:05d}-x',
+    'https://dl.acm.org/doi/10.1145/{number}',
+    'https://link.springer.com/article/10.1007/s00{month:02d}-{number}',
+    'https://people.example.edu/~lab/papers/{number}.pdf',
+    'https://github.com/example/project-{number}',
+    'https://www.youtube.com/watch?v=abc{number}',
+    'https://docs.google.com/document/d/{number}/edit',
+    # Lookalike hosts that contain an academic domain without being one
+    'https://notarxiv.org.example.com/abs/{number}',
+    'https://example.com/redirect?to=nature.com/{number}',
+)
+
+
+def make_messages(count, seed=0, link_share=0.3):
+    """
+    Generate chat messages, some of them with links.
+
+    Args:
+        count (int): Number of messages
+        seed (int): Seed of the generator, so every run scans the same corpus
+        link_share (float): Share of messages with links
+
+    Returns:
+        list: Message texts
+    """
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 40))]
+        if rng.random() < link_share:
+            for _ in range(rng.randint(1, 3)):
+                link = rng.choice(LINK_TEMPLATES).format(
+                    year=rng.randint(15, 25), month=rng.randint(1, 12), number=rng.randint(1000, 99999)
+                )
+                if rng.random() < 0.5:
+                    # Slack sends links as <url> or <url|label>
+                    link = f"<{link}|{rng.choice(WORDS)}>" if rng.random() < 0.5 else f"<{link}>"
+                words.insert(rng.randint(0, len(words)), link)
+        messages.append(' '.join(words))
+    return messages
+
+
+def substring_extract_paper_url(text):
+    """The link extraction replaced by the host lookup: an uncompiled regex and substring matching."""
+    if not text:
+        return None
+    url_pattern = r'https?://[^\s<>"]+|www\.[^\s<>"]+'
+    urls = re.findall(url_pattern, text)
+    for url in urls:
+        if any(domain in url.lower() for domain in SUBSTRING_DOMAINS):
+            return url
+    return urls[0] if urls else None
+
+
+def time_function(function, messages, repeat):
+    """Return the best time in seconds of running a function over every message."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            function(message)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def classify_all(message):
+    """Find and classify every link of a message."""
+    return [classify_url(url) for url in scan_urls(message)]
+
+
+def measure(messages, repeat=3):
+    """
+    Time link extraction over a corpus.
+
+    Args:
+        messages (list): Message texts
+        repeat (int): Runs of each function; the fastest counts
+
+    Returns:
+        dict: Seconds per implementation, and the messages whose first paper link differs
+    """
+    processor = PaperProcessor()
+    seconds = {
+        'substring': time_function(substring_extract_paper_url, messages, repeat),
+        'host_lookup': time_function(processor.extract_paper_url, messages, repeat),
+        'classify_all_links': time_function(classify_all, messages, repeat),
+    }
+    differences = [
+        (message, substring_extract_paper_url(message), processor.extract_paper_url(message))
+        for message in messages
+        if substring_extract_paper_url(message) != processor.extract_paper_url(message)
+    ]
+    return {'seconds': seconds, 'differences': differences}
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark finding paper links in channel messages")
+    parser.add_argument('--messages', type=int, default=100000, help="Messages in the corpus")
+    parser.add_argument('--link-share', type=float, default=0.3, help="Share of messages with links")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs of each implementation; the fastest counts")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the corpus")
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.seed, args.link_share)
+    result = measure(messages, args.repeat)
+
+    print(f"{len(messages)} messages, {sum(len(m) for m in messages) / 1e6:.1f} MB of text")
+    print(f"{'implementation':<20} {'total':>10} {'per message':>14} {'messages/s':>12}")
+    for name, seconds in result['seconds'].items():
+        print(f"{name:<20} {seconds:>9.3f}s {seconds / len(messages) * 1e6:>12.2f}us "
+              f"{len(messages) / seconds:>12.0f}")
+    speedup = result['seconds']['substring'] / result['seconds']['host_lookup']
+    print(f"\nhost_lookup is {speedup:.2f}x the speed of substring")
+
+    # Differences are lookalike hosts the substring matching took for papers, and cleaned-up Slack markup
+    differences = result['differences']
+    print(f"{len(differences)} messages get a different link, e.g.:")
+    for _, old, new in differences[:5]:
+        print(f"  {old} -> {new}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
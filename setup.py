@@ -16,6 +16,9 @@ setup(
         "requests>=2.31.0",
         "beautifulsoup4>=4.12.2",
         "PyPDF2>=3.0.1",
+        "httpx>=0.24,<0.28",
+        "aiohttp>=3.8",
+        "uvicorn>=0.22",
     ],
     author="Your Name",
     author_email="your.email@example.com",
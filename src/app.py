@@ -5,15 +5,18 @@ This file handles the Slack slash command and coordinates the paper processing a
 """
 
 import os
+import atexit
 import logging
-from flask import Flask, request, jsonify
-from dotenv import load_dotenv
-from slack_client import SlackClient
-from paper_processor import PaperProcessor
-from summarizer import Summarizer
-
-# Load environment variables
-load_dotenv()
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, Response, request, jsonify
+from components import slack_client, slack_dispatcher, paper_processor, paper_prefetcher, summarizer
+from job_queue import JobQueue, InMemoryBackend, SQLiteBackend, QueueFullError
+from single_flight import SingleFlight
+from message_updater import ThrottledMessageUpdater
+from rate_limiter import current_requester
+from url_utils import normalize_url
+from metrics import REGISTRY, CONTENT_TYPE, QUEUE_DEPTH, trace_request
 
 # Configure logging
 logging.basicConfig(
@@ -25,13 +28,33 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 
-# Initialize components
-slack_client = SlackClient(
-    token=os.environ.get('SLACK_BOT_TOKEN'),
-    signing_secret=os.environ.get('SLACK_SIGNING_SECRET')
-)
-paper_processor = PaperProcessor()
-summarizer = Summarizer(api_key=os.environ.get('OPENAI_API_KEY'))
+# Initialize the background job queue
+job_queue_size = int(os.environ.get('JOB_QUEUE_MAX_SIZE', 100))
+if os.environ.get('JOB_QUEUE_BACKEND', 'memory') == 'sqlite':
+    job_backend = SQLiteBackend(
+        path=os.environ.get('JOB_QUEUE_PATH', 'jobs.sqlite3'),
+        max_size=job_queue_size,
+        failed_retention_seconds=float(os.environ.get('JOB_FAILED_RETENTION_HOURS', 168)) * 3600
+    )
+else:
+    job_backend = InMemoryBackend(max_size=job_queue_size)
+job_queue = JobQueue(job_backend, workers=int(os.environ.get('JOB_WORKERS', 4)))
+
+# Concurrent requests for the same paper share one extraction and summary
+summary_flight = SingleFlight()
+
+# Minimum seconds between two edits of a streamed summary message
+SLACK_UPDATE_INTERVAL = float(os.environ.get('SLACK_UPDATE_INTERVAL', 1.5))
+
+# Papers summarized by "/summary all", and how many of them at once
+SUMMARY_ALL_MAX_PAPERS = int(os.environ.get('SUMMARY_ALL_MAX_PAPERS', 5))
+SUMMARY_ALL_CONCURRENCY = int(os.environ.get('SUMMARY_ALL_CONCURRENCY', 3))
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Export pipeline metrics for Prometheus."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 @app.route('/slack/events', methods=['POST'])
@@ -56,6 +79,8 @@ def summary_command():
     channel_id = request.form.get('channel_id')
     thread_ts = request.form.get('thread_ts')
     user_id = request.form.get('user_id')
+    # "/summary all" summarizes every paper linked in the parent message
+    all_papers = (request.form.get('text') or '').strip().lower() == 'all'
     
     # If not in a thread, inform the user
     if not thread_ts:
@@ -65,7 +90,16 @@ def summary_command():
         })
     
     # Process the request asynchronously
-    process_summary_request(channel_id, thread_ts, user_id)
+    try:
+        job_queue.enqueue(
+            'summary', channel_id=channel_id, thread_ts=thread_ts, user_id=user_id, all_papers=all_papers
+        )
+    except QueueFullError:
+        logger.warning("Job queue is full, rejecting summary request")
+        return jsonify({
+            "response_type": "ephemeral",
+            "text": "I'm working on too many summaries right now. Please try again in a few minutes."
+        })
     
     return jsonify({
         "response_type": "ephemeral",
@@ -73,58 +107,160 @@ def summary_command():
     })
 
 
-def process_summary_request(channel_id, thread_ts, user_id):
+def process_summary_request(channel_id, thread_ts, user_id, all_papers=False):
     """Process a summary request asynchronously."""
-    try:
-        # Get the parent message
-        parent_message = slack_client.get_parent_message(channel_id, thread_ts)
-        
-        # Extract paper URL from parent message
-        paper_url = paper_processor.extract_paper_url(parent_message.get('text', ''))
-        
-        if not paper_url:
-            slack_client.post_message(
-                channel=channel_id,
-                thread_ts=thread_ts,
-                text=f"<@{user_id}> I couldn't find a paper link in the parent message. Please make sure the parent message contains a valid academic paper URL."
+    updater = None
+    # OpenAI calls are queued fairly across channels and users
+    current_requester.set((channel_id, user_id))
+    with trace_request('summary_request', channel=channel_id, user=user_id):
+        try:
+            # Get the parent message
+            parent_message = slack_dispatcher.get_parent_message(channel_id, thread_ts)
+            
+            # Extract paper URLs from parent message
+            if all_papers:
+                paper_urls = paper_processor.extract_paper_urls(parent_message.get('text', ''))[:SUMMARY_ALL_MAX_PAPERS]
+            else:
+                paper_url = paper_processor.extract_paper_url(parent_message.get('text', ''))
+                paper_urls = [paper_url] if paper_url else []
+            
+            if not paper_urls:
+                slack_dispatcher.post_status(
+                    channel_id, thread_ts, key=user_id,
+                    text=f"<@{user_id}> I couldn't find a paper link in the parent message. Please make sure the parent message contains a valid academic paper URL."
+                )
+                return
+            
+            if len(paper_urls) > 1:
+                status_ts = slack_dispatcher.post_status(
+                    channel_id, thread_ts, key=user_id,
+                    text=f"<@{user_id}> I'm analyzing the {len(paper_urls)} papers linked in the parent message. This may take a few minutes..."
+                )
+                updater = ThrottledMessageUpdater(slack_dispatcher, channel_id, status_ts, min_interval=SLACK_UPDATE_INTERVAL)
+                digest = summarize_papers(
+                    paper_urls,
+                    on_progress=lambda done: updater.update(
+                        f"<@{user_id}> I've summarized {done} of the {len(paper_urls)} papers linked in the parent message..."
+                    )
+                )
+                
+                if not digest:
+                    updater.cancel()
+                    slack_dispatcher.post_status(
+                        channel_id, thread_ts, key=user_id,
+                        text=f"<@{user_id}> I had trouble extracting content from the papers linked in the parent message. Please ensure they are valid and accessible academic papers."
+                    )
+                    return
+                
+                text = f"<@{user_id}> Here's a digest of the papers:\n\n" + digest
+                if not updater.finish(text):
+                    # The status message could not be edited, so the digest is posted as a new message
+                    slack_dispatcher.post_message(channel_id, text, thread_ts=thread_ts)
+                return
+            
+            paper_url = paper_urls[0]
+            
+            # Post initial status message, which is then edited as the summary streams in
+            status_ts = slack_dispatcher.post_status(
+                channel_id, thread_ts, key=user_id,
+                text=f"<@{user_id}> I'm analyzing the paper at {paper_url}. This may take a few minutes..."
             )
-            return
-        
-        # Post initial status message
-        slack_client.post_message(
-            channel=channel_id,
-            thread_ts=thread_ts,
-            text=f"<@{user_id}> I'm analyzing the paper at {paper_url}. This may take a few minutes..."
-        )
-        
-        # Extract paper content
-        paper_content = paper_processor.extract_paper_content(paper_url)
-        
-        if not paper_content:
-            slack_client.post_message(
-                channel=channel_id,
-                thread_ts=thread_ts,
-                text=f"<@{user_id}> I had trouble extracting content from {paper_url}. Please ensure it's a valid and accessible academic paper."
+            updater = ThrottledMessageUpdater(slack_dispatcher, channel_id, status_ts, min_interval=SLACK_UPDATE_INTERVAL)
+            header = f"<@{user_id}> Here's the summary of the paper:\n\n"
+            
+            # Summarize the paper, sharing the work with concurrent requests for it
+            summary = summary_flight.do(
+                normalize_url(paper_url), summarize_paper, paper_url,
+                on_progress=lambda text: updater.update(header + text)
             )
-            return
-        
-        # Generate summary
-        summary = summarizer.generate_summary(paper_content)
+            
+            if not summary:
+                updater.cancel()
+                slack_dispatcher.post_status(
+                    channel_id, thread_ts, key=user_id,
+                    text=f"<@{user_id}> I had trouble extracting content from {paper_url}. Please ensure it's a valid and accessible academic paper."
+                )
+                return
+            
+            # Replace the streamed text with the final summary
+            if not updater.finish(header + summary):
+                # The status message could not be edited, so the summary is posted as a new message
+                slack_dispatcher.post_message(channel_id, header + summary, thread_ts=thread_ts)
         
-        # Post summary to thread
-        slack_client.post_message(
-            channel=channel_id,
-            thread_ts=thread_ts,
-            text=f"<@{user_id}> Here's the summary of the paper:\n\n{summary}"
-        )
+        except Exception as e:
+            logger.error(f"Error processing summary request: {str(e)}", exc_info=True)
+            if updater:
+                updater.cancel()
+            slack_dispatcher.post_status(
+                channel_id, thread_ts, key=user_id,
+                text=f"<@{user_id}> I encountered an error while processing your request: {str(e)}"
+            )
+        finally:
+            slack_dispatcher.end_status(channel_id, thread_ts, key=user_id)
+
+
+def summarize_paper(paper_url, on_progress=None):
+    """
+    Extract and summarize a paper.
+    
+    Args:
+        paper_url (str): URL of the paper
+        on_progress (callable, optional): Called with the partial summary as it streams in
         
-    except Exception as e:
-        logger.error(f"Error processing summary request: {str(e)}", exc_info=True)
-        slack_client.post_message(
-            channel=channel_id,
-            thread_ts=thread_ts,
-            text=f"<@{user_id}> I encountered an error while processing your request: {str(e)}"
-        )
+    Returns:
+        str: Generated summary, or None if the paper could not be extracted
+    """
+    # Joins or reuses a prefetch of the paper, if one was made
+    paper_content = paper_prefetcher.extract_paper_content(paper_url)
+    if not paper_content:
+        return None
+    
+    return summarizer.generate_summary(paper_content, on_progress=on_progress)
+
+
+def summarize_papers(paper_urls, on_progress=None):
+    """
+    Extract and summarize several papers concurrently and combine them into a digest.
+    
+    At most SUMMARY_ALL_CONCURRENCY papers are processed at once. Each paper
+    shares its work with concurrent requests for it, as single summaries do.
+    
+    Args:
+        paper_urls (list): URLs of the papers
+        on_progress (callable, optional): Called with the number of papers done so far
+    
+    Returns:
+        str: Digest with a comparison of the papers and their summaries, or None if no paper could be extracted
+    """
+    summaries = [None] * len(paper_urls)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(SUMMARY_ALL_CONCURRENCY, len(paper_urls))), thread_name_prefix="summary-all"
+    ) as executor:
+        # Copy the context so the rate limiter knows who the calls are for
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run, summary_flight.do, normalize_url(url), summarize_paper, url
+            ): index
+            for index, url in enumerate(paper_urls)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                summaries[futures[future]] = future.result()
+            except Exception as e:
+                logger.error(f"Error summarizing {paper_urls[futures[future]]}: {str(e)}", exc_info=True)
+            if on_progress:
+                on_progress(done)
+    
+    failed = [url for url, summary in zip(paper_urls, summaries) if not summary]
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        return None
+    
+    comparison = summarizer.generate_comparison(summaries) if len(summaries) > 1 else None
+    digest = summarizer.combine_digest(summaries, comparison)
+    if failed:
+        digest += "\n\nI had trouble extracting content from " + ", ".join(failed) + "."
+    return digest
 
 
 def handle_slack_event(event_data):
@@ -135,11 +271,38 @@ def handle_slack_event(event_data):
     if event_type == 'url_verification':
         return jsonify({"challenge": event_data.get('challenge')})
     
+    if event_type == 'event_callback':
+        # Remember new and edited messages, so /summary in their threads needs no lookup
+        slack_dispatcher.message_cache.observe_event(event_data.get('event') or {})
+        # Start extracting papers linked in new posts, so /summary finds them ready
+        paper_prefetcher.observe_event(event_data.get('event') or {})
+    
     # Add more event handling as needed
     
     return jsonify({"status": "ok"})
 
 
+def queue_depths():
+    """Collect the work waiting in this process for /metrics."""
+    depths = {
+        ('summary_jobs',): job_queue.depth(),
+        ('prefetch',): paper_prefetcher.stats()['pending'],
+    }
+    if summarizer.rate_limiter:
+        depths[('openai_rate_limit',)] = summarizer.rate_limiter.stats()['waiting']
+    return depths
+
+
+QUEUE_DEPTH.set_function(queue_depths)
+
+# Start the background workers
+job_queue.register('summary', process_summary_request)
+job_queue.start()
+atexit.register(paper_prefetcher.shutdown)
+atexit.register(job_queue.shutdown, timeout=float(os.environ.get('JOB_DRAIN_TIMEOUT', 30)))
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 3000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # The reloader runs the app in a child process, which would start a second worker pool
+    app.run(host='0.0.0.0', port=port, debug=True, use_reloader=False)
@@ -0,0 +1,434 @@
+"""
+arXiv fetcher module for reading papers from the arXiv metadata API and LaTeX sources.
+"""
+
+import io
+import re
+import gzip
+import asyncio
+import hashlib
+import logging
+import tarfile
+import posixpath
+import xml.etree.ElementTree as ElementTree
+from http_transport import get_default_transport
+from section_parser import parse_sections
+from metrics import span, DOWNLOADED_BYTES
+
+logger = logging.getLogger(__name__)
+
+ATOM_NAMESPACE = {'atom': 'http://www.w3.org/2005/Atom'}
+
+# Versioned identifier at the end of an entry ID such as http://arxiv.org/abs/1706.03762v7
+ENTRY_ID_PATTERN = re.compile(r'/abs/(.+v\d+)$')
+
+# Largest LaTeX source, unpacked, read from a source archive
+MAX_SOURCE_TEXT_BYTES = 20 * 1024 * 1024
+
+# Environments left out of the text: floats, math and code
+SKIPPED_ENVIRONMENTS = (
+    'figure', 'figure*', 'table', 'table*', 'equation', 'equation*', 'align', 'align*', 'eqnarray',
+    'eqnarray*', 'gather', 'gather*', 'multline', 'multline*', 'displaymath', 'tikzpicture', 'algorithm',
+    'algorithmic', 'lstlisting', 'verbatim', 'comment', 'tabular', 'wrapfigure'
+)
+
+# Commands dropped together with their argument
+DROPPED_COMMANDS = (
+    'label', 'ref', 'eqref', 'autoref', 'cref', 'Cref', 'cite', 'citep', 'citet', 'citealp', 'citeauthor',
+    'citeyear', 'nocite', 'includegraphics', 'vspace', 'hspace', 'bibliographystyle', 'thanks', 'footnotemark',
+    'newcommand', 'renewcommand', 'def', 'usepackage', 'input', 'include', 'affiliation', 'author', 'email',
+    'institute', 'address', 'keywords', 'date'
+)
+
+SECTION_PATTERN = re.compile(r'\\(section|subsection|subsubsection|paragraph)\*?(?:\[[^\]]*\])?\{')
+
+COMMAND_PATTERN = re.compile(r'\\([A-Za-z]+)\*?(?:\[[^\]]*\])?')
+
+
+def _braced(text, start):
+    """
+    Return the content of the braces opening at text[start] and the index after them.
+
+    Returns:
+        tuple: (content, end), or (None, start) if no balanced group starts there
+    """
+    if start >= len(text) or text[start] != '{':
+        return None, start
+    depth = 0
+    index = start
+    while index < len(text):
+        char = text[index]
+        if char == '\\':
+            # Skip escaped characters such as \{
+            index += 2
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:index], index + 1
+        index += 1
+    return None, start
+
+
+def _command_argument(latex, name):
+    """Return the first argument of the first use of a command, or None."""
+    match = re.search(r'\\' + name + r'\*?(?:\[[^\]]*\])?\s*\{', latex)
+    if match is None:
+        return None
+    content, _ = _braced(latex, match.end() - 1)
+    return content
+
+
+def parse_atom_entry(atom):
+    """
+    Read the metadata of a paper from an arXiv API response.
+
+    Args:
+        atom (str): Atom feed returned by the query API for one id_list entry
+
+    Returns:
+        dict: Versioned ID, title, abstract and authors, or None if the feed has no paper
+    """
+    try:
+        root = ElementTree.fromstring(atom)
+    except ElementTree.ParseError as e:
+        logger.error(f"Could not parse arXiv API response: {str(e)}")
+        return None
+
+    entry = root.find('atom:entry', ATOM_NAMESPACE)
+    if entry is None:
+        return None
+    match = ENTRY_ID_PATTERN.search(entry.findtext('atom:id', '', ATOM_NAMESPACE).strip())
+    if match is None:
+        # Unknown identifiers come back as an entry titled "Error"
+        return None
+
+    def text(tag):
+        return ' '.join(entry.findtext(tag, '', ATOM_NAMESPACE).split())
+
+    return {
+        'id': match.group(1),
+        'title': text('atom:title'),
+        'abstract': text('atom:summary'),
+        'authors': [
+            ' '.join(author.findtext('atom:name', '', ATOM_NAMESPACE).split())
+            for author in entry.findall('atom:author', ATOM_NAMESPACE)
+        ]
+    }
+
+
+def read_source_archive(data):
+    """
+    Assemble the LaTeX of a paper from an arXiv source download.
+
+    Sources are a gzipped tar of the submission, a single gzipped .tex
+    file, or a PDF for papers submitted without source. In a tar, the main
+    file is the one with \\documentclass, and \\input, \\include and
+    \\bibliography are replaced by the files they name.
+
+    Args:
+        data (bytes): Source download
+
+    Returns:
+        str: LaTeX document, or None if the source is not LaTeX
+    """
+    if data.startswith(b'%PDF'):
+        return None
+
+    try:
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:*') as archive:
+            files = {}
+            total = 0
+            for member in archive.getmembers():
+                if not member.isfile() or not member.name.lower().endswith(('.tex', '.bbl')):
+                    continue
+                total += member.size
+                if total > MAX_SOURCE_TEXT_BYTES:
+                    logger.warning("LaTeX source is too large, reading only part of it")
+                    break
+                files[posixpath.normpath(member.name)] = archive.extractfile(member).read().decode(
+                    'utf-8', errors='replace'
+                )
+            return _assemble(files)
+    except tarfile.TarError:
+        pass
+
+    try:
+        with gzip.GzipFile(fileobj=io.BytesIO(data)) as f:
+            data = f.read(MAX_SOURCE_TEXT_BYTES)
+    except OSError:
+        pass
+    if data.startswith(b'%PDF'):
+        return None
+    latex = data.decode('utf-8', errors='replace')
+    return latex if '\\begin{document}' in latex or '\\section' in latex else None
+
+
+def _assemble(files):
+    """Find the main .tex file of a submission and inline the files it includes."""
+    candidates = [name for name, text in files.items() if name.endswith('.tex') and '\\documentclass' in text]
+    if not candidates:
+        return None
+    # Prefer a complete document, then the largest one
+    main = max(candidates, key=lambda name: ('\\begin{document}' in files[name], len(files[name])))
+    bbl = next((text for name, text in files.items() if name.endswith('.bbl')), '')
+
+    def resolve(text, depth):
+        text = _strip_comments(text)
+        if depth > 5:
+            return text
+
+        def include(match):
+            name = posixpath.normpath(match.group(2).strip())
+            for candidate in (name, name + '.tex'):
+                if candidate in files:
+                    return resolve(files[candidate], depth + 1)
+            return ''
+
+        text = re.sub(r'\\(input|include)\s*\{([^}]*)\}', include, text)
+        return re.sub(r'\\bibliography\s*\{[^}]*\}', lambda _: bbl, text)
+
+    return resolve(files[main], 0)
+
+
+def _strip_comments(latex):
+    """Remove LaTeX comments."""
+    return re.sub(r'(?<!\\)%.*', '', latex)
+
+
+def latex_to_text(latex):
+    """
+    Convert a LaTeX paper to plain text with one line per section heading.
+
+    Sections are numbered ("1 Introduction", "1.2 Setup") so the section
+    parser finds them, the abstract gets an "Abstract" heading and the
+    bibliography a "References" one. Floats, display math and code are left
+    out, and formatting commands are reduced to their text.
+
+    Args:
+        latex (str): LaTeX document
+
+    Returns:
+        str: Plain text of the paper
+    """
+    latex = _strip_comments(latex)
+    title = _command_argument(latex, 'title')
+    begin = latex.find('\\begin{document}')
+    if begin != -1:
+        latex = latex[begin + len('\\begin{document}'):]
+    end = latex.find('\\end{document}')
+    if end != -1:
+        latex = latex[:end]
+
+    for environment in SKIPPED_ENVIRONMENTS:
+        name = re.escape(environment)
+        latex = re.sub(r'\\begin\{' + name + r'\}.*?\\end\{' + name + r'\}', '\n', latex, flags=re.DOTALL)
+    latex = re.sub(r'\\\[.*?\\\]|\$\$.*?\$\$', ' ', latex, flags=re.DOTALL)
+    latex = re.sub(r'\\begin\{abstract\}', '\n\n\x00Abstract\n', latex)
+    latex = re.sub(r'\\begin\{thebibliography\}(?:\{[^}]*\})?', '\n\n\x00References\n', latex)
+    latex = re.sub(r'\\bibitem(?:\[[^\]]*\])?\{[^}]*\}', '\n', latex)
+    latex = re.sub(r'\\appendix(?![A-Za-z])', '\n\n\x00Appendix\n', latex)
+
+    latex = _number_sections(latex)
+
+    for command in DROPPED_COMMANDS:
+        latex = re.sub(r'\\' + command + r'(?![A-Za-z])\*?(?:\[[^\]]*\])?(?:\{[^{}]*\})*', '', latex)
+    latex = re.sub(r'\\href\{[^}]*\}', '', latex)
+    latex = re.sub(r'\\(?:begin|end)\{[^}]*\}', '\n', latex)
+    latex = latex.replace('\\\\', '\n').replace('~', ' ')
+    latex = re.sub(r'\\([%&#_$])', r'\1', latex)
+    latex = COMMAND_PATTERN.sub('', latex)
+    latex = re.sub(r'[{}$]', '', latex)
+
+    paragraphs = []
+    for block in re.split(r'\n\s*\n', latex):
+        lines = [line.strip() for line in block.splitlines() if line.strip()]
+        if not lines:
+            continue
+        # Heading lines stay on their own line, the rest of a block is one paragraph
+        if lines[0].startswith('\x00'):
+            paragraphs.append(lines[0][1:])
+            lines = lines[1:]
+        if lines:
+            # Dropped citations and references leave runs of spaces behind
+            paragraphs.append(' '.join(' '.join(lines).split()))
+
+    text = '\n\n'.join(paragraphs)
+    if title:
+        text = ' '.join(_inline_text(title).split()) + '\n\n' + text
+    return text
+
+
+def _inline_text(latex):
+    """Reduce a short LaTeX fragment, such as a title, to its text."""
+    latex = COMMAND_PATTERN.sub('', latex.replace('\\\\', ' ').replace('~', ' '))
+    return re.sub(r'[{}$]', '', latex)
+
+
+def _number_sections(latex):
+    """Replace sectioning commands with numbered heading lines, marked with a NUL character."""
+    counters = [0, 0, 0]
+    levels = {'section': 0, 'subsection': 1, 'subsubsection': 2}
+    parts = []
+    position = 0
+    for match in SECTION_PATTERN.finditer(latex):
+        if match.start() < position:
+            continue
+        heading, end = _braced(latex, match.end() - 1)
+        if heading is None:
+            continue
+        heading = ' '.join(_inline_text(heading).split())
+        level = levels.get(match.group(1))
+        if level is None:
+            # \paragraph headings run into their text
+            parts.append(latex[position:match.start()] + heading + '. ')
+        else:
+            counters[level] += 1
+            counters[level + 1:] = [0] * (len(counters) - level - 1)
+            number = '.'.join(str(counter) for counter in counters[:level + 1])
+            parts.append(latex[position:match.start()] + f"\n\n\x00{number} {heading}\n")
+        position = end
+    parts.append(latex[position:])
+    return ''.join(parts)
+
+
+class ArxivFetcher:
+    """
+    Fetches arXiv papers through the metadata API and the LaTeX source.
+
+    The title and abstract come from the Atom query API, which also resolves
+    an unversioned identifier to the latest version. The text comes from the
+    LaTeX source of that version, which is smaller than the PDF and gives
+    the sections directly; callers fall back to the PDF when there is no
+    usable source.
+    """
+
+    def __init__(self, transport=None, async_transport=None, api_url='https://export.arxiv.org/api/query',
+                 base_url='https://arxiv.org', prefer_source=True, max_source_bytes=50 * 1024 * 1024):
+        """
+        Initialize the fetcher.
+
+        Args:
+            transport (HttpTransport, optional): HTTP transport, the shared one by default
+            async_transport (AsyncHttpTransport, optional): HTTP transport of the async methods
+            api_url (str): URL of the arXiv query API
+            base_url (str): Base URL of the abstract, PDF and source pages
+            prefer_source (bool): Read the LaTeX source before trying the PDF
+            max_source_bytes (int): Largest source archive that will be downloaded
+        """
+        self.transport = transport or get_default_transport()
+        self.async_transport = async_transport
+        self.api_url = api_url
+        self.base_url = base_url.rstrip('/')
+        self.prefer_source = prefer_source
+        self.max_source_bytes = max_source_bytes
+
+    def pdf_url(self, arxiv_id):
+        """Return the PDF URL of a paper."""
+        return f"{self.base_url}/pdf/{arxiv_id}"
+
+    def source_url(self, arxiv_id):
+        """Return the source archive URL of a paper."""
+        return f"{self.base_url}/e-print/{arxiv_id}"
+
+    def fetch_metadata(self, arxiv_id):
+        """
+        Fetch the title, abstract and latest version of a paper.
+
+        Args:
+            arxiv_id (str): Identifier, with or without a version
+
+        Returns:
+            dict: Metadata from parse_atom_entry(), or None if it could not be fetched
+        """
+        try:
+            with span('arxiv_metadata', arxiv_id=arxiv_id):
+                response = self.transport.get(self.api_url, params={'id_list': arxiv_id, 'max_results': 1})
+                response.raise_for_status()
+                return parse_atom_entry(response.text)
+        except Exception as e:
+            logger.warning(f"Could not fetch arXiv metadata of {arxiv_id}: {str(e)}")
+            return None
+
+    async def afetch_metadata(self, arxiv_id):
+        """Fetch the metadata of a paper through the async transport."""
+        try:
+            with span('arxiv_metadata', arxiv_id=arxiv_id):
+                response = await self.async_transport.get(
+                    self.api_url, params={'id_list': arxiv_id, 'max_results': 1}
+                )
+                response.raise_for_status()
+                return parse_atom_entry(response.text)
+        except Exception as e:
+            logger.warning(f"Could not fetch arXiv metadata of {arxiv_id}: {str(e)}")
+            return None
+
+    def fetch_source(self, arxiv_id):
+        """
+        Extract a paper from its LaTeX source.
+
+        Args:
+            arxiv_id (str): Versioned identifier
+
+        Returns:
+            dict: Paper content, or None if the paper has no usable LaTeX source
+        """
+        url = self.source_url(arxiv_id)
+        try:
+            with span('download', url=url):
+                with self.transport.get(url, stream=True) as response:
+                    response.raise_for_status()
+                    self._check_size(url, int(response.headers.get('Content-Length') or 0))
+                    data = bytearray()
+                    for chunk in self.transport.iter_content(response):
+                        data += chunk
+                        self._check_size(url, len(data))
+            DOWNLOADED_BYTES.inc(len(data), kind='latex')
+            return self._parse_source(bytes(data), url)
+        except Exception as e:
+            logger.warning(f"Could not use the LaTeX source of {arxiv_id}: {str(e)}")
+            return None
+
+    async def afetch_source(self, arxiv_id):
+        """Extract a paper from its LaTeX source through the async transport."""
+        url = self.source_url(arxiv_id)
+        try:
+            with span('download', url=url):
+                async with self.async_transport.stream('GET', url) as response:
+                    response.raise_for_status()
+                    self._check_size(url, int(response.headers.get('Content-Length') or 0))
+                    data = bytearray()
+                    async for chunk in self.async_transport.aiter_bytes(response):
+                        data += chunk
+                        self._check_size(url, len(data))
+            DOWNLOADED_BYTES.inc(len(data), kind='latex')
+            return await asyncio.to_thread(self._parse_source, bytes(data), url)
+        except Exception as e:
+            logger.warning(f"Could not use the LaTeX source of {arxiv_id}: {str(e)}")
+            return None
+
+    def _check_size(self, url, size):
+        """Refuse a source download larger than max_source_bytes."""
+        if size > self.max_source_bytes:
+            raise ValueError(f"{url} is larger than the {self.max_source_bytes} byte limit")
+
+    def _parse_source(self, data, url):
+        """Turn a source download into paper content, or None if it is not LaTeX."""
+        with span('parse', url=url):
+            latex = read_source_archive(data)
+            if latex is None:
+                logger.info(f"No LaTeX source at {url}")
+                return None
+            text = latex_to_text(latex)
+            title, abstract, sections = parse_sections(text)
+
+        return {
+            'title': title,
+            'abstract': abstract,
+            'full_text': text,
+            'sections': [section.to_dict() for section in sections],
+            'source_url': url,
+            'content_hash': hashlib.sha256(data).hexdigest()
+        }
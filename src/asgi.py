@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+ASGI application for the Paper Summarizer Slack Bot.
+This file serves the same Slack endpoints as app.py on an asyncio event loop, so
+a single process can hold many summaries waiting on network I/O at once.
+
+Run it with an ASGI server, e.g. `uvicorn asgi:app --app-dir src`.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from urllib.parse import parse_qs
+from single_flight import AsyncSingleFlight
+from message_updater import AsyncThrottledMessageUpdater
+from rate_limiter import current_requester
+from slack_dispatcher import SlackDispatcher
+from prefetcher import AsyncPaperPrefetcher
+from url_utils import normalize_url
+from metrics import REGISTRY, CONTENT_TYPE, QUEUE_DEPTH, trace_request
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class AsgiRequest:
+    """Minimal request wrapper exposing what SlackClient.verify_signature needs."""
+
+    def __init__(self, scope, body):
+        """
+        Initialize the request.
+
+        Args:
+            scope (dict): ASGI connection scope
+            body (bytes): Request body
+        """
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {
+            name.decode('latin-1').title(): value.decode('latin-1')
+            for name, value in scope.get('headers', [])
+        }
+        self.body = body
+
+    def get_data(self):
+        """Return the raw request body."""
+        return self.body
+
+    @property
+    def form(self):
+        """Return the URL-encoded form fields of the body."""
+        fields = parse_qs(self.body.decode('utf-8'), keep_blank_values=True)
+        return {name: values[0] for name, values in fields.items()}
+
+    @property
+    def json(self):
+        """Return the JSON body."""
+        return json.loads(self.body or b'{}')
+
+
+class SlackAsgiApp:
+    """
+    ASGI application handling Slack events and the /summary slash command.
+
+    Each accepted command runs as a task on the event loop. Extraction,
+    summarization and Slack calls are awaited, so waiting on I/O costs a
+    coroutine rather than a thread.
+    """
+
+    def __init__(self, slack_client, paper_processor, summarizer, max_in_flight=200, update_interval=1.5,
+                 dispatcher=None, prefetcher=None, max_papers=5, paper_concurrency=3):
+        """
+        Initialize the application.
+
+        Args:
+            slack_client (SlackClient): Slack client
+            paper_processor (PaperProcessor): Paper processor
+            summarizer (Summarizer): Summarizer
+            max_in_flight (int): Maximum number of summary requests processed at once
+            update_interval (float): Minimum seconds between two edits of a streamed summary
+            dispatcher (SlackDispatcher, optional): Sends messages within Slack's rate limits
+            prefetcher (AsyncPaperPrefetcher, optional): Extracts papers linked in new posts,
+                by default in no channel
+            max_papers (int): Papers summarized by "/summary all"
+            paper_concurrency (int): Papers of one "/summary all" request processed at once
+        """
+        self.slack_client = slack_client
+        self.dispatcher = dispatcher or SlackDispatcher(slack_client)
+        self.paper_processor = paper_processor
+        self.prefetcher = prefetcher or AsyncPaperPrefetcher(paper_processor, channels=set())
+        self.summarizer = summarizer
+        self.max_in_flight = max_in_flight
+        self.update_interval = update_interval
+        self.max_papers = max_papers
+        self.paper_concurrency = paper_concurrency
+        self.tasks = set()
+        # Concurrent requests for the same paper share one extraction and summary
+        self.summary_flight = AsyncSingleFlight()
+        self.routes = {
+            '/slack/events': self.slack_events,
+            '/slack/commands/summary': self.summary_command,
+        }
+
+    async def __call__(self, scope, receive, send):
+        """Dispatch an ASGI connection."""
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        if scope['path'] == '/metrics' and scope['method'] == 'GET':
+            await self.send_body(send, REGISTRY.render().encode('utf-8'), CONTENT_TYPE)
+            return
+
+        handler = self.routes.get(scope['path'])
+        if handler is None:
+            await self.send_json(send, {"error": "Not found"}, status=404)
+            return
+        if scope['method'] != 'POST':
+            await self.send_json(send, {"error": "Method not allowed"}, status=405)
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        status, payload = await handler(AsgiRequest(scope, body))
+        await self.send_json(send, payload, status=status)
+
+    async def lifespan(self, receive, send):
+        """Handle server startup and shutdown, draining in-flight summaries on shutdown."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.prefetcher.aclose()
+                await self.drain(timeout=float(os.environ.get('JOB_DRAIN_TIMEOUT', 30)))
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def drain(self, timeout=None):
+        """
+        Wait for in-flight summary requests to finish.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait before cancelling them
+        """
+        if not self.tasks:
+            return
+        logger.info(f"Waiting for {len(self.tasks)} in-flight summary requests")
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Cancelled {len(pending)} summary requests still running at shutdown")
+
+    async def send_json(self, send, payload, status=200):
+        """Send a JSON response."""
+        await self.send_body(send, json.dumps(payload).encode('utf-8'), 'application/json', status=status)
+
+    async def send_body(self, send, body, content_type, status=200):
+        """Send a response with the given body."""
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', content_type.encode('latin-1')),
+                (b'content-length', str(len(body)).encode('latin-1')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def slack_events(self, request):
+        """Handle Slack events and verify request signatures."""
+        if not self.slack_client.verify_signature(request):
+            return 403, {"error": "Invalid request signature"}
+
+        event_data = request.json
+        if event_data.get('type') == 'url_verification':
+            return 200, {"challenge": event_data.get('challenge')}
+
+        if event_data.get('type') == 'event_callback':
+            # Remember new and edited messages, so /summary in their threads needs no lookup
+            self.dispatcher.message_cache.observe_event(event_data.get('event') or {})
+            # Start extracting papers linked in new posts, so /summary finds them ready
+            self.prefetcher.observe_event(event_data.get('event') or {})
+
+        return 200, {"status": "ok"}
+
+    async def summary_command(self, request):
+        """Handle the /summary slash command."""
+        if not self.slack_client.verify_signature(request):
+            return 403, {"error": "Invalid request signature"}
+
+        form = request.form
+
+        # Acknowledge receipt of the command
+        await self.slack_client.aacknowledge_command(response_url=form.get('response_url'))
+
+        channel_id = form.get('channel_id')
+        thread_ts = form.get('thread_ts')
+        user_id = form.get('user_id')
+        # "/summary all" summarizes every paper linked in the parent message
+        all_papers = (form.get('text') or '').strip().lower() == 'all'
+
+        # If not in a thread, inform the user
+        if not thread_ts:
+            return 200, {
+                "response_type": "ephemeral",
+                "text": "This command must be used in a thread containing a paper link."
+            }
+
+        if len(self.tasks) >= self.max_in_flight:
+            logger.warning("Too many summaries in flight, rejecting summary request")
+            return 200, {
+                "response_type": "ephemeral",
+                "text": "I'm working on too many summaries right now. Please try again in a few minutes."
+            }
+
+        task = asyncio.ensure_future(self.process_summary_request(channel_id, thread_ts, user_id, all_papers))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+        return 200, {
+            "response_type": "ephemeral",
+            "text": "Processing your request. I'll post the summary in this thread shortly."
+        }
+
+    async def process_summary_request(self, channel_id, thread_ts, user_id, all_papers=False):
+        """Process a summary request."""
+        updater = None
+        # OpenAI calls are queued fairly across channels and users
+        current_requester.set((channel_id, user_id))
+        with trace_request('summary_request', channel=channel_id, user=user_id):
+            try:
+                # Get the parent message
+                parent_message = await self.dispatcher.aget_parent_message(channel_id, thread_ts)
+
+                # Extract paper URLs from parent message
+                if all_papers:
+                    paper_urls = self.paper_processor.extract_paper_urls(parent_message.get('text', ''))
+                    paper_urls = paper_urls[:self.max_papers]
+                else:
+                    paper_url = self.paper_processor.extract_paper_url(parent_message.get('text', ''))
+                    paper_urls = [paper_url] if paper_url else []
+
+                if not paper_urls:
+                    await self.dispatcher.apost_status(
+                        channel_id, thread_ts, key=user_id,
+                        text=f"<@{user_id}> I couldn't find a paper link in the parent message. Please make sure the parent message contains a valid academic paper URL."
+                    )
+                    return
+
+                if len(paper_urls) > 1:
+                    status_ts = await self.dispatcher.apost_status(
+                        channel_id, thread_ts, key=user_id,
+                        text=f"<@{user_id}> I'm analyzing the {len(paper_urls)} papers linked in the parent message. This may take a few minutes..."
+                    )
+                    updater = AsyncThrottledMessageUpdater(
+                        self.dispatcher, channel_id, status_ts, min_interval=self.update_interval
+                    )
+                    digest = await self.summarize_papers(
+                        paper_urls,
+                        on_progress=lambda done: updater.update(
+                            f"<@{user_id}> I've summarized {done} of the {len(paper_urls)} papers linked in the parent message..."
+                        )
+                    )
+
+                    if not digest:
+                        updater.cancel()
+                        await self.dispatcher.apost_status(
+                            channel_id, thread_ts, key=user_id,
+                            text=f"<@{user_id}> I had trouble extracting content from the papers linked in the parent message. Please ensure they are valid and accessible academic papers."
+                        )
+                        return
+
+                    text = f"<@{user_id}> Here's a digest of the papers:\n\n" + digest
+                    if not await updater.finish(text):
+                        # The status message could not be edited, so the digest is posted as a new message
+                        await self.dispatcher.apost_message(channel_id, text, thread_ts=thread_ts)
+                    return
+
+                paper_url = paper_urls[0]
+
+                # Post initial status message, which is then edited as the summary streams in
+                status_ts = await self.dispatcher.apost_status(
+                    channel_id, thread_ts, key=user_id,
+                    text=f"<@{user_id}> I'm analyzing the paper at {paper_url}. This may take a few minutes..."
+                )
+                updater = AsyncThrottledMessageUpdater(
+                    self.dispatcher, channel_id, status_ts, min_interval=self.update_interval
+                )
+                header = f"<@{user_id}> Here's the summary of the paper:\n\n"
+
+                # Summarize the paper, sharing the work with concurrent requests for it
+                summary = await self.summary_flight.do(
+                    normalize_url(paper_url), self.summarize_paper, paper_url,
+                    on_progress=lambda text: updater.update(header + text)
+                )
+
+                if not summary:
+                    updater.cancel()
+                    await self.dispatcher.apost_status(
+                        channel_id, thread_ts, key=user_id,
+                        text=f"<@{user_id}> I had trouble extracting content from {paper_url}. Please ensure it's a valid and accessible academic paper."
+                    )
+                    return
+
+                # Replace the streamed text with the final summary
+                if not await updater.finish(header + summary):
+                    # The status message could not be edited, so the summary is posted as a new message
+                    await self.dispatcher.apost_message(channel_id, header + summary, thread_ts=thread_ts)
+
+            except Exception as e:
+                logger.error(f"Error processing summary request: {str(e)}", exc_info=True)
+                if updater:
+                    updater.cancel()
+                await self.dispatcher.apost_status(
+                    channel_id, thread_ts, key=user_id,
+                    text=f"<@{user_id}> I encountered an error while processing your request: {str(e)}"
+                )
+            finally:
+                self.dispatcher.end_status(channel_id, thread_ts, key=user_id)
+
+    async def summarize_paper(self, paper_url, on_progress=None):
+        """
+        Extract and summarize a paper.
+
+        Args:
+            paper_url (str): URL of the paper
+            on_progress (callable, optional): Called with the partial summary as it streams in
+
+        Returns:
+            str: Generated summary, or None if the paper could not be extracted
+        """
+        # Joins or reuses a prefetch of the paper, if one was made
+        paper_content = await self.prefetcher.extract_paper_content(paper_url)
+        if not paper_content:
+            return None
+
+        return await self.summarizer.agenerate_summary(paper_content, on_progress=on_progress)
+
+    async def summarize_papers(self, paper_urls, on_progress=None):
+        """
+        Extract and summarize several papers concurrently and combine them into a digest.
+
+        At most paper_concurrency papers are processed at once. Each paper
+        shares its work with concurrent requests for it, as single summaries do.
+
+        Args:
+            paper_urls (list): URLs of the papers
+            on_progress (callable, optional): Called with the number of papers done so far
+
+        Returns:
+            str: Digest with a comparison of the papers and their summaries, or None if no paper could be extracted
+        """
+        semaphore = asyncio.Semaphore(max(1, self.paper_concurrency))
+        done = 0
+
+        async def summarize(url):
+            nonlocal done
+            try:
+                async with semaphore:
+                    return await self.summary_flight.do(normalize_url(url), self.summarize_paper, url)
+            except Exception as e:
+                logger.error(f"Error summarizing {url}: {str(e)}", exc_info=True)
+                return None
+            finally:
+                done += 1
+                if on_progress:
+                    on_progress(done)
+
+        summaries = await asyncio.gather(*(summarize(url) for url in paper_urls))
+
+        failed = [url for url, summary in zip(paper_urls, summaries) if not summary]
+        summaries = [summary for summary in summaries if summary]
+        if not summaries:
+            return None
+
+        comparison = await self.summarizer.agenerate_comparison(summaries) if len(summaries) > 1 else None
+        digest = self.summarizer.combine_digest(summaries, comparison)
+        if failed:
+            digest += "\n\nI had trouble extracting content from " + ", ".join(failed) + "."
+        return digest
+
+
+def create_app():
+    """Build the ASGI application from the shared components."""
+    from components import slack_client, slack_dispatcher, paper_processor, async_paper_prefetcher, summarizer
+    app = SlackAsgiApp(
+        slack_client,
+        paper_processor,
+        summarizer,
+        dispatcher=slack_dispatcher,
+        prefetcher=async_paper_prefetcher,
+        max_in_flight=int(os.environ.get('MAX_INFLIGHT_SUMMARIES', 200)),
+        update_interval=float(os.environ.get('SLACK_UPDATE_INTERVAL', 1.5)),
+        max_papers=int(os.environ.get('SUMMARY_ALL_MAX_PAPERS', 5)),
+        paper_concurrency=int(os.environ.get('SUMMARY_ALL_CONCURRENCY', 3))
+    )
+    # Report the work in flight on /metrics
+    QUEUE_DEPTH.set_function(lambda: {
+        ('summary_tasks',): len(app.tasks),
+        ('prefetch',): app.prefetcher.stats()['pending'],
+        ('openai_rate_limit',): summarizer.rate_limiter.stats()['waiting'] if summarizer.rate_limiter else 0,
+    })
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    """Build the module-level `app` on first access, so importing the module has no side effects."""
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(create_app(), host='0.0.0.0', port=int(os.environ.get('PORT', 3000)))
@@ -0,0 +1,307 @@
+"""
+Batch summarizer module for summarizing reading lists of papers.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from url_utils import normalize_url, parse_arxiv_id, parse_doi
+from summarizer import summary_error
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"{}]+')
+
+BIBTEX_ENTRY_PATTERN = re.compile(r'@\w+\s*\{')
+
+BIBTEX_FIELD_PATTERN = re.compile(r'\b(url|eprint|doi)\s*=\s*(?:\{([^{}]*)\}|"([^"]*)")', re.IGNORECASE)
+
+
+def source_to_url(source):
+    """
+    Turn one reading list item into a paper URL.
+
+    Args:
+        source (str): A URL, an arXiv identifier or a DOI
+
+    Returns:
+        str: Paper URL, or None if the item is not recognised
+    """
+    source = source.strip()
+    if URL_PATTERN.fullmatch(source):
+        return source
+    arxiv_id = parse_arxiv_id(source)
+    if arxiv_id:
+        return f"https://arxiv.org/abs/{arxiv_id}"
+    doi = parse_doi(source)
+    if doi:
+        return f"https://doi.org/{doi}"
+    return None
+
+
+def parse_bibtex(text):
+    """
+    Extract paper URLs from BibTeX entries.
+
+    Each entry contributes its url field, or else its arXiv eprint, or else its DOI.
+
+    Args:
+        text (str): BibTeX source
+
+    Returns:
+        list: Paper URLs in entry order
+    """
+    urls = []
+    for entry in BIBTEX_ENTRY_PATTERN.split(text)[1:]:
+        fields = {}
+        for name, braced, quoted in BIBTEX_FIELD_PATTERN.findall(entry):
+            fields.setdefault(name.lower(), (braced or quoted).strip())
+        url = fields.get('url') or source_to_url(fields.get('eprint', '')) or source_to_url(fields.get('doi', ''))
+        if url:
+            urls.append(url)
+        else:
+            logger.warning(f"No URL, arXiv eprint or DOI in BibTeX entry {entry.split(',', 1)[0].strip()}")
+    return urls
+
+
+def parse_sources(text):
+    """
+    Extract paper URLs from a reading list.
+
+    The list is either BibTeX or one item per line: a URL, an arXiv
+    identifier or a DOI. Blank lines and lines starting with # are skipped,
+    and papers listed more than once are kept once.
+
+    Args:
+        text (str): Reading list
+
+    Returns:
+        list: Paper URLs in list order
+    """
+    if BIBTEX_ENTRY_PATTERN.search(text):
+        urls = parse_bibtex(text)
+    else:
+        urls = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            url = source_to_url(line)
+            if url is None:
+                logger.warning(f"Skipping unrecognised reading list item: {line}")
+                continue
+            urls.append(url)
+
+    unique = {}
+    for url in urls:
+        unique.setdefault(normalize_url(url), url)
+    return list(unique.values())
+
+
+def load_checkpoint(path):
+    """
+    Read the papers summarized by earlier runs.
+
+    Args:
+        path (str): Checkpoint file written by BatchSummarizer
+
+    Returns:
+        dict: Normalized URL -> record, for papers that were summarized successfully
+    """
+    records = {}
+    if not path or not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line of an interrupted run may be cut short
+                continue
+            if not record.get('error'):
+                records[normalize_url(record['url'])] = record
+    return records
+
+
+def write_jsonl(records, file):
+    """Write records as one JSON object per line."""
+    for record in records:
+        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def write_markdown(records, file):
+    """Write records as a Markdown document with one section per paper."""
+    for record in records:
+        file.write(f"## {record.get('title') or record['url']}\n\n{record['url']}\n\n")
+        if record.get('error'):
+            file.write(f"_Not summarized: {record['error']}_\n\n")
+        else:
+            file.write(f"{record['summary'].strip()}\n\n")
+        file.write("---\n\n")
+
+
+class BatchSummarizer:
+    """
+    Summarizes a list of papers with parallel extraction and summarization.
+
+    Each paper is extracted and then summarized by the same task, with
+    separate limits on how many extractions and how many summaries run at
+    once, so extracted text never piles up ahead of the summarizer. Every
+    finished paper is appended to a checkpoint file; a later run with the
+    same checkpoint skips the papers that were summarized and retries the
+    ones that failed.
+
+    With a Batch API client, papers are all extracted first and then
+    summarized together in one offline batch instead.
+    """
+
+    def __init__(self, paper_processor, summarizer, extract_workers=4, summary_workers=4, checkpoint_path=None,
+                 batch_client=None, batch_timeout=None):
+        """
+        Initialize the batch summarizer.
+
+        Args:
+            paper_processor (PaperProcessor): Paper processor
+            summarizer (Summarizer): Summarizer, ideally with a rate limiter
+            extract_workers (int): Papers extracted at once
+            summary_workers (int): Papers summarized at once
+            checkpoint_path (str, optional): JSONL file recording finished papers
+            batch_client (OpenAIBatchClient, optional): Summarize through the Batch API
+            batch_timeout (float, optional): Maximum seconds to wait for each Batch API batch
+        """
+        self.paper_processor = paper_processor
+        self.summarizer = summarizer
+        self.extract_workers = extract_workers
+        self.summary_workers = summary_workers
+        self.checkpoint_path = checkpoint_path
+        self.batch_client = batch_client
+        self.batch_timeout = batch_timeout
+        self._extract_slots = threading.Semaphore(extract_workers)
+        self._summary_slots = threading.Semaphore(summary_workers)
+        self._lock = threading.Lock()
+        self._finished = 0
+
+    def run(self, urls):
+        """
+        Summarize papers, resuming from the checkpoint.
+
+        Args:
+            urls (list): Paper URLs
+
+        Returns:
+            list: One record per URL, in input order, with url, title, summary and error
+        """
+        records = load_checkpoint(self.checkpoint_path)
+        todo = [url for url in urls if normalize_url(url) not in records]
+        if len(todo) < len(urls):
+            logger.info(f"Resuming: {len(urls) - len(todo)} of {len(urls)} papers already summarized")
+        self._finished = len(urls) - len(todo)
+
+        if self.batch_client:
+            for record in self._run_offline(todo, len(urls)):
+                records[normalize_url(record['url'])] = record
+            return [records[normalize_url(url)] for url in urls]
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.extract_workers + self.summary_workers, thread_name_prefix="batch"
+        )
+        try:
+            futures = [executor.submit(self._process, url, len(urls)) for url in todo]
+            for future in as_completed(futures):
+                record = future.result()
+                records[normalize_url(record['url'])] = record
+        except BaseException:
+            # Papers finished so far are in the checkpoint
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+        return [records[normalize_url(url)] for url in urls]
+
+    def _process(self, url, total):
+        """Extract and summarize one paper, recording the outcome."""
+        record = {'url': url, 'title': None, 'summary': None, 'error': None}
+        try:
+            with self._extract_slots:
+                paper_content = self.paper_processor.extract_paper_content(url)
+            if not paper_content:
+                record['error'] = 'Could not extract the paper'
+            else:
+                record['title'] = paper_content.get('title')
+                with self._summary_slots:
+                    summary = self.summarizer.generate_summary(paper_content)
+                # Summaries with a failed pass are errors, so a resumed run retries them
+                record['error'] = summary_error(summary)
+                if not record['error']:
+                    record['summary'] = summary
+        except Exception as e:
+            logger.error(f"Error summarizing {url}: {str(e)}", exc_info=True)
+            record['error'] = str(e)
+
+        self._checkpoint(record)
+        with self._lock:
+            self._finished += 1
+            outcome = 'failed' if record['error'] else 'summarized'
+            logger.info(f"[{self._finished}/{total}] {outcome} {record['title'] or url}")
+        return record
+
+    def _run_offline(self, urls, total):
+        """Extract papers in parallel, then summarize them in one Batch API job."""
+        records = {url: {'url': url, 'title': None, 'summary': None, 'error': None} for url in urls}
+        extracted = {}
+        with ThreadPoolExecutor(max_workers=self.extract_workers, thread_name_prefix="batch-extract") as executor:
+            futures = {executor.submit(self.paper_processor.extract_paper_content, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    paper_content = future.result()
+                except Exception as e:
+                    logger.error(f"Error extracting {url}: {str(e)}", exc_info=True)
+                    paper_content = None
+                if paper_content:
+                    records[url]['title'] = paper_content.get('title')
+                    extracted[url] = paper_content
+                else:
+                    records[url]['error'] = 'Could not extract the paper'
+                    self._finish(records[url], total)
+
+        if extracted:
+            logger.info(f"Summarizing {len(extracted)} papers through the Batch API")
+            try:
+                summaries = self.summarizer.generate_summaries_batch(
+                    list(extracted.values()), self.batch_client, timeout=self.batch_timeout
+                )
+            except Exception as e:
+                logger.error(f"Batch summarization failed: {str(e)}", exc_info=True)
+                summaries = [None] * len(extracted)
+                for url in extracted:
+                    records[url]['error'] = str(e)
+            for url, summary in zip(extracted, summaries):
+                # Requests that failed or expired in the batch are errors, so a resumed run resubmits them
+                if not records[url]['error']:
+                    records[url]['error'] = summary_error(summary)
+                if not records[url]['error']:
+                    records[url]['summary'] = summary
+                self._finish(records[url], total)
+
+        return list(records.values())
+
+    def _finish(self, record, total):
+        """Checkpoint and log a paper summarized offline."""
+        self._checkpoint(record)
+        self._finished += 1
+        outcome = 'failed' if record['error'] else 'summarized'
+        logger.info(f"[{self._finished}/{total}] {outcome} {record['title'] or record['url']}")
+
+    def _checkpoint(self, record):
+        """Append a finished paper to the checkpoint file."""
+        if not self.checkpoint_path:
+            return
+        with self._lock:
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
@@ -0,0 +1,135 @@
+"""
+Shared components for the Paper Summarizer Slack Bot, configured from environment variables.
+Both the Flask app and the ASGI app use these instances.
+"""
+
+import os
+from dotenv import load_dotenv
+from slack_client import SlackClient
+from slack_dispatcher import SlackDispatcher
+from message_cache import MessageCache
+from prefetcher import PaperPrefetcher, AsyncPaperPrefetcher
+from paper_processor import PaperProcessor
+from arxiv_fetcher import ArxivFetcher
+from summarizer import Summarizer
+from extraction_cache import ExtractionCache
+from pdf_extraction import SerialExtractionEngine, ProcessPoolExtractionEngine
+from summary_cache import SummaryCache
+from context_builder import ContextBuilder
+from http_transport import HttpTransport, AsyncHttpTransport
+from rate_limiter import RateLimiter, SQLiteBucketStore
+from metrics import CACHE_LOOKUPS, setup_tracing
+
+# Load environment variables
+load_dotenv()
+
+# Initialize components
+http_transport = HttpTransport(
+    connect_timeout=float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5)),
+    read_timeout=float(os.environ.get('HTTP_READ_TIMEOUT', 30)),
+    total_timeout=float(os.environ.get('HTTP_TOTAL_TIMEOUT', 120)),
+    retries=int(os.environ.get('HTTP_RETRIES', 3))
+)
+async_http_transport = AsyncHttpTransport(
+    connect_timeout=float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5)),
+    read_timeout=float(os.environ.get('HTTP_READ_TIMEOUT', 30)),
+    total_timeout=float(os.environ.get('HTTP_TOTAL_TIMEOUT', 120)),
+    retries=int(os.environ.get('HTTP_RETRIES', 3))
+)
+slack_client = SlackClient(
+    token=os.environ.get('SLACK_BOT_TOKEN'),
+    signing_secret=os.environ.get('SLACK_SIGNING_SECRET'),
+    transport=http_transport,
+    async_transport=async_http_transport,
+    base_url=os.environ.get('SLACK_API_URL', 'https://www.slack.com/api/')
+)
+slack_dispatcher = SlackDispatcher(
+    slack_client,
+    channel_messages_per_minute=int(os.environ.get('SLACK_CHANNEL_MESSAGES_PER_MINUTE', 60)),
+    max_retries=int(os.environ.get('SLACK_MAX_RETRIES', 5)),
+    message_cache=MessageCache(
+        max_entries=int(os.environ.get('SLACK_MESSAGE_CACHE_SIZE', 1000)),
+        ttl=float(os.environ.get('SLACK_MESSAGE_CACHE_TTL', 900))
+    )
+)
+paper_processor = PaperProcessor(
+    cache=ExtractionCache(
+        path=os.environ.get('EXTRACTION_CACHE_PATH', 'extraction_cache.sqlite3'),
+        max_bytes=int(os.environ.get('EXTRACTION_CACHE_MAX_MB', 512)) * 1024 * 1024
+    ),
+    max_download_bytes=int(os.environ.get('MAX_PAPER_MB', 50)) * 1024 * 1024,
+    max_pages=int(os.environ.get('MAX_PAPER_PAGES', 200)),
+    extraction_engine=(
+        SerialExtractionEngine() if int(os.environ.get('PDF_EXTRACTION_WORKERS', 0)) == 1
+        else ProcessPoolExtractionEngine(workers=int(os.environ.get('PDF_EXTRACTION_WORKERS', 0)) or None)
+    ),
+    max_chars=int(os.environ.get('PDF_MAX_CHARS', 0)) or None,
+    stop_at_references=os.environ.get('PDF_STOP_AT_REFERENCES', 'true').lower() == 'true',
+    transport=http_transport,
+    async_transport=async_http_transport,
+    arxiv_latest_ttl=float(os.environ.get('ARXIV_LATEST_TTL_HOURS', 24)) * 3600,
+    arxiv_fetcher=ArxivFetcher(
+        transport=http_transport,
+        async_transport=async_http_transport,
+        api_url=os.environ.get('ARXIV_API_URL', 'https://export.arxiv.org/api/query'),
+        base_url=os.environ.get('ARXIV_URL', 'https://arxiv.org'),
+        prefer_source=os.environ.get('ARXIV_PREFER_SOURCE', 'true').lower() == 'true',
+        max_source_bytes=int(os.environ.get('MAX_PAPER_MB', 50)) * 1024 * 1024
+    )
+)
+prefetch_channels = os.environ.get('PREFETCH_CHANNELS', '').strip()
+prefetch_options = dict(
+    # Off unless enabled: '*' prefetches in every channel, otherwise a comma-separated list of channel IDs
+    channels=None if prefetch_channels == '*' else {c.strip() for c in prefetch_channels.split(',') if c.strip()},
+    debounce=float(os.environ.get('PREFETCH_DEBOUNCE', 5)),
+    max_concurrent=int(os.environ.get('PREFETCH_CONCURRENCY', 2)),
+    max_pending=int(os.environ.get('PREFETCH_MAX_PENDING', 20)),
+    max_pending_per_channel=int(os.environ.get('PREFETCH_MAX_PENDING_PER_CHANNEL', 5))
+)
+paper_prefetcher = PaperPrefetcher(paper_processor, **prefetch_options)
+async_paper_prefetcher = AsyncPaperPrefetcher(paper_processor, **prefetch_options)
+openai_rate_limiter = None
+if int(os.environ.get('OPENAI_RPM', 500)) > 0 and int(os.environ.get('OPENAI_TPM', 200000)) > 0:
+    openai_rate_limiter = RateLimiter(
+        requests_per_minute=int(os.environ.get('OPENAI_RPM', 500)),
+        tokens_per_minute=int(os.environ.get('OPENAI_TPM', 200000)),
+        store=SQLiteBucketStore(os.environ.get('OPENAI_RATE_LIMIT_PATH', 'openai_rate_limit.sqlite3'))
+    )
+summarizer = Summarizer(
+    api_key=os.environ.get('OPENAI_API_KEY'),
+    pass_timeout=float(os.environ.get('SUMMARY_PASS_TIMEOUT', 300)),
+    context_builder=ContextBuilder(token_budget=int(os.environ.get('CONTEXT_TOKEN_BUDGET', 6000))),
+    map_reduce_threshold=int(os.environ.get('MAP_REDUCE_THRESHOLD_TOKENS', 30000)),
+    map_concurrency=int(os.environ.get('MAP_CONCURRENCY', 4)),
+    rate_limiter=openai_rate_limiter,
+    max_retries=int(os.environ.get('OPENAI_MAX_RETRIES', 4)),
+    cache=SummaryCache(
+        path=os.environ.get('SUMMARY_CACHE_PATH', 'summary_cache.sqlite3'),
+        ttl=float(os.environ.get('SUMMARY_CACHE_TTL_HOURS', 168)) * 3600,
+        max_entries=int(os.environ.get('SUMMARY_CACHE_MAX_ENTRIES', 10000))
+    )
+)
+
+
+def cache_lookups():
+    """Collect hits and misses of the caches for /metrics."""
+    values = {}
+    caches = [
+        ('extraction', paper_processor.cache),
+        ('summary', summarizer.cache),
+        ('slack_message', slack_dispatcher.message_cache),
+    ]
+    for name, cache in caches:
+        if cache is None:
+            continue
+        stats = cache.stats()
+        values[(name, 'hit')] = stats['hits'] + stats.get('alias_hits', 0)
+        values[(name, 'miss')] = stats['misses']
+    return values
+
+
+CACHE_LOOKUPS.set_function(cache_lookups)
+
+# Traces are exported only when an OTLP endpoint is configured
+if os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT'):
+    setup_tracing(os.environ.get('OTEL_SERVICE_NAME', 'paper-summarizer'))
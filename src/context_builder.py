@@ -0,0 +1,241 @@
+"""
+Context builder module for packing the most informative paper content into a token budget.
+"""
+
+import re
+import math
+import logging
+import threading
+from collections import Counter
+
+try:
+    import tiktoken
+except ImportError:  # Optional, token counts are estimated without it
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Share of the token budget given to each canonical section. The title,
+# abstract, introduction and conclusion are already part of the user message.
+DEFAULT_SECTION_WEIGHTS = {
+    'method': 0.3,
+    'results': 0.3,
+    'discussion': 0.1,
+    'background': 0.05,
+    'related_work': 0.05,
+    'body': 1.0,
+}
+
+# Weight for sections without a canonical key, e.g. "3.1 Model Architecture"
+OTHER_SECTION_WEIGHT = 0.1
+
+# Sections that never go into the additional context
+EXCLUDED_SECTIONS = {
+    'abstract', 'keywords', 'introduction', 'conclusion', 'references', 'acknowledgments', 'appendix'
+}
+
+# Phrases that usually introduce contributions or findings
+SALIENT_PHRASES = (
+    'we propose', 'we present', 'we introduce', 'we show', 'we find', 'we demonstrate',
+    'our results', 'outperform', 'state-of-the-art', 'significant', 'improve', 'achieve',
+    'accuracy', 'compared to', 'baseline', 'table', 'figure', 'fig.', 'in contrast', 'limitation'
+)
+
+WORD_PATTERN = re.compile(r'[a-z][a-z-]{2,}')
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?%?')
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once, or return None if it is unavailable."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            if tiktoken is not None:
+                try:
+                    _encoding = tiktoken.get_encoding('o200k_base')
+                except Exception as e:
+                    logger.warning(f"Could not load tokenizer, estimating token counts: {str(e)}")
+    return _encoding
+
+
+def count_tokens(text):
+    """
+    Count the tokens in a piece of text.
+
+    Uses tiktoken when it is installed and falls back to an estimate of
+    four characters per token otherwise.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Number of tokens
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+class Passage:
+    """A paragraph-sized piece of a section considered for the context."""
+
+    def __init__(self, section_index, position, heading, text):
+        """
+        Initialize a passage.
+
+        Args:
+            section_index (int): Index of the section in document order
+            position (int): Position of the passage within its section
+            heading (str): Heading of the section the passage belongs to
+            text (str): Passage text
+        """
+        self.section_index = section_index
+        self.position = position
+        self.heading = heading
+        self.text = text
+        self.tokens = count_tokens(text)
+        self.score = 0.0
+
+
+class ContextBuilder:
+    """Builds the additional paper context for the second pass within a token budget."""
+
+    def __init__(self, token_budget=6000, section_weights=None, passage_tokens=150):
+        """
+        Initialize the context builder.
+
+        Args:
+            token_budget (int): Maximum number of tokens of additional context
+            section_weights (dict, optional): Budget share per canonical section key
+            passage_tokens (int): Approximate size of the passages that are ranked
+        """
+        self.token_budget = token_budget
+        self.section_weights = section_weights or DEFAULT_SECTION_WEIGHTS
+        self.passage_tokens = passage_tokens
+
+    def build(self, paper_content):
+        """
+        Select and order the most informative passages of a paper.
+
+        Args:
+            paper_content (dict): Paper content with full_text and sections
+
+        Returns:
+            tuple: Context text and its token count
+        """
+        sections = self._sections(paper_content)
+        if not sections:
+            return '', 0
+
+        query_terms = self._terms(f"{paper_content.get('title', '')} {paper_content.get('abstract', '')}")
+        passages_by_section = []
+        for section_index, (key, heading, text) in enumerate(sections):
+            passages = [Passage(section_index, position, heading, passage_text)
+                        for position, passage_text in enumerate(self._split_passages(text))]
+            for passage in passages:
+                passage.score = self._score(passage, query_terms)
+            passages_by_section.append((key, passages))
+
+        selected = self._pack(passages_by_section)
+        selected.sort(key=lambda passage: (passage.section_index, passage.position))
+
+        parts = []
+        current_section = None
+        for passage in selected:
+            if passage.section_index != current_section:
+                current_section = passage.section_index
+                parts.append(f"\n[{passage.heading}]")
+            parts.append(passage.text)
+
+        context = '\n'.join(parts).strip()
+        return context, count_tokens(context)
+
+    def _sections(self, paper_content):
+        """Return the (key, heading, text) of every section eligible for the context."""
+        full_text = paper_content.get('full_text', '')
+        sections = paper_content.get('sections')
+
+        if not isinstance(sections, list) or not sections:
+            return [('body', 'Paper text', full_text)] if full_text.strip() else []
+
+        return [
+            (section['key'], section['heading'], full_text[section['start']:section['end']])
+            for section in sections
+            if section['key'] not in EXCLUDED_SECTIONS and full_text[section['start']:section['end']].strip()
+        ]
+
+    def _split_passages(self, text):
+        """Split section text into passages of roughly passage_tokens tokens."""
+        sentences = SENTENCE_PATTERN.split(' '.join(text.split()))
+        passages = []
+        current = []
+        current_tokens = 0
+        for sentence in sentences:
+            sentence_tokens = count_tokens(sentence)
+            if current and current_tokens + sentence_tokens > self.passage_tokens:
+                passages.append(' '.join(current))
+                current = []
+                current_tokens = 0
+            current.append(sentence)
+            current_tokens += sentence_tokens
+        if current:
+            passages.append(' '.join(current))
+        return passages
+
+    def _terms(self, text):
+        """Return the lowercase content words of a text."""
+        return Counter(WORD_PATTERN.findall(text.lower()))
+
+    def _score(self, passage, query_terms):
+        """
+        Estimate how informative a passage is.
+
+        Rewards overlap with the title and abstract, numbers (results are
+        usually quantitative), phrases that announce findings, and the first
+        passage of each section, normalized by passage length.
+        """
+        lowered = passage.text.lower()
+        terms = self._terms(lowered)
+        overlap = sum(min(count, 3) for term, count in terms.items() if term in query_terms)
+        numbers = len(NUMBER_PATTERN.findall(passage.text))
+        phrases = sum(lowered.count(phrase) for phrase in SALIENT_PHRASES)
+
+        score = (overlap + 2 * min(numbers, 10) + 3 * phrases) / math.sqrt(max(passage.tokens, 1))
+        if passage.position == 0:
+            score += 1.0
+        return score
+
+    def _pack(self, passages_by_section):
+        """Choose passages within each section's budget, then fill leftover budget globally."""
+        weights = [self.section_weights.get(key, OTHER_SECTION_WEIGHT) for key, _ in passages_by_section]
+        total_weight = sum(weights) or 1.0
+
+        selected = []
+        leftovers = []
+        used = 0
+        for weight, (_, passages) in zip(weights, passages_by_section):
+            budget = int(self.token_budget * weight / total_weight)
+            section_used = 0
+            for passage in sorted(passages, key=lambda p: p.score, reverse=True):
+                if section_used + passage.tokens <= budget:
+                    selected.append(passage)
+                    section_used += passage.tokens
+                else:
+                    leftovers.append(passage)
+            used += section_used
+
+        for passage in sorted(leftovers, key=lambda p: p.score, reverse=True):
+            if used + passage.tokens <= self.token_budget:
+                selected.append(passage)
+                used += passage.tokens
+
+        return selected
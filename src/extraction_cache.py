@@ -0,0 +1,215 @@
+"""
+Extraction cache module for reusing parsed paper content across requests.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+
+from url_utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Persistent, size-bounded LRU cache of extracted paper content.
+
+    Entries are stored once per SHA-256 hash of the downloaded document and
+    are reachable through any number of normalized URL aliases, so mirrors
+    and /abs/ vs /pdf/ links share one entry. Aliases of links whose target
+    changes over time, such as an arXiv link without a version, can be
+    given an expiry. Content is stored as zlib-compressed JSON.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        """
+        Initialize the extraction cache.
+
+        Args:
+            path (str): Path to the SQLite database file
+            max_bytes (int): Maximum total size of the stored entries
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.alias_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                content_hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS aliases (
+                url_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                expires_at REAL
+            )
+            """
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(aliases)")]
+        if 'expires_at' not in columns:
+            # Caches created before aliases could expire
+            self._conn.execute("ALTER TABLE aliases ADD COLUMN expires_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS aliases_content_hash ON aliases (content_hash)")
+
+    def get(self, url):
+        """
+        Look up extracted content by URL.
+
+        Args:
+            url (str): Paper URL
+
+        Returns:
+            dict: Cached paper content, or None on a miss or an expired alias
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, expires_at FROM aliases WHERE url_key = ?",
+                (normalize_url(url),)
+            ).fetchone()
+        if row and row[1] is not None and row[1] <= time.time():
+            row = None
+        content = self._load(row[0]) if row else None
+        self._record(content is not None)
+        return content
+
+    def get_by_hash(self, content_hash, url=None, ttl=None):
+        """
+        Look up extracted content by the hash of the downloaded document.
+
+        This is consulted after a URL miss, so only hits are counted.
+
+        Args:
+            content_hash (str): SHA-256 hex digest of the document bytes
+            url (str, optional): URL to alias to the entry on a hit
+            ttl (float, optional): Seconds until the alias expires, None to keep it
+
+        Returns:
+            dict: Cached paper content, or None on a miss
+        """
+        content = self._load(content_hash)
+        if content is None:
+            return None
+
+        with self._lock:
+            self.alias_hits += 1
+        if url:
+            self.alias(url, content_hash, ttl=ttl)
+        return content
+
+    def alias(self, url, content_hash, ttl=None):
+        """
+        Point a URL at a stored entry.
+
+        Args:
+            url (str): Paper URL
+            content_hash (str): SHA-256 hex digest of the entry
+            ttl (float, optional): Seconds until the alias expires, None to keep it
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aliases (url_key, content_hash, expires_at) VALUES (?, ?, ?)",
+                (normalize_url(url), content_hash, time.time() + ttl if ttl is not None else None)
+            )
+
+    def put(self, url, content, ttl=None):
+        """
+        Store extracted content and alias it to a URL.
+
+        Args:
+            url (str): Paper URL
+            content (dict): Paper content including its 'content_hash'
+            ttl (float, optional): Seconds until the alias expires, None to keep it
+        """
+        content_hash = content.get('content_hash')
+        if not content_hash:
+            return
+
+        data = zlib.compress(json.dumps(content, separators=(',', ':')).encode('utf-8'))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (content_hash, data, size, last_access) VALUES (?, ?, ?, ?)",
+                    (content_hash, data, len(data), time.time())
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO aliases (url_key, content_hash, expires_at) VALUES (?, ?, ?)",
+                    (normalize_url(url), content_hash, time.time() + ttl if ttl is not None else None)
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self):
+        """
+        Report cache usage.
+
+        Returns:
+            dict: Hit and miss counters, entry count and stored bytes
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            'hits': self.hits,
+            'alias_hits': self.alias_hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': size
+        }
+
+    def _load(self, content_hash):
+        """Read and decode an entry, refreshing its LRU position."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM entries WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+            if not row:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE content_hash = ?",
+                (time.time(), content_hash)
+            )
+        return json.loads(zlib.decompress(row[0]))
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its size bound."""
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT content_hash, size FROM entries ORDER BY last_access").fetchall()
+        for content_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE content_hash = ?", (content_hash,))
+            self._conn.execute("DELETE FROM aliases WHERE content_hash = ?", (content_hash,))
+            total -= size
+            logger.info(f"Evicted extraction cache entry {content_hash[:12]}")
+
+    def _record(self, hit):
+        """Update the hit and miss counters."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
@@ -0,0 +1,190 @@
+"""
+HTML paper extraction that parses as little of a publisher page as it can.
+
+Publisher pages carry megabytes of scripts, styles and navigation around a
+paper. Those elements are cut out of the markup before a tree is built,
+the title and abstract are read from the citation meta tags most publishers
+set, and on pages of publishers that wrap the paper in an <article> element
+only that element is parsed.
+"""
+
+import re
+import html as html_module
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:  # Optional, the slower built-in parser is used without it
+    PARSER = 'html.parser'
+
+# Elements that never hold paper text, removed with their contents before parsing
+STRIPPED_ELEMENTS = ('script', 'style', 'noscript', 'nav', 'svg', 'template')
+# Those whose contents are raw text, where a tag of the same name cannot open
+RAW_TEXT_ELEMENTS = ('script', 'style')
+
+STRIPPED_PATTERN = re.compile(
+    r'<!--.*?-->'
+    # A self-closing tag, such as an inline <svg .../> icon, has no contents
+    r'|<(?:' + '|'.join(STRIPPED_ELEMENTS) + r')\b[^>]*/>'
+    r'|<(' + '|'.join(RAW_TEXT_ELEMENTS) + r')\b[^>]*>.*?</\1\s*>'
+    # Another tag of the same name opening first means this one was never closed, so it is kept
+    r'|<(' + '|'.join(name for name in STRIPPED_ELEMENTS if name not in RAW_TEXT_ELEMENTS) +
+    r')\b[^>]*(?<!/)>(?:(?!<\2\b).)*?</\2\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+HEAD_END_PATTERN = re.compile(r'</head\s*>', re.IGNORECASE)
+META_PATTERN = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+ATTRIBUTE_PATTERN = re.compile(r'''([\w:.-]+)\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+)''')
+TITLE_PATTERN = re.compile(r'<title[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+ARTICLE_START_PATTERN = re.compile(r'<article\b', re.IGNORECASE)
+ARTICLE_END_PATTERN = re.compile(r'</article\s*>', re.IGNORECASE)
+
+# Publishers whose pages hold the whole paper in an <article> element
+ARTICLE_HOSTS = ('link.springer.com', 'nature.com', 'dl.acm.org')
+
+
+def strip_boilerplate(html):
+    """
+    Remove comments and the elements in STRIPPED_ELEMENTS from an HTML document.
+
+    Args:
+        html (str): HTML document
+
+    Returns:
+        str: HTML without scripts, styles and navigation
+    """
+    return STRIPPED_PATTERN.sub(' ', html)
+
+
+def read_meta_tags(html):
+    """
+    Read the named meta tags of the document head.
+
+    Args:
+        html (str): HTML document
+
+    Returns:
+        dict: Lower-cased meta name (or property) to its first content value
+    """
+    head_end = HEAD_END_PATTERN.search(html)
+    head = html[:head_end.start()] if head_end else html
+    tags = {}
+    for match in META_PATTERN.finditer(head):
+        attributes = {
+            name.lower(): value.strip('"\'')
+            for name, value in ATTRIBUTE_PATTERN.findall(match.group(0))
+        }
+        name = (attributes.get('name') or attributes.get('property') or '').lower()
+        if name and 'content' in attributes and name not in tags:
+            tags[name] = _plain_text(attributes['content'])
+    return tags
+
+
+def _plain_text(markup):
+    """Reduce a meta tag value, which may hold escaped markup, to normalized text."""
+    text = TAG_PATTERN.sub(' ', html_module.unescape(markup))
+    return ' '.join(html_module.unescape(text).split())
+
+
+def _is_article_host(url):
+    """Return True if the URL is on a publisher listed in ARTICLE_HOSTS."""
+    host = (urlparse(url).hostname or '') if url else ''
+    return any(host == name or host.endswith('.' + name) for name in ARTICLE_HOSTS)
+
+
+def _article_markup(html):
+    """Return the markup from the first <article> tag to the last </article>, or None."""
+    start = ARTICLE_START_PATTERN.search(html)
+    if not start:
+        return None
+    end = None
+    for end in ARTICLE_END_PATTERN.finditer(html, start.start()):
+        pass
+    if end is None:
+        return None
+    return html[start.start():end.end()]
+
+
+def _is_abstract_class(css_class):
+    """Match elements with a class containing "abstract"."""
+    return css_class is not None and 'abstract' in css_class.lower()
+
+
+def _find_abstract(soup):
+    """Return the text of the first div, section or paragraph with an abstract class."""
+    for name in ('div', 'section', 'p'):
+        element = soup.find(name, class_=_is_abstract_class)
+        if element:
+            return element.text.strip()
+    return ""
+
+
+def _find_title(soup):
+    """Return the text of the first non-empty h1 or h2, or None."""
+    for tag in soup.find_all(['h1', 'h2']):
+        if tag.text.strip():
+            return tag.text.strip()
+    return None
+
+
+def _find_main_text(soup):
+    """Return the text of the article, the content div or, failing those, all paragraphs."""
+    article_tag = soup.find('article')
+    if article_tag:
+        return article_tag.text
+    main_div = soup.find('div', id='content')
+    if not main_div:
+        main_div = soup.find('div', class_='content')
+    if main_div:
+        return main_div.text
+    return ' '.join(p.text for p in soup.find_all('p'))
+
+
+def extract_html(html, url=None):
+    """
+    Extract the title, abstract and main text of an HTML paper.
+
+    The citation_title and citation_abstract meta tags take precedence over
+    headings and abstract elements. On pages of ARTICLE_HOSTS only the
+    <article> element is parsed; other pages are parsed whole once their
+    scripts, styles and navigation are removed.
+
+    Args:
+        html (str): HTML document
+        url (str, optional): URL the document was downloaded from
+
+    Returns:
+        dict: Paper title, abstract and full text
+    """
+    meta = read_meta_tags(html)
+    title = meta.get('citation_title')
+    abstract = meta.get('citation_abstract', '')
+    html = strip_boilerplate(html)
+
+    article = _article_markup(html) if _is_article_host(url) else None
+    if article is not None:
+        soup = BeautifulSoup(article, PARSER)
+        if not title:
+            title = _find_title(soup)
+        if not title:
+            match = TITLE_PATTERN.search(html)
+            title = _plain_text(match.group(1)) if match else None
+        return {
+            'title': title or "Unknown Title",
+            'abstract': abstract or _find_abstract(soup),
+            'full_text': soup.text
+        }
+
+    soup = BeautifulSoup(html, PARSER)
+    if not title:
+        title = _find_title(soup)
+    if not title:
+        title = soup.title.text if soup.title else "Unknown Title"
+    return {
+        'title': title,
+        'abstract': abstract or _find_abstract(soup),
+        'full_text': _find_main_text(soup)
+    }
@@ -0,0 +1,514 @@
+"""
+HTTP transport module with pooled keep-alive sessions, timeouts and retries.
+"""
+
+import time
+import random
+import socket
+import asyncio
+import logging
+import threading
+import contextvars
+from contextlib import asynccontextmanager, contextmanager
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+# Monotonic deadline of the request being sent, which retries must not wait past
+_request_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class TransportTimeoutError(requests.exceptions.Timeout):
+    """Raised when a download takes longer than the total timeout."""
+
+
+class JitteredRetry(Retry):
+    """
+    Retry policy with exponential backoff plus random jitter.
+
+    Waits, Retry-After included, are capped at backoff_max, and a retry
+    that would wait past the deadline of the request raises instead.
+    """
+
+    def __init__(self, *args, jitter=0.5, **kwargs):
+        """
+        Initialize the retry policy.
+
+        Args:
+            jitter (float): Maximum random seconds added to each backoff
+        """
+        super().__init__(*args, **kwargs)
+        self.jitter = jitter
+
+    def new(self, **kwargs):
+        """Return a copy of the policy for the next attempt, keeping the jitter."""
+        retry = super().new(**kwargs)
+        retry.jitter = self.jitter
+        return retry
+
+    def get_backoff_time(self):
+        """Return the exponential backoff for the next attempt plus jitter."""
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return backoff
+        return min(self.backoff_max, backoff + random.uniform(0, self.jitter))
+
+    def get_retry_after(self, response):
+        """Return the Retry-After delay of a response, capped at the maximum backoff."""
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.backoff_max)
+
+    def sleep(self, response=None):
+        """
+        Wait before the next attempt.
+
+        Raises:
+            TransportTimeoutError: If the wait would end past the deadline of the request
+        """
+        delay = None
+        if response is not None and self.respect_retry_after_header:
+            delay = self.get_retry_after(response)
+        if delay is None:
+            delay = self.get_backoff_time()
+        deadline = _request_deadline.get()
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            raise TransportTimeoutError(f"No time left to retry after {len(self.history)} attempts")
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HttpTransport:
+    """
+    Shared HTTP client with per-host connection pools.
+
+    Connections are kept alive and reused across requests, every request has
+    connect and read timeouts, and idempotent requests are retried with
+    jittered exponential backoff on connection errors and 429/5xx responses,
+    honouring Retry-After up to the maximum backoff. A request, its retries
+    and their waits included, must finish within a total timeout: a
+    watchdog shuts down the connection of a response still being read at
+    the deadline, so a server dripping bytes slower than the read timeout
+    cannot hold a worker indefinitely.
+    """
+
+    def __init__(self, pool_connections=16, pool_maxsize=16, connect_timeout=5, read_timeout=30,
+                 total_timeout=120, retries=3, backoff_factor=0.5, jitter=0.5, backoff_max=30):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_connections (int): Number of hosts with their own connection pool
+            pool_maxsize (int): Maximum connections kept per host
+            connect_timeout (float): Seconds to wait for a connection
+            read_timeout (float): Seconds to wait between bytes from the server
+            total_timeout (float): Maximum seconds for a request or a streamed download
+            retries (int): Maximum number of retries per request
+            backoff_factor (float): Base of the exponential backoff in seconds
+            jitter (float): Maximum random seconds added to each backoff
+            backoff_max (float): Longest wait before a retry, Retry-After included
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.total_timeout = total_timeout
+        self.session = requests.Session()
+
+        retry = JitteredRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            backoff_max=backoff_max,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            jitter=jitter
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.adapter = adapter
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._in_flight = defaultdict(int)
+        self._requests = defaultdict(int)
+        self._retries = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled session.
+
+        The total timeout starts before the first attempt: a retry that would
+        wait past it raises, and unless the response is streamed its body is
+        read within it. Each attempt waits for the response headers for at
+        most the connect and read timeouts.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            **kwargs: Arguments passed to requests, e.g. headers, json or stream
+
+        Returns:
+            requests.Response: The response
+
+        Raises:
+            TransportTimeoutError: If the request exceeds the total timeout
+        """
+        deadline = time.monotonic() + self.total_timeout
+        stream = kwargs.pop('stream', False)
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._in_flight[host] += 1
+            self._requests[host] += 1
+
+        token = _request_deadline.set(deadline)
+        try:
+            response = self.session.request(method, url, stream=True, **kwargs)
+            if not stream:
+                with self._deadline(response, deadline):
+                    response.content  # Reads and caches the body
+        except requests.RequestException as e:
+            with self._lock:
+                self._errors[host] += 1
+            # A retry given up at the total timeout comes back wrapped in a ConnectionError
+            if e.args and isinstance(e.args[0], TransportTimeoutError):
+                raise e.args[0] from None
+            raise
+        finally:
+            _request_deadline.reset(token)
+            with self._lock:
+                self._in_flight[host] -= 1
+
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', None)
+        if retries:
+            with self._lock:
+                self._retries[host] += len(retries)
+        return response
+
+    def get(self, url, **kwargs):
+        """Send a GET request."""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """Send a POST request."""
+        return self.request('POST', url, **kwargs)
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        """
+        Iterate over a streamed response within the total timeout.
+
+        Args:
+            response (requests.Response): Response opened with stream=True
+            chunk_size (int): Size of the chunks to read
+
+        Yields:
+            bytes: Chunks of the response body
+
+        Raises:
+            TransportTimeoutError: If the download exceeds the total timeout
+        """
+        deadline = time.monotonic() + self.total_timeout
+        with self._deadline(response, deadline):
+            yield from response.iter_content(chunk_size=chunk_size)
+
+    @contextmanager
+    def _deadline(self, response, deadline):
+        """
+        Bound the reads of a response body by a deadline.
+
+        A timer shuts down the connection at the deadline, which wakes up a
+        read blocked on it, and the read is then reported as a timeout.
+
+        Args:
+            response (requests.Response): Response whose body is read
+            deadline (float): time.monotonic() value the reads must finish by
+
+        Raises:
+            TransportTimeoutError: If the deadline passes before the reads finish
+        """
+        expired = threading.Event()
+
+        def expire():
+            expired.set()
+            _shutdown_connection(response)
+
+        timer = threading.Timer(max(0.0, deadline - time.monotonic()), expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        except Exception as e:
+            if not expired.is_set():
+                raise
+            response.close()
+            raise TransportTimeoutError(
+                f"Download of {response.url} took longer than {self.total_timeout}s"
+            ) from e
+        finally:
+            timer.cancel()
+        # A body without a Content-Length just ends when its connection is shut down
+        if expired.is_set():
+            response.close()
+            raise TransportTimeoutError(
+                f"Download of {response.url} took longer than {self.total_timeout}s"
+            )
+
+    def pool_stats(self):
+        """
+        Report connection pool usage per host.
+
+        Returns:
+            dict: For each host, the requests sent, requests in flight, retries,
+                errors, connections opened and idle pooled connections
+        """
+        stats = {}
+        with self._lock:
+            for host in self._requests:
+                stats[host] = {
+                    'requests': self._requests[host],
+                    'in_flight': self._in_flight[host],
+                    'retries': self._retries[host],
+                    'errors': self._errors[host],
+                    'connections_opened': 0,
+                    'idle_connections': 0
+                }
+
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = stats.setdefault(host, {
+                'requests': 0, 'in_flight': 0, 'retries': 0, 'errors': 0,
+                'connections_opened': 0, 'idle_connections': 0
+            })
+            entry['connections_opened'] += pool.num_connections
+            entry['idle_connections'] += pool.pool.qsize() if pool.pool else 0
+        return stats
+
+
+def _shutdown_connection(response):
+    """Shut down the socket of a response, waking up any thread blocked reading it."""
+    connection = getattr(response.raw, 'connection', None)
+    sock = getattr(connection, 'sock', None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # Already closed
+
+
+class AsyncHttpTransport:
+    """
+    Asyncio counterpart of HttpTransport built on httpx.
+
+    Shares one keep-alive connection pool across coroutines and applies the
+    same timeouts and jittered, Retry-After aware retry policy, with waits
+    capped at the maximum backoff. Requests, retries and their waits
+    included, and streamed downloads are cancelled at the total timeout.
+    """
+
+    def __init__(self, max_connections=100, max_keepalive_connections=20, connect_timeout=5,
+                 read_timeout=30, total_timeout=120, retries=3, backoff_factor=0.5, jitter=0.5, backoff_max=30):
+        """
+        Initialize the async transport.
+
+        Args:
+            max_connections (int): Maximum open connections across all hosts
+            max_keepalive_connections (int): Maximum idle connections kept alive
+            connect_timeout (float): Seconds to wait for a connection
+            read_timeout (float): Seconds to wait between bytes from the server
+            total_timeout (float): Maximum seconds for a request or a streamed download
+            retries (int): Maximum number of retries per request
+            backoff_factor (float): Base of the exponential backoff in seconds
+            jitter (float): Maximum random seconds added to each backoff
+            backoff_max (float): Longest wait before a retry, Retry-After included
+        """
+        self.total_timeout = total_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.backoff_max = backoff_max
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            follow_redirects=True,
+            # Connection failures are retried by httpx, responses below
+            transport=httpx.AsyncHTTPTransport(retries=retries)
+        )
+
+    async def request(self, method, url, **kwargs):
+        """
+        Send a request, retrying idempotent requests on 429/5xx responses.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            **kwargs: Arguments passed to httpx, e.g. headers or json
+
+        Returns:
+            httpx.Response: The response
+
+        Raises:
+            TransportTimeoutError: If the request exceeds the total timeout
+        """
+        try:
+            return await asyncio.wait_for(self._request(method, url, **kwargs), self.total_timeout)
+        except asyncio.TimeoutError as e:
+            raise TransportTimeoutError(f"{method} {url} took longer than {self.total_timeout}s") from e
+
+    async def _request(self, method, url, **kwargs):
+        """Send a request and read its body."""
+        async with self.stream(method, url, **kwargs) as response:
+            await response.aread()
+        return response
+
+    async def get(self, url, **kwargs):
+        """Send a GET request."""
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        """Send a POST request."""
+        return await self.request('POST', url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        """
+        Open a streamed response, retrying idempotent requests on 429/5xx responses.
+
+        Sending, retries and their waits must finish within the total timeout;
+        the body is then read with aiter_bytes() under a timeout of its own.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            **kwargs: Arguments passed to httpx, e.g. headers
+
+        Yields:
+            httpx.Response: The response, with its body not yet read
+        """
+        deadline = time.monotonic() + self.total_timeout
+        attempt = 0
+        while True:
+            request = self.client.build_request(method, url, **kwargs)
+            try:
+                response = await asyncio.wait_for(
+                    self.client.send(request, stream=True), max(0.0, deadline - time.monotonic())
+                )
+            except asyncio.TimeoutError as e:
+                raise TransportTimeoutError(f"{method} {url} took longer than {self.total_timeout}s") from e
+            retryable = response.status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS
+            if not retryable or attempt >= self.retries:
+                break
+
+            delay = self._backoff(attempt, response.headers.get('Retry-After'))
+            await response.aclose()
+            if time.monotonic() + delay >= deadline:
+                raise TransportTimeoutError(
+                    f"{method} {url} returned {response.status_code} with no time left to retry"
+                )
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def aiter_bytes(self, response, chunk_size=64 * 1024):
+        """
+        Iterate over a streamed response within the total timeout.
+
+        Args:
+            response (httpx.Response): Response opened with stream()
+            chunk_size (int): Size of the chunks to read
+
+        Yields:
+            bytes: Chunks of the response body
+
+        Raises:
+            TransportTimeoutError: If the download exceeds the total timeout
+        """
+        deadline = time.monotonic() + self.total_timeout
+        chunks = response.aiter_bytes(chunk_size=chunk_size)
+        while True:
+            try:
+                # Each read waits at most for the rest of the total timeout
+                chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - time.monotonic()))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError as e:
+                await response.aclose()
+                raise TransportTimeoutError(
+                    f"Download of {response.url} took longer than {self.total_timeout}s"
+                ) from e
+            yield chunk
+
+    async def aclose(self):
+        """Close all pooled connections."""
+        await self.client.aclose()
+
+    def _backoff(self, attempt, retry_after):
+        """Return the delay before the next attempt, honouring Retry-After up to the maximum backoff."""
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff_factor * (2 ** attempt) + random.uniform(0, self.jitter)
+        return min(delay, self.backoff_max)
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value (str): Header value, either seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport():
+    """
+    Return the transport shared by the whole process.
+
+    Returns:
+        HttpTransport: The shared transport
+    """
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
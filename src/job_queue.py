@@ -0,0 +1,309 @@
+"""
+Job queue module for running slash command work in the background.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is saturated."""
+
+
+class Job:
+    """A named unit of background work with JSON-serializable arguments."""
+
+    def __init__(self, name, kwargs, job_id=None):
+        """
+        Initialize a job.
+
+        Args:
+            name (str): Name of the registered handler to run
+            kwargs (dict): Keyword arguments passed to the handler
+            job_id (str, optional): Existing job ID, generated if omitted
+        """
+        self.id = job_id or uuid.uuid4().hex
+        self.name = name
+        self.kwargs = kwargs
+
+
+class InMemoryBackend:
+    """Job backend that keeps pending jobs in a bounded in-process queue."""
+
+    def __init__(self, max_size=100):
+        """
+        Initialize the in-memory backend.
+
+        Args:
+            max_size (int): Maximum number of pending jobs
+        """
+        self._queue = queue.Queue(maxsize=max_size)
+
+    def put(self, job):
+        """Add a job, raising QueueFullError if the queue is saturated."""
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFullError("Job queue is full")
+
+    def get(self, timeout):
+        """Return the next pending job, or None if none arrives in time."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def complete(self, job, error=None):
+        """Mark a job as finished. Nothing to record for in-memory jobs."""
+
+    def size(self):
+        """Return the number of pending jobs."""
+        return self._queue.qsize()
+
+
+class SQLiteBackend:
+    """
+    Job backend that persists jobs to SQLite so they survive restarts.
+
+    Jobs are claimed with a lease: a job left in the running state by a
+    crashed process becomes claimable again once its lease expires.
+    Completed jobs are removed; failed jobs are kept with their error for
+    a retention period, then pruned.
+    """
+
+    def __init__(self, path, max_size=100, lease_seconds=900, poll_interval=0.5,
+                 failed_retention_seconds=7 * 24 * 3600):
+        """
+        Initialize the SQLite backend.
+
+        Args:
+            path (str): Path to the SQLite database file
+            max_size (int): Maximum number of pending jobs
+            lease_seconds (float): Time after which a running job is reclaimed
+            poll_interval (float): Seconds between polls for new jobs
+            failed_retention_seconds (float): Time after which a failed job is deleted
+        """
+        self.max_size = max_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.failed_retention_seconds = failed_retention_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                claimed_at REAL,
+                error TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        with self._lock:
+            self._prune_failed()
+
+    def put(self, job):
+        """Persist a job, raising QueueFullError if the queue is saturated."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                (pending,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'pending'"
+                ).fetchone()
+                if pending >= self.max_size:
+                    raise QueueFullError("Job queue is full")
+                self._conn.execute(
+                    "INSERT INTO jobs (id, name, payload, status, created_at) VALUES (?, ?, ?, 'pending', ?)",
+                    (job.id, job.name, json.dumps(job.kwargs), time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, timeout):
+        """Claim the oldest pending job, or return None if none arrives in time."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self._claim()
+            if job or time.monotonic() >= deadline:
+                return job
+            time.sleep(min(self.poll_interval, max(0, deadline - time.monotonic())))
+
+    def _claim(self):
+        """Atomically move one claimable job to the running state."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """
+                    SELECT id, name, payload FROM jobs
+                    WHERE status = 'pending' OR (status = 'running' AND claimed_at < ?)
+                    ORDER BY created_at LIMIT 1
+                    """,
+                    (now - self.lease_seconds,)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', claimed_at = ? WHERE id = ?",
+                        (now, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if not row:
+            return None
+        return Job(row[1], json.loads(row[2]), job_id=row[0])
+
+    def complete(self, job, error=None):
+        """Remove a finished job, or keep it as failed with its error message."""
+        with self._lock:
+            if error is None:
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (job.id,))
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ? WHERE id = ?",
+                    (error, job.id)
+                )
+                self._prune_failed()
+
+    def _prune_failed(self):
+        """Delete failed jobs that ran longer ago than the retention period. Caller holds the lock."""
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status = 'failed' AND claimed_at < ?",
+            (time.time() - self.failed_retention_seconds,)
+        )
+
+    def size(self):
+        """Return the number of pending jobs."""
+        with self._lock:
+            (pending,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'pending'"
+            ).fetchone()
+        return pending
+
+
+class JobQueue:
+    """Bounded worker pool that drains jobs from a pluggable backend."""
+
+    def __init__(self, backend, workers=4):
+        """
+        Initialize the job queue.
+
+        Args:
+            backend: Storage backend (InMemoryBackend or SQLiteBackend)
+            workers (int): Number of worker threads processing jobs
+        """
+        self.backend = backend
+        self.workers = workers
+        self._handlers = {}
+        self._threads = []
+        self._stopping = threading.Event()
+        self._drain = True
+
+    def register(self, name, handler):
+        """
+        Register a handler for jobs with the given name.
+
+        Args:
+            name (str): Job name
+            handler (callable): Function called with the job's keyword arguments
+        """
+        self._handlers[name] = handler
+
+    def start(self):
+        """Start the worker threads."""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def enqueue(self, name, **kwargs):
+        """
+        Submit a job for background processing.
+
+        Args:
+            name (str): Name of a registered handler
+            **kwargs: JSON-serializable arguments for the handler
+
+        Returns:
+            Job: The submitted job
+
+        Raises:
+            QueueFullError: If the queue is saturated or shutting down
+        """
+        if name not in self._handlers:
+            raise ValueError(f"No handler registered for job '{name}'")
+        if self._stopping.is_set():
+            raise QueueFullError("Job queue is shutting down")
+
+        job = Job(name, kwargs)
+        self.backend.put(job)
+        return job
+
+    def depth(self):
+        """Return the number of jobs waiting to be processed."""
+        return self.backend.size()
+
+    def shutdown(self, drain=True, timeout=None):
+        """
+        Stop accepting jobs and wait for the workers to finish.
+
+        Args:
+            drain (bool): Process the remaining pending jobs before stopping
+            timeout (float, optional): Maximum seconds to wait for the workers
+        """
+        self._drain = drain
+        self._stopping.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            thread.join(remaining)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        if self._threads:
+            logger.warning(f"{len(self._threads)} job workers still running after shutdown timeout")
+
+    def _worker_loop(self):
+        """Process jobs until the queue is stopped."""
+        while True:
+            if self._stopping.is_set() and not self._drain:
+                return
+
+            job = self.backend.get(timeout=0.5)
+            if job is None:
+                if self._stopping.is_set():
+                    return
+                continue
+
+            self._run(job)
+
+    def _run(self, job):
+        """Run a single job and record its outcome."""
+        handler = self._handlers.get(job.name)
+        if handler is None:
+            logger.error(f"No handler registered for job '{job.name}'")
+            self.backend.complete(job, error="No handler registered")
+            return
+
+        try:
+            handler(**job.kwargs)
+        except Exception as e:
+            logger.error(f"Error running job {job.id} ({job.name}): {str(e)}", exc_info=True)
+            self.backend.complete(job, error=str(e))
+        else:
+            self.backend.complete(job)
@@ -0,0 +1,128 @@
+"""
+Message cache module for reusing Slack thread parent messages across requests.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Message subtypes that are ordinary posts and can start a thread
+PARENT_SUBTYPES = {None, 'bot_message', 'file_share', 'thread_broadcast', 'me_message'}
+
+
+class MessageCache:
+    """
+    In-memory cache of Slack messages with TTL and LRU eviction, keyed by (channel, ts).
+
+    Entries come from API lookups and from message events, which also keep
+    them current when a message is edited or deleted.
+    """
+
+    def __init__(self, max_entries=1000, ttl=900):
+        """
+        Initialize the message cache.
+
+        Args:
+            max_entries (int): Maximum number of cached messages
+            ttl (float): Seconds a message stays valid after it is stored
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (channel, ts) -> (stored_at, message), least recently used first
+        self._entries = OrderedDict()
+
+    def get(self, channel, ts):
+        """
+        Look up a message.
+
+        Args:
+            channel (str): Channel ID
+            ts (str): Message timestamp
+
+        Returns:
+            dict: The cached message, or None on a miss
+        """
+        key = (channel, ts)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, channel, ts, message):
+        """
+        Store a message.
+
+        Args:
+            channel (str): Channel ID
+            ts (str): Message timestamp
+            message (dict): Message data
+        """
+        with self._lock:
+            self._entries[(channel, ts)] = (time.monotonic(), message)
+            self._entries.move_to_end((channel, ts))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, channel, ts):
+        """
+        Remove a message.
+
+        Args:
+            channel (str): Channel ID
+            ts (str): Message timestamp
+        """
+        with self._lock:
+            self._entries.pop((channel, ts), None)
+
+    def observe_event(self, event):
+        """
+        Update the cache from a Slack `message` event.
+
+        New top-level messages are stored, so a later /summary in their thread
+        needs no lookup. Edits replace cached messages and deletions remove them.
+
+        Args:
+            event (dict): The `event` of an event_callback payload
+        """
+        if event.get('type') != 'message' or not event.get('channel'):
+            return
+        channel = event['channel']
+        subtype = event.get('subtype')
+
+        if subtype == 'message_deleted':
+            self.invalidate(channel, event.get('deleted_ts'))
+        elif subtype == 'message_changed':
+            message = event.get('message') or {}
+            if message.get('ts') and self._is_parent(message):
+                self.put(channel, message['ts'], message)
+        elif subtype in PARENT_SUBTYPES and event.get('ts') and self._is_parent(event):
+            self.put(channel, event['ts'], event)
+
+    def stats(self):
+        """
+        Report cache activity.
+
+        Returns:
+            dict: Hits, misses and cached messages
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    @staticmethod
+    def _is_parent(message):
+        """Return True if the message is not a reply within a thread."""
+        thread_ts = message.get('thread_ts')
+        return not thread_ts or thread_ts == message.get('ts')
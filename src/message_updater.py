@@ -0,0 +1,216 @@
+"""
+Message updater module for progressively editing a Slack message within rate limits.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottledMessageUpdater:
+    """
+    Progressively updates one Slack message, at most once per interval.
+
+    Updates arriving faster than the interval are batched: only the latest
+    text is sent when the interval has passed. Sending happens on a
+    background thread, so callers streaming text are never held up by Slack.
+    Failed intermediate updates are logged and skipped; finish() reports
+    whether the final text made it, so callers can post it another way.
+    """
+
+    def __init__(self, slack_client, channel, ts, min_interval=1.5):
+        """
+        Initialize the updater.
+
+        Args:
+            slack_client (SlackClient): Slack client
+            channel (str): Channel ID
+            ts (str): Timestamp of the message to update
+            min_interval (float): Minimum seconds between two updates
+        """
+        self.slack_client = slack_client
+        self.channel = channel
+        self.ts = ts
+        self.min_interval = min_interval
+        self.updates_sent = 0
+        self._pending = None
+        self._closed = False
+        self._last_sent = 0.0
+        self._last_ok = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def update(self, text):
+        """
+        Schedule the message to show the given text.
+
+        Args:
+            text (str): Latest message text
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._pending = text
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="message-updater", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def finish(self, text):
+        """
+        Show the final text and stop updating.
+
+        Waits for the minimum interval since the previous update, then sends
+        the final text.
+
+        Args:
+            text (str): Final message text
+
+        Returns:
+            bool: True if the message shows the final text, False if the update failed
+        """
+        with self._condition:
+            self._pending = text
+            self._closed = True
+            thread = self._thread
+            self._condition.notify()
+
+        if thread is None:
+            self._send(text)
+        else:
+            thread.join()
+        return self._last_ok
+
+    def cancel(self):
+        """Stop updating without sending any pending text."""
+        with self._condition:
+            self._pending = None
+            self._closed = True
+            self._condition.notify()
+
+    def _run(self):
+        """Send the latest pending text whenever the interval allows."""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                # Let more text accumulate until the interval has passed
+                while True:
+                    remaining = self._last_sent + self.min_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                text, self._pending = self._pending, None
+
+            self._send(text)
+
+    def _send(self, text):
+        """Update the message, logging rather than raising on errors."""
+        try:
+            self.slack_client.update_message(channel=self.channel, ts=self.ts, text=text)
+            self.updates_sent += 1
+            self._last_ok = True
+        except Exception as e:
+            logger.error(f"Error updating message {self.ts}: {str(e)}")
+            self._last_ok = False
+        self._last_sent = time.monotonic()
+
+
+class AsyncThrottledMessageUpdater:
+    """
+    Asyncio counterpart of ThrottledMessageUpdater.
+
+    update() must be called on the event loop; sending happens in a task.
+    """
+
+    def __init__(self, slack_client, channel, ts, min_interval=1.5):
+        """
+        Initialize the updater.
+
+        Args:
+            slack_client (SlackClient): Slack client
+            channel (str): Channel ID
+            ts (str): Timestamp of the message to update
+            min_interval (float): Minimum seconds between two updates
+        """
+        self.slack_client = slack_client
+        self.channel = channel
+        self.ts = ts
+        self.min_interval = min_interval
+        self.updates_sent = 0
+        self._pending = None
+        self._closed = False
+        self._last_sent = 0.0
+        self._last_ok = False
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def update(self, text):
+        """
+        Schedule the message to show the given text.
+
+        Args:
+            text (str): Latest message text
+        """
+        if self._closed:
+            return
+        self._pending = text
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        self._wakeup.set()
+
+    async def finish(self, text):
+        """
+        Show the final text and stop updating.
+
+        Args:
+            text (str): Final message text
+
+        Returns:
+            bool: True if the message shows the final text, False if the update failed
+        """
+        self._pending = text
+        self._closed = True
+        if self._task is None:
+            await self._send(text)
+        else:
+            self._wakeup.set()
+            await self._task
+        return self._last_ok
+
+    def cancel(self):
+        """Stop updating without sending any pending text."""
+        self._pending = None
+        self._closed = True
+        self._wakeup.set()
+
+    async def _run(self):
+        """Send the latest pending text whenever the interval allows."""
+        while True:
+            while self._pending is None and not self._closed:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            if self._pending is None:
+                return
+            # Let more text accumulate until the interval has passed
+            remaining = self._last_sent + self.min_interval - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            text, self._pending = self._pending, None
+            await self._send(text)
+
+    async def _send(self, text):
+        """Update the message, logging rather than raising on errors."""
+        try:
+            await self.slack_client.aupdate_message(channel=self.channel, ts=self.ts, text=text)
+            self.updates_sent += 1
+            self._last_ok = True
+        except Exception as e:
+            logger.error(f"Error updating message {self.ts}: {str(e)}")
+            self._last_ok = False
+        self._last_sent = time.monotonic()
@@ -0,0 +1,371 @@
+"""
+Metrics module for timing pipeline stages and exporting them in the Prometheus text format.
+"""
+
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.context import Context
+except ImportError:  # Optional, stages are only timed without it
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram buckets in seconds, from a cache lookup to a long summary pass
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_value(value):
+    """Format a sample value."""
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values):
+    """Format a label set, escaping the values."""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Metric:
+    """
+    A named metric with one value per label set.
+
+    Values are either recorded as they happen or computed when the metrics
+    are collected, by a function set with set_function().
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Initialize the metric.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        self._function = None
+
+    def set_function(self, function):
+        """
+        Compute the values at collection time.
+
+        Args:
+            function (callable): Returns a dict of label value tuples to values
+        """
+        self._function = function
+
+    def _key(self, labels):
+        """Return the label value tuple of a label set."""
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """
+        Return the current samples.
+
+        Returns:
+            list: (name suffix, label names, label values, value) tuples
+        """
+        if self._function is not None:
+            try:
+                values = self._function()
+            except Exception as e:
+                logger.error(f"Error collecting {self.name}: {str(e)}")
+                return []
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [('', self.labelnames, key, value) for key, value in sorted(values.items())]
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter.
+
+        Args:
+            amount (float): Amount to add
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """
+        Set the gauge.
+
+        Args:
+            value (float): New value
+            **labels: Label values
+        """
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Counts observations in cumulative buckets, with their sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Names of the labels
+            buckets (tuple): Upper bounds of the buckets
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """
+        Record an observation.
+
+        Args:
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        """Return the bucket, sum and count samples."""
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        samples = []
+        for key, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                samples.append(('_bucket', self.labelnames + ('le',), key + (_format_value(bound),), count))
+            samples.append(('_sum', self.labelnames, key, total))
+            samples.append(('_count', self.labelnames, key, counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Holds the metrics of the process and renders them for Prometheus."""
+
+    def __init__(self):
+        """Initialize the registry."""
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def counter(self, name, documentation, labelnames=()):
+        """Register a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        """Register a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Register a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, names, values, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        """Add a metric, refusing duplicate names."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'paper_summarizer_stage_seconds', 'Seconds spent in each stage of the summary pipeline', ['stage']
+)
+STAGE_ERRORS = REGISTRY.counter(
+    'paper_summarizer_stage_errors_total', 'Pipeline stages that raised an error', ['stage']
+)
+OPENAI_TOKENS = REGISTRY.counter(
+    'paper_summarizer_openai_tokens_total',
+    'OpenAI tokens used by each stage, estimated when the API does not report usage', ['stage', 'kind']
+)
+DOWNLOADED_BYTES = REGISTRY.counter(
+    'paper_summarizer_downloaded_bytes_total', 'Bytes of papers downloaded', ['kind']
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'paper_summarizer_cache_lookups_total', 'Cache lookups by cache and result (hit or miss)', ['cache', 'result']
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    'paper_summarizer_queue_depth', 'Work waiting or in flight', ['queue']
+)
+
+# Callables notified of every finished stage, e.g. by benchmarks
+_stage_listeners = []
+
+
+def add_stage_listener(listener):
+    """
+    Call a function whenever a stage or request finishes.
+
+    Args:
+        listener (callable): Called with the stage name, its duration in seconds,
+            whether it raised an error and the span attributes
+    """
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener):
+    """
+    Stop notifying a stage listener.
+
+    Args:
+        listener (callable): Listener passed to add_stage_listener()
+    """
+    _stage_listeners.remove(listener)
+
+
+def _record(stage, seconds, error, attributes):
+    """Record a finished stage and notify the listeners."""
+    if error:
+        STAGE_ERRORS.inc(stage=stage)
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    for listener in list(_stage_listeners):
+        try:
+            listener(stage, seconds, error, attributes)
+        except Exception as e:
+            logger.error(f"Error in stage listener: {str(e)}")
+
+
+@contextmanager
+def span(stage, **attributes):
+    """
+    Time a pipeline stage, and trace it when OpenTelemetry is installed.
+
+    Args:
+        stage (str): Stage name, used as the metric label and span name
+        **attributes: Span attributes
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        if trace is None:
+            yield
+        else:
+            with trace.get_tracer(__name__).start_as_current_span(stage, attributes=attributes):
+                yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _record(stage, time.perf_counter() - start, error, attributes)
+
+
+@contextmanager
+def trace_request(name, **attributes):
+    """
+    Time a request and start a new trace for it when OpenTelemetry is installed.
+
+    Spans of the stages run within the request, including those in worker
+    threads started from a copied context, share the request's trace ID.
+
+    Args:
+        name (str): Request name, used as the metric label and span name
+        **attributes: Span attributes
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        if trace is None:
+            yield
+        else:
+            tracer = trace.get_tracer(__name__)
+            with tracer.start_as_current_span(name, context=Context(), attributes=attributes) as request_span:
+                trace_id = request_span.get_span_context().trace_id
+                if trace_id:
+                    logger.info(f"Tracing {name} as trace {trace_id:032x}")
+                yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _record(name, time.perf_counter() - start, error, attributes)
+
+
+def setup_tracing(service_name='paper-summarizer'):
+    """
+    Export spans over OTLP/HTTP, configured by the standard OTEL_EXPORTER_OTLP_* variables.
+
+    Args:
+        service_name (str): Service name reported with the spans
+
+    Returns:
+        bool: True if trace export was set up
+    """
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger.warning(
+            "Trace export needs opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http, not exporting traces"
+        )
+        return False
+
+    provider = TracerProvider(resource=Resource.create({'service.name': service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Exporting traces of {service_name} over OTLP")
+    return True
@@ -0,0 +1,190 @@
+"""
+OpenAI Batch API module for running many chat completions offline at batch prices.
+"""
+
+import json
+import time
+import logging
+from http_transport import get_default_transport
+
+logger = logging.getLogger(__name__)
+
+# Batch statuses after which the batch will not change any more
+FINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+class BatchApiError(Exception):
+    """Raised when the Batch API rejects a request or a batch does not complete."""
+
+
+class OpenAIBatchClient:
+    """
+    Client for the OpenAI Batch API over plain HTTP.
+
+    A batch is a JSONL file of chat completion requests, each with a
+    custom_id. It is uploaded, submitted, polled until it finishes (within
+    the completion window, usually much later than an interactive call), and
+    its output file is read back and matched to the requests by custom_id.
+    """
+
+    def __init__(self, api_key, base_url='https://api.openai.com/v1', transport=None, poll_interval=30,
+                 completion_window='24h'):
+        """
+        Initialize the batch client.
+
+        Args:
+            api_key (str): OpenAI API key
+            base_url (str): Base URL of the OpenAI API
+            transport (HttpTransport, optional): HTTP transport for the API calls
+            poll_interval (float): Seconds between two status checks of a batch
+            completion_window (str): Time within which the batch should complete
+        """
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.transport = transport or get_default_transport()
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    def run(self, requests, timeout=None, metadata=None):
+        """
+        Submit chat completion requests as one batch and wait for the results.
+
+        Args:
+            requests (dict): custom_id -> request body for /v1/chat/completions
+            timeout (float, optional): Maximum seconds to wait for the batch
+            metadata (dict, optional): Metadata stored with the batch
+
+        Returns:
+            dict: custom_id -> generated text, or None for requests that failed
+        """
+        lines = [
+            json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': '/v1/chat/completions', 'body': body})
+            for custom_id, body in requests.items()
+        ]
+        input_file_id = self.upload_file('\n'.join(lines) + '\n')
+        batch = self.create_batch(input_file_id, metadata=metadata)
+        logger.info(f"Submitted batch {batch['id']} with {len(lines)} requests")
+
+        batch = self.wait(batch['id'], timeout=timeout)
+        if batch['status'] != 'completed':
+            raise BatchApiError(f"Batch {batch['id']} ended with status {batch['status']}")
+
+        results = dict.fromkeys(requests)
+        if batch.get('output_file_id'):
+            for line in self.file_content(batch['output_file_id']).splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get('response') or {}
+                if response.get('status_code') == 200:
+                    content = response['body']['choices'][0]['message']['content']
+                    results[result['custom_id']] = (content or '').strip()
+                else:
+                    logger.error(f"Batch request {result['custom_id']} failed: {result.get('error') or response}")
+        failed = sum(1 for text in results.values() if text is None)
+        if failed:
+            logger.warning(f"{failed} of {len(requests)} requests in batch {batch['id']} failed")
+        return results
+
+    def upload_file(self, content):
+        """
+        Upload a batch input file.
+
+        Args:
+            content (str): JSONL requests
+
+        Returns:
+            str: ID of the uploaded file
+        """
+        response = self._request(
+            'POST', '/files',
+            data={'purpose': 'batch'},
+            files={'file': ('batch.jsonl', content.encode('utf-8'), 'application/jsonl')}
+        )
+        return response['id']
+
+    def create_batch(self, input_file_id, metadata=None):
+        """
+        Create a batch from an uploaded input file.
+
+        Args:
+            input_file_id (str): ID of the uploaded JSONL file
+            metadata (dict, optional): Metadata stored with the batch
+
+        Returns:
+            dict: The batch
+        """
+        body = {
+            'input_file_id': input_file_id,
+            'endpoint': '/v1/chat/completions',
+            'completion_window': self.completion_window
+        }
+        if metadata:
+            body['metadata'] = metadata
+        return self._request('POST', '/batches', json=body)
+
+    def get_batch(self, batch_id):
+        """
+        Retrieve a batch.
+
+        Args:
+            batch_id (str): Batch ID
+
+        Returns:
+            dict: The batch
+        """
+        return self._request('GET', f"/batches/{batch_id}")
+
+    def wait(self, batch_id, timeout=None):
+        """
+        Poll a batch until it reaches a final status.
+
+        Args:
+            batch_id (str): Batch ID
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            dict: The finished batch
+
+        Raises:
+            BatchApiError: If the batch is still running after the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            batch = self.get_batch(batch_id)
+            if batch['status'] in FINAL_STATUSES:
+                return batch
+            counts = batch.get('request_counts') or {}
+            logger.info(
+                f"Batch {batch_id} is {batch['status']}: "
+                f"{counts.get('completed', 0)} of {counts.get('total', '?')} requests done"
+            )
+            if deadline is not None and time.monotonic() + self.poll_interval > deadline:
+                raise BatchApiError(f"Batch {batch_id} did not finish within {timeout}s")
+            time.sleep(self.poll_interval)
+
+    def file_content(self, file_id):
+        """
+        Download the content of a file.
+
+        Args:
+            file_id (str): File ID
+
+        Returns:
+            str: File content
+        """
+        response = self.transport.get(f"{self.base_url}/files/{file_id}/content", headers=self._headers())
+        if response.status_code >= 400:
+            raise BatchApiError(f"Could not download file {file_id}: {response.status_code} {response.text}")
+        return response.text
+
+    def _request(self, method, path, **kwargs):
+        """Call the API and return the JSON response, raising BatchApiError on errors."""
+        response = self.transport.request(method, f"{self.base_url}{path}", headers=self._headers(), **kwargs)
+        if response.status_code >= 400:
+            raise BatchApiError(f"{method} {path} failed: {response.status_code} {response.text}")
+        return response.json()
+
+    def _headers(self):
+        """Return the authorization headers."""
+        return {'Authorization': f"Bearer {self.api_key}"}
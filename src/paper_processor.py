@@ -2,29 +2,88 @@
 Paper processor module for extracting and processing academic papers.
 """
 
-import re
+import sys
+import asyncio
+import hashlib
 import logging
-import requests
-from bs4 import BeautifulSoup
-import PyPDF2
-from io import BytesIO
+import tempfile
+from http_transport import get_default_transport
+from pdf_extraction import SerialExtractionEngine, ExtractionLimits
+from html_extraction import extract_html
+from section_parser import parse_sections
+from metrics import span, DOWNLOADED_BYTES
+from arxiv_fetcher import ArxivFetcher
+from url_utils import (
+    parse_arxiv_id, parse_doi, arxiv_id_from_doi, unversioned_arxiv_id, normalize_url, scan_links,
+    host_in_domains, classify_url, ACADEMIC_DOMAINS, LINK_ARXIV, LINK_DOI, LINK_PDF
+)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
 
 logger = logging.getLogger(__name__)
 
+
+class PaperTooLargeError(Exception):
+    """Raised when a paper exceeds the configured download size."""
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident set size of this process.
+    
+    This is the high-water mark over the life of the process, shared by
+    concurrent requests, and leaves out PDF extraction worker processes.
+    
+    Returns:
+        float: Peak RSS in megabytes, or 0 if it cannot be measured
+    """
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
 class PaperProcessor:
     """Processor for extracting and handling academic paper content."""
     
-    def __init__(self):
-        """Initialize the paper processor."""
+    def __init__(self, cache=None, max_download_bytes=50 * 1024 * 1024, max_pages=200,
+                 extraction_engine=None, max_chars=None, stop_at_references=False, transport=None,
+                 async_transport=None, arxiv_fetcher=None, arxiv_latest_ttl=24 * 3600):
+        """
+        Initialize the paper processor.
+        
+        Args:
+            cache (ExtractionCache, optional): Cache of previously extracted papers
+            max_download_bytes (int): Largest PDF that will be downloaded
+            max_pages (int): Maximum number of PDF pages to extract text from
+            extraction_engine (optional): PDF text extraction engine, serial by default
+            max_chars (int, optional): Stop extracting PDF pages after this many characters
+            stop_at_references (bool): Stop extracting PDF pages after the references heading
+            transport (HttpTransport, optional): HTTP transport, the shared one by default
+            async_transport (AsyncHttpTransport, optional): HTTP transport used by aextract_paper_content
+            arxiv_fetcher (ArxivFetcher, optional): Fetcher of arXiv metadata and sources
+            arxiv_latest_ttl (float): Seconds the cached extraction of an arXiv link without a
+                version is used before checking for a newer version
+        """
+        self.cache = cache
+        self.max_download_bytes = max_download_bytes
+        self.max_pages = max_pages
+        self.extraction_engine = extraction_engine or SerialExtractionEngine()
+        self.max_chars = max_chars
+        self.stop_at_references = stop_at_references
+        self.transport = transport or get_default_transport()
+        self.async_transport = async_transport
+        self.arxiv_fetcher = arxiv_fetcher or ArxivFetcher(
+            transport=self.transport, async_transport=async_transport, max_source_bytes=max_download_bytes
+        )
+        self.arxiv_latest_ttl = arxiv_latest_ttl
+        
         # Common academic paper domains
-        self.academic_domains = [
-            'arxiv.org', 'ieee.org', 'acm.org', 'springer.com', 
-            'sciencedirect.com', 'nature.com', 'researchgate.net',
-            'ssrn.com', 'biorxiv.org', 'medrxiv.org', 'pnas.org',
-            'acs.org', 'wiley.com', 'tandfonline.com', 'sagepub.com',
-            'oup.com', 'frontiersin.org', 'mdpi.com', 'plos.org',
-            'hindawi.com', 'elsevier.com', 'semanticscholar.org'
-        ]
+        self.academic_domains = ACADEMIC_DOMAINS
         
         # User agent for requests
         self.headers = {
@@ -43,18 +102,47 @@ class PaperProcessor:
         """
         if not text:
             return None
-            
-        # Regular expression to find URLs
-        url_pattern = r'https?://[^\s<>"]+|www\.[^\s<>"]+'
-        urls = re.findall(url_pattern, text)
         
         # Check if any URL is from an academic domain
-        for url in urls:
-            if any(domain in url.lower() for domain in self.academic_domains):
+        first_url = None
+        for url, host in scan_links(text):
+            if host_in_domains(host, self.academic_domains):
                 return url
-                
+            if first_url is None:
+                first_url = url
+        
         # If no academic domain found, return the first URL as a fallback
-        return urls[0] if urls else None
+        return first_url
+    
+    def extract_paper_urls(self, text):
+        """
+        Extract every academic paper URL from text.
+        
+        Links are deduplicated by their normalized form, so an arXiv abstract
+        and PDF link of the same paper count once. Slack link labels
+        ("<url|label>") and trailing punctuation are dropped.
+        
+        Args:
+            text (str): Text to extract URLs from
+        
+        Returns:
+            list: Paper URLs in the order they first appear; the first URL of the
+                text if none is from an academic domain, or an empty list if there is no URL
+        """
+        if not text:
+            return []
+        
+        papers = {}
+        first_url = None
+        for url, host in scan_links(text):
+            if host_in_domains(host, self.academic_domains):
+                papers.setdefault(normalize_url(url), url)
+            elif first_url is None:
+                first_url = url
+        
+        if not papers:
+            return [first_url] if first_url else []
+        return list(papers.values())
     
     def extract_paper_content(self, url):
         """
@@ -66,36 +154,245 @@ class PaperProcessor:
         Returns:
             dict: Paper content with title, abstract, sections, etc.
         """
-        try:
-            # Handle different types of papers based on URL
-            if 'arxiv.org' in url.lower():
-                return self._extract_arxiv_paper(url)
-            elif url.lower().endswith('.pdf'):
-                return self._extract_pdf_paper(url)
-            else:
-                return self._extract_html_paper(url)
+        with span('extract_paper_content', url=url):
+            try:
+                if self.cache:
+                    content = self.cache.get(url)
+                    if content:
+                        logger.info(f"Using cached extraction for {url}")
+                        return content
+                
+                # Handle different types of papers based on URL
+                paper_url = url
+                if classify_url(paper_url) == LINK_DOI:
+                    paper_url = self._resolve_doi(paper_url)
+                kind = classify_url(paper_url)
+                if kind == LINK_ARXIV:
+                    content = self._extract_arxiv_paper(paper_url)
+                elif kind == LINK_PDF:
+                    content = self._extract_pdf_paper(paper_url)
+                else:
+                    content = self._extract_html_paper(paper_url)
                 
+                if self.cache and content:
+                    self._cache_put(url, content)
+                return content
+                
+            except Exception as e:
+                logger.error(f"Error extracting paper content: {str(e)}", exc_info=True)
+                return None
+    
+    async def aextract_paper_content(self, url):
+        """
+        Extract content from an academic paper URL without blocking the event loop.
+        
+        Downloads go through the async transport; cache lookups and PDF/HTML
+        parsing run in a worker thread.
+        
+        Args:
+            url (str): URL of the paper
+            
+        Returns:
+            dict: Paper content with title, abstract, sections, etc.
+        """
+        if self.async_transport is None:
+            return await asyncio.to_thread(self.extract_paper_content, url)
+        
+        with span('extract_paper_content', url=url):
+            try:
+                if self.cache:
+                    content = await asyncio.to_thread(self.cache.get, url)
+                    if content:
+                        logger.info(f"Using cached extraction for {url}")
+                        return content
+                
+                paper_url = url
+                if classify_url(paper_url) == LINK_DOI:
+                    paper_url = await self._aresolve_doi(paper_url)
+                kind = classify_url(paper_url)
+                if kind == LINK_ARXIV:
+                    content = await self._aextract_arxiv_paper(paper_url)
+                elif kind == LINK_PDF:
+                    content = await self._aextract_pdf_paper(paper_url)
+                else:
+                    content = await self._aextract_html_paper(paper_url)
+                
+                if self.cache and content:
+                    await asyncio.to_thread(self._cache_put, url, content)
+                return content
+                
+            except Exception as e:
+                logger.error(f"Error extracting paper content: {str(e)}", exc_info=True)
+                return None
+    
+    def _resolve_doi(self, url):
+        """
+        Resolve a doi.org link to the publisher page it redirects to.
+        
+        DOIs arXiv registered map to the arXiv paper without a request. If
+        resolution fails, the doi.org link is returned and fetched as a page.
+        
+        Args:
+            url (str): doi.org URL
+        
+        Returns:
+            str: URL of the paper
+        """
+        arxiv_id = arxiv_id_from_doi(parse_doi(url))
+        if arxiv_id:
+            return f"https://arxiv.org/abs/{arxiv_id}"
+        
+        try:
+            with span('resolve_doi', url=url):
+                response = self.transport.request('HEAD', url, headers=self.headers, allow_redirects=True)
+                response.close()
         except Exception as e:
-            logger.error(f"Error extracting paper content: {str(e)}", exc_info=True)
-            return None
+            logger.warning(f"Could not resolve {url}: {str(e)}")
+            return url
+        
+        # Publishers that refuse HEAD requests still show where the DOI redirects
+        logger.info(f"Resolved {url} to {response.url}")
+        return response.url or url
+    
+    async def _aresolve_doi(self, url):
+        """
+        Resolve a doi.org link to the publisher page it redirects to, using the async transport.
+        
+        Args:
+            url (str): doi.org URL
+        
+        Returns:
+            str: URL of the paper
+        """
+        arxiv_id = arxiv_id_from_doi(parse_doi(url))
+        if arxiv_id:
+            return f"https://arxiv.org/abs/{arxiv_id}"
+        
+        try:
+            with span('resolve_doi', url=url):
+                response = await self.async_transport.request('HEAD', url, headers=self.headers)
+        except Exception as e:
+            logger.warning(f"Could not resolve {url}: {str(e)}")
+            return url
+        
+        logger.info(f"Resolved {url} to {response.url}")
+        return str(response.url) or url
+    
+    def _arxiv_pdf_url(self, url):
+        """Return the PDF URL of an arXiv paper."""
+        # Convert to PDF URL if it's an abstract page
+        if '/abs/' in url:
+            return url.replace('/abs/', '/pdf/') + '.pdf'
+        return url
     
     def _extract_arxiv_paper(self, url):
         """
         Extract content from an arXiv paper.
         
+        The title, abstract and latest version come from the arXiv API, and
+        the text from the LaTeX source, or from the PDF when the paper has no
+        usable source.
+        
         Args:
             url (str): arXiv paper URL
             
         Returns:
             dict: Paper content
         """
-        # Convert to PDF URL if it's an abstract page
-        if '/abs/' in url:
-            pdf_url = url.replace('/abs/', '/pdf/') + '.pdf'
-        else:
-            pdf_url = url
+        arxiv_id = parse_arxiv_id(url)
+        if arxiv_id is None:
+            return self._extract_pdf_paper(self._arxiv_pdf_url(url))
+        
+        metadata = self.arxiv_fetcher.fetch_metadata(arxiv_id)
+        if metadata and metadata['id'] != arxiv_id:
+            cached = self._get_cached_version(metadata['id'])
+            if cached:
+                return cached
+        arxiv_id = metadata['id'] if metadata else arxiv_id
+        content = None
+        if self.arxiv_fetcher.prefer_source:
+            content = self.arxiv_fetcher.fetch_source(arxiv_id)
+        if content is None:
+            content = self._extract_pdf_paper(self.arxiv_fetcher.pdf_url(arxiv_id))
+        return self._with_arxiv_metadata(content, arxiv_id, metadata)
+    
+    async def _aextract_arxiv_paper(self, url):
+        """
+        Extract content from an arXiv paper using the async transport.
+        
+        Args:
+            url (str): arXiv paper URL
+        
+        Returns:
+            dict: Paper content
+        """
+        arxiv_id = parse_arxiv_id(url)
+        if arxiv_id is None:
+            return await self._aextract_pdf_paper(self._arxiv_pdf_url(url))
+        
+        metadata = await self.arxiv_fetcher.afetch_metadata(arxiv_id)
+        if metadata and metadata['id'] != arxiv_id:
+            cached = await asyncio.to_thread(self._get_cached_version, metadata['id'])
+            if cached:
+                return cached
+        arxiv_id = metadata['id'] if metadata else arxiv_id
+        content = None
+        if self.arxiv_fetcher.prefer_source:
+            content = await self.arxiv_fetcher.afetch_source(arxiv_id)
+        if content is None:
+            content = await self._aextract_pdf_paper(self.arxiv_fetcher.pdf_url(arxiv_id))
+        return self._with_arxiv_metadata(content, arxiv_id, metadata)
+    
+    def _get_cached_version(self, arxiv_id):
+        """
+        Look up the extraction of a version of an arXiv paper.
+        
+        Args:
+            arxiv_id (str): arXiv identifier with its version
             
-        return self._extract_pdf_paper(pdf_url)
+        Returns:
+            dict: Cached paper content, or None if not cached
+        """
+        if not self.cache:
+            return None
+        
+        cached = self.cache.get(f"https://arxiv.org/abs/{arxiv_id}")
+        if cached:
+            logger.info(f"Latest version {arxiv_id} matches a cached extraction")
+        return cached
+    
+    def _cache_put(self, url, content):
+        """
+        Cache extracted content under the URL it was requested by.
+        
+        A link to the latest version of an arXiv paper is aliased only for
+        arxiv_latest_ttl, so a newer version is picked up after that; the
+        version that was extracted is cached for good under its own link.
+        
+        Args:
+            url (str): URL the paper was requested by
+            content (dict): Paper content
+        """
+        ttl = self._alias_ttl(url)
+        self.cache.put(url, content, ttl=ttl)
+        arxiv_id = content.get('arxiv_id')
+        if ttl is not None and arxiv_id and content.get('content_hash') and not unversioned_arxiv_id(arxiv_id):
+            self.cache.alias(f"https://arxiv.org/abs/{arxiv_id}", content['content_hash'])
+    
+    def _alias_ttl(self, url):
+        """Return the seconds a cache alias of the URL is valid, None for links that always show the same paper."""
+        return self.arxiv_latest_ttl if unversioned_arxiv_id(url) else None
+    
+    def _with_arxiv_metadata(self, content, arxiv_id, metadata):
+        """Add the arXiv ID, and the title and abstract from the API, to extracted content."""
+        if not content:
+            return content
+        content['arxiv_id'] = arxiv_id
+        if metadata:
+            content['title'] = metadata['title'] or content.get('title')
+            content['abstract'] = metadata['abstract'] or content.get('abstract')
+            content['authors'] = metadata['authors']
+        return content
     
     def _extract_pdf_paper(self, url):
         """
@@ -107,63 +404,67 @@ class PaperProcessor:
         Returns:
             dict: Paper content
         """
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        
-        # Read PDF content
-        pdf_file = BytesIO(response.content)
-        reader = PyPDF2.PdfReader(pdf_file)
-        
-        # Extract text from PDF
-        text = ""
-        for page_num in range(len(reader.pages)):
-            text += reader.pages[page_num].extract_text()
-        
-        # Basic parsing of PDF content
-        lines = text.split('\n')
-        title = lines[0].strip() if lines else "Unknown Title"
-        
-        # Try to extract abstract
-        abstract = ""
-        abstract_start = False
-        for line in lines:
-            if 'abstract' in line.lower():
-                abstract_start = True
-                continue
-            if abstract_start and line.strip() and not line.lower().startswith(('introduction', 'keywords')):
-                abstract += line + " "
-            if abstract_start and (line.lower().startswith('introduction') or line.lower().startswith('keywords')):
-                break
-        
-        # Extract sections
-        sections = {}
-        current_section = None
-        section_content = []
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Check if this is a section header (simple heuristic)
-            if (line.isupper() or line[0].isdigit()) and len(line) < 100:
-                if current_section and section_content:
-                    sections[current_section] = ' '.join(section_content)
-                    section_content = []
-                current_section = line
-            elif current_section:
-                section_content.append(line)
-                
-        # Add the last section
-        if current_section and section_content:
-            sections[current_section] = ' '.join(section_content)
+        with tempfile.NamedTemporaryFile(prefix='paper-', suffix='.pdf') as pdf_file:
+            content_hash, size = self._download_to_file(url, pdf_file)
+            
+            # Skip parsing if the same document was extracted from another URL
+            cached = self._get_cached_by_hash(content_hash, url)
+            if cached:
+                return cached
+            
+            return self._parse_pdf_file(pdf_file.name, url, content_hash, size)
+    
+    async def _aextract_pdf_paper(self, url):
+        """
+        Extract content from a PDF paper using the async transport.
+        
+        Args:
+            url (str): PDF paper URL
+            
+        Returns:
+            dict: Paper content
+        """
+        with tempfile.NamedTemporaryFile(prefix='paper-', suffix='.pdf') as pdf_file:
+            content_hash, size = await self._adownload_to_file(url, pdf_file)
+            
+            cached = await asyncio.to_thread(self._get_cached_by_hash, content_hash, url)
+            if cached:
+                return cached
+            
+            return await asyncio.to_thread(
+                self._parse_pdf_file, pdf_file.name, url, content_hash, size
+            )
+    
+    def _parse_pdf_file(self, path, url, content_hash, size):
+        """
+        Extract and index the text of a downloaded PDF.
+        
+        Args:
+            path (str): Path to the downloaded PDF
+            url (str): URL the PDF was downloaded from
+            content_hash (str): SHA-256 hex digest of the PDF
+            size (int): Size of the PDF in bytes
+            
+        Returns:
+            dict: Paper content
+        """
+        with span('parse', url=url):
+            # Extract text from PDF
+            limits = ExtractionLimits(max_chars=self.max_chars, stop_at_references=self.stop_at_references)
+            text = self.extraction_engine.extract_text(path, self.max_pages, limits)
+            
+            logger.info(f"Extracted {size} bytes from {url} (process peak RSS {peak_rss_mb():.1f} MB)")
+            
+            # Index the title, abstract and sections in one pass over the text
+            title, abstract, sections = parse_sections(text)
         
         return {
             'title': title,
             'abstract': abstract,
             'full_text': text,
-            'sections': sections,
-            'source_url': url
+            'sections': [section.to_dict() for section in sections],
+            'source_url': url,
+            'content_hash': content_hash
         }
     
     def _extract_html_paper(self, url):
@@ -176,53 +477,160 @@ class PaperProcessor:
         Returns:
             dict: Paper content
         """
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Try to extract title
-        title = None
-        title_tags = soup.find_all(['h1', 'h2'])
-        for tag in title_tags:
-            if tag.text.strip():
-                title = tag.text.strip()
-                break
-        
-        if not title:
-            title = soup.title.text if soup.title else "Unknown Title"
-        
-        # Try to extract abstract
-        abstract = ""
-        abstract_section = soup.find('div', class_=lambda c: c and 'abstract' in c.lower())
-        if not abstract_section:
-            abstract_section = soup.find('section', class_=lambda c: c and 'abstract' in c.lower())
-        if not abstract_section:
-            abstract_section = soup.find('p', class_=lambda c: c and 'abstract' in c.lower())
-            
-        if abstract_section:
-            abstract = abstract_section.text.strip()
-        
-        # Extract main content
-        main_content = ""
-        article_tag = soup.find('article')
-        if article_tag:
-            main_content = article_tag.text
-        else:
-            # Fallback to main content div
-            main_div = soup.find('div', id='content')
-            if not main_div:
-                main_div = soup.find('div', class_='content')
-            if main_div:
-                main_content = main_div.text
-            else:
-                # Last resort: get all paragraph text
-                paragraphs = soup.find_all('p')
-                main_content = ' '.join([p.text for p in paragraphs])
+        with span('download', url=url):
+            response = self.transport.get(url, headers=self.headers)
+            response.raise_for_status()
+        DOWNLOADED_BYTES.inc(len(response.content), kind='html')
         
-        return {
-            'title': title,
-            'abstract': abstract,
-            'full_text': main_content,
-            'source_url': url
-        }
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        cached = self._get_cached_by_hash(content_hash, url)
+        if cached:
+            return cached
+        
+        with span('parse', url=url):
+            return self._parse_html(response.text, url, content_hash)
+    
+    async def _aextract_html_paper(self, url):
+        """
+        Extract content from an HTML paper using the async transport.
+        
+        Args:
+            url (str): HTML paper URL
+            
+        Returns:
+            dict: Paper content
+        """
+        with span('download', url=url):
+            response = await self.async_transport.get(url, headers=self.headers)
+            response.raise_for_status()
+        DOWNLOADED_BYTES.inc(len(response.content), kind='html')
+        
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        cached = await asyncio.to_thread(self._get_cached_by_hash, content_hash, url)
+        if cached:
+            return cached
+        
+        with span('parse', url=url):
+            return await asyncio.to_thread(self._parse_html, response.text, url, content_hash)
+    
+    def _parse_html(self, html, url, content_hash):
+        """
+        Extract the title, abstract and main text of an HTML paper.
+        
+        Args:
+            html (str): HTML document
+            url (str): URL the document was downloaded from
+            content_hash (str): SHA-256 hex digest of the document
+            
+        Returns:
+            dict: Paper content
+        """
+        content = extract_html(html, url)
+        content['source_url'] = url
+        content['content_hash'] = content_hash
+        return content
+    
+    def _download_to_file(self, url, file, chunk_size=64 * 1024):
+        """
+        Stream a download into a file while hashing it.
+        
+        Args:
+            url (str): URL to download
+            file: Writable binary file object
+            chunk_size (int): Size of the chunks read from the response
+            
+        Returns:
+            tuple: SHA-256 hex digest and size in bytes of the download
+            
+        Raises:
+            PaperTooLargeError: If the download exceeds max_download_bytes
+        """
+        with span('download', url=url):
+            with self.transport.get(url, headers=self.headers, stream=True) as response:
+                response.raise_for_status()
+                
+                declared_size = int(response.headers.get('Content-Length') or 0)
+                if declared_size > self.max_download_bytes:
+                    raise PaperTooLargeError(
+                        f"{url} is {declared_size} bytes, larger than the {self.max_download_bytes} byte limit"
+                    )
+                
+                digest = hashlib.sha256()
+                size = 0
+                for chunk in self.transport.iter_content(response, chunk_size=chunk_size):
+                    size += len(chunk)
+                    if size > self.max_download_bytes:
+                        raise PaperTooLargeError(
+                            f"{url} is larger than the {self.max_download_bytes} byte limit"
+                        )
+                    digest.update(chunk)
+                    file.write(chunk)
+        
+        if size == 0:
+            raise ValueError(f"{url} returned an empty document")
+        
+        DOWNLOADED_BYTES.inc(size, kind='pdf')
+        file.flush()
+        return digest.hexdigest(), size
+    
+    async def _adownload_to_file(self, url, file, chunk_size=64 * 1024):
+        """
+        Stream a download into a file through the async transport while hashing it.
+        
+        Args:
+            url (str): URL to download
+            file: Writable binary file object
+            chunk_size (int): Size of the chunks read from the response
+            
+        Returns:
+            tuple: SHA-256 hex digest and size in bytes of the download
+            
+        Raises:
+            PaperTooLargeError: If the download exceeds max_download_bytes
+        """
+        with span('download', url=url):
+            async with self.async_transport.stream('GET', url, headers=self.headers) as response:
+                response.raise_for_status()
+                
+                declared_size = int(response.headers.get('Content-Length') or 0)
+                if declared_size > self.max_download_bytes:
+                    raise PaperTooLargeError(
+                        f"{url} is {declared_size} bytes, larger than the {self.max_download_bytes} byte limit"
+                    )
+                
+                digest = hashlib.sha256()
+                size = 0
+                async for chunk in self.async_transport.aiter_bytes(response, chunk_size=chunk_size):
+                    size += len(chunk)
+                    if size > self.max_download_bytes:
+                        raise PaperTooLargeError(
+                            f"{url} is larger than the {self.max_download_bytes} byte limit"
+                        )
+                    digest.update(chunk)
+                    file.write(chunk)
+            
+            if size == 0:
+                raise ValueError(f"{url} returned an empty document")
+        
+        DOWNLOADED_BYTES.inc(size, kind='pdf')
+        file.flush()
+        return digest.hexdigest(), size
+    
+    def _get_cached_by_hash(self, content_hash, url):
+        """
+        Look up a previously extracted document by its content hash.
+        
+        Args:
+            content_hash (str): SHA-256 hex digest of the downloaded bytes
+            url (str): URL the document was downloaded from
+            
+        Returns:
+            dict: Cached paper content, or None if not cached
+        """
+        if not self.cache:
+            return None
+        
+        cached = self.cache.get_by_hash(content_hash, url=url, ttl=self._alias_ttl(url))
+        if cached:
+            logger.info(f"Document at {url} matches a cached extraction")
+        return cached
@@ -0,0 +1,194 @@
+"""
+PDF text extraction engines with early stopping and parallel page parsing.
+"""
+
+import os
+import re
+import mmap
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# Matches a references heading on its own line, e.g. "References" or "7 REFERENCES"
+REFERENCES_PATTERN = re.compile(
+    r'^\s*(?:\d+\.?\s*)?(?:references|bibliography)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+def _extract_page_range(path, start, end):
+    """
+    Extract the text of a range of pages.
+
+    Runs in a worker process, so it opens its own reader on the file.
+
+    Args:
+        path (str): Path to the PDF file
+        start (int): First page index
+        end (int): Page index after the last page
+
+    Returns:
+        list: Text of each page in the range
+    """
+    with open(path, 'rb') as pdf_file:
+        with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+            reader = PyPDF2.PdfReader(pdf_map)
+            return [reader.pages[page_num].extract_text() for page_num in range(start, end)]
+
+
+class ExtractionLimits:
+    """Tracks extracted text and decides when extraction can stop early."""
+
+    def __init__(self, max_chars=None, stop_at_references=False):
+        """
+        Initialize the extraction limits.
+
+        Args:
+            max_chars (int, optional): Stop once this many characters are extracted
+            stop_at_references (bool): Stop after the page with the references heading
+        """
+        self.max_chars = max_chars
+        self.stop_at_references = stop_at_references
+        self.chars = 0
+
+    def add_page(self, text):
+        """
+        Account for an extracted page.
+
+        Args:
+            text (str): Text of the page
+
+        Returns:
+            bool: True if no further pages are needed
+        """
+        self.chars += len(text)
+        if self.max_chars is not None and self.chars >= self.max_chars:
+            return True
+        return self.stop_at_references and REFERENCES_PATTERN.search(text) is not None
+
+
+class SerialExtractionEngine:
+    """Extracts page text one page at a time in the calling thread."""
+
+    def extract_text(self, path, max_pages, limits=None):
+        """
+        Extract the text of a PDF.
+
+        Args:
+            path (str): Path to the PDF file
+            max_pages (int): Maximum number of pages to extract
+            limits (ExtractionLimits, optional): Early stopping conditions
+
+        Returns:
+            str: Extracted text
+        """
+        limits = limits or ExtractionLimits()
+        pages = []
+        with open(path, 'rb') as pdf_file:
+            with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+                reader = PyPDF2.PdfReader(pdf_map)
+                page_count = _capped_page_count(reader, max_pages, path)
+
+                for page_num in range(page_count):
+                    text = reader.pages[page_num].extract_text()
+                    pages.append(text)
+                    if limits.add_page(text):
+                        break
+
+        return ''.join(pages)
+
+    def shutdown(self):
+        """Release engine resources. Nothing to release for serial extraction."""
+
+
+class ProcessPoolExtractionEngine:
+    """
+    Extracts page text in parallel across a pool of worker processes.
+
+    Pages are handed out in batches, a bounded number of batches ahead of
+    the one being consumed, so extraction can stop early without parsing
+    the rest of the document. Short documents are extracted serially to
+    avoid the cost of shipping work to another process.
+    """
+
+    def __init__(self, workers=None, batch_size=4, min_pages=12):
+        """
+        Initialize the process pool engine.
+
+        Args:
+            workers (int, optional): Number of worker processes, defaults to the CPU count
+            batch_size (int): Number of pages extracted per task
+            min_pages (int): Documents with fewer pages are extracted serially
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.min_pages = min_pages
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._serial = SerialExtractionEngine()
+
+    def extract_text(self, path, max_pages, limits=None):
+        """
+        Extract the text of a PDF.
+
+        Args:
+            path (str): Path to the PDF file
+            max_pages (int): Maximum number of pages to extract
+            limits (ExtractionLimits, optional): Early stopping conditions
+
+        Returns:
+            str: Extracted text
+        """
+        limits = limits or ExtractionLimits()
+        with open(path, 'rb') as pdf_file:
+            with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+                page_count = _capped_page_count(PyPDF2.PdfReader(pdf_map), max_pages, path)
+
+        if page_count < self.min_pages or self.workers < 2:
+            return self._serial.extract_text(path, max_pages, limits)
+
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        batches = [(start, min(start + self.batch_size, page_count))
+                   for start in range(0, page_count, self.batch_size)]
+        pending = []
+        pages = []
+        next_batch = 0
+
+        try:
+            while next_batch < len(batches) or pending:
+                # Keep every worker busy without running far ahead of what is needed
+                while next_batch < len(batches) and len(pending) < self.workers:
+                    start, end = batches[next_batch]
+                    pending.append(self._pool.submit(_extract_page_range, path, start, end))
+                    next_batch += 1
+
+                for text in pending.pop(0).result():
+                    pages.append(text)
+                    if limits.add_page(text):
+                        return ''.join(pages)
+        finally:
+            for future in pending:
+                future.cancel()
+
+        return ''.join(pages)
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def _capped_page_count(reader, max_pages, path):
+    """Return the number of pages to extract, logging when the cap applies."""
+    page_count = len(reader.pages)
+    if page_count > max_pages:
+        logger.warning(f"{path} has {page_count} pages, extracting only the first {max_pages}")
+    return min(page_count, max_pages)
@@ -0,0 +1,367 @@
+"""
+Prefetcher module for extracting papers linked in Slack channels before they are requested.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from message_cache import PARENT_SUBTYPES
+from single_flight import SingleFlight, AsyncSingleFlight
+from url_utils import normalize_url, is_academic_url
+
+logger = logging.getLogger(__name__)
+
+
+def posted_message(event):
+    """
+    Return the top-level message a Slack `message` event creates, edits or deletes.
+
+    Args:
+        event (dict): The `event` of an event_callback payload
+
+    Returns:
+        tuple: (channel, ts, text), where text is None for deletions, or None
+            if the event is not about a top-level message
+    """
+    if event.get('type') != 'message' or not event.get('channel'):
+        return None
+    subtype = event.get('subtype')
+    if subtype == 'message_deleted':
+        return event['channel'], event.get('deleted_ts'), None
+    if subtype == 'message_changed':
+        message = event.get('message') or {}
+    elif subtype in PARENT_SUBTYPES:
+        message = event
+    else:
+        return None
+    if not message.get('ts') or message.get('thread_ts') not in (None, message['ts']):
+        return None
+    return event['channel'], message['ts'], message.get('text') or ''
+
+
+class BasePrefetcher:
+    """
+    Admission policy shared by the prefetchers.
+
+    A paper link posted in an enabled channel is scheduled for extraction
+    after a debounce delay; edits within the delay reschedule it with the
+    edited link. Only links to academic hosts are prefetched: unlike a
+    /summary request, nobody asked for the page, so other links are never
+    fetched on the strength of being posted. Links already prefetched are
+    skipped, and scheduled or running prefetches are capped in total and
+    per channel.
+    """
+
+    def __init__(self, paper_processor, channels=None, debounce=5.0, max_concurrent=2, max_pending=20,
+                 max_pending_per_channel=5, max_remembered_urls=1000):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            paper_processor (PaperProcessor): Paper processor
+            channels (set, optional): Channel IDs to prefetch in, None for every channel
+            debounce (float): Seconds to wait after a post or edit before prefetching
+            max_concurrent (int): Papers extracted at once
+            max_pending (int): Prefetches scheduled or running at once
+            max_pending_per_channel (int): Prefetches scheduled or running at once for one channel
+            max_remembered_urls (int): Prefetched URLs remembered to skip repeated links
+        """
+        self.paper_processor = paper_processor
+        self.channels = channels
+        self.debounce = debounce
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.max_pending_per_channel = max_pending_per_channel
+        self.max_remembered_urls = max_remembered_urls
+        self.scheduled = 0
+        self.started = 0
+        self.skipped = 0
+        self.cancelled = 0
+        # (channel, ts) -> scheduling data of the subclass, url
+        self._scheduled = OrderedDict()
+        # channel -> prefetches handed to a worker and not finished
+        self._running = Counter()
+        self._recent = OrderedDict()
+
+    def _admit(self, event):
+        """
+        Decide what an event means for the schedule. Caller holds the lock.
+
+        Returns:
+            tuple: (key, url) to schedule, or None when nothing should be scheduled;
+                a scheduled prefetch the event makes obsolete is removed
+        """
+        message = posted_message(event)
+        if message is None:
+            return None
+        channel, ts, text = message
+        if self.channels is not None and channel not in self.channels:
+            return None
+
+        key = (channel, ts)
+        url = self.paper_processor.extract_paper_url(text) if text else None
+        if url is not None and not is_academic_url(url):
+            url = None
+        if url is None or normalize_url(url) in self._recent:
+            if self._unschedule(key):
+                self.cancelled += 1
+            return None
+        if key not in self._scheduled and not self._has_room(channel):
+            self.skipped += 1
+            logger.info(f"Too many prefetches pending, not prefetching {url}")
+            return None
+        if key not in self._scheduled:
+            self.scheduled += 1
+        return key, url
+
+    def _unschedule(self, key):
+        """Remove a scheduled prefetch. Caller holds the lock."""
+        return self._scheduled.pop(key, None) is not None
+
+    def _has_room(self, channel):
+        """Return True if another prefetch may be scheduled for the channel. Caller holds the lock."""
+        if len(self._scheduled) + sum(self._running.values()) >= self.max_pending:
+            return False
+        in_channel = sum(1 for scheduled_channel, _ in self._scheduled if scheduled_channel == channel)
+        return in_channel + self._running[channel] < self.max_pending_per_channel
+
+    def _claim(self, channel, url):
+        """
+        Mark a due prefetch as handed to a worker. Caller holds the lock.
+
+        Returns:
+            bool: False if the URL was prefetched meanwhile
+        """
+        normalized = normalize_url(url)
+        if normalized in self._recent:
+            return False
+        self._recent[normalized] = None
+        while len(self._recent) > self.max_remembered_urls:
+            self._recent.popitem(last=False)
+        self._running[channel] += 1
+        self.started += 1
+        return True
+
+    def _release(self, channel):
+        """Mark a prefetch as finished. Caller holds the lock."""
+        self._running[channel] -= 1
+        if self._running[channel] <= 0:
+            del self._running[channel]
+
+    def stats(self):
+        """
+        Report prefetcher activity.
+
+        Returns:
+            dict: Prefetches scheduled, started, skipped by the caps, cancelled
+                by edits or deletions, and pending now
+        """
+        return {
+            'scheduled': self.scheduled,
+            'started': self.started,
+            'skipped': self.skipped,
+            'cancelled': self.cancelled,
+            'pending': len(self._scheduled) + sum(self._running.values())
+        }
+
+
+class PaperPrefetcher(BasePrefetcher):
+    """
+    Extracts papers linked in channel posts on background threads.
+
+    Extraction fills the extraction cache, so a later /summary of the paper
+    starts from the cached text; one still in progress is joined instead of
+    being repeated.
+    """
+
+    def __init__(self, paper_processor, **kwargs):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            paper_processor (PaperProcessor): Paper processor
+            **kwargs: Options of BasePrefetcher
+        """
+        super().__init__(paper_processor, **kwargs)
+        self.flight = SingleFlight()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+        self._executor = None
+
+    def observe_event(self, event):
+        """
+        Schedule, reschedule or cancel a prefetch for a Slack `message` event.
+
+        Args:
+            event (dict): The `event` of an event_callback payload
+        """
+        with self._condition:
+            if self._closed:
+                return
+            admitted = self._admit(event)
+            if admitted is None:
+                return
+            key, url = admitted
+            self._scheduled[key] = (time.monotonic() + self.debounce, url)
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='prefetch')
+                self._thread = threading.Thread(target=self._run, name="prefetch-scheduler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def extract_paper_content(self, url):
+        """
+        Extract a paper, joining a prefetch of it that is in progress.
+
+        Args:
+            url (str): URL of the paper
+
+        Returns:
+            dict: Paper content, or None if extraction failed
+        """
+        return self.flight.do(normalize_url(url), self.paper_processor.extract_paper_content, url)
+
+    def shutdown(self):
+        """Stop scheduling prefetches; running ones are left to finish."""
+        with self._condition:
+            self._closed = True
+            self._scheduled.clear()
+            self._condition.notify()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Report prefetcher activity."""
+        with self._condition:
+            return super().stats()
+
+    def _run(self):
+        """Hand prefetches to the workers once their debounce delay has passed."""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    due = [key for key, (due_at, _) in self._scheduled.items() if due_at <= now]
+                    if due:
+                        break
+                    next_due = min((due_at for due_at, _ in self._scheduled.values()), default=None)
+                    self._condition.wait(None if next_due is None else next_due - now)
+                jobs = []
+                for channel, ts in due:
+                    _, url = self._scheduled.pop((channel, ts))
+                    if self._claim(channel, url):
+                        jobs.append((channel, url))
+
+            for channel, url in jobs:
+                self._executor.submit(self._prefetch, channel, url)
+
+    def _prefetch(self, channel, url):
+        """Extract one paper, logging rather than raising on errors."""
+        try:
+            logger.info(f"Prefetching paper at {url}")
+            self.extract_paper_content(url)
+        except Exception as e:
+            logger.error(f"Error prefetching {url}: {str(e)}")
+        finally:
+            with self._condition:
+                self._release(channel)
+
+
+class AsyncPaperPrefetcher(BasePrefetcher):
+    """
+    Asyncio counterpart of PaperPrefetcher.
+
+    observe_event() must be called on the event loop; extraction runs in tasks.
+    """
+
+    def __init__(self, paper_processor, **kwargs):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            paper_processor (PaperProcessor): Paper processor
+            **kwargs: Options of BasePrefetcher
+        """
+        super().__init__(paper_processor, **kwargs)
+        self.flight = AsyncSingleFlight()
+        self._ready = deque()
+        self._tasks = set()
+
+    def observe_event(self, event):
+        """
+        Schedule, reschedule or cancel a prefetch for a Slack `message` event.
+
+        Args:
+            event (dict): The `event` of an event_callback payload
+        """
+        admitted = self._admit(event)
+        if admitted is None:
+            return
+        key, url = admitted
+        self._unschedule(key)
+        handle = asyncio.get_running_loop().call_later(self.debounce, self._fire, key)
+        self._scheduled[key] = (handle, url)
+
+    async def extract_paper_content(self, url):
+        """
+        Extract a paper, joining a prefetch of it that is in progress.
+
+        Args:
+            url (str): URL of the paper
+
+        Returns:
+            dict: Paper content, or None if extraction failed
+        """
+        return await self.flight.do(normalize_url(url), self.paper_processor.aextract_paper_content, url)
+
+    async def aclose(self):
+        """Cancel scheduled and running prefetches."""
+        for handle, _ in self._scheduled.values():
+            handle.cancel()
+        self._scheduled.clear()
+        self._ready.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _unschedule(self, key):
+        """Remove a scheduled prefetch and cancel its timer."""
+        scheduled = self._scheduled.pop(key, None)
+        if scheduled is None:
+            return False
+        scheduled[0].cancel()
+        return True
+
+    def _fire(self, key):
+        """Queue a prefetch whose debounce delay has passed."""
+        _, url = self._scheduled.pop(key)
+        channel = key[0]
+        if self._claim(channel, url):
+            self._ready.append((channel, url))
+            self._start_ready()
+
+    def _start_ready(self):
+        """Start queued prefetches while fewer than max_concurrent are running."""
+        while self._ready and len(self._tasks) < self.max_concurrent:
+            task = asyncio.ensure_future(self._prefetch(*self._ready.popleft()))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(self, channel, url):
+        """Extract one paper, logging rather than raising on errors."""
+        try:
+            logger.info(f"Prefetching paper at {url}")
+            await self.extract_paper_content(url)
+        except Exception as e:
+            logger.error(f"Error prefetching {url}: {str(e)}")
+        finally:
+            self._release(channel)
+            # The finished task is still in _tasks until its callbacks run
+            asyncio.get_running_loop().call_soon(self._start_ready)
@@ -0,0 +1,359 @@
+"""
+Rate limiter module for scheduling API calls within requests- and tokens-per-minute budgets.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+import contextvars
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Channel and user on whose behalf API calls are made, used for fair queueing
+current_requester = contextvars.ContextVar('current_requester', default=None)
+
+
+class InMemoryBucketStore:
+    """Keeps the limiter state in this process."""
+
+    # Transactions never wait on I/O or other processes
+    blocking = False
+
+    def __init__(self):
+        """Initialize the store."""
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def transact(self, name, func):
+        """
+        Atomically read, update and write the state of a limiter.
+
+        Args:
+            name (str): Limiter name
+            func (callable): Called with the current state (or None), returns
+                the new state and a result
+
+        Returns:
+            The result returned by func
+        """
+        with self._lock:
+            state, result = func(self._states.get(name))
+            self._states[name] = state
+            return result
+
+
+class SQLiteBucketStore:
+    """
+    Keeps the limiter state in a SQLite database shared by several processes.
+
+    Every update runs in an immediate transaction, so worker processes on the
+    same host draw from the same budget.
+    """
+
+    # Transactions may wait up to the busy timeout for another process
+    blocking = True
+
+    def __init__(self, path):
+        """
+        Initialize the store.
+
+        Args:
+            path (str): Path to the SQLite database file
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS limiter_state (
+                name TEXT PRIMARY KEY,
+                state TEXT NOT NULL
+            )
+            """
+        )
+
+    def transact(self, name, func):
+        """
+        Atomically read, update and write the state of a limiter.
+
+        Args:
+            name (str): Limiter name
+            func (callable): Called with the current state (or None), returns
+                the new state and a result
+
+        Returns:
+            The result returned by func
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT state FROM limiter_state WHERE name = ?", (name,)).fetchone()
+                state, result = func(json.loads(row[0]) if row else None)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO limiter_state (name, state) VALUES (?, ?)",
+                    (name, json.dumps(state))
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+
+class RateLimiter:
+    """
+    Token-bucket scheduler for requests per minute and tokens per minute.
+
+    Each call takes one request and its estimated tokens from two buckets
+    that refill continuously. Calls waiting in this process are served in
+    turn across channels, then across users within a channel, so one busy
+    requester cannot starve the others. A rate-limit response from the API
+    blocks every caller sharing the store until its Retry-After has passed.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, store=None, name='openai', poll_interval=0.05,
+                 burst=None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_minute (int): Request budget per minute
+            tokens_per_minute (int): Token budget per minute, or None to limit requests only
+            store (optional): Where the bucket state is kept, in memory by default
+            name (str): Name of the limiter within the store
+            poll_interval (float): Seconds between checks while waiting for a turn
+            burst (int, optional): Most requests granted at once, defaults to requests_per_minute
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.store = store or InMemoryBucketStore()
+        self.name = name
+        self.poll_interval = poll_interval
+        self.burst = burst or requests_per_minute
+        self.granted = 0
+        self.throttled = 0
+        self.blocks = 0
+        self._condition = threading.Condition()
+        # channel -> user -> tickets, rotated after every grant
+        self._waiting = OrderedDict()
+
+    def acquire(self, tokens, requester=None):
+        """
+        Wait until a call with the given token estimate fits the budget.
+
+        Args:
+            tokens (int): Estimated tokens used by the call
+            requester (tuple, optional): (channel, user) the call is made for,
+                defaults to current_requester
+        """
+        ticket = self._enqueue(requester)
+        throttled = False
+        try:
+            with self._condition:
+                while True:
+                    if self._is_next(ticket):
+                        wait = self._take_unlocked(tokens)
+                        if wait <= 0:
+                            self._dequeue(ticket)
+                            self._condition.notify_all()
+                            break
+                        throttled = True
+                        self._condition.wait(min(wait, 1.0))
+                    else:
+                        self._condition.wait(1.0)
+        except BaseException:
+            self._discard(ticket)
+            raise
+        self._record_grant(throttled)
+
+    async def aacquire(self, tokens, requester=None):
+        """
+        Wait without blocking the event loop until a call fits the budget.
+
+        Args:
+            tokens (int): Estimated tokens used by the call
+            requester (tuple, optional): (channel, user) the call is made for,
+                defaults to current_requester
+        """
+        ticket = self._enqueue(requester)
+        throttled = False
+        try:
+            while True:
+                with self._condition:
+                    is_next = self._is_next(ticket)
+                wait = self.poll_interval
+                if is_next:
+                    # A store shared with other processes may wait on their lock, so it runs off the loop
+                    if getattr(self.store, 'blocking', True):
+                        wait = await asyncio.to_thread(self._try_take, tokens)
+                    else:
+                        wait = self._try_take(tokens)
+                    if wait <= 0:
+                        with self._condition:
+                            self._dequeue(ticket)
+                            self._condition.notify_all()
+                        break
+                    throttled = True
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            self._discard(ticket)
+            raise
+        self._record_grant(throttled)
+
+    def block(self, seconds):
+        """
+        Stop granting calls for a while, e.g. after a 429 response.
+
+        Args:
+            seconds (float): Seconds to block for
+        """
+        def update(state):
+            state = self._refill(state, time.time())
+            state['blocked_until'] = max(state['blocked_until'], time.time() + seconds)
+            return state, None
+
+        self.store.transact(self.name, update)
+        self.blocks += 1
+        logger.warning(f"Rate limited by the API, pausing calls for {seconds:.1f}s")
+
+    def refund(self, tokens):
+        """
+        Return unused tokens to the budget once the actual usage is known.
+
+        Args:
+            tokens (int): Tokens estimated but not used
+        """
+        if tokens <= 0 or not self.tokens_per_minute:
+            return
+
+        def update(state):
+            state = self._refill(state, time.time())
+            state['tokens'] = min(self.tokens_per_minute, state['tokens'] + tokens)
+            return state, None
+
+        self.store.transact(self.name, update)
+
+    def stats(self):
+        """
+        Report scheduler activity.
+
+        Returns:
+            dict: Calls granted, calls that had to wait, API blocks and calls waiting now
+        """
+        with self._condition:
+            waiting = sum(len(tickets) for users in self._waiting.values() for tickets in users.values())
+        return {'granted': self.granted, 'throttled': self.throttled, 'blocks': self.blocks, 'waiting': waiting}
+
+    def _record_grant(self, throttled):
+        """Count a granted call."""
+        with self._condition:
+            self.granted += 1
+            if throttled:
+                self.throttled += 1
+
+    def _take_unlocked(self, tokens):
+        """
+        Call _try_take with the lock released. Caller holds the lock.
+
+        The store may wait on another process, and the event loop takes the
+        lock to check its turn, so the lock is not held across the store.
+        Only the call at the head of the queue takes from the store, and only
+        its own caller removes it, so the turn cannot change meanwhile.
+        """
+        self._condition.release()
+        try:
+            return self._try_take(tokens)
+        finally:
+            self._condition.acquire()
+
+    def _try_take(self, tokens):
+        """
+        Take one request and the tokens from the buckets if they are available.
+
+        Returns:
+            float: 0 if taken, otherwise the seconds until they should be available
+        """
+        # A call larger than the whole budget may run once the bucket is full
+        tokens = min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+
+        def update(state):
+            now = time.time()
+            state = self._refill(state, now)
+            if now < state['blocked_until']:
+                return state, state['blocked_until'] - now
+            missing_requests = 1 - state['requests']
+            missing_tokens = tokens - state['tokens'] if self.tokens_per_minute else 0
+            if missing_requests <= 0 and missing_tokens <= 0:
+                state['requests'] -= 1
+                state['tokens'] -= tokens
+                return state, 0
+            wait = missing_requests * 60 / self.requests_per_minute
+            if missing_tokens > 0:
+                wait = max(wait, missing_tokens * 60 / self.tokens_per_minute)
+            return state, wait
+
+        return self.store.transact(self.name, update)
+
+    def _refill(self, state, now):
+        """Return the state with both buckets refilled up to now."""
+        if state is None:
+            return {
+                'requests': float(self.burst),
+                'tokens': float(self.tokens_per_minute or 0),
+                'updated_at': now,
+                'blocked_until': 0.0
+            }
+        elapsed = max(0.0, now - state['updated_at'])
+        state['requests'] = min(self.burst, state['requests'] + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            state['tokens'] = min(self.tokens_per_minute, state['tokens'] + elapsed * self.tokens_per_minute / 60)
+        state['updated_at'] = now
+        return state
+
+    def _enqueue(self, requester):
+        """Add a waiting call to its channel and user queue and return its ticket."""
+        channel, user = requester or current_requester.get() or (None, None)
+        ticket = (channel, user, object())
+        with self._condition:
+            self._waiting.setdefault(channel, OrderedDict()).setdefault(user, deque()).append(ticket)
+        return ticket
+
+    def _is_next(self, ticket):
+        """Return True if the ticket is next in the fair order. Caller holds the lock."""
+        users = next(iter(self._waiting.values()))
+        return next(iter(users.values()))[0] is ticket
+
+    def _dequeue(self, ticket):
+        """Remove a granted ticket and rotate its channel and user to the back. Caller holds the lock."""
+        channel, user, _ = ticket
+        users = self._waiting[channel]
+        users[user].popleft()
+        if users[user]:
+            users.move_to_end(user)
+        else:
+            del users[user]
+        if users:
+            self._waiting.move_to_end(channel)
+        else:
+            del self._waiting[channel]
+
+    def _discard(self, ticket):
+        """Remove an abandoned ticket wherever it is in the queue."""
+        channel, user, _ = ticket
+        with self._condition:
+            users = self._waiting.get(channel)
+            if users is None or user not in users:
+                return
+            try:
+                users[user].remove(ticket)
+            except ValueError:
+                return
+            if not users[user]:
+                del users[user]
+            if not users:
+                del self._waiting[channel]
+            self._condition.notify_all()
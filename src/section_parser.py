@@ -0,0 +1,194 @@
+"""
+Section parser module for indexing the sections of extracted paper text.
+"""
+
+import re
+
+# Heading names mapped to canonical section keys
+CANONICAL_SECTIONS = {
+    'abstract': 'abstract',
+    'keywords': 'keywords',
+    'key words': 'keywords',
+    'index terms': 'keywords',
+    'introduction': 'introduction',
+    'background': 'background',
+    'related work': 'related_work',
+    'related works': 'related_work',
+    'method': 'method',
+    'methods': 'method',
+    'methodology': 'method',
+    'approach': 'method',
+    'our approach': 'method',
+    'proposed method': 'method',
+    'materials and methods': 'method',
+    'results': 'results',
+    'experiments': 'results',
+    'experimental results': 'results',
+    'experiments and results': 'results',
+    'evaluation': 'results',
+    'discussion': 'discussion',
+    'conclusion': 'conclusion',
+    'conclusions': 'conclusion',
+    'concluding remarks': 'conclusion',
+    'references': 'references',
+    'bibliography': 'references',
+    'acknowledgments': 'acknowledgments',
+    'acknowledgements': 'acknowledgments',
+    'appendix': 'appendix',
+}
+
+# Keywords used when a heading is not an exact canonical name, in priority order
+SECTION_KEYWORDS = (
+    ('conclusion', 'conclusion'),
+    ('introduction', 'introduction'),
+    ('related work', 'related_work'),
+    ('experiment', 'results'),
+    ('evaluation', 'results'),
+    ('result', 'results'),
+    ('method', 'method'),
+)
+
+# Optional "1", "2.3.", "IV." style numbering followed by the heading name
+NUMBERING_PATTERN = re.compile(r'^(?:(\d+(?:\.\d+)*|[IVX]+)[.)]?\s+)?(.*)$')
+
+# Abstract label followed by text on the same line, e.g. "Abstract—We propose..."
+INLINE_ABSTRACT_PATTERN = re.compile(r'^abstract\s*[-—–:.]\s*', re.IGNORECASE)
+
+
+class Section:
+    """A section of the paper located by character offsets into the full text."""
+
+    def __init__(self, key, heading, start, end):
+        """
+        Initialize a section.
+
+        Args:
+            key (str): Canonical key, or the normalized heading for other sections
+            heading (str): Heading as it appears in the text
+            start (int): Offset of the first character of the section body
+            end (int): Offset after the last character of the section body
+        """
+        self.key = key
+        self.heading = heading
+        self.start = start
+        self.end = end
+
+    def to_dict(self):
+        """Return a JSON-serializable representation of the section."""
+        return {'key': self.key, 'heading': self.heading, 'start': self.start, 'end': self.end}
+
+
+def _classify_heading(line):
+    """
+    Decide whether a line is a section heading.
+
+    Args:
+        line (str): Stripped line of text
+
+    Returns:
+        tuple: Section key and heading, or None if the line is not a heading
+    """
+    if len(line) > 80 or line.endswith(('.', ',', ';')):
+        return None
+
+    numbering, name = NUMBERING_PATTERN.match(line).groups()
+    normalized = ' '.join(name.lower().strip(' :').split())
+    if not normalized or not normalized[0].isalpha():
+        return None
+
+    key = CANONICAL_SECTIONS.get(normalized)
+    if key is None and (numbering or name.isupper()) and len(normalized.split()) <= 6:
+        for keyword, keyword_key in SECTION_KEYWORDS:
+            if keyword in normalized:
+                key = keyword_key
+                break
+
+    if key is not None:
+        return key, line
+
+    # Other headings follow the original heuristic: numbered or all caps
+    if numbering and name[0].isupper():
+        return normalized, line
+    if name.isupper() and sum(c.isalpha() for c in name) >= 3:
+        return normalized, line
+    return None
+
+
+def parse_sections(text):
+    """
+    Index the sections of a paper in a single pass over its text.
+
+    Args:
+        text (str): Full text of the paper
+
+    Returns:
+        tuple: Title, abstract and the ordered list of Section objects
+    """
+    title = None
+    sections = []
+    position = 0
+    length = len(text)
+
+    while position < length:
+        line_end = text.find('\n', position)
+        if line_end == -1:
+            line_end = length
+        raw_line = text[position:line_end]
+        line = raw_line.strip()
+        line_start = position
+        position = line_end + 1
+
+        if not line:
+            continue
+        if title is None:
+            title = line
+            continue
+
+        inline_abstract = INLINE_ABSTRACT_PATTERN.match(line)
+        if inline_abstract and len(line) > inline_abstract.end():
+            heading = ('abstract', line[:inline_abstract.end()].strip())
+            body_start = line_start + raw_line.index(line) + inline_abstract.end()
+        else:
+            heading = _classify_heading(line)
+            body_start = min(position, length)
+
+        if heading:
+            if sections:
+                sections[-1].end = line_start
+            sections.append(Section(heading[0], heading[1], body_start, length))
+
+    abstract = ''
+    for section in sections:
+        if section.key == 'abstract':
+            abstract = ' '.join(text[section.start:section.end].split())
+            break
+
+    return title or "Unknown Title", abstract, sections
+
+
+def section_text(paper_content, key):
+    """
+    Get the text of the first section with the given canonical key.
+
+    Args:
+        paper_content (dict): Paper content with full_text and sections
+        key (str): Canonical section key, e.g. 'introduction'
+
+    Returns:
+        str: Section text, or an empty string if the paper has no such section
+    """
+    sections = paper_content.get('sections') or []
+    full_text = paper_content.get('full_text', '')
+
+    # Papers extracted before sections were indexed map headings to text
+    if isinstance(sections, dict):
+        for heading, content in sections.items():
+            classified = _classify_heading(heading.strip())
+            if classified and classified[0] == key:
+                return content
+        return ''
+
+    for section in sections:
+        if section['key'] == key:
+            return ' '.join(full_text[section['start']:section['end']].split())
+    return ''
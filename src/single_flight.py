@@ -0,0 +1,106 @@
+"""
+Single-flight module for deduplicating concurrent work on the same key.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait on the same future and receive its result or
+    exception. Once the call finishes the key is forgotten, so later calls
+    run the function again.
+    """
+
+    def __init__(self):
+        """Initialize the single-flight group."""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run a function once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Deduplication key
+            func (callable): Function to run
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            The function's result, shared by every caller
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            logger.info(f"Joining in-flight request for {key}")
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        """Return the number of keys currently being processed."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent coroutine calls that share a key into one task.
+
+    The asyncio counterpart of SingleFlight. A caller that is cancelled does
+    not cancel the shared task, so the other callers still get the result.
+    """
+
+    def __init__(self):
+        """Initialize the single-flight group."""
+        self._calls = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        Await a coroutine function once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Deduplication key
+            func (callable): Coroutine function to run
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            The coroutine's result, shared by every caller
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            logger.info(f"Joining in-flight request for {key}")
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        """Return the number of keys currently being processed."""
+        return len(self._calls)
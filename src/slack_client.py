@@ -3,28 +3,50 @@ Slack client module for interacting with the Slack API.
 """
 
 import hmac
+import asyncio
 import hashlib
 import time
 import logging
+import threading
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-import requests
+from http_transport import get_default_transport
 
 logger = logging.getLogger(__name__)
 
 class SlackClient:
     """Client for interacting with Slack API."""
     
-    def __init__(self, token, signing_secret):
+    def __init__(self, token, signing_secret, transport=None, async_transport=None,
+                 base_url='https://www.slack.com/api/'):
         """
         Initialize the Slack client.
         
         Args:
             token (str): Slack bot token
             signing_secret (str): Slack signing secret for request verification
+            transport (HttpTransport, optional): HTTP transport for response URLs
+            async_transport (AsyncHttpTransport, optional): HTTP transport for response URLs
+                in the async methods
+            base_url (str): Base URL of the Slack Web API
         """
-        self.client = WebClient(token=token)
+        self.token = token
+        self.base_url = base_url
+        self.client = WebClient(token=token, base_url=base_url)
         self.signing_secret = signing_secret
+        self.transport = transport or get_default_transport()
+        self.async_transport = async_transport
+        self._async_client = None
+        self._async_client_lock = threading.Lock()
+    
+    @property
+    def async_client(self):
+        """The async Slack Web API client, created on first use (requires aiohttp)."""
+        with self._async_client_lock:
+            if self._async_client is None:
+                from slack_sdk.web.async_client import AsyncWebClient
+                self._async_client = AsyncWebClient(token=self.token, base_url=self.base_url)
+            return self._async_client
     
     def verify_signature(self, request):
         """
@@ -87,6 +109,30 @@ class SlackClient:
             logger.error(f"Error posting message: {e}")
             raise
     
+    def update_message(self, channel, ts, text, blocks=None):
+        """
+        Replace the text of a message posted by the bot.
+        
+        Args:
+            channel (str): Channel ID
+            ts (str): Timestamp of the message to update
+            text (str): New message text
+            blocks (list, optional): Blocks for rich formatting
+            
+        Returns:
+            dict: Response from Slack API
+        """
+        try:
+            return self.client.chat_update(
+                channel=channel,
+                ts=ts,
+                text=text,
+                blocks=blocks
+            )
+        except SlackApiError as e:
+            logger.error(f"Error updating message: {e}")
+            raise
+    
     def get_parent_message(self, channel, thread_ts):
         """
         Get the parent message of a thread.
@@ -99,10 +145,11 @@ class SlackClient:
             dict: Parent message data
         """
         try:
-            # The thread_ts is the timestamp of the parent message
-            result = self.client.conversations_history(
+            # The thread_ts is the timestamp of the parent message, which
+            # conversations.replies returns first
+            result = self.client.conversations_replies(
                 channel=channel,
-                latest=thread_ts,
+                ts=thread_ts,
                 inclusive=True,
                 limit=1
             )
@@ -125,10 +172,108 @@ class SlackClient:
             response_url (str): URL to send the acknowledgement to
         """
         try:
-            requests.post(
+            # Short timeouts: this runs inside Slack's 3 second window
+            self.transport.post(
                 response_url,
                 json={"text": "Processing your request..."},
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=(1, 2)
+            )
+        except Exception as e:
+            logger.error(f"Error acknowledging command: {e}")
+    
+    async def apost_message(self, channel, text, thread_ts=None, blocks=None):
+        """
+        Post a message to a Slack channel without blocking the event loop.
+        
+        Args:
+            channel (str): Channel ID
+            text (str): Message text
+            thread_ts (str, optional): Thread timestamp to reply in a thread
+            blocks (list, optional): Blocks for rich formatting
+            
+        Returns:
+            dict: Response from Slack API
+        """
+        try:
+            return await self.async_client.chat_postMessage(
+                channel=channel,
+                text=text,
+                thread_ts=thread_ts,
+                blocks=blocks
+            )
+        except SlackApiError as e:
+            logger.error(f"Error posting message: {e}")
+            raise
+    
+    async def aupdate_message(self, channel, ts, text, blocks=None):
+        """
+        Replace the text of a message posted by the bot without blocking the event loop.
+        
+        Args:
+            channel (str): Channel ID
+            ts (str): Timestamp of the message to update
+            text (str): New message text
+            blocks (list, optional): Blocks for rich formatting
+            
+        Returns:
+            dict: Response from Slack API
+        """
+        try:
+            return await self.async_client.chat_update(
+                channel=channel,
+                ts=ts,
+                text=text,
+                blocks=blocks
+            )
+        except SlackApiError as e:
+            logger.error(f"Error updating message: {e}")
+            raise
+    
+    async def aget_parent_message(self, channel, thread_ts):
+        """
+        Get the parent message of a thread without blocking the event loop.
+        
+        Args:
+            channel (str): Channel ID
+            thread_ts (str): Thread timestamp
+            
+        Returns:
+            dict: Parent message data
+        """
+        try:
+            result = await self.async_client.conversations_replies(
+                channel=channel,
+                ts=thread_ts,
+                inclusive=True,
+                limit=1
+            )
+            
+            if result["messages"] and len(result["messages"]) > 0:
+                return result["messages"][0]
+            else:
+                logger.error("Parent message not found")
+                return {}
+                
+        except SlackApiError as e:
+            logger.error(f"Error getting parent message: {e}")
+            raise
+    
+    async def aacknowledge_command(self, response_url):
+        """
+        Acknowledge a slash command without blocking the event loop.
+        
+        Args:
+            response_url (str): URL to send the acknowledgement to
+        """
+        try:
+            await asyncio.wait_for(
+                self.async_transport.post(
+                    response_url,
+                    json={"text": "Processing your request..."},
+                    headers={"Content-Type": "application/json"}
+                ),
+                timeout=2
             )
         except Exception as e:
             logger.error(f"Error acknowledging command: {e}")
@@ -0,0 +1,462 @@
+"""
+Slack dispatcher module for sending messages within Slack's rate limits.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from slack_sdk.errors import SlackApiError
+from http_transport import parse_retry_after
+from rate_limiter import RateLimiter, InMemoryBucketStore
+from message_cache import MessageCache
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Calls per minute allowed for each Web API method across the workspace
+# (Slack's rate limit tiers: chat.postMessage is special, the others Tier 3)
+DEFAULT_METHOD_LIMITS = {
+    'chat.postMessage': 60,
+    'chat.update': 50,
+    'conversations.history': 50,
+    'conversations.replies': 50,
+}
+
+# Pipeline stage each API method is timed as
+METHOD_STAGES = {
+    'chat.postMessage': 'post_message',
+    'chat.update': 'update_message',
+    'conversations.history': 'get_parent_message',
+    'conversations.replies': 'get_parent_message',
+}
+
+# Longest text of a section block
+BLOCK_TEXT_LIMIT = 3000
+
+# Most blocks in one message
+MAX_BLOCKS_PER_MESSAGE = 50
+
+# Longest notification text sent alongside blocks
+FALLBACK_TEXT_LIMIT = 4000
+
+
+def split_text(text, limit=BLOCK_TEXT_LIMIT):
+    """
+    Split text into chunks that fit a section block, keeping paragraphs together.
+
+    Text is cut at paragraph breaks where possible, then at line breaks,
+    then at spaces, and only mid-word as a last resort.
+
+    Args:
+        text (str): Text to split
+        limit (int): Maximum characters per chunk
+
+    Returns:
+        list: Chunks in order
+    """
+    chunks = []
+    current = ''
+    for paragraph in text.split('\n\n'):
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        while len(paragraph) > limit:
+            cut = paragraph.rfind('\n', 0, limit)
+            if cut <= 0:
+                cut = paragraph.rfind(' ', 0, limit)
+            if cut <= 0:
+                cut = limit
+            chunks.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip('\n ')
+        current = paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def to_messages(text):
+    """
+    Lay out text as one or more messages of section blocks.
+
+    Args:
+        text (str): Message text
+
+    Returns:
+        list: (text, blocks) for each message; blocks is None for short text
+    """
+    if len(text) <= BLOCK_TEXT_LIMIT:
+        return [(text, None)]
+
+    chunks = split_text(text)
+    messages = []
+    for start in range(0, len(chunks), MAX_BLOCKS_PER_MESSAGE):
+        group = chunks[start:start + MAX_BLOCKS_PER_MESSAGE]
+        blocks = [{"type": "section", "text": {"type": "mrkdwn", "text": chunk}} for chunk in group]
+        messages.append(('\n\n'.join(group)[:FALLBACK_TEXT_LIMIT], blocks))
+    return messages
+
+
+class SlackDispatcher:
+    """
+    Sends Slack Web API calls within per-method and per-channel rate limits.
+
+    Calls wait their turn instead of failing, `ratelimited` errors pause the
+    method for Retry-After and are retried, long texts are split into section
+    blocks sent in order, and status messages for the same thread and user
+    are coalesced into edits of one message. It offers the same message
+    methods as SlackClient, so it can be used in its place.
+    """
+
+    def __init__(self, slack_client, method_limits=None, channel_messages_per_minute=60, channel_burst=3,
+                 max_retries=5, max_tracked_messages=1000, message_cache=None):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            slack_client (SlackClient): Client making the API calls
+            method_limits (dict, optional): Calls per minute for each API method
+            channel_messages_per_minute (int): Posts and edits per minute in one channel
+            channel_burst (int): Posts and edits allowed at once in one channel
+            max_retries (int): Retries of rate-limited calls before giving up
+            max_tracked_messages (int): Status messages and threads remembered for coalescing
+            message_cache (MessageCache, optional): Cache of thread parent messages
+        """
+        self.slack_client = slack_client
+        self.method_limits = method_limits or DEFAULT_METHOD_LIMITS
+        self.channel_messages_per_minute = channel_messages_per_minute
+        self.channel_burst = channel_burst
+        self.max_retries = max_retries
+        self.max_tracked_messages = max_tracked_messages
+        self.message_cache = message_cache or MessageCache()
+        self.calls = 0
+        self.retries = 0
+        self._store = InMemoryBucketStore()
+        self._limiters = {}
+        self._lock = threading.Lock()
+        # (channel, thread_ts, key) -> ts of the status message
+        self._statuses = OrderedDict()
+        # (channel, ts) -> thread_ts of messages posted by the dispatcher
+        self._threads = OrderedDict()
+
+    def post_message(self, channel, text, thread_ts=None, blocks=None):
+        """
+        Post a message, splitting long text into several messages sent in order.
+
+        Args:
+            channel (str): Channel ID
+            text (str): Message text
+            thread_ts (str, optional): Thread timestamp to reply in a thread
+            blocks (list, optional): Blocks for rich formatting
+
+        Returns:
+            dict: Response from Slack API for the first message
+        """
+        messages = [(text, blocks)] if blocks else to_messages(text)
+        first = None
+        for message_text, message_blocks in messages:
+            response = self._call(
+                'chat.postMessage', channel, self.slack_client.post_message,
+                channel=channel, text=message_text, thread_ts=thread_ts, blocks=message_blocks
+            )
+            self._remember_thread(channel, response, thread_ts)
+            first = first or response
+        return first
+
+    def update_message(self, channel, ts, text, blocks=None):
+        """
+        Update a message, posting text beyond one message as replies in its thread.
+
+        Args:
+            channel (str): Channel ID
+            ts (str): Timestamp of the message to update
+            text (str): New message text
+            blocks (list, optional): Blocks for rich formatting
+
+        Returns:
+            dict: Response from Slack API for the update
+        """
+        messages = [(text, blocks)] if blocks else to_messages(text)
+        message_text, message_blocks = messages[0]
+        # Updates without blocks keep the old ones, so short text is sent as a block too
+        message_blocks = message_blocks or [{"type": "section", "text": {"type": "mrkdwn", "text": message_text}}]
+        response = self._call(
+            'chat.update', channel, self.slack_client.update_message,
+            channel=channel, ts=ts, text=message_text, blocks=message_blocks
+        )
+        thread_ts = self._thread_of(channel, ts)
+        for message_text, message_blocks in messages[1:]:
+            self._call(
+                'chat.postMessage', channel, self.slack_client.post_message,
+                channel=channel, text=message_text, thread_ts=thread_ts, blocks=message_blocks
+            )
+        return response
+
+    def get_parent_message(self, channel, thread_ts):
+        """
+        Get the parent message of a thread, from the message cache when possible.
+
+        Args:
+            channel (str): Channel ID
+            thread_ts (str): Thread timestamp
+
+        Returns:
+            dict: Parent message data
+        """
+        message = self.message_cache.get(channel, thread_ts)
+        if message is not None:
+            return message
+        message = self._call(
+            'conversations.replies', None, self.slack_client.get_parent_message, channel, thread_ts
+        )
+        if message:
+            self.message_cache.put(channel, thread_ts, message)
+        return message
+
+    def post_status(self, channel, thread_ts, text, key=None):
+        """
+        Show a status in a thread, editing the previous status instead of posting again.
+
+        Args:
+            channel (str): Channel ID
+            thread_ts (str): Thread timestamp
+            text (str): Status text
+            key (str, optional): Separates statuses in the same thread, e.g. per user
+
+        Returns:
+            str: Timestamp of the status message
+        """
+        ts = self._status_ts(channel, thread_ts, key)
+        if ts:
+            self.update_message(channel, ts, text)
+            return ts
+        response = self.post_message(channel, text, thread_ts=thread_ts)
+        return self._set_status_ts(channel, thread_ts, key, response['ts'])
+
+    def end_status(self, channel, thread_ts, key=None):
+        """
+        Forget a status message, so the next status is posted as a new message.
+
+        Args:
+            channel (str): Channel ID
+            thread_ts (str): Thread timestamp
+            key (str, optional): Key passed to post_status
+        """
+        with self._lock:
+            self._statuses.pop((channel, thread_ts, key), None)
+
+    async def apost_message(self, channel, text, thread_ts=None, blocks=None):
+        """
+        Post a message without blocking the event loop, splitting long text in order.
+
+        Args:
+            channel (str): Channel ID
+            text (str): Message text
+            thread_ts (str, optional): Thread timestamp to reply in a thread
+            blocks (list, optional): Blocks for rich formatting
+
+        Returns:
+            dict: Response from Slack API for the first message
+        """
+        messages = [(text, blocks)] if blocks else to_messages(text)
+        first = None
+        for message_text, message_blocks in messages:
+            response = await self._acall(
+                'chat.postMessage', channel, self.slack_client.apost_message,
+                channel=channel, text=message_text, thread_ts=thread_ts, blocks=message_blocks
+            )
+            self._remember_thread(channel, response, thread_ts)
+            first = first or response
+        return first
+
+    async def aupdate_message(self, channel, ts, text, blocks=None):
+        """
+        Update a message without blocking the event loop.
+
+        Args:
+            channel (str): Channel ID
+            ts (str): Timestamp of the message to update
+            text (str): New message text
+            blocks (list, optional): Blocks for rich formatting
+
+        Returns:
+            dict: Response from Slack API for the update
+        """
+        messages = [(text, blocks)] if blocks else to_messages(text)
+        message_text, message_blocks = messages[0]
+        # Updates without blocks keep the old ones, so short text is sent as a block too
+        message_blocks = message_blocks or [{"type": "section", "text": {"type": "mrkdwn", "text": message_text}}]
+        response = await self._acall(
+            'chat.update', channel, self.slack_client.aupdate_message,
+            channel=channel, ts=ts, text=message_text, blocks=message_blocks
+        )
+        thread_ts = self._thread_of(channel, ts)
+        for message_text, message_blocks in messages[1:]:
+            await self._acall(
+                'chat.postMessage', channel, self.slack_client.apost_message,
+                channel=channel, text=message_text, thread_ts=thread_ts, blocks=message_blocks
+            )
+        return response
+
+    async def aget_parent_message(self, channel, thread_ts):
+        """
+        Get the parent message of a thread without blocking the event loop,
+        from the message cache when possible.
+
+        Args:
+            channel (str): Channel ID
+            thread_ts (str): Thread timestamp
+
+        Returns:
+            dict: Parent message data
+        """
+        message = self.message_cache.get(channel, thread_ts)
+        if message is not None:
+            return message
+        message = await self._acall(
+            'conversations.replies', None, self.slack_client.aget_parent_message, channel, thread_ts
+        )
+        if message:
+            self.message_cache.put(channel, thread_ts, message)
+        return message
+
+    async def apost_status(self, channel, thread_ts, text, key=None):
+        """
+        Show a status in a thread without blocking the event loop.
+
+        Args:
+            channel (str): Channel ID
+            thread_ts (str): Thread timestamp
+            text (str): Status text
+            key (str, optional): Separates statuses in the same thread, e.g. per user
+
+        Returns:
+            str: Timestamp of the status message
+        """
+        ts = self._status_ts(channel, thread_ts, key)
+        if ts:
+            await self.aupdate_message(channel, ts, text)
+            return ts
+        response = await self.apost_message(channel, text, thread_ts=thread_ts)
+        return self._set_status_ts(channel, thread_ts, key, response['ts'])
+
+    def stats(self):
+        """
+        Report dispatcher activity.
+
+        Returns:
+            dict: API calls made and rate-limited calls retried
+        """
+        return {'calls': self.calls, 'retries': self.retries}
+
+    def _call(self, method, limited_channel, func, *args, **kwargs):
+        """Make an API call within the rate limits, retrying when Slack rate limits it."""
+        with span(METHOD_STAGES.get(method, method)):
+            attempt = 0
+            while True:
+                for limiter in self._limiters_for(method, limited_channel):
+                    limiter.acquire(0, requester=(limited_channel, method))
+                try:
+                    result = func(*args, **kwargs)
+                    self.calls += 1
+                    return result
+                except SlackApiError as e:
+                    delay = self._retry_delay(method, e, attempt)
+                    if delay is None:
+                        raise
+                time.sleep(delay)
+                attempt += 1
+
+    async def _acall(self, method, limited_channel, func, *args, **kwargs):
+        """Make an async API call within the rate limits, retrying when Slack rate limits it."""
+        with span(METHOD_STAGES.get(method, method)):
+            attempt = 0
+            while True:
+                for limiter in self._limiters_for(method, limited_channel):
+                    await limiter.aacquire(0, requester=(limited_channel, method))
+                try:
+                    result = await func(*args, **kwargs)
+                    self.calls += 1
+                    return result
+                except SlackApiError as e:
+                    delay = self._retry_delay(method, e, attempt)
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _retry_delay(self, method, error, attempt):
+        """
+        Decide whether a failed call is retried and after how long.
+
+        Returns:
+            float: Seconds to wait, or None if the error is not a rate limit or retries ran out
+        """
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        code = response.get('error') if hasattr(response, 'get') else None
+        if (status != 429 and code != 'ratelimited') or attempt >= self.max_retries:
+            return None
+
+        headers = {name.lower(): value for name, value in (getattr(response, 'headers', None) or {}).items()}
+        delay = parse_retry_after(headers.get('retry-after'))
+        if delay is None:
+            delay = 2 ** attempt
+        self.retries += 1
+        logger.warning(f"Slack rate limited {method}, retry {attempt + 1} in {delay:.1f}s")
+        self._limiter(method).block(delay)
+        return delay
+
+    def _limiters_for(self, method, channel):
+        """Return the limiters a call has to pass: its method, then its channel for messages."""
+        limiters = [self._limiter(method)]
+        if channel is not None:
+            limiters.append(self._limiter(f"channel:{channel}"))
+        return limiters
+
+    def _limiter(self, name):
+        """Return the limiter for a method or channel, creating it on first use."""
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                if name.startswith('channel:'):
+                    limiter = RateLimiter(
+                        self.channel_messages_per_minute, None, store=self._store, name=name,
+                        burst=self.channel_burst
+                    )
+                else:
+                    limiter = RateLimiter(self.method_limits.get(name, 20), None, store=self._store, name=name)
+                self._limiters[name] = limiter
+            return limiter
+
+    def _status_ts(self, channel, thread_ts, key):
+        """Return the timestamp of the current status message, if any."""
+        with self._lock:
+            return self._statuses.get((channel, thread_ts, key))
+
+    def _set_status_ts(self, channel, thread_ts, key, ts):
+        """Remember the status message of a thread and key."""
+        with self._lock:
+            self._statuses[(channel, thread_ts, key)] = ts
+            while len(self._statuses) > self.max_tracked_messages:
+                self._statuses.popitem(last=False)
+        return ts
+
+    def _remember_thread(self, channel, response, thread_ts):
+        """Remember which thread a posted message belongs to."""
+        ts = response.get('ts') if hasattr(response, 'get') else None
+        if not ts or not isinstance(ts, str):
+            return
+        with self._lock:
+            self._threads[(channel, ts)] = thread_ts or ts
+            while len(self._threads) > self.max_tracked_messages:
+                self._threads.popitem(last=False)
+
+    def _thread_of(self, channel, ts):
+        """Return the thread of a message posted by the dispatcher, or the message itself."""
+        with self._lock:
+            return self._threads.get((channel, ts), ts)
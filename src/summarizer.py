@@ -2,23 +2,167 @@
 Summarizer module for generating paper summaries using GPT-3o.
 """
 
+import json
+import random
+import asyncio
+import hashlib
 import logging
-from openai import OpenAI
+import threading
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from openai import OpenAI, AsyncOpenAI, RateLimitError, InternalServerError
+from section_parser import section_text
+from context_builder import ContextBuilder, count_tokens
+from http_transport import parse_retry_after
+from metrics import span, OPENAI_TOKENS
 
 logger = logging.getLogger(__name__)
 
+FIRST_PASS_ERROR = "Error generating first pass summary."
+SECOND_PASS_ERROR = "Error generating second pass summary."
+PASS_TIMEOUT_MESSAGE = "The {} summary timed out."
+PASS_PENDING_MESSAGE = "_Working on the {}..._"
+
+# Start of the text generate_summary returns when it fails altogether
+SUMMARY_ERROR_PREFIX = "Error generating summary"
+
+# Texts a failed or timed out pass leaves in a summary
+FAILED_PASS_TEXTS = (
+    FIRST_PASS_ERROR, SECOND_PASS_ERROR,
+    PASS_TIMEOUT_MESSAGE.format("first pass"), PASS_TIMEOUT_MESSAGE.format("second pass")
+)
+
+# Completion tokens reserved for calls that do not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+
+def stage_name(name):
+    """Return the metric stage of a named call, e.g. 'Map step (Results)' -> 'map_step'."""
+    return name.split(' (')[0].lower().replace(' ', '_')
+
+
+def summary_error(summary):
+    """
+    Tell whether a summary returned by Summarizer is complete.
+    
+    Args:
+        summary (str): Summary from generate_summary, agenerate_summary or generate_summaries_batch
+    
+    Returns:
+        str: Why the summary is incomplete, or None if every pass succeeded
+    """
+    if not summary:
+        return "No summary was generated"
+    if summary.startswith(SUMMARY_ERROR_PREFIX):
+        return summary
+    for text in FAILED_PASS_TEXTS:
+        if text in summary:
+            return f"Incomplete summary: {text}"
+    return None
+
+
+class SummaryProgress:
+    """
+    Collects the text streamed by both passes and reports the partial summary.
+    
+    The callback receives the whole summary rendered so far each time either
+    pass produces more text. Errors raised by the callback are logged and
+    never interrupt summarization.
+    """
+    
+    def __init__(self, title, callback, render):
+        """
+        Initialize the progress tracker.
+        
+        Args:
+            title (str): Paper title
+            callback (callable): Called with the partial summary text
+            render (callable): Builds the summary from the title and both passes
+        """
+        self.title = title
+        self.callback = callback
+        self.render = render
+        self.passes = {'first pass': '', 'second pass': ''}
+        self._lock = threading.Lock()
+    
+    def update(self, name, text):
+        """
+        Record the text streamed so far by a pass.
+        
+        Args:
+            name (str): 'first pass' or 'second pass'
+            text (str): Text generated so far by that pass
+        """
+        with self._lock:
+            self.passes[name] = text
+            summary = self.render(
+                self.title,
+                *(self.passes[key] or PASS_PENDING_MESSAGE.format(key) for key in ('first pass', 'second pass'))
+            )
+        try:
+            self.callback(summary)
+        except Exception as e:
+            logger.error(f"Error reporting summary progress: {str(e)}", exc_info=True)
+    
+    def on_text(self, name):
+        """Return a callback recording streamed text for the named pass."""
+        return lambda text: self.update(name, text)
+
+
 class Summarizer:
     """Summarizer for generating paper summaries using GPT-3o."""
     
-    def __init__(self, api_key):
+    def __init__(self, api_key, model="o3-mini", pass_timeout=300, max_concurrent_calls=8, cache=None,
+                 context_builder=None, map_reduce_threshold=30000, map_chunk_tokens=6000,
+                 map_concurrency=4, map_timeout=180, rate_limiter=None, max_retries=4):
         """
         Initialize the summarizer.
         
         Args:
             api_key (str): OpenAI API key
+            model (str): Chat model used for both passes
+            pass_timeout (float): Maximum seconds to wait for each summary pass
+            max_concurrent_calls (int): Maximum number of passes running at once
+            cache (SummaryCache, optional): Cache of previously generated summaries
+            context_builder (ContextBuilder, optional): Selects the paper content for the second pass
+            map_reduce_threshold (int): Paper size in tokens above which the second pass uses map-reduce
+            map_chunk_tokens (int): Maximum size in tokens of each chunk summarized in the map step
+            map_concurrency (int): Maximum number of chunks summarized at once
+            map_timeout (float): Maximum seconds spent on the map step before reducing what is done
+            rate_limiter (RateLimiter, optional): Schedules API calls within the account's rate limits
+            max_retries (int): Retries of rate-limited or failed API calls when a rate limiter is set
         """
         self.api_key = api_key
-        self.client = OpenAI(api_key=api_key)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        # With a rate limiter, retries go through the scheduler instead of the client
+        self._client_options = {'max_retries': 0} if rate_limiter else {}
+        self.client = OpenAI(api_key=api_key, **self._client_options)
+        self.model = model  # Replace with "gpt-3o" when available
+        self.pass_timeout = pass_timeout
+        self.cache = cache
+        self.context_builder = context_builder or ContextBuilder()
+        self.map_reduce_threshold = map_reduce_threshold
+        self.map_chunk_tokens = map_chunk_tokens
+        self.map_timeout = map_timeout
+        self._async_client = None
+        self._async_client_lock = threading.Lock()
+        
+        # Generation parameters for the second pass
+        self.second_pass_params = {'temperature': 0.3, 'max_tokens': 1500}
+        
+        # Both passes are independent, so they run side by side
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_calls,
+            thread_name_prefix="summary-pass"
+        )
+        
+        # Chunk summaries get their own pool so a pass never waits on its own queue
+        self._map_executor = ThreadPoolExecutor(
+            max_workers=map_concurrency,
+            thread_name_prefix="summary-map"
+        )
         
         # System prompt template for the first pass
         self.first_pass_prompt = """
@@ -42,13 +186,36 @@ class Summarizer:
         
         Provide a comprehensive summary of the paper's content with supporting evidence. Focus on the main thrust of the paper and its key findings.
         """
+        
+        # System prompt template for summarizing one chunk of a long paper
+        self.map_prompt = """
+        You are reading one part of a long academic paper. Write concise notes on this part only:
+        1. The methods, arguments or results it presents, including key numbers.
+        2. Any figures, tables or illustrations it describes and what they show.
+        3. References that seem important for understanding the paper's background.
+        
+        Do not speculate about parts of the paper you have not been shown.
+        """
+        
+        # System prompt template for comparing papers shared together
+        self.comparison_prompt = """
+        You are given summaries of several academic papers that were shared together, e.g. for a journal club.
+        Write a short comparison of them, in under 200 words:
+        1. The problem or theme they have in common.
+        2. How their approaches, assumptions and results differ.
+        3. Which paper to read first, and why.
+        
+        Refer to the papers by their titles. Do not repeat the summaries.
+        """
     
-    def generate_summary(self, paper_content):
+    def generate_summary(self, paper_content, on_progress=None):
         """
         Generate a summary of the paper using GPT-3o.
         
         Args:
             paper_content (dict): Paper content with title, abstract, sections, etc.
+            on_progress (callable, optional): Called with the partial summary as the
+                passes stream in; passes are streamed only when it is given
             
         Returns:
             str: Generated summary
@@ -56,17 +223,271 @@ class Summarizer:
         try:
             # Extract relevant parts of the paper
             title = paper_content.get('title', 'Unknown Title')
-            abstract = paper_content.get('abstract', '')
-            full_text = paper_content.get('full_text', '')
-            sections = paper_content.get('sections', {})
             
-            # Prepare content for the model
-            introduction = sections.get('INTRODUCTION', sections.get('Introduction', ''))
-            conclusion = sections.get('CONCLUSION', sections.get('Conclusions', 
-                          sections.get('CONCLUSIONS', sections.get('Conclusion', ''))))
+            cache_key = self._cache_key(paper_content) if self.cache else None
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    logger.info(f"Using cached summary for \"{title}\"")
+                    return cached
+            
+            user_message = self._build_user_message(paper_content)
+            progress = SummaryProgress(title, on_progress, self._combine_passes) if on_progress else None
+            first_on_text = progress.on_text('first pass') if progress else None
+            second_on_text = progress.on_text('second pass') if progress else None
+            
+            # Generate both passes concurrently
+            start = time.monotonic()
+            # Copy the context so the rate limiter knows who the calls are for
+            first_future = self._executor.submit(
+                contextvars.copy_context().run, self._timed, self._generate_first_pass, user_message, first_on_text
+            )
+            if self._needs_map_reduce(paper_content):
+                second_pass_method = self._generate_map_reduce_pass
+            else:
+                second_pass_method = self._generate_second_pass
+            second_future = self._executor.submit(
+                contextvars.copy_context().run, self._timed, second_pass_method, user_message, paper_content,
+                second_on_text
+            )
+            
+            first_pass, first_latency = self._collect_pass(first_future, "first pass", start)
+            second_pass, second_latency = self._collect_pass(second_future, "second pass", start)
+            
+            logger.info(
+                f"Summary passes for \"{title}\" finished in {time.monotonic() - start:.2f}s "
+                f"(first pass {first_latency:.2f}s, second pass {second_latency:.2f}s)"
+            )
+            
+            combined_summary = self._combine_passes(title, first_pass, second_pass)
+            if cache_key and self._is_complete(first_pass, second_pass):
+                self.cache.put(cache_key, combined_summary)
+            
+            return combined_summary
+            
+        except Exception as e:
+            logger.error(f"Error generating summary: {str(e)}", exc_info=True)
+            return f"{SUMMARY_ERROR_PREFIX}: {str(e)}"
+    
+    def generate_summaries_batch(self, papers, batch_client, timeout=None):
+        """
+        Generate summaries of many papers offline with the OpenAI Batch API.
+        
+        The passes of every paper go into one batch, at batch prices and
+        without using the interactive rate limits. Long papers put their map
+        step chunks in that batch and their reduce step in a second one.
+        Summaries are assembled and cached as in generate_summary.
+        
+        Args:
+            papers (list): Paper contents with title, abstract, sections, etc.
+            batch_client (OpenAIBatchClient): Batch API client
+            timeout (float, optional): Maximum seconds to wait for each batch
+            
+        Returns:
+            list: Summaries in the order of the papers
+        """
+        summaries = [None] * len(papers)
+        requests = {}
+        # Paper index -> (title, user message, map chunks or None, cache key)
+        plans = {}
+        
+        for index, paper_content in enumerate(papers):
+            title = paper_content.get('title', 'Unknown Title')
+            cache_key = self._cache_key(paper_content) if self.cache else None
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached:
+                    logger.info(f"Using cached summary for \"{title}\"")
+                    summaries[index] = cached
+                    continue
+            
+            user_message = self._build_user_message(paper_content)
+            requests[f"{index}-first"] = self._chat_request(self.first_pass_prompt, user_message)
+            chunks = None
+            if self._needs_map_reduce(paper_content):
+                chunks = self._chunk_paper(paper_content)
+                for chunk_index, (_, text) in enumerate(chunks):
+                    requests[f"{index}-map-{chunk_index}"] = self._chat_request(self.map_prompt, text)
+            else:
+                requests[f"{index}-second"] = self._chat_request(
+                    self.second_pass_prompt, self._second_pass_message(user_message, paper_content),
+                    **self.second_pass_params
+                )
+            plans[index] = (title, user_message, chunks, cache_key)
+        
+        if not requests:
+            return summaries
+        results = batch_client.run(requests, timeout=timeout, metadata={'job': 'paper-summaries'})
+        
+        # Reduce the chunk notes of long papers in a second batch
+        reduce_requests = {}
+        for index, (_, user_message, chunks, _) in plans.items():
+            if chunks is None:
+                continue
+            notes = [results.get(f"{index}-map-{chunk_index}") for chunk_index in range(len(chunks))]
+            if not any(notes):
+                continue
+            notes = [
+                f"[{heading}]\n{note or '(This part could not be summarized.)'}"
+                for (heading, _), note in zip(chunks, notes)
+            ]
+            reduce_requests[f"{index}-reduce"] = self._chat_request(
+                self.second_pass_prompt, self._reduce_message(user_message, notes), **self.second_pass_params
+            )
+        if reduce_requests:
+            results.update(batch_client.run(reduce_requests, timeout=timeout, metadata={'job': 'paper-summaries'}))
+        
+        for index, (title, _, chunks, cache_key) in plans.items():
+            first_pass = results.get(f"{index}-first") or FIRST_PASS_ERROR
+            second_pass = results.get(f"{index}-second" if chunks is None else f"{index}-reduce") or SECOND_PASS_ERROR
+            summaries[index] = self._combine_passes(title, first_pass, second_pass)
+            if cache_key and self._is_complete(first_pass, second_pass):
+                self.cache.put(cache_key, summaries[index])
+        
+        return summaries
+    
+    async def agenerate_summary(self, paper_content, on_progress=None):
+        """
+        Generate a summary of the paper without blocking the event loop.
+        
+        Both passes are awaited concurrently on the async OpenAI client. The
+        map-reduce second pass and cache access run in worker threads.
+        
+        Args:
+            paper_content (dict): Paper content with title, abstract, sections, etc.
+            on_progress (callable, optional): Called on the event loop with the partial
+                summary as the passes stream in; passes are streamed only when it is given
+            
+        Returns:
+            str: Generated summary
+        """
+        try:
+            title = paper_content.get('title', 'Unknown Title')
+            
+            cache_key = self._cache_key(paper_content) if self.cache else None
+            if cache_key:
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached:
+                    logger.info(f"Using cached summary for \"{title}\"")
+                    return cached
+            
+            user_message = self._build_user_message(paper_content)
+            progress = SummaryProgress(title, on_progress, self._combine_passes) if on_progress else None
+            first_on_text = progress.on_text('first pass') if progress else None
+            second_on_text = progress.on_text('second pass') if progress else None
+            
+            start = time.monotonic()
+            first_pass = self._await_pass(self._agenerate_first_pass(user_message, first_on_text), "first pass")
+            if self._needs_map_reduce(paper_content):
+                # The reduce step streams from a worker thread, report back on the loop
+                if second_on_text:
+                    loop = asyncio.get_running_loop()
+                    
+                    def threaded_on_text(text):
+                        loop.call_soon_threadsafe(second_on_text, text)
+                else:
+                    threaded_on_text = None
+                second_pass = self._await_pass(
+                    asyncio.to_thread(self._generate_map_reduce_pass, user_message, paper_content, threaded_on_text),
+                    "second pass"
+                )
+            else:
+                second_pass = self._await_pass(
+                    self._agenerate_second_pass(user_message, paper_content, second_on_text), "second pass"
+                )
+            (first_pass, first_latency), (second_pass, second_latency) = await asyncio.gather(first_pass, second_pass)
+            
+            logger.info(
+                f"Summary passes for \"{title}\" finished in {time.monotonic() - start:.2f}s "
+                f"(first pass {first_latency:.2f}s, second pass {second_latency:.2f}s)"
+            )
+            
+            combined_summary = self._combine_passes(title, first_pass, second_pass)
+            if cache_key and self._is_complete(first_pass, second_pass):
+                await asyncio.to_thread(self.cache.put, cache_key, combined_summary)
+            
+            return combined_summary
+            
+        except Exception as e:
+            logger.error(f"Error generating summary: {str(e)}", exc_info=True)
+            return f"{SUMMARY_ERROR_PREFIX}: {str(e)}"
+    
+    def generate_comparison(self, summaries):
+        """
+        Compare the summaries of papers shared together.
+        
+        Args:
+            summaries (list): Summaries generated by generate_summary
+        
+        Returns:
+            str: Short comparison of the papers, or None if it could not be generated
+        """
+        try:
+            return self._complete("Comparison", self.comparison_prompt, self._comparison_message(summaries))
+        except Exception as e:
+            logger.error(f"Error generating comparison: {str(e)}", exc_info=True)
+            return None
+    
+    async def agenerate_comparison(self, summaries):
+        """
+        Compare the summaries of papers shared together without blocking the event loop.
+        
+        Args:
+            summaries (list): Summaries generated by agenerate_summary
+        
+        Returns:
+            str: Short comparison of the papers, or None if it could not be generated
+        """
+        try:
+            return await self._acomplete("Comparison", self.comparison_prompt, self._comparison_message(summaries))
+        except Exception as e:
+            logger.error(f"Error generating comparison: {str(e)}", exc_info=True)
+            return None
+    
+    def combine_digest(self, summaries, comparison=None):
+        """
+        Combine the summaries of papers shared together into one digest.
+        
+        Args:
+            summaries (list): Summaries of the papers
+            comparison (str, optional): Comparison of the papers, placed first
+        
+        Returns:
+            str: Digest posted to Slack
+        """
+        parts = [f"# Digest of {len(summaries)} papers"]
+        if comparison:
+            parts.append(f"## Comparison\n\n{comparison}")
+        parts.extend(summaries)
+        return "\n\n".join(parts)
+    
+    @property
+    def async_client(self):
+        """The async OpenAI client, created on first use."""
+        with self._async_client_lock:
+            if self._async_client is None:
+                self._async_client = AsyncOpenAI(api_key=self.api_key, **self._client_options)
+            return self._async_client
+    
+    def _build_user_message(self, paper_content):
+        """
+        Build the user message shared by both passes.
+        
+        Args:
+            paper_content (dict): Paper content with title, abstract, sections, etc.
             
-            # Prepare the user message with paper content
-            user_message = f"""
+        Returns:
+            str: User message with the title, abstract, introduction and conclusion
+        """
+        title = paper_content.get('title', 'Unknown Title')
+        abstract = paper_content.get('abstract', '')
+        
+        # Prepare content for the model
+        introduction = section_text(paper_content, 'introduction')
+        conclusion = section_text(paper_content, 'conclusion')
+        
+        # Prepare the user message with paper content
+        return f"""
             Paper Title: {title}
             
             Abstract: {abstract}
@@ -77,15 +498,66 @@ class Summarizer:
             
             Please provide a summary of this paper following the methodology from "How to read a paper" by S. Keshav.
             """
+    
+    def _second_pass_message(self, user_message, paper_content):
+        """
+        Build the second pass user message.
+        
+        Args:
+            user_message (str): User message shared by both passes
+            paper_content (dict): Paper content with full text and sections
             
-            # Generate first pass summary
-            first_pass = self._generate_first_pass(user_message)
-            
-            # Generate second pass summary
-            second_pass = self._generate_second_pass(user_message, full_text)
+        Returns:
+            str: User message with the most informative passages that fit the context budget
+        """
+        context, context_tokens = self.context_builder.build(paper_content)
+        logger.info(f"Second pass context: {context_tokens} tokens of {self.context_builder.token_budget} budgeted")
+        
+        return f"{user_message}\n\nAdditional paper content for analysis:\n{context}"
+    
+    def _comparison_message(self, summaries):
+        """
+        Build the user message comparing papers.
+        
+        Args:
+            summaries (list): Summaries of the papers
+        
+        Returns:
+            str: User message with the numbered summaries
+        """
+        return "\n\n".join(
+            f"Paper {number}:\n{summary}" for number, summary in enumerate(summaries, start=1)
+        )
+    
+    def _reduce_message(self, user_message, notes):
+        """
+        Build the reduce step user message of a long paper.
+        
+        Args:
+            user_message (str): User message shared by both passes
+            notes (list): Notes on each chunk, in document order
             
-            # Combine the summaries
-            combined_summary = f"""# Summary of "{title}"
+        Returns:
+            str: User message with the chunk notes
+        """
+        return (
+            f"{user_message}\n\nThe paper is too long to include in full. "
+            f"Notes on each part of the paper, in order:\n\n" + "\n\n".join(notes)
+        )
+    
+    def _needs_map_reduce(self, paper_content):
+        """Return True if the paper is long enough to use map-reduce for the second pass."""
+        if count_tokens(paper_content.get('full_text', '')) > self.map_reduce_threshold:
+            logger.info(
+                f"\"{paper_content.get('title', 'Unknown Title')}\" is above {self.map_reduce_threshold} "
+                f"tokens, using map-reduce for the second pass"
+            )
+            return True
+        return False
+    
+    def _combine_passes(self, title, first_pass, second_pass):
+        """Combine the two passes into the summary posted to Slack."""
+        return f"""# Summary of "{title}"
 
 ## First Pass: The Five Cs
 
@@ -98,67 +570,519 @@ class Summarizer:
 ---
 Summary generated using the methodology from "How to read a paper" by S. Keshav.
 """
+    
+    def _is_complete(self, first_pass, second_pass):
+        """Return True if neither pass failed, so the summary may be cached."""
+        # Only cache complete summaries so failed passes are retried
+        return first_pass not in FAILED_PASS_TEXTS and second_pass not in FAILED_PASS_TEXTS
+    
+    def _cache_key(self, paper_content):
+        """
+        Build a summary cache key from the paper and the generation settings.
+        
+        Any change to the model, prompts or generation parameters produces a
+        new key, so stale summaries are never served after a prompt change.
+        
+        Args:
+            paper_content (dict): Paper content with title, abstract, sections, etc.
             
-            return combined_summary
+        Returns:
+            str: SHA-256 hex digest identifying the summary
+        """
+        content_hash = paper_content.get('content_hash')
+        if not content_hash:
+            content = {key: paper_content.get(key) for key in ('title', 'abstract', 'sections', 'full_text')}
+            content_hash = hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+        
+        key_material = {
+            'content_hash': content_hash,
+            'model': self.model,
+            'first_pass_prompt': self.first_pass_prompt,
+            'second_pass_prompt': self.second_pass_prompt,
+            'second_pass_params': self.second_pass_params,
+            'context_token_budget': self.context_builder.token_budget,
+            'context_section_weights': self.context_builder.section_weights,
+            'map_prompt': self.map_prompt,
+            'map_reduce_threshold': self.map_reduce_threshold,
+            'map_chunk_tokens': self.map_chunk_tokens
+        }
+        return hashlib.sha256(json.dumps(key_material, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _timed(self, func, *args):
+        """
+        Call a function and measure how long it takes.
+        
+        Args:
+            func (callable): Function to call
+            *args: Arguments passed to the function
             
-        except Exception as e:
-            logger.error(f"Error generating summary: {str(e)}", exc_info=True)
-            return f"Error generating summary: {str(e)}"
+        Returns:
+            tuple: The function's result and its latency in seconds
+        """
+        start = time.monotonic()
+        result = func(*args)
+        return result, time.monotonic() - start
+    
+    def _collect_pass(self, future, name, start):
+        """
+        Wait for a summary pass, falling back to a placeholder on timeout.
+        
+        Args:
+            future (Future): Future returned by submitting the pass
+            name (str): Name of the pass for logging
+            start (float): Monotonic time at which the passes were started
+            
+        Returns:
+            tuple: The pass text and its latency in seconds
+        """
+        remaining = None
+        if self.pass_timeout is not None:
+            remaining = max(0, self.pass_timeout - (time.monotonic() - start))
+        
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.error(f"The {name} did not finish within {self.pass_timeout}s")
+            return PASS_TIMEOUT_MESSAGE.format(name), time.monotonic() - start
     
-    def _generate_first_pass(self, user_message):
+    async def _await_pass(self, awaitable, name):
+        """
+        Await a summary pass, falling back to a placeholder on timeout.
+        
+        Args:
+            awaitable: Coroutine producing the pass text
+            name (str): Name of the pass for logging
+            
+        Returns:
+            tuple: The pass text and its latency in seconds
+        """
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=self.pass_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"The {name} did not finish within {self.pass_timeout}s")
+            return PASS_TIMEOUT_MESSAGE.format(name), time.monotonic() - start
+        return result, time.monotonic() - start
+    
+    def _generate_first_pass(self, user_message, on_text=None):
         """
         Generate the first pass summary.
         
         Args:
             user_message (str): User message with paper content
+            on_text (callable, optional): Called with the text streamed so far
             
         Returns:
             str: First pass summary
         """
         try:
-            response = self.client.chat.completions.create(
-                model="o3-mini",  # Replace with "gpt-3o" when available
-                messages=[
-                    {"role": "system", "content": self.first_pass_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-            )
-            
-            return response.choices[0].message.content.strip()
+            return self._complete("First pass", self.first_pass_prompt, user_message, on_text)
             
         except Exception as e:
             logger.error(f"Error generating first pass: {str(e)}", exc_info=True)
-            return "Error generating first pass summary."
+            return FIRST_PASS_ERROR
     
-    def _generate_second_pass(self, user_message, full_text):
+    def _generate_second_pass(self, user_message, paper_content, on_text=None):
         """
         Generate the second pass summary.
         
         Args:
             user_message (str): User message with paper content
-            full_text (str): Full text of the paper
+            paper_content (dict): Paper content with full text and sections
+            on_text (callable, optional): Called with the text streamed so far
             
         Returns:
             str: Second pass summary
         """
         try:
-            # Add a truncated version of the full text for more context
-            truncated_text = full_text[:10000] + "..." if len(full_text) > 10000 else full_text
-            
-            second_pass_message = f"{user_message}\n\nAdditional paper content for analysis:\n{truncated_text}"
-            
-            response = self.client.chat.completions.create(
-                model="o3-mini",  # Replace with "gpt-3o" when available
-                messages=[
-                    {"role": "system", "content": self.second_pass_prompt},
-                    {"role": "user", "content": second_pass_message}
-                ],
-                temperature=0.3,
-                max_tokens=1500
+            second_pass_message = self._second_pass_message(user_message, paper_content)
+            
+            return self._complete(
+                "Second pass", self.second_pass_prompt, second_pass_message, on_text, **self.second_pass_params
             )
             
-            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Error generating second pass: {str(e)}", exc_info=True)
+            return SECOND_PASS_ERROR
+    
+    async def _agenerate_first_pass(self, user_message, on_text=None):
+        """
+        Generate the first pass summary on the async client.
+        
+        Args:
+            user_message (str): User message with paper content
+            on_text (callable, optional): Called with the text streamed so far
+            
+        Returns:
+            str: First pass summary
+        """
+        try:
+            return await self._acomplete("First pass", self.first_pass_prompt, user_message, on_text)
+            
+        except Exception as e:
+            logger.error(f"Error generating first pass: {str(e)}", exc_info=True)
+            return FIRST_PASS_ERROR
+    
+    async def _agenerate_second_pass(self, user_message, paper_content, on_text=None):
+        """
+        Generate the second pass summary on the async client.
+        
+        Args:
+            user_message (str): User message with paper content
+            paper_content (dict): Paper content with full text and sections
+            on_text (callable, optional): Called with the text streamed so far
+            
+        Returns:
+            str: Second pass summary
+        """
+        try:
+            context, context_tokens = await asyncio.to_thread(self.context_builder.build, paper_content)
+            logger.info(f"Second pass context: {context_tokens} tokens of {self.context_builder.token_budget} budgeted")
+            
+            second_pass_message = f"{user_message}\n\nAdditional paper content for analysis:\n{context}"
+            
+            return await self._acomplete(
+                "Second pass", self.second_pass_prompt, second_pass_message, on_text, **self.second_pass_params
+            )
             
         except Exception as e:
             logger.error(f"Error generating second pass: {str(e)}", exc_info=True)
-            return "Error generating second pass summary."
+            return SECOND_PASS_ERROR
+    
+    def _generate_map_reduce_pass(self, user_message, paper_content, on_text=None):
+        """
+        Generate the second pass summary of a long paper with map-reduce.
+        
+        The paper is chunked by section, the chunks are summarized in
+        parallel, and the chunk notes are reduced into the usual second pass.
+        Chunks not summarized within map_timeout are left out.
+        
+        Args:
+            user_message (str): User message with paper content
+            paper_content (dict): Paper content with full text and sections
+            on_text (callable, optional): Called with the reduce step text streamed so far
+            
+        Returns:
+            str: Second pass summary
+        """
+        try:
+            chunks = self._chunk_paper(paper_content)
+            map_timeout = self.map_timeout
+            if self.pass_timeout is not None:
+                # Leave time for the reduce step within the pass timeout
+                map_timeout = min(map_timeout, self.pass_timeout * 0.6)
+            
+            futures = [
+                self._map_executor.submit(contextvars.copy_context().run, self._summarize_chunk, heading, text)
+                for heading, text in chunks
+            ]
+            done, not_done = wait(futures, timeout=map_timeout)
+            for future in not_done:
+                future.cancel()
+            
+            notes = []
+            for (heading, _), future in zip(chunks, futures):
+                if future in done and future.result():
+                    notes.append(f"[{heading}]\n{future.result()}")
+                else:
+                    notes.append(f"[{heading}]\n(This part could not be summarized in time.)")
+            
+            logger.info(f"Map step summarized {len(done)} of {len(chunks)} chunks")
+            if not done:
+                return SECOND_PASS_ERROR
+            
+            return self._complete(
+                "Reduce step", self.second_pass_prompt, self._reduce_message(user_message, notes), on_text,
+                **self.second_pass_params
+            )
+            
+        except Exception as e:
+            logger.error(f"Error generating map-reduce second pass: {str(e)}", exc_info=True)
+            return SECOND_PASS_ERROR
+    
+    def _chunk_paper(self, paper_content):
+        """
+        Split a paper into chunks of at most map_chunk_tokens tokens.
+        
+        Consecutive sections are grouped together while they fit, and
+        sections that are too large on their own are split into pieces.
+        
+        Args:
+            paper_content (dict): Paper content with full text and sections
+            
+        Returns:
+            list: (heading, text) tuples in document order
+        """
+        full_text = paper_content.get('full_text', '')
+        sections = paper_content.get('sections')
+        if isinstance(sections, list) and sections:
+            parts = [
+                (section['heading'], full_text[section['start']:section['end']])
+                for section in sections if section['key'] not in ('references', 'acknowledgments')
+            ]
+        else:
+            parts = [('Paper text', full_text)]
+        
+        # Cut oversized sections on whitespace, using four characters per token
+        max_chars = self.map_chunk_tokens * 4
+        pieces = []
+        for heading, text in parts:
+            while count_tokens(text) > self.map_chunk_tokens:
+                cut = text.rfind(' ', 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append((heading, text[:cut]))
+                text = text[cut:]
+            if text.strip():
+                pieces.append((heading, text))
+        
+        chunks = []
+        chunk_headings, chunk_texts, chunk_tokens = [], [], 0
+        for heading, text in pieces:
+            tokens = count_tokens(text)
+            if chunk_texts and chunk_tokens + tokens > self.map_chunk_tokens:
+                chunks.append((' / '.join(dict.fromkeys(chunk_headings)), '\n'.join(chunk_texts)))
+                chunk_headings, chunk_texts, chunk_tokens = [], [], 0
+            chunk_headings.append(heading)
+            chunk_texts.append(f"{heading}\n{text}")
+            chunk_tokens += tokens
+        if chunk_texts:
+            chunks.append((' / '.join(dict.fromkeys(chunk_headings)), '\n'.join(chunk_texts)))
+        
+        return chunks
+    
+    def _summarize_chunk(self, heading, text):
+        """
+        Summarize one chunk of a long paper for the map step.
+        
+        Args:
+            heading (str): Headings of the sections in the chunk
+            text (str): Chunk text
+            
+        Returns:
+            str: Notes on the chunk, or None if the call failed
+        """
+        try:
+            return self._complete(f"Map step ({heading[:40]})", self.map_prompt, text)
+        except Exception as e:
+            logger.error(f"Error summarizing chunk {heading}: {str(e)}", exc_info=True)
+            return None
+    
+    def _complete(self, name, system_prompt, user_message, on_text=None, **params):
+        """
+        Generate text for a pass, streaming it when a callback is given.
+        
+        Args:
+            name (str): Name of the pass for logging
+            system_prompt (str): System prompt
+            user_message (str): User message
+            on_text (callable, optional): Called with the text streamed so far
+            **params: Extra generation parameters
+            
+        Returns:
+            str: Generated text
+        """
+        with span(stage_name(name), model=self.model):
+            if on_text is None:
+                response = self._create_completion(system_prompt, user_message, **params)
+                self._log_token_usage(name, user_message, response)
+                return response.choices[0].message.content.strip()
+            
+            parts = []
+            for chunk in self._create_completion(system_prompt, user_message, stream=True, **params):
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_text(''.join(parts).strip())
+            self._log_token_usage(name, user_message, None, ''.join(parts))
+            return ''.join(parts).strip()
+    
+    async def _acomplete(self, name, system_prompt, user_message, on_text=None, **params):
+        """
+        Generate text for a pass on the async client, streaming it when a callback is given.
+        
+        Args:
+            name (str): Name of the pass for logging
+            system_prompt (str): System prompt
+            user_message (str): User message
+            on_text (callable, optional): Called with the text streamed so far
+            **params: Extra generation parameters
+            
+        Returns:
+            str: Generated text
+        """
+        with span(stage_name(name), model=self.model):
+            if on_text is None:
+                response = await self._acreate_completion(system_prompt, user_message, **params)
+                self._log_token_usage(name, user_message, response)
+                return response.choices[0].message.content.strip()
+            
+            parts = []
+            async for chunk in await self._acreate_completion(system_prompt, user_message, stream=True, **params):
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_text(''.join(parts).strip())
+            self._log_token_usage(name, user_message, None, ''.join(parts))
+            return ''.join(parts).strip()
+    
+    def _chat_request(self, system_prompt, user_message, **params):
+        """
+        Build the body of a chat completions request for a batch.
+        
+        Args:
+            system_prompt (str): System prompt
+            user_message (str): User message
+            **params: Extra generation parameters
+            
+        Returns:
+            dict: Request body
+        """
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            **params
+        }
+    
+    def _create_completion(self, system_prompt, user_message, **params):
+        """
+        Call the chat completions API with a system and a user message.
+        
+        Args:
+            system_prompt (str): System prompt
+            user_message (str): User message
+            **params: Extra generation parameters
+            
+        Returns:
+            Chat completion response
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        if self.rate_limiter is None:
+            return self.client.chat.completions.create(
+                model=self.model, messages=messages, timeout=self.pass_timeout, **params
+            )
+        
+        estimate = self._estimate_tokens(system_prompt, user_message, params)
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(estimate)
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model, messages=messages, timeout=self.pass_timeout, **params
+                )
+            except (RateLimitError, InternalServerError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+                continue
+            self._refund_tokens(estimate, response)
+            return response
+    
+    async def _acreate_completion(self, system_prompt, user_message, **params):
+        """
+        Call the chat completions API on the async client.
+        
+        Args:
+            system_prompt (str): System prompt
+            user_message (str): User message
+            **params: Extra generation parameters
+            
+        Returns:
+            Chat completion response
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ]
+        if self.rate_limiter is None:
+            return await self.async_client.chat.completions.create(
+                model=self.model, messages=messages, timeout=self.pass_timeout, **params
+            )
+        
+        estimate = self._estimate_tokens(system_prompt, user_message, params)
+        attempt = 0
+        while True:
+            await self.rate_limiter.aacquire(estimate)
+            try:
+                response = await self.async_client.chat.completions.create(
+                    model=self.model, messages=messages, timeout=self.pass_timeout, **params
+                )
+            except (RateLimitError, InternalServerError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+                continue
+            self._refund_tokens(estimate, response)
+            return response
+    
+    def _estimate_tokens(self, system_prompt, user_message, params):
+        """Estimate the tokens a call counts against the tokens-per-minute budget."""
+        completion_tokens = params.get('max_tokens') or DEFAULT_COMPLETION_TOKENS
+        return count_tokens(system_prompt) + count_tokens(user_message) + completion_tokens
+    
+    def _retry_delay(self, error, attempt):
+        """
+        Decide how long to wait before retrying a failed call.
+        
+        A 429 response pauses every caller sharing the rate limiter for its
+        Retry-After, or for an exponential backoff when the header is missing.
+        
+        Args:
+            error (APIStatusError): Error raised by the API call
+            attempt (int): Number of retries so far
+            
+        Returns:
+            float: Seconds to wait before the retry
+        """
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        delay = parse_retry_after(headers.get('retry-after'))
+        if delay is None and headers.get('retry-after-ms'):
+            delay = parse_retry_after(headers.get('retry-after-ms'))
+            delay = delay / 1000 if delay is not None else None
+        if delay is None:
+            delay = 0.5 * (2 ** attempt) + random.uniform(0, 0.5)
+        
+        logger.warning(f"OpenAI call failed with {type(error).__name__}, retry {attempt + 1} in {delay:.1f}s")
+        if isinstance(error, RateLimitError):
+            self.rate_limiter.block(delay)
+        return delay
+    
+    def _refund_tokens(self, estimate, response):
+        """Return the difference between the estimated and the reported token usage."""
+        usage = getattr(response, 'usage', None)
+        total = getattr(usage, 'total_tokens', None)
+        if isinstance(total, int):
+            self.rate_limiter.refund(estimate - total)
+    
+    def _log_token_usage(self, name, user_message, response, completion_text=None):
+        """
+        Log and count the token usage of a pass.
+        
+        Args:
+            name (str): Name of the pass
+            user_message (str): User message sent to the model
+            response: Chat completion response
+            completion_text (str, optional): Streamed text, counted when the response has no usage
+        """
+        stage = stage_name(name)
+        usage = getattr(response, 'usage', None)
+        if usage is not None and isinstance(getattr(usage, 'prompt_tokens', None), int):
+            logger.info(
+                f"{name}: {usage.prompt_tokens} prompt tokens, {usage.completion_tokens} completion tokens"
+            )
+            OPENAI_TOKENS.inc(usage.prompt_tokens, stage=stage, kind='prompt')
+            OPENAI_TOKENS.inc(usage.completion_tokens, stage=stage, kind='completion')
+        else:
+            prompt_tokens = count_tokens(user_message)
+            logger.info(f"{name}: about {prompt_tokens} prompt tokens")
+            OPENAI_TOKENS.inc(prompt_tokens, stage=stage, kind='prompt')
+            if completion_text:
+                OPENAI_TOKENS.inc(count_tokens(completion_text), stage=stage, kind='completion')
@@ -0,0 +1,116 @@
+"""
+Summary cache module for reusing generated summaries across requests.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryCache:
+    """
+    SQLite-backed summary cache with TTL and LRU eviction.
+
+    The database runs in WAL mode so several worker processes can share it.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=10000):
+        """
+        Initialize the summary cache.
+
+        Args:
+            path (str): Path to the SQLite database file
+            ttl (float): Seconds a summary stays valid after it is stored
+            max_entries (int): Maximum number of stored summaries
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_access ON summaries (last_access)")
+
+    def get(self, key):
+        """
+        Look up a summary.
+
+        Args:
+            key (str): Cache key built from the paper content and generation settings
+
+        Returns:
+            str: Cached summary, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                row = None
+
+            if row:
+                self._conn.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, summary):
+        """
+        Store a summary.
+
+        Args:
+            key (str): Cache key built from the paper content and generation settings
+            summary (str): Generated summary
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, summary, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, summary, now, now)
+                )
+                self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+                self._conn.execute(
+                    """
+                    DELETE FROM summaries WHERE key IN (
+                        SELECT key FROM summaries ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self):
+        """
+        Report cache usage.
+
+        Returns:
+            dict: Hit and miss counters and the number of stored summaries
+        """
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
 """
 Script to test the paper summarizer locally without Slack integration.
-This is useful for development and testing.
+This is useful for development and testing, and with --batch it summarizes
+a whole reading list.
 """
 
 import os
+import sys
 import argparse
 import logging
 from dotenv import load_dotenv
 from paper_processor import PaperProcessor
 from summarizer import Summarizer
+from rate_limiter import RateLimiter
+from batch_summarizer import BatchSummarizer, parse_sources, write_jsonl, write_markdown
+from openai_batch import OpenAIBatchClient
 
 # Configure logging
 logging.basicConfig(
@@ -25,8 +30,24 @@ def main():
     
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Test the paper summarizer locally.')
-    parser.add_argument('url', help='URL of the academic paper to summarize')
+    parser.add_argument('url', nargs='?', help='URL of the academic paper to summarize')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Reading list of URLs, arXiv IDs, DOIs or BibTeX entries to summarize ('-' for stdin)")
+    parser.add_argument('--output', '-o', help='File to write the batch results to (default: stdout)')
+    parser.add_argument('--format', choices=['jsonl', 'markdown'], default='jsonl', help='Batch output format')
+    parser.add_argument('--checkpoint',
+                        help='File recording finished papers, so an interrupted batch can resume '
+                             '(default: OUTPUT.checkpoint.jsonl, or batch.checkpoint.jsonl)')
+    parser.add_argument('--extract-workers', type=int, default=4, help='Papers extracted at once')
+    parser.add_argument('--summary-workers', type=int, default=4, help='Papers summarized at once')
+    parser.add_argument('--offline', action='store_true',
+                        help='Summarize the batch through the OpenAI Batch API at batch prices; '
+                             'results can take up to 24 hours')
+    parser.add_argument('--poll-interval', type=float, default=60,
+                        help='Seconds between status checks of an offline batch')
     args = parser.parse_args()
+    if bool(args.url) == bool(args.batch):
+        parser.error('give either a paper URL or --batch FILE')
     
     # Check for OpenAI API key
     api_key = os.environ.get('OPENAI_API_KEY')
@@ -34,6 +55,10 @@ def main():
         logger.error("OPENAI_API_KEY environment variable is not set. Please set it in your .env file.")
         return
     
+    if args.batch:
+        run_batch(args, api_key)
+        return
+    
     try:
         # Initialize components
         paper_processor = PaperProcessor()
@@ -62,5 +87,56 @@ def main():
         logger.error(f"Error: {str(e)}", exc_info=True)
 
 
+def run_batch(args, api_key):
+    """Summarize every paper of a reading list and write the results."""
+    if args.batch == '-':
+        urls = parse_sources(sys.stdin.read())
+    else:
+        with open(args.batch, encoding='utf-8') as f:
+            urls = parse_sources(f.read())
+    logger.info(f"Summarizing {len(urls)} papers...")
+    
+    # Calls from all workers are scheduled within the account's rate limits
+    rate_limiter = None
+    if int(os.environ.get('OPENAI_RPM', 500)) > 0 and int(os.environ.get('OPENAI_TPM', 200000)) > 0:
+        rate_limiter = RateLimiter(
+            requests_per_minute=int(os.environ.get('OPENAI_RPM', 500)),
+            tokens_per_minute=int(os.environ.get('OPENAI_TPM', 200000))
+        )
+    summarizer = Summarizer(
+        api_key=api_key,
+        max_concurrent_calls=2 * args.summary_workers,
+        rate_limiter=rate_limiter,
+        max_retries=int(os.environ.get('OPENAI_MAX_RETRIES', 4))
+    )
+    checkpoint = args.checkpoint or (f"{args.output}.checkpoint.jsonl" if args.output else 'batch.checkpoint.jsonl')
+    batch = BatchSummarizer(
+        PaperProcessor(),
+        summarizer,
+        extract_workers=args.extract_workers,
+        summary_workers=args.summary_workers,
+        checkpoint_path=checkpoint,
+        batch_client=OpenAIBatchClient(api_key, poll_interval=args.poll_interval) if args.offline else None
+    )
+    
+    try:
+        records = batch.run(urls)
+    except KeyboardInterrupt:
+        logger.warning(f"Interrupted; run the same command again to resume from {checkpoint}")
+        sys.exit(130)
+    
+    write = write_markdown if args.format == 'markdown' else write_jsonl
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            write(records, f)
+    else:
+        write(records, sys.stdout)
+    
+    failed = sum(1 for record in records if record['error'])
+    logger.info(f"Summarized {len(records) - failed} of {len(records)} papers")
+    if failed:
+        logger.warning(f"{failed} papers failed; run the same command again to retry them")
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,279 @@
+"""
+URL utilities shared by the paper processor and the caches.
+"""
+
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+# Query parameters that only track where a link was shared
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ref', 'src'}
+
+ARXIV_HOSTS = ('arxiv.org', 'export.arxiv.org')
+
+ARXIV_PATH_PATTERN = re.compile(r'^/(?:abs|pdf)/(.+?)(?:\.pdf)?$')
+
+# Paths that name a paper: abstract, PDF, HTML, format and source pages
+ARXIV_PAPER_PATH_PATTERN = re.compile(r'^/(?:abs|pdf|html|format|e-print|src)/(.+?)(?:\.pdf)?/?$', re.IGNORECASE)
+
+# Links in message text, bare or in Slack's <url|label> markup; group 1 is the host
+URL_PATTERN = re.compile(r'(?:https?://(?:[^\s<>"|/?#@]*@)?|(?=www\.))([^\s<>"|/?#:]+)[^\s<>"|]*')
+
+# Punctuation that ends a sentence rather than a link
+TRAILING_PUNCTUATION = '.,;:!?'
+
+# Hosts of academic papers; subdomains match too, e.g. dl.acm.org and export.arxiv.org
+ACADEMIC_DOMAINS = frozenset({
+    'arxiv.org', 'ieee.org', 'acm.org', 'springer.com',
+    'sciencedirect.com', 'nature.com', 'researchgate.net',
+    'ssrn.com', 'biorxiv.org', 'medrxiv.org', 'pnas.org',
+    'acs.org', 'wiley.com', 'tandfonline.com', 'sagepub.com',
+    'oup.com', 'frontiersin.org', 'mdpi.com', 'plos.org',
+    'hindawi.com', 'elsevier.com', 'semanticscholar.org', 'doi.org'
+})
+
+DOI_HOSTS = frozenset({'doi.org', 'dx.doi.org'})
+
+# A DOI, bare, with a "doi:" prefix or as the path of a doi.org link
+DOI_PATTERN = re.compile(r'^(?:doi:)?(10\.\d{4,9}/\S+)$', re.IGNORECASE)
+
+# DOIs arXiv registers for its papers, e.g. 10.48550/arXiv.1706.03762
+ARXIV_DOI_PATTERN = re.compile(r'^10\.48550/arxiv\.(.+)$', re.IGNORECASE)
+
+# Kinds of paper links returned by classify_url()
+LINK_ARXIV = 'arxiv'
+LINK_DOI = 'doi'
+LINK_PDF = 'pdf'
+LINK_HTML = 'html'
+
+# New-style (1706.03762, 1706.03762v5) and old-style (hep-th/9901001, math.GT/0309136v2) identifiers
+ARXIV_ID_PATTERN = re.compile(r'(\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[a-z]{2})?/\d{7})(v\d+)?', re.IGNORECASE)
+
+
+def parse_arxiv_id(text):
+    """
+    Return the canonical arXiv identifier of an arXiv URL or a bare identifier.
+
+    Abstract, PDF, HTML and source links on arxiv.org and its export mirror
+    are recognised, as are identifiers with an "arXiv:" prefix. The version
+    is kept when one is given, so "arXiv:1706.03762v5",
+    "https://export.arxiv.org/pdf/1706.03762v5.pdf" and
+    "arxiv.org/abs/1706.03762v5" all give "1706.03762v5".
+
+    Args:
+        text (str): URL or identifier
+
+    Returns:
+        str: Identifier with its version, if any, or None if the text is not an arXiv paper
+    """
+    text = text.strip()
+    if '://' in text or text.lower().startswith(('arxiv.org/', 'www.arxiv.org/', 'export.arxiv.org/')):
+        parts = urlsplit(text if '://' in text else 'https://' + text)
+        host = (parts.hostname or '').lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        match = ARXIV_PAPER_PATH_PATTERN.match(parts.path) if host in ARXIV_HOSTS else None
+        if match is None:
+            return None
+        text = match.group(1)
+    elif text.lower().startswith('arxiv:'):
+        text = text[len('arxiv:'):]
+
+    match = ARXIV_ID_PATTERN.fullmatch(text)
+    if match is None:
+        return None
+    identifier, version = match.groups()
+    return identifier + (version.lower() if version else '')
+
+
+def scan_links(text):
+    """
+    Find the links in a message with their hosts.
+
+    The host comes out of the same regular expression match as the link, so
+    no URL is parsed twice. Slack link labels ("<url|label>") and
+    punctuation ending a sentence are not part of the links.
+
+    Args:
+        text (str): Message text
+
+    Yields:
+        tuple: Link and its lowercased host without "www.", in the order they appear
+    """
+    # Most messages have no link, and substring tests are much cheaper than the regular expression
+    if '://' not in text and 'www.' not in text:
+        return
+    for match in URL_PATTERN.finditer(text):
+        url = match.group(0).rstrip(TRAILING_PUNCTUATION)
+        host = match.group(1).lower().rstrip(TRAILING_PUNCTUATION)
+        yield url, host[4:] if host.startswith('www.') else host
+
+
+def scan_urls(text):
+    """
+    Find the links in a message.
+
+    Args:
+        text (str): Message text
+
+    Yields:
+        str: Links in the order they appear
+    """
+    for url, _ in scan_links(text):
+        yield url
+
+
+def url_host(url):
+    """
+    Return the lowercased host of a URL, without "www.".
+
+    Args:
+        url (str): URL, with a scheme or starting with "www."
+
+    Returns:
+        str: Host name, empty if the URL has none
+    """
+    host = (urlsplit(url if '://' in url else 'https://' + url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def host_in_domains(host, domains):
+    """
+    Return True if a host is one of the domains or a subdomain of one.
+
+    Each suffix of the host is looked up in the set, so the cost depends on
+    the number of labels in the host, not on the number of domains, and
+    "notarxiv.org.example.com" does not match "arxiv.org".
+
+    Args:
+        host (str): Lowercased host name
+        domains (frozenset): Domains to match
+
+    Returns:
+        bool: True if the host matches
+    """
+    while host:
+        if host in domains:
+            return True
+        host = host.partition('.')[2]
+    return False
+
+
+def is_academic_url(url):
+    """Return True if the URL is on a host listed in ACADEMIC_DOMAINS."""
+    return host_in_domains(url_host(url), ACADEMIC_DOMAINS)
+
+
+def parse_doi(text):
+    """
+    Return the DOI of a doi.org link, a "doi:" reference or a bare DOI.
+
+    Args:
+        text (str): URL or DOI
+
+    Returns:
+        str: DOI, or None if the text is not one
+    """
+    text = text.strip()
+    if '://' in text or text.lower().startswith(tuple(f"{host}/" for host in DOI_HOSTS)):
+        parts = urlsplit(text if '://' in text else 'https://' + text)
+        if url_host(text) not in DOI_HOSTS:
+            return None
+        text = unquote(parts.path.lstrip('/'))
+    match = DOI_PATTERN.match(text)
+    return match.group(1) if match else None
+
+
+def arxiv_id_from_doi(doi):
+    """
+    Return the arXiv identifier of a DOI arXiv registered, such as 10.48550/arXiv.1706.03762.
+
+    Args:
+        doi (str): DOI
+
+    Returns:
+        str: arXiv identifier, or None for DOIs of other registrants
+    """
+    match = ARXIV_DOI_PATTERN.match(doi)
+    return parse_arxiv_id(match.group(1)) if match else None
+
+
+def unversioned_arxiv_id(url):
+    """
+    Return the arXiv identifier of a link to whatever the latest version of a paper is.
+
+    Args:
+        url (str): arXiv URL or identifier, or DOI link
+
+    Returns:
+        str: Identifier of an arXiv link or DOI without a version, or None for
+            versioned links and links to other papers
+    """
+    doi = parse_doi(url)
+    arxiv_id = arxiv_id_from_doi(doi) if doi else parse_arxiv_id(url)
+    match = ARXIV_ID_PATTERN.fullmatch(arxiv_id) if arxiv_id else None
+    return arxiv_id if match and not match.group(2) else None
+
+
+def classify_url(url):
+    """
+    Tell how a paper link is fetched, parsing the URL once.
+
+    Args:
+        url (str): Paper URL
+
+    Returns:
+        str: LINK_ARXIV for arXiv pages, LINK_DOI for doi.org links, LINK_PDF for
+            links to PDF files and LINK_HTML for other pages
+    """
+    parts = urlsplit(url if '://' in url else 'https://' + url)
+    host = (parts.hostname or '').lower()
+    if host_in_domains(host, ARXIV_HOSTS):
+        return LINK_ARXIV
+    if host_in_domains(host, DOI_HOSTS) and DOI_PATTERN.match(unquote(parts.path.lstrip('/'))):
+        return LINK_DOI
+    if parts.path.lower().endswith('.pdf'):
+        return LINK_PDF
+    return LINK_HTML
+
+
+def normalize_url(url):
+    """
+    Normalize a paper URL so that equivalent links share one key.
+
+    The scheme is forced to https, the host is lowercased without "www.",
+    fragments, default ports, trailing slashes and tracking parameters are
+    dropped, and arXiv abstract, PDF and source links map to the same /abs/ URL.
+
+    Args:
+        url (str): URL to normalize
+
+    Returns:
+        str: Normalized URL
+    """
+    url = url.strip()
+    if url.startswith('www.'):
+        url = 'https://' + url
+
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip('/') or '/'
+    if host in ARXIV_HOSTS:
+        host = 'arxiv.org'
+        arxiv_id = parse_arxiv_id(url)
+        match = ARXIV_PATH_PATTERN.match(path)
+        if arxiv_id:
+            path = f"/abs/{arxiv_id}"
+        elif match:
+            path = f"/abs/{match.group(1)}"
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ))
+
+    return urlunsplit(('https', host, path, query, ''))
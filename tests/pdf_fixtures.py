@@ -0,0 +1,55 @@
+"""
+Helpers for building small text PDFs in tests.
+"""
+
+
+def _escape(text):
+    """Escape a string for use in a PDF literal string."""
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(pages):
+    """
+    Build a PDF document with one text page per entry.
+
+    Args:
+        pages (list): Each page is a list of text lines
+
+    Returns:
+        bytes: PDF document
+    """
+    page_count = len(pages)
+    font_id = 3 + 2 * page_count
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            ' '.join(f"{3 + 2 * i} 0 R" for i in range(page_count)), page_count
+        )).encode()
+    ]
+
+    for i, lines in enumerate(pages):
+        content = "BT /F1 10 Tf 14 TL 50 750 Td " + ' '.join(
+            f"({_escape(line)}) Tj T*" for line in lines
+        ) + " ET"
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(
+            f"<< /Length {len(content)} >>\nstream\n".encode() + content.encode('latin-1') + b"\nendstream"
+        )
+
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
@@ -0,0 +1,346 @@
+"""
+Tests for the arXiv fetcher module, against a local stand-in for the arXiv endpoints.
+"""
+
+import io
+import gzip
+import tarfile
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.arxiv_fetcher import ArxivFetcher, parse_atom_entry, read_source_archive, latex_to_text
+from src.extraction_cache import ExtractionCache
+from src.http_transport import HttpTransport, AsyncHttpTransport
+from src.paper_processor import PaperProcessor
+from src.url_utils import parse_arxiv_id
+from tests.pdf_fixtures import make_pdf
+
+MAIN_TEX = r"""
+\documentclass{article}
+\usepackage{amsmath}
+\title{Attention Is All You Need}
+\begin{document}
+\maketitle
+\begin{abstract}
+We propose the \textbf{Transformer}, a model based on attention.
+\end{abstract}
+\input{sections/intro}
+\section{Model Architecture}\label{sec:model}
+The encoder maps an input sequence~\cite{bahdanau} to representations, see Section~\ref{sec:intro}.
+% A comment that should not appear
+\begin{equation}
+  \mathrm{Attention}(Q, K, V) = \mathrm{softmax}(QK^T)V
+\end{equation}
+\subsection{Scaled Dot-Product Attention}
+We call our particular attention $\sqrt{d_k}$-scaled.
+\begin{figure}[t]
+  \includegraphics{arch.png}
+  \caption{The architecture.}
+\end{figure}
+\section{Conclusion}
+Attention suffices.
+\bibliographystyle{plain}
+\bibliography{refs}
+\end{document}
+"""
+
+INTRO_TEX = r"""
+\section{Introduction}\label{sec:intro}
+Recurrent models are \emph{sequential} and hard to parallelize.
+"""
+
+REFS_BBL = r"""
+\begin{thebibliography}{1}
+\bibitem{bahdanau} Bahdanau et al. Neural machine translation. 2014.
+\end{thebibliography}
+"""
+
+ATOM_ENTRY = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <id>http://arxiv.org/abs/{id}</id>
+    <title>Attention Is All
+      You Need</title>
+    <summary>  The dominant sequence transduction models
+      are based on recurrent networks. </summary>
+    <author><name>Ashish Vaswani</name></author>
+    <author><name>Noam Shazeer</name></author>
+  </entry>
+</feed>
+"""
+
+ATOM_ERROR = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <id>http://arxiv.org/api/errors#incorrect_id_format_for_{id}</id>
+    <title>Error</title>
+    <summary>incorrect id format for {id}</summary>
+  </entry>
+</feed>
+"""
+
+
+def make_source_tarball(files):
+    """Build a gzipped tar of a LaTeX submission."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name, text in files.items():
+            data = text.encode('utf-8')
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class ArxivStubHandler(BaseHTTPRequestHandler):
+    """Stands in for the arXiv query API and the source and PDF downloads."""
+
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    lock = threading.Lock()
+    sources = {
+        # A LaTeX submission
+        '1706.03762v7': make_source_tarball({
+            'main.tex': MAIN_TEX, 'sections/intro.tex': INTRO_TEX, 'main.bbl': REFS_BBL
+        }),
+        # A paper submitted as a PDF only
+        '2001.00001v1': make_pdf([['A PDF Only Paper', 'Abstract', 'No source here.'], ['INTRODUCTION', 'Text.']]),
+    }
+
+    def do_GET(self):
+        """Serve the query API, sources and PDFs."""
+        parts = urlsplit(self.path)
+        with self.lock:
+            self.requests.append(parts.path)
+        if parts.path == '/api/query':
+            arxiv_id = parse_qs(parts.query)['id_list'][0]
+            if arxiv_id.startswith('1706.03762') or arxiv_id.startswith('2001.00001'):
+                latest = '1706.03762v7' if arxiv_id.startswith('1706.03762') else '2001.00001v1'
+                body = ATOM_ENTRY.format(id=arxiv_id if 'v' in arxiv_id else latest)
+            else:
+                body = ATOM_ERROR.format(id=arxiv_id)
+            self._send(200, body.encode('utf-8'), 'application/atom+xml')
+        elif parts.path.startswith('/e-print/'):
+            source = self.sources.get(parts.path[len('/e-print/'):])
+            if source is None:
+                self._send(404, b'not found', 'text/plain')
+            else:
+                self._send(200, source, 'application/x-eprint-tar')
+        elif parts.path.startswith('/pdf/'):
+            self._send(200, self.sources['2001.00001v1'], 'application/pdf')
+        else:
+            self._send(404, b'not found', 'text/plain')
+
+    def log_message(self, format, *args):
+        """Silence request logging."""
+
+    def _send(self, status, body, content_type):
+        """Send a response."""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ArxivStubMixin:
+    """Runs the arXiv stand-in for a test case."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the stand-in server."""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ArxivStubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stand-in server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Forget the requests of earlier tests."""
+        ArxivStubHandler.requests.clear()
+
+
+class TestArxivIds(unittest.TestCase):
+    """Test cases for parse_arxiv_id."""
+
+    def test_urls_and_ids(self):
+        """Test that every form of an arXiv link gives the same canonical identifier."""
+        for text in (
+            '1706.03762v5', 'arXiv:1706.03762v5', 'https://arxiv.org/abs/1706.03762v5',
+            'http://export.arxiv.org/abs/1706.03762v5', 'https://arxiv.org/pdf/1706.03762v5.pdf',
+            'https://arxiv.org/pdf/1706.03762v5', 'https://www.arxiv.org/abs/1706.03762v5/',
+            'arxiv.org/abs/1706.03762v5',
+        ):
+            self.assertEqual(parse_arxiv_id(text), '1706.03762v5', text)
+
+    def test_unversioned_and_old_style(self):
+        """Test identifiers without a version and old-style identifiers."""
+        self.assertEqual(parse_arxiv_id('https://arxiv.org/abs/1706.03762'), '1706.03762')
+        self.assertEqual(parse_arxiv_id('https://arxiv.org/abs/hep-th/9901001v2'), 'hep-th/9901001v2')
+        self.assertEqual(parse_arxiv_id('math.GT/0309136'), 'math.GT/0309136')
+
+    def test_not_arxiv(self):
+        """Test that other links are not taken for arXiv papers."""
+        self.assertIsNone(parse_arxiv_id('https://example.com/abs/1706.03762'))
+        self.assertIsNone(parse_arxiv_id('https://arxiv.org/list/cs.AI/recent'))
+        self.assertIsNone(parse_arxiv_id('not a paper'))
+
+
+class TestArxivParsing(unittest.TestCase):
+    """Test cases for the metadata and LaTeX parsing."""
+
+    def test_parse_atom_entry(self):
+        """Test reading the metadata of a paper."""
+        metadata = parse_atom_entry(ATOM_ENTRY.format(id='1706.03762v7'))
+
+        self.assertEqual(metadata['id'], '1706.03762v7')
+        self.assertEqual(metadata['title'], 'Attention Is All You Need')
+        self.assertEqual(
+            metadata['abstract'], 'The dominant sequence transduction models are based on recurrent networks.'
+        )
+        self.assertEqual(metadata['authors'], ['Ashish Vaswani', 'Noam Shazeer'])
+
+    def test_parse_atom_error(self):
+        """Test that an error entry is not taken for a paper."""
+        self.assertIsNone(parse_atom_entry(ATOM_ERROR.format(id='nope')))
+        self.assertIsNone(parse_atom_entry('not xml'))
+
+    def test_read_source_archive(self):
+        """Test that included files and the bibliography are inlined into the main file."""
+        latex = read_source_archive(ArxivStubHandler.sources['1706.03762v7'])
+
+        self.assertIn('Recurrent models are', latex)
+        self.assertIn('Bahdanau et al.', latex)
+        self.assertNotIn('A comment', latex)
+
+    def test_read_single_file_and_pdf_sources(self):
+        """Test gzipped single-file sources and PDF-only submissions."""
+        self.assertIn('\\section{Conclusion}', read_source_archive(gzip.compress(MAIN_TEX.encode('utf-8'))))
+        self.assertIsNone(read_source_archive(ArxivStubHandler.sources['2001.00001v1']))
+
+    def test_latex_to_text(self):
+        """Test that the LaTeX is reduced to text with numbered headings on their own lines."""
+        latex = read_source_archive(ArxivStubHandler.sources['1706.03762v7'])
+        text = latex_to_text(latex)
+        lines = text.splitlines()
+
+        self.assertEqual(lines[0], 'Attention Is All You Need')
+        for heading in ('Abstract', '1 Introduction', '2 Model Architecture', '2.1 Scaled Dot-Product Attention',
+                        '3 Conclusion', 'References'):
+            self.assertIn(heading, lines)
+        self.assertIn('We propose the Transformer, a model based on attention.', text)
+        self.assertIn('Recurrent models are sequential and hard to parallelize.', text)
+        self.assertIn('The encoder maps an input sequence to representations, see Section .', text)
+        self.assertNotIn('softmax', text)
+        self.assertNotIn('arch.png', text)
+        self.assertNotIn('\\', text)
+
+
+class TestArxivExtraction(ArxivStubMixin, unittest.TestCase):
+    """Test cases for extracting arXiv papers through PaperProcessor."""
+
+    def make_processor(self, cache=None, arxiv_latest_ttl=3600, **kwargs):
+        """Build a paper processor whose arXiv fetcher uses the stand-in."""
+        transport = HttpTransport(retries=0)
+        fetcher = ArxivFetcher(
+            transport=transport, api_url=f"{self.base_url}/api/query", base_url=self.base_url, **kwargs
+        )
+        return PaperProcessor(
+            cache=cache, transport=transport, arxiv_fetcher=fetcher, arxiv_latest_ttl=arxiv_latest_ttl
+        )
+
+    def test_extracts_from_source(self):
+        """Test that a paper with LaTeX source is read from it, at its latest version, without the PDF."""
+        content = self.make_processor().extract_paper_content('https://arxiv.org/abs/1706.03762')
+
+        self.assertEqual(content['arxiv_id'], '1706.03762v7')
+        self.assertEqual(content['title'], 'Attention Is All You Need')
+        self.assertTrue(content['abstract'].startswith('The dominant sequence transduction models'))
+        self.assertEqual(content['authors'], ['Ashish Vaswani', 'Noam Shazeer'])
+        keys = [section['key'] for section in content['sections']]
+        self.assertEqual(keys[:3], ['abstract', 'introduction', 'model architecture'])
+        self.assertIn('conclusion', keys)
+        self.assertEqual(ArxivStubHandler.requests, ['/api/query', '/e-print/1706.03762v7'])
+
+    def test_falls_back_to_pdf(self):
+        """Test that a PDF-only submission is read from its PDF."""
+        content = self.make_processor().extract_paper_content('https://export.arxiv.org/pdf/2001.00001.pdf')
+
+        self.assertEqual(content['arxiv_id'], '2001.00001v1')
+        self.assertIn('No source here.', content['full_text'])
+        self.assertEqual(ArxivStubHandler.requests, ['/api/query', '/e-print/2001.00001v1', '/pdf/2001.00001v1'])
+
+    def test_source_disabled(self):
+        """Test that the source can be skipped in favour of the PDF."""
+        content = self.make_processor(prefer_source=False).extract_paper_content('https://arxiv.org/abs/2001.00001v1')
+
+        self.assertIn('No source here.', content['full_text'])
+        self.assertNotIn('/e-print/2001.00001v1', ArxivStubHandler.requests)
+
+    def test_unversioned_link_is_rechecked(self):
+        """Test that a cached link without a version is checked for a newer version once it expires."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        cache = ExtractionCache(os.path.join(tmpdir.name, 'cache.sqlite3'))
+        url = 'https://arxiv.org/abs/1706.03762'
+
+        # An alias that expires at once makes every lookup check the latest version
+        expiring = self.make_processor(cache=cache, arxiv_latest_ttl=0)
+        expiring.extract_paper_content(url)
+        content = expiring.extract_paper_content(url)
+        self.assertEqual(content['arxiv_id'], '1706.03762v7')
+        self.assertEqual(ArxivStubHandler.requests, ['/api/query', '/e-print/1706.03762v7', '/api/query'])
+
+        # The extracted version, and a fresh alias, are served from the cache alone
+        ArxivStubHandler.requests.clear()
+        self.make_processor(cache=cache).extract_paper_content('https://arxiv.org/pdf/1706.03762v7')
+        self.make_processor(cache=cache).extract_paper_content(url)
+        self.make_processor(cache=cache).extract_paper_content(url)
+        self.assertEqual(ArxivStubHandler.requests, ['/api/query'])
+
+    def test_metadata_unavailable(self):
+        """Test that a paper unknown to the API is still fetched by the identifier in its URL."""
+        ArxivStubHandler.sources['9999.99999'] = ArxivStubHandler.sources['1706.03762v7']
+        self.addCleanup(ArxivStubHandler.sources.pop, '9999.99999')
+
+        content = self.make_processor().extract_paper_content('https://arxiv.org/abs/9999.99999')
+
+        self.assertEqual(content['arxiv_id'], '9999.99999')
+        self.assertEqual(content['title'], 'Attention Is All You Need')
+        self.assertNotIn('authors', content)
+
+
+class TestAsyncArxivExtraction(ArxivStubMixin, unittest.IsolatedAsyncioTestCase):
+    """Test cases for extracting arXiv papers through the async transport."""
+
+    async def test_extracts_from_source(self):
+        """Test that the async path reads the metadata and the LaTeX source."""
+        transport = AsyncHttpTransport(retries=0)
+        self.addAsyncCleanup(transport.aclose)
+        fetcher = ArxivFetcher(
+            async_transport=transport, api_url=f"{self.base_url}/api/query", base_url=self.base_url
+        )
+        processor = PaperProcessor(async_transport=transport, arxiv_fetcher=fetcher)
+
+        content = await processor.aextract_paper_content('https://arxiv.org/abs/1706.03762v7')
+
+        self.assertEqual(content['arxiv_id'], '1706.03762v7')
+        self.assertEqual(content['title'], 'Attention Is All You Need')
+        self.assertIn('Recurrent models are sequential', content['full_text'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,308 @@
+"""
+Tests for the ASGI application.
+"""
+
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+from urllib.parse import urlencode
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.asgi import SlackAsgiApp
+from src.slack_dispatcher import SlackDispatcher
+from src.prefetcher import AsyncPaperPrefetcher
+
+
+async def call_app(app, path, body=b'', method='POST', headers=None):
+    """Send one HTTP request through an ASGI app and return the status and JSON body."""
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': headers or []}
+    await app(scope, receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+class TestSlackAsgiApp(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the SlackAsgiApp class."""
+
+    def setUp(self):
+        """Set up an app with mocked components."""
+        self.slack_client = MagicMock()
+        self.slack_client.verify_signature.return_value = True
+        self.slack_client.aacknowledge_command = AsyncMock()
+        self.slack_client.aget_parent_message = AsyncMock(
+            return_value={'text': 'Check out https://arxiv.org/abs/1234.5678'}
+        )
+        self.slack_client.apost_message = AsyncMock(return_value={'ts': '9.0'})
+        self.slack_client.aupdate_message = AsyncMock()
+
+        self.paper_processor = MagicMock()
+        self.paper_processor.extract_paper_url.return_value = 'https://arxiv.org/abs/1234.5678'
+        self.paper_processor.aextract_paper_content = AsyncMock(return_value={'title': 'A Paper'})
+
+        self.summarizer = MagicMock()
+        self.summarizer.agenerate_summary = AsyncMock(return_value='The summary')
+
+        dispatcher = SlackDispatcher(self.slack_client, channel_messages_per_minute=6000, channel_burst=100)
+        self.app = SlackAsgiApp(
+            self.slack_client, self.paper_processor, self.summarizer, max_in_flight=2, update_interval=0.01,
+            dispatcher=dispatcher
+        )
+
+    def command_body(self, **fields):
+        """Build a URL-encoded slash command body."""
+        form = {'channel_id': 'C1', 'user_id': 'U1', 'response_url': 'https://hooks.slack.com/x'}
+        form.update(fields)
+        return urlencode(form).encode('utf-8')
+
+    async def test_url_verification(self):
+        """Test that the events endpoint answers the URL verification challenge."""
+        body = json.dumps({'type': 'url_verification', 'challenge': 'abc'}).encode('utf-8')
+        status, payload = await call_app(self.app, '/slack/events', body)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload, {'challenge': 'abc'})
+
+    async def test_invalid_signature(self):
+        """Test that unsigned requests are rejected."""
+        self.slack_client.verify_signature.return_value = False
+        status, _ = await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        self.assertEqual(status, 403)
+
+    async def test_signature_headers(self):
+        """Test that the signature check sees the Slack headers and the raw body."""
+        body = self.command_body()
+        await call_app(self.app, '/slack/commands/summary', body, headers=[
+            (b'x-slack-request-timestamp', b'123'),
+            (b'x-slack-signature', b'v0=abc'),
+        ])
+
+        request = self.slack_client.verify_signature.call_args.args[0]
+        self.assertEqual(request.headers.get('X-Slack-Request-Timestamp'), '123')
+        self.assertEqual(request.headers.get('X-Slack-Signature'), 'v0=abc')
+        self.assertEqual(request.get_data(), body)
+
+    async def test_command_outside_thread(self):
+        """Test that the command asks to be used in a thread."""
+        status, payload = await call_app(self.app, '/slack/commands/summary', self.command_body())
+
+        self.assertEqual(status, 200)
+        self.assertIn('must be used in a thread', payload['text'])
+        self.assertEqual(self.app.tasks, set())
+
+    async def test_summary_is_posted(self):
+        """Test that an accepted command summarizes the paper and posts it to the thread."""
+        status, payload = await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        self.assertEqual(status, 200)
+        self.assertIn('Processing your request', payload['text'])
+
+        await self.app.drain()
+
+        self.slack_client.aacknowledge_command.assert_awaited_once()
+        self.slack_client.aget_parent_message.assert_awaited_once_with('C1', '1.0')
+        self.assertEqual(self.summarizer.agenerate_summary.call_args.args, ({'title': 'A Paper'},))
+        final = self.slack_client.aupdate_message.call_args.kwargs
+        self.assertEqual(final['ts'], '9.0')
+        self.assertIn('The summary', final['text'])
+
+    async def test_message_events_prewarm_parent_lookup(self):
+        """Test that a message seen in an event is used as the thread parent without an API call."""
+        event = {
+            'type': 'event_callback',
+            'event': {'type': 'message', 'channel': 'C1', 'ts': '1.0', 'text': 'See https://arxiv.org/abs/1111.2222'}
+        }
+        status, _ = await call_app(self.app, '/slack/events', json.dumps(event).encode('utf-8'))
+        self.assertEqual(status, 200)
+
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        await self.app.drain()
+
+        self.slack_client.aget_parent_message.assert_not_awaited()
+        self.paper_processor.extract_paper_url.assert_called_once_with('See https://arxiv.org/abs/1111.2222')
+
+    async def test_message_events_prefetch_paper(self):
+        """Test that a linked paper is extracted on the post and the summary joins that extraction."""
+        async def slow_extract(url):
+            await asyncio.sleep(0.05)
+            return {'title': 'A Paper'}
+
+        self.paper_processor.aextract_paper_content = AsyncMock(side_effect=slow_extract)
+        self.app.prefetcher = AsyncPaperPrefetcher(self.paper_processor, debounce=0)
+        event = {
+            'type': 'event_callback',
+            'event': {'type': 'message', 'channel': 'C1', 'ts': '1.0', 'text': 'See https://arxiv.org/abs/1234.5678'}
+        }
+        await call_app(self.app, '/slack/events', json.dumps(event).encode('utf-8'))
+        await asyncio.sleep(0.01)
+
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        await self.app.drain()
+        await self.app.prefetcher.aclose()
+
+        self.paper_processor.aextract_paper_content.assert_awaited_once_with('https://arxiv.org/abs/1234.5678')
+        self.assertEqual(self.app.prefetcher.stats()['started'], 1)
+
+    async def test_summary_streams_into_status_message(self):
+        """Test that partial summaries edit the status message before the final text."""
+        async def streaming_summary(paper_content, on_progress=None):
+            on_progress('First pass so far')
+            await asyncio.sleep(0.05)
+            on_progress('First pass done, second pass so far')
+            await asyncio.sleep(0.05)
+            return 'The summary'
+
+        self.summarizer.agenerate_summary = AsyncMock(side_effect=streaming_summary)
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        await self.app.drain()
+
+        texts = [call.kwargs['text'] for call in self.slack_client.aupdate_message.call_args_list]
+        self.assertTrue(texts[0].endswith('First pass so far'))
+        self.assertTrue(texts[-1].endswith('The summary'))
+        self.assertEqual(self.slack_client.apost_message.await_count, 1)
+
+    async def test_summary_is_posted_when_status_edit_fails(self):
+        """Test that the summary is posted as a new message when the status message cannot be edited."""
+        self.slack_client.aupdate_message = AsyncMock(side_effect=Exception("message_not_found"))
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        await self.app.drain()
+
+        final = self.slack_client.apost_message.call_args.kwargs
+        self.assertEqual(self.slack_client.apost_message.await_count, 2)
+        self.assertEqual(final['thread_ts'], '1.0')
+        self.assertEqual(final['text'], "<@U1> Here's the summary of the paper:\n\nThe summary")
+
+    async def test_concurrent_requests_share_summary(self):
+        """Test that concurrent commands for the same paper summarize it once."""
+        async def slow_summary(paper_content, on_progress=None):
+            await asyncio.sleep(0.05)
+            return 'The summary'
+
+        self.summarizer.agenerate_summary = AsyncMock(side_effect=slow_summary)
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='2.0'))
+        await self.app.drain()
+
+        self.assertEqual(self.summarizer.agenerate_summary.await_count, 1)
+
+    async def test_backpressure(self):
+        """Test that commands beyond max_in_flight are turned away."""
+        release = asyncio.Event()
+
+        async def blocked_summary(paper_content, on_progress=None):
+            await release.wait()
+            return 'The summary'
+
+        self.summarizer.agenerate_summary = AsyncMock(side_effect=blocked_summary)
+        self.paper_processor.extract_paper_url.side_effect = ['https://a.org/1.pdf', 'https://a.org/2.pdf']
+        for thread_ts in ('1.0', '2.0'):
+            await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts=thread_ts))
+
+        _, payload = await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='3.0'))
+        self.assertIn('too many summaries', payload['text'])
+
+        release.set()
+        await self.app.drain()
+        self.assertEqual(self.app.tasks, set())
+
+    async def test_summary_all(self):
+        """Test that "/summary all" summarizes every linked paper, a bounded number at once, into one digest."""
+        urls = ['https://a.org/1.pdf', 'https://a.org/2.pdf', 'https://a.org/3.pdf']
+        self.paper_processor.extract_paper_urls.return_value = urls
+        self.paper_processor.aextract_paper_content = AsyncMock(side_effect=lambda url: {'title': url[-5]})
+        running = []
+        peak = []
+
+        async def summary(paper_content, on_progress=None):
+            running.append(paper_content['title'])
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.remove(paper_content['title'])
+            return f"Summary of {paper_content['title']}"
+
+        self.summarizer.agenerate_summary = AsyncMock(side_effect=summary)
+        self.summarizer.agenerate_comparison = AsyncMock(return_value='They differ')
+        self.summarizer.combine_digest.side_effect = lambda summaries, comparison: '\n'.join([comparison] + summaries)
+        self.app.paper_concurrency = 2
+
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0', text='all'))
+        await self.app.drain()
+
+        self.paper_processor.extract_paper_url.assert_not_called()
+        self.assertEqual(max(peak), 2)
+        self.summarizer.agenerate_comparison.assert_awaited_once_with(
+            ['Summary of 1', 'Summary of 2', 'Summary of 3']
+        )
+        final = self.slack_client.aupdate_message.call_args.kwargs['text']
+        self.assertIn("Here's a digest of the papers", final)
+        self.assertIn('They differ\nSummary of 1\nSummary of 2\nSummary of 3', final)
+
+    async def test_summary_all_with_failed_paper(self):
+        """Test that papers that cannot be extracted are left out of the digest and named."""
+        urls = ['https://a.org/1.pdf', 'https://a.org/2.pdf', 'https://a.org/3.pdf']
+        self.paper_processor.extract_paper_urls.return_value = urls
+        self.paper_processor.aextract_paper_content = AsyncMock(
+            side_effect=lambda url: None if url.endswith('2.pdf') else {'title': url[-5]}
+        )
+        self.summarizer.agenerate_summary = AsyncMock(
+            side_effect=lambda paper_content, on_progress=None: f"Summary of {paper_content['title']}"
+        )
+        self.summarizer.agenerate_comparison = AsyncMock(return_value='They differ')
+        self.summarizer.combine_digest.side_effect = lambda summaries, comparison: '\n'.join([comparison] + summaries)
+
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0', text='all'))
+        await self.app.drain()
+
+        self.summarizer.agenerate_comparison.assert_awaited_once_with(['Summary of 1', 'Summary of 3'])
+        final = self.slack_client.aupdate_message.call_args.kwargs['text']
+        self.assertIn('I had trouble extracting content from https://a.org/2.pdf.', final)
+
+    async def test_summary_all_with_one_paper(self):
+        """Test that "/summary all" on a single paper posts its summary without a digest."""
+        self.paper_processor.extract_paper_urls.return_value = ['https://a.org/1.pdf']
+
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0', text=' ALL '))
+        await self.app.drain()
+
+        self.summarizer.agenerate_comparison.assert_not_called()
+        final = self.slack_client.aupdate_message.call_args.kwargs['text']
+        self.assertIn("Here's the summary of the paper", final)
+
+    async def test_metrics_endpoint(self):
+        """Test that /metrics exports the timings of finished requests in the Prometheus format."""
+        await call_app(self.app, '/slack/commands/summary', self.command_body(thread_ts='1.0'))
+        await self.app.drain()
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await self.app({'type': 'http', 'method': 'GET', 'path': '/metrics', 'headers': []}, None, send)
+
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/plain; version=0.0.4; charset=utf-8'), sent[0]['headers'])
+        body = sent[1]['body'].decode('utf-8')
+        self.assertIn('# TYPE paper_summarizer_stage_seconds histogram', body)
+        self.assertIn('paper_summarizer_stage_seconds_count{stage="summary_request"}', body)
+
+    async def test_unknown_path(self):
+        """Test that unknown paths return 404."""
+        status, _ = await call_app(self.app, '/nope')
+        self.assertEqual(status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
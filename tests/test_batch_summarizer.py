@@ -0,0 +1,246 @@
+"""
+Tests for the batch summarizer module.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.batch_summarizer import (
+    BatchSummarizer, parse_sources, load_checkpoint, write_jsonl, write_markdown
+)
+
+
+class TestParseSources(unittest.TestCase):
+    """Test cases for parse_sources."""
+
+    def test_line_items(self):
+        """Test that URLs, arXiv IDs and DOIs become URLs, in order and without duplicates."""
+        text = """
+        # ICML reading list
+        https://arxiv.org/abs/1706.03762
+        arXiv:2005.14165v4
+        hep-th/9901001
+        10.1145/3292500.3330701
+        https://arxiv.org/pdf/1706.03762.pdf
+        not a paper
+        """
+        self.assertEqual(parse_sources(text), [
+            'https://arxiv.org/abs/1706.03762',
+            'https://arxiv.org/abs/2005.14165v4',
+            'https://arxiv.org/abs/hep-th/9901001',
+            'https://doi.org/10.1145/3292500.3330701',
+        ])
+
+    def test_bibtex(self):
+        """Test that BibTeX entries use their url, else eprint, else DOI."""
+        text = """
+        @inproceedings{vaswani2017,
+          title = {Attention Is All You Need},
+          url = {https://papers.nips.cc/paper/7181},
+          eprint = {1706.03762}
+        }
+        @article{brown2020,
+          title = "Language Models are Few-Shot Learners",
+          eprint = "2005.14165",
+          archivePrefix = {arXiv}
+        }
+        @article{other,
+          doi = {10.1000/xyz123}
+        }
+        """
+        self.assertEqual(parse_sources(text), [
+            'https://papers.nips.cc/paper/7181',
+            'https://arxiv.org/abs/2005.14165',
+            'https://doi.org/10.1000/xyz123',
+        ])
+
+
+class TestBatchSummarizer(unittest.TestCase):
+    """Test cases for the BatchSummarizer class."""
+
+    def setUp(self):
+        """Set up fake components and a checkpoint path."""
+        self.paper_processor = MagicMock()
+        self.paper_processor.extract_paper_content.side_effect = lambda url: {'title': f"Paper {url[-1]}"}
+        self.summarizer = MagicMock()
+        self.summarizer.generate_summary.side_effect = lambda content: f"Summary of {content['title']}"
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmpdir.name, 'batch.checkpoint.jsonl')
+        self.urls = [f"https://arxiv.org/abs/{i}" for i in range(1, 6)]
+
+    def tearDown(self):
+        """Remove the checkpoint."""
+        self.tmpdir.cleanup()
+
+    def test_results_in_input_order(self):
+        """Test that every paper is summarized and results keep the input order."""
+        records = BatchSummarizer(self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint).run(self.urls)
+
+        self.assertEqual([record['url'] for record in records], self.urls)
+        self.assertEqual(records[2]['summary'], 'Summary of Paper 3')
+        self.assertEqual(len(load_checkpoint(self.checkpoint)), 5)
+
+    def test_bounded_parallelism(self):
+        """Test that extraction and summarization run in parallel within their limits."""
+        lock = threading.Lock()
+        running = {'extract': 0, 'summary': 0}
+        peak = {'extract': 0, 'summary': 0}
+
+        def tracked(stage, result):
+            def run(arg):
+                with lock:
+                    running[stage] += 1
+                    peak[stage] = max(peak[stage], running[stage])
+                time.sleep(0.05)
+                with lock:
+                    running[stage] -= 1
+                return result(arg)
+            return run
+
+        self.paper_processor.extract_paper_content.side_effect = tracked('extract', lambda url: {'title': url})
+        self.summarizer.generate_summary.side_effect = tracked('summary', lambda content: 'Summary')
+        urls = [f"https://arxiv.org/abs/{i}" for i in range(12)]
+
+        BatchSummarizer(self.paper_processor, self.summarizer, extract_workers=3, summary_workers=2).run(urls)
+
+        self.assertEqual(peak['extract'], 3)
+        self.assertEqual(peak['summary'], 2)
+
+    def test_resume_skips_summarized_and_retries_failed(self):
+        """Test that a second run only processes the papers that did not succeed."""
+        self.summarizer.generate_summary.side_effect = lambda content: (
+            'Error generating summary: timeout' if content['title'] == 'Paper 2' else 'Summary'
+        )
+        first = BatchSummarizer(self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint).run(self.urls)
+        self.assertIn('timeout', first[1]['error'])
+
+        self.paper_processor.extract_paper_content.reset_mock()
+        self.summarizer.generate_summary.side_effect = lambda content: 'Summary'
+        second = BatchSummarizer(self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint).run(self.urls)
+
+        self.paper_processor.extract_paper_content.assert_called_once_with('https://arxiv.org/abs/2')
+        self.assertTrue(all(record['error'] is None for record in second))
+
+    def test_failed_pass_is_retried(self):
+        """Test that a summary with a failed or timed out pass is recorded as an error and retried."""
+        self.summarizer.generate_summary.side_effect = lambda content: {
+            'Paper 2': '# Summary\n\n## First Pass\n\nError generating first pass summary.\n\n## Second Pass\n\nOK',
+            'Paper 4': '# Summary\n\n## First Pass\n\nOK\n\n## Second Pass\n\nThe second pass summary timed out.',
+        }.get(content['title'], 'Summary')
+        first = BatchSummarizer(self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint).run(self.urls)
+        self.assertIn('first pass', first[1]['error'])
+        self.assertIn('timed out', first[3]['error'])
+        self.assertIsNone(first[1]['summary'])
+
+        self.paper_processor.extract_paper_content.reset_mock()
+        self.summarizer.generate_summary.side_effect = lambda content: 'Summary'
+        BatchSummarizer(self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint).run(self.urls)
+
+        self.assertEqual(
+            sorted(call.args[0] for call in self.paper_processor.extract_paper_content.call_args_list),
+            ['https://arxiv.org/abs/2', 'https://arxiv.org/abs/4']
+        )
+
+    def test_truncated_checkpoint_line_is_ignored(self):
+        """Test that a line cut short by an interruption does not break resuming."""
+        with open(self.checkpoint, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'url': self.urls[0], 'title': 'Paper 1', 'summary': 'S', 'error': None}) + '\n')
+            f.write('{"url": "https://arxiv.org/abs/2", "tit')
+
+        self.assertEqual(list(load_checkpoint(self.checkpoint)), ['https://arxiv.org/abs/1'])
+
+    def test_extraction_failure(self):
+        """Test that papers that cannot be extracted are reported and not summarized."""
+        self.paper_processor.extract_paper_content.side_effect = lambda url: None
+
+        records = BatchSummarizer(self.paper_processor, self.summarizer).run(self.urls[:1])
+
+        self.assertEqual(records[0]['error'], 'Could not extract the paper')
+        self.summarizer.generate_summary.assert_not_called()
+
+    def test_offline_mode_submits_one_batch(self):
+        """Test that with a Batch API client all extracted papers are summarized in one call."""
+        self.paper_processor.extract_paper_content.side_effect = lambda url: (
+            None if url.endswith('3') else {'title': f"Paper {url[-1]}"}
+        )
+        self.summarizer.generate_summaries_batch.side_effect = lambda papers, client, timeout=None: [
+            f"Summary of {paper['title']}" for paper in papers
+        ]
+        batch_client = MagicMock()
+
+        records = BatchSummarizer(
+            self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint, batch_client=batch_client
+        ).run(self.urls)
+
+        self.summarizer.generate_summaries_batch.assert_called_once()
+        self.summarizer.generate_summary.assert_not_called()
+        self.assertEqual(records[0]['summary'], 'Summary of Paper 1')
+        self.assertEqual(records[2]['error'], 'Could not extract the paper')
+        self.assertEqual(len(load_checkpoint(self.checkpoint)), 4)
+
+
+    def test_offline_failed_requests_are_resubmitted(self):
+        """Test that papers whose batch requests failed are recorded as errors and summarized again on resume."""
+        self.summarizer.generate_summaries_batch.side_effect = lambda papers, client, timeout=None: [
+            'Error generating second pass summary.' if paper['title'] == 'Paper 2' else 'Summary'
+            for paper in papers
+        ]
+        batch_client = MagicMock()
+        records = BatchSummarizer(
+            self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint, batch_client=batch_client
+        ).run(self.urls)
+
+        self.assertIn('second pass', records[1]['error'])
+        self.assertIsNone(records[1]['summary'])
+        self.assertEqual(len(load_checkpoint(self.checkpoint)), 4)
+
+        self.summarizer.generate_summaries_batch.side_effect = lambda papers, client, timeout=None: [
+            'Summary' for paper in papers
+        ]
+        BatchSummarizer(
+            self.paper_processor, self.summarizer, checkpoint_path=self.checkpoint, batch_client=batch_client
+        ).run(self.urls)
+
+        papers = self.summarizer.generate_summaries_batch.call_args.args[0]
+        self.assertEqual([paper['title'] for paper in papers], ['Paper 2'])
+        self.assertEqual(len(load_checkpoint(self.checkpoint)), 5)
+
+
+class TestWriters(unittest.TestCase):
+    """Test cases for the output writers."""
+
+    records = [
+        {'url': 'https://arxiv.org/abs/1', 'title': 'Paper 1', 'summary': 'Summary 1', 'error': None},
+        {'url': 'https://arxiv.org/abs/2', 'title': None, 'summary': None, 'error': 'Could not extract the paper'},
+    ]
+
+    def test_jsonl(self):
+        """Test that JSONL output has one record per line."""
+        out = io.StringIO()
+        write_jsonl(self.records, out)
+
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()], self.records)
+
+    def test_markdown(self):
+        """Test that Markdown output has a section per paper and notes failures."""
+        out = io.StringIO()
+        write_markdown(self.records, out)
+
+        self.assertIn('## Paper 1\n\nhttps://arxiv.org/abs/1\n\nSummary 1', out.getvalue())
+        self.assertIn('## https://arxiv.org/abs/2', out.getvalue())
+        self.assertIn('_Not summarized: Could not extract the paper_', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
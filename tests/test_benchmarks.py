@@ -0,0 +1,132 @@
+"""
+Tests for the benchmark corpus and fake services.
+"""
+
+import tempfile
+import unittest
+import sys
+import os
+
+# Add the project root, the src directory and the benchmarks directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from openai import OpenAI
+from corpus import make_pdf, make_html
+from fake_services import PaperServer, FakeOpenAI, FakeSlack
+from run_benchmark import percentile
+from url_scan_benchmark import make_messages, measure
+from src.paper_processor import PaperProcessor
+from src.slack_client import SlackClient
+
+
+class TestCorpus(unittest.TestCase):
+    """Test cases for the benchmark corpus."""
+
+    def test_pdf_is_paper_sized_and_parses(self):
+        """Test that a corpus PDF has the size of a real paper and its sections are found."""
+        pdf = make_pdf(7, pages=8, figures=2, figure_kb=100)
+        self.assertGreater(len(pdf), 200 * 1024)
+        self.assertEqual(pdf, make_pdf(7, pages=8, figures=2, figure_kb=100))
+
+        processor = PaperProcessor()
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as f:
+            f.write(pdf)
+            f.flush()
+            content = processor._parse_pdf_file(f.name, 'http://example.com/7.pdf', 'hash', len(pdf))
+
+        self.assertTrue(content['title'].startswith('Benchmark Paper 7'))
+        keys = [section['key'] for section in content['sections']]
+        for key in ('introduction', 'method', 'results', 'conclusion', 'references'):
+            self.assertIn(key, keys)
+
+    def test_html_parses(self):
+        """Test that a corpus HTML page parses to its title and text."""
+        html = make_html(7, pages=8)
+        content = PaperProcessor()._parse_html(html.decode('utf-8'), 'http://example.com/7.html', 'hash')
+        self.assertTrue(content['title'].startswith('Benchmark Paper 7'))
+        self.assertIn('Introduction', content['full_text'])
+
+    def test_papers_differ(self):
+        """Test that papers with different numbers have different text."""
+        self.assertNotEqual(make_html(1, pages=2), make_html(2, pages=2))
+
+
+class TestFakeServices(unittest.TestCase):
+    """Test cases for the fake services, through the clients the bot uses."""
+
+    def test_paper_server(self):
+        """Test that papers are served from the corpus."""
+        papers = PaperServer(pages=2, figures=1, figure_kb=10, latency=0).start()
+        self.addCleanup(papers.stop)
+
+        processor = PaperProcessor()
+        content = processor.extract_paper_content(papers.paper_url(3))
+        self.assertTrue(content['title'].startswith('Benchmark Paper 3'))
+        self.assertEqual(papers.bytes_sent, len(make_pdf(3, 2, 1, 10)))
+
+    def test_fake_openai(self):
+        """Test that the fake OpenAI API answers plain and streamed completions."""
+        openai = FakeOpenAI(latency=0, tokens_per_second=10000, completion_tokens=20).start()
+        self.addCleanup(openai.stop)
+        client = OpenAI(api_key='sk-test', base_url=f"{openai.url}/v1", max_retries=0)
+        messages = [{'role': 'user', 'content': 'Summarize this paper'}]
+
+        response = client.chat.completions.create(model='gpt-4o', messages=messages, max_tokens=5)
+        self.assertEqual(len(response.choices[0].message.content.split()), 5)
+        self.assertEqual(response.usage.completion_tokens, 5)
+
+        chunks = client.chat.completions.create(model='gpt-4o', messages=messages, stream=True)
+        text = ''.join(chunk.choices[0].delta.content or '' for chunk in chunks if chunk.choices)
+        self.assertEqual(len(text.split()), 20)
+        self.assertEqual(openai.requests, 2)
+
+    def test_fake_slack(self):
+        """Test that the fake Slack API serves threads and records posted messages."""
+        slack = FakeSlack(latency=0).start()
+        self.addCleanup(slack.stop)
+        client = SlackClient('xoxb-test', 'secret', base_url=slack.api_url)
+        slack.add_thread('C1', '1.0', 'Look at https://arxiv.org/abs/1234.5678')
+
+        self.assertEqual(client.get_parent_message('C1', '1.0')['text'], 'Look at https://arxiv.org/abs/1234.5678')
+        ts = client.post_message('C1', 'Working on it', thread_ts='1.0')['ts']
+        client.update_message('C1', ts, 'Done')
+        self.assertEqual(slack.replies('C1', '1.0'), ['Done'])
+        self.assertEqual(slack.calls['chat.postMessage'], 1)
+
+
+class TestPercentile(unittest.TestCase):
+    """Test cases for the percentile helper."""
+
+    def test_nearest_rank(self):
+        """Test percentiles by the nearest-rank method."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([3.0], 0.99), 3.0)
+        self.assertIsNone(percentile([], 0.5))
+
+
+class TestUrlScanBenchmark(unittest.TestCase):
+    """Test cases for the link extraction micro-benchmark."""
+
+    def test_corpus_and_measurement(self):
+        """Test that the corpus is reproducible and the host lookup only differs where substrings misled."""
+        messages = make_messages(2000, seed=1)
+        self.assertEqual(messages, make_messages(2000, seed=1))
+        self.assertTrue(any('notarxiv.org.example.com' in message for message in messages))
+
+        result = measure(messages, repeat=1)
+
+        self.assertEqual(set(result['seconds']), {'substring', 'host_lookup', 'classify_all_links'})
+        self.assertTrue(result['differences'])
+        for _, old, new in result['differences']:
+            # Slack labels, lookalike hosts and DOI links, which substring matching missed
+            self.assertNotIn('|', new)
+            self.assertTrue('|' in old or 'example.com' in old or 'doi.org' in new, (old, new))
+
+
+if __name__ == '__main__':
+    unittest.main()
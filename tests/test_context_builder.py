@@ -0,0 +1,82 @@
+"""
+Tests for the context builder module.
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.context_builder import ContextBuilder, count_tokens
+from src.section_parser import parse_sections
+
+
+def make_paper(sections):
+    """Build indexed paper content from (heading, body) pairs."""
+    text = 'Sparse Attention for Long Documents\n' + ''.join(
+        f"{heading}\n{body}\n" for heading, body in sections
+    )
+    title, abstract, parsed = parse_sections(text)
+    return {
+        'title': title,
+        'abstract': abstract,
+        'full_text': text,
+        'sections': [section.to_dict() for section in parsed]
+    }
+
+
+FILLER = 'This sentence describes implementation details at some length. ' * 30
+
+
+class TestContextBuilder(unittest.TestCase):
+    """Test cases for the ContextBuilder class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.paper = make_paper([
+            ('Abstract', 'We study sparse attention for long documents.'),
+            ('1 Introduction', 'Long documents are common. ' * 20),
+            ('3 Method', FILLER + 'We propose sparse attention that scales linearly.'),
+            ('4 Results', FILLER + 'Sparse attention achieves 91.2% accuracy, outperforming the baseline by 4.1 points.'),
+            ('5 Conclusion', 'Sparse attention works.'),
+            ('References', '[1] A paper. ' * 50),
+        ])
+
+    def test_respects_token_budget(self):
+        """Test that the context fits in the configured budget."""
+        builder = ContextBuilder(token_budget=200)
+        context, tokens = builder.build(self.paper)
+
+        self.assertLessEqual(tokens, 200 + 20)
+        self.assertEqual(tokens, count_tokens(context))
+
+    def test_prefers_salient_passages(self):
+        """Test that passages with findings are chosen over filler."""
+        context, _ = ContextBuilder(token_budget=200, passage_tokens=40).build(self.paper)
+
+        self.assertIn('91.2% accuracy', context)
+        self.assertIn('We propose sparse attention', context)
+
+    def test_excludes_sections_in_user_message(self):
+        """Test that the introduction, conclusion and references are left out."""
+        context, _ = ContextBuilder(token_budget=5000).build(self.paper)
+
+        self.assertIn('[4 Results]', context)
+        self.assertNotIn('Long documents are common', context)
+        self.assertNotIn('[1] A paper.', context)
+        self.assertLess(context.index('[3 Method]'), context.index('[4 Results]'))
+
+    def test_unindexed_paper(self):
+        """Test that papers without a section index use the full text."""
+        paper = {'title': 'Test', 'full_text': 'We propose a method. ' * 500, 'sections': {}}
+        context, tokens = ContextBuilder(token_budget=300).build(paper)
+
+        self.assertTrue(context.startswith('[Paper text]'))
+        self.assertLessEqual(tokens, 320)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests for the extraction cache module.
+"""
+
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.extraction_cache import ExtractionCache
+from src.paper_processor import PaperProcessor
+from src.url_utils import normalize_url
+
+
+def make_content(content_hash, text='Some text'):
+    """Build extracted paper content for tests."""
+    return {
+        'title': 'Test Paper',
+        'abstract': 'An abstract.',
+        'full_text': text,
+        'sections': {'INTRODUCTION': 'Intro.'},
+        'source_url': 'https://arxiv.org/pdf/1234.5678.pdf',
+        'content_hash': content_hash
+    }
+
+
+class TestNormalizeUrl(unittest.TestCase):
+    """Test cases for URL normalization."""
+
+    def test_arxiv_links_share_a_key(self):
+        """Test that arXiv abstract, PDF and mirror links normalize alike."""
+        expected = 'https://arxiv.org/abs/1234.5678'
+        self.assertEqual(normalize_url('https://arxiv.org/abs/1234.5678'), expected)
+        self.assertEqual(normalize_url('http://arxiv.org/pdf/1234.5678.pdf'), expected)
+        self.assertEqual(normalize_url('https://export.arxiv.org/abs/1234.5678/'), expected)
+
+    def test_tracking_parameters_are_dropped(self):
+        """Test that tracking parameters and fragments are removed."""
+        self.assertEqual(
+            normalize_url('https://www.Nature.com/articles/x?utm_source=slack&b=2&a=1#sec'),
+            'https://nature.com/articles/x?a=1&b=2'
+        )
+
+
+class TestExtractionCache(unittest.TestCase):
+    """Test cases for the ExtractionCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite3')
+        self.cache = ExtractionCache(self.path)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.tmpdir.cleanup()
+
+    def test_round_trip_and_counters(self):
+        """Test storing content and reading it back through another URL form."""
+        self.assertIsNone(self.cache.get('https://arxiv.org/abs/1234.5678'))
+        self.cache.put('https://arxiv.org/abs/1234.5678', make_content('abc'))
+
+        content = self.cache.get('https://arxiv.org/pdf/1234.5678.pdf')
+        self.assertEqual(content, make_content('abc'))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_hash_alias(self):
+        """Test that a mirror URL is aliased to an entry with the same hash."""
+        self.cache.put('https://arxiv.org/abs/1234.5678', make_content('abc'))
+
+        mirror = 'https://mirror.example.com/paper.pdf'
+        self.assertIsNotNone(self.cache.get_by_hash('abc', url=mirror))
+        self.assertIsNotNone(self.cache.get(mirror))
+
+    def test_alias_expiry(self):
+        """Test that an expired alias misses while other aliases of the entry still hit."""
+        self.cache.put('https://arxiv.org/abs/1234.5678', make_content('abc'), ttl=-1)
+        self.cache.alias('https://arxiv.org/abs/1234.5678v2', 'abc')
+
+        self.assertIsNone(self.cache.get('https://arxiv.org/abs/1234.5678'))
+        self.assertIsNotNone(self.cache.get('https://arxiv.org/abs/1234.5678v2'))
+
+        self.cache.put('https://arxiv.org/abs/1234.5678', make_content('abc'), ttl=60)
+        self.assertIsNotNone(self.cache.get('https://arxiv.org/abs/1234.5678'))
+
+    def test_cache_without_alias_expiry(self):
+        """Test that a cache created before aliases could expire is upgraded and keeps its aliases."""
+        path = os.path.join(self.tmpdir.name, 'old.sqlite3')
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE aliases (url_key TEXT PRIMARY KEY, content_hash TEXT NOT NULL)")
+            conn.execute("INSERT INTO aliases VALUES ('https://example.com/paper', 'abc')")
+        conn.close()
+
+        cache = ExtractionCache(path)
+        cache.put('https://example.com/other', make_content('abc'))
+
+        self.assertIsNotNone(cache.get('https://example.com/paper'))
+
+    def test_persistence(self):
+        """Test that entries are visible to a new cache instance."""
+        self.cache.put('https://example.com/paper', make_content('abc'))
+        self.assertIsNotNone(ExtractionCache(self.path).get('https://example.com/paper'))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = self.cache
+        cache.put('https://example.com/a', make_content('a', os.urandom(300).hex()))
+        cache.put('https://example.com/b', make_content('b', os.urandom(300).hex()))
+        cache.get('https://example.com/a')
+
+        cache.max_bytes = cache.stats()['bytes'] - 1
+        cache.put('https://example.com/c', make_content('c', 'x'))
+
+        self.assertIsNotNone(cache.get('https://example.com/a'))
+        self.assertIsNone(cache.get('https://example.com/b'))
+        self.assertIsNotNone(cache.get('https://example.com/c'))
+
+    @patch('requests.Session.request')
+    def test_paper_processor_uses_cache(self, mock_get):
+        """Test that a cached paper is returned without downloading it."""
+        self.cache.put('https://arxiv.org/abs/1234.5678', make_content('abc'))
+        processor = PaperProcessor(cache=self.cache)
+
+        content = processor.extract_paper_content('https://arxiv.org/pdf/1234.5678')
+
+        self.assertEqual(content['content_hash'], 'abc')
+        mock_get.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests for the HTML extraction module.
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.html_extraction import extract_html, read_meta_tags, strip_boilerplate
+
+PUBLISHER_PAGE = """<!DOCTYPE html>
+<html><head>
+<title>Deep Learning | Nature</title>
+<meta name="citation_title" content="Deep learning">
+<meta name="citation_abstract" content="&lt;p&gt;Deep learning allows &amp; enables models.&lt;/p&gt;">
+<meta name="description" content="A review">
+<script>var article = "<article>not the paper</article>";</script>
+<style>article { color: red; }</style>
+</head><body>
+<nav><h1>Journal menu</h1><a href="/">Home</a></nav>
+<!-- <h1>Commented out</h1> -->
+<div class="c-sidebar"><p>Related articles</p></div>
+<article>
+  <h1>Deep learning</h1>
+  <section class="c-article-abstract"><p>Abstract in the page.</p></section>
+  <h2>Introduction</h2><p>Representation learning is a set of methods.</p>
+  <svg><text>Figure label</text></svg>
+</article>
+<footer><p>Copyright</p></footer>
+</body></html>"""
+
+
+class TestHtmlExtraction(unittest.TestCase):
+    """Test cases for the HTML extraction module."""
+
+    def test_strip_boilerplate(self):
+        """Test that scripts, styles, navigation and comments are removed with their contents."""
+        stripped = strip_boilerplate(PUBLISHER_PAGE)
+
+        for text in ('var article', 'color: red', 'Journal menu', 'Commented out', 'Figure label'):
+            self.assertNotIn(text, stripped)
+        self.assertIn('Representation learning', stripped)
+        self.assertIn('Related articles', stripped)
+
+    def test_strip_boilerplate_self_closing_and_unclosed(self):
+        """Test that self-closing and unclosed tags do not take the text up to a later closing tag."""
+        page = (
+            '<p><svg class="icon" viewBox="0 0 16 16"/>Body text.</p>'
+            '<nav class="crumbs">Home <p>Section text.</p>'
+            '<nav>Menu</nav><svg><text>Figure label</text></svg>'
+        )
+        stripped = strip_boilerplate(page)
+
+        self.assertIn('Body text.', stripped)
+        self.assertIn('Section text.', stripped)
+        self.assertNotIn('Menu', stripped)
+        self.assertNotIn('Figure label', stripped)
+
+        content = extract_html('<html><body><h2>A Paper</h2>' + page + '</body></html>')
+        self.assertIn('Body text.', content['full_text'])
+
+    def test_read_meta_tags(self):
+        """Test that meta tag values are unescaped and reduced to text."""
+        tags = read_meta_tags(PUBLISHER_PAGE)
+
+        self.assertEqual(tags['citation_title'], 'Deep learning')
+        self.assertEqual(tags['citation_abstract'], 'Deep learning allows & enables models.')
+        self.assertEqual(tags['description'], 'A review')
+
+    def test_article_host_parses_article(self):
+        """Test that on publisher pages only the article is parsed, with the meta tags taking precedence."""
+        content = extract_html(PUBLISHER_PAGE, 'https://www.nature.com/articles/nature14539')
+
+        self.assertEqual(content['title'], 'Deep learning')
+        self.assertEqual(content['abstract'], 'Deep learning allows & enables models.')
+        self.assertIn('Representation learning is a set of methods.', content['full_text'])
+        for text in ('Related articles', 'Copyright', 'Journal menu', 'not the paper'):
+            self.assertNotIn(text, content['full_text'])
+
+    def test_article_host_without_meta_tags(self):
+        """Test the heading, abstract element and <title> fallbacks of publisher pages."""
+        page = PUBLISHER_PAGE.replace('citation_', 'other_')
+        content = extract_html(page, 'https://link.springer.com/article/10.1007/x')
+        self.assertEqual(content['title'], 'Deep learning')
+        self.assertEqual(content['abstract'], 'Abstract in the page.')
+
+        page = page.replace('<h1>Deep learning</h1>', '').replace('h2>', 'h3>')
+        content = extract_html(page, 'https://dl.acm.org/doi/10.1145/x')
+        self.assertEqual(content['title'], 'Deep Learning | Nature')
+
+    def test_other_hosts(self):
+        """Test that other pages are parsed whole, without their navigation."""
+        content = extract_html(PUBLISHER_PAGE.replace('citation_', 'other_'), 'https://example.org/paper')
+
+        self.assertEqual(content['title'], 'Deep learning')
+        self.assertEqual(content['abstract'], 'Abstract in the page.')
+        self.assertIn('Representation learning', content['full_text'])
+
+        content = extract_html('<html><body><h2>A Paper</h2><p>One.</p><p>Two.</p></body></html>')
+        self.assertEqual(content['title'], 'A Paper')
+        self.assertEqual(content['abstract'], '')
+        self.assertEqual(content['full_text'], 'One. Two.')
+
+    def test_publisher_page_without_article(self):
+        """Test that a publisher page without an article element is parsed whole."""
+        content = extract_html('<html><h1>Title</h1><div id="content">Body.</div></html>', 'https://nature.com/x')
+
+        self.assertEqual(content['title'], 'Title')
+        self.assertEqual(content['full_text'], 'Body.')
+
+
+if __name__ == '__main__':
+    unittest.main()
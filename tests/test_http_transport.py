@@ -0,0 +1,258 @@
+"""
+Tests for the HTTP transport module.
+"""
+
+import asyncio
+import unittest
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.http_transport import HttpTransport, AsyncHttpTransport, TransportTimeoutError
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Serves test endpoints over keep-alive HTTP/1.1."""
+
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+
+    def do_GET(self):
+        """Handle the test endpoints."""
+        if self.path.startswith('/flaky'):
+            remaining = self.failures.get(self.path, 0)
+            if remaining:
+                self.failures[self.path] = remaining - 1
+                self.send_response(503)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self._send_body(b'ok')
+        elif self.path == '/overloaded':
+            self.send_response(503)
+            self.send_header('Retry-After', '3600')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path == '/slow':
+            self.send_response(200)
+            self.send_header('Content-Length', '100')
+            self.end_headers()
+            try:
+                for _ in range(10):
+                    self.wfile.write(b'x' * 10)
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client gave up on the slow download
+        elif self.path == '/drip':
+            # One byte at a time, each well within the read timeout
+            self.send_response(200)
+            self.send_header('Content-Length', '100')
+            self.end_headers()
+            try:
+                for _ in range(100):
+                    self.wfile.write(b'x')
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client gave up on the slow download
+        else:
+            self._send_body(b'hello')
+
+    def _send_body(self, body):
+        """Send a 200 response with the given body."""
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Silence request logging."""
+
+
+class TestHttpTransport(unittest.TestCase):
+    """Test cases for the HttpTransport class."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the local test server."""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the local test server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_connections_are_reused(self):
+        """Test that sequential requests share one keep-alive connection."""
+        transport = HttpTransport()
+        for _ in range(5):
+            self.assertEqual(transport.get(f"{self.base_url}/hello").content, b'hello')
+
+        stats = transport.pool_stats()[f"127.0.0.1:{self.server.server_port}"]
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_retries_server_errors(self):
+        """Test that 503 responses are retried until the server recovers."""
+        FlakyHandler.failures['/flaky-retry'] = 2
+        transport = HttpTransport(backoff_factor=0.01, jitter=0.01)
+
+        response = transport.get(f"{self.base_url}/flaky-retry")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(transport.pool_stats()[f"127.0.0.1:{self.server.server_port}"]['retries'], 2)
+
+    def test_gives_up_after_retries(self):
+        """Test that the last error response is returned once retries run out."""
+        FlakyHandler.failures['/flaky-down'] = 10
+        transport = HttpTransport(retries=1, backoff_factor=0.01, jitter=0.01)
+
+        self.assertEqual(transport.get(f"{self.base_url}/flaky-down").status_code, 503)
+
+    def test_retry_after_is_capped(self):
+        """Test that a huge Retry-After is waited for at most the maximum backoff."""
+        transport = HttpTransport(retries=2, backoff_max=0.05)
+        start = time.monotonic()
+
+        self.assertEqual(transport.get(f"{self.base_url}/overloaded").status_code, 503)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(transport.pool_stats()[f"127.0.0.1:{self.server.server_port}"]['retries'], 2)
+
+    def test_retries_count_against_total_timeout(self):
+        """Test that a retry which would wait past the total timeout raises instead of waiting."""
+        transport = HttpTransport(total_timeout=1)
+        start = time.monotonic()
+
+        with self.assertRaises(TransportTimeoutError):
+            transport.get(f"{self.base_url}/overloaded")
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_total_timeout(self):
+        """Test that a slow streamed download is abandoned after the total timeout."""
+        transport = HttpTransport(total_timeout=0.3)
+        with transport.get(f"{self.base_url}/slow", stream=True) as response:
+            with self.assertRaises(TransportTimeoutError):
+                for _ in transport.iter_content(response, chunk_size=10):
+                    pass
+
+    def test_total_timeout_bounds_slow_drip_reads(self):
+        """Test that a chunk dripping in slower than the total timeout is abandoned mid-read."""
+        transport = HttpTransport(total_timeout=0.3)
+        start = time.monotonic()
+        with transport.get(f"{self.base_url}/drip", stream=True) as response:
+            with self.assertRaises(TransportTimeoutError):
+                for _ in transport.iter_content(response):
+                    pass
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_total_timeout_bounds_requests(self):
+        """Test that reading the body of a request that is not streamed is bounded by the total timeout."""
+        transport = HttpTransport(total_timeout=0.3)
+        start = time.monotonic()
+        with self.assertRaises(TransportTimeoutError):
+            transport.get(f"{self.base_url}/drip")
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(transport.pool_stats()[f"127.0.0.1:{self.server.server_port}"]['errors'], 1)
+        self.assertEqual(transport.get(f"{self.base_url}/hello").content, b'hello')
+
+
+class TestAsyncHttpTransport(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the AsyncHttpTransport class."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the local test server."""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the local test server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def asyncSetUp(self):
+        """Create the transports."""
+        self.transport = AsyncHttpTransport(backoff_factor=0.01, jitter=0.01)
+        self.short_transport = AsyncHttpTransport(total_timeout=0.3)
+
+    async def asyncTearDown(self):
+        """Close the transports."""
+        await self.transport.aclose()
+        await self.short_transport.aclose()
+
+    async def test_concurrent_requests(self):
+        """Test that concurrent requests share the pool and all succeed."""
+        responses = await asyncio.gather(*[self.transport.get(f"{self.base_url}/hello") for _ in range(10)])
+        self.assertEqual([response.content for response in responses], [b'hello'] * 10)
+
+    async def test_retries_server_errors(self):
+        """Test that 503 responses are retried until the server recovers."""
+        FlakyHandler.failures['/flaky-async'] = 2
+        response = await self.transport.get(f"{self.base_url}/flaky-async")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'ok')
+
+    async def test_retry_after_is_capped(self):
+        """Test that a huge Retry-After is waited for at most the maximum backoff."""
+        transport = AsyncHttpTransport(retries=2, backoff_max=0.05)
+        self.addAsyncCleanup(transport.aclose)
+        start = time.monotonic()
+
+        response = await transport.get(f"{self.base_url}/overloaded")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertLess(time.monotonic() - start, 2)
+
+    async def test_retries_count_against_total_timeout(self):
+        """Test that a retry which would wait past the total timeout raises instead of waiting."""
+        transport = AsyncHttpTransport(total_timeout=1)
+        self.addAsyncCleanup(transport.aclose)
+        start = time.monotonic()
+
+        with self.assertRaises(TransportTimeoutError):
+            async with transport.stream('GET', f"{self.base_url}/overloaded"):
+                pass
+        self.assertLess(time.monotonic() - start, 1)
+
+    async def test_total_timeout(self):
+        """Test that a slow streamed download is abandoned after the total timeout."""
+        async with self.short_transport.stream('GET', f"{self.base_url}/slow") as response:
+            with self.assertRaises(TransportTimeoutError):
+                async for _ in self.short_transport.aiter_bytes(response, chunk_size=10):
+                    pass
+
+    async def test_total_timeout_bounds_slow_drip_reads(self):
+        """Test that a chunk dripping in slower than the total timeout is abandoned mid-read."""
+        start = time.monotonic()
+        async with self.short_transport.stream('GET', f"{self.base_url}/drip") as response:
+            with self.assertRaises(TransportTimeoutError):
+                async for _ in self.short_transport.aiter_bytes(response):
+                    pass
+        self.assertLess(time.monotonic() - start, 2)
+
+    async def test_total_timeout_bounds_requests(self):
+        """Test that a request whose body drips in is abandoned at the total timeout."""
+        start = time.monotonic()
+        with self.assertRaises(TransportTimeoutError):
+            await self.short_transport.get(f"{self.base_url}/drip")
+        self.assertLess(time.monotonic() - start, 2)
+        response = await self.short_transport.get(f"{self.base_url}/hello")
+        self.assertEqual(response.content, b'hello')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Tests for the job queue module.
+"""
+
+import unittest
+import sqlite3
+import tempfile
+import threading
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.job_queue import JobQueue, InMemoryBackend, SQLiteBackend, QueueFullError, Job
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test cases for the JobQueue class."""
+
+    def test_runs_jobs_in_background(self):
+        """Test that enqueued jobs are processed by the workers."""
+        done = threading.Event()
+        results = []
+
+        def handler(value):
+            results.append(value)
+            done.set()
+
+        job_queue = JobQueue(InMemoryBackend(max_size=10), workers=2)
+        job_queue.register('test', handler)
+        job_queue.start()
+        job_queue.enqueue('test', value=42)
+
+        self.assertTrue(done.wait(5))
+        job_queue.shutdown(timeout=5)
+        self.assertEqual(results, [42])
+
+    def test_queue_full(self):
+        """Test that a saturated queue rejects new jobs."""
+        job_queue = JobQueue(InMemoryBackend(max_size=1), workers=1)
+        job_queue.register('test', lambda: None)
+        job_queue.enqueue('test')
+
+        with self.assertRaises(QueueFullError):
+            job_queue.enqueue('test')
+
+    def test_shutdown_drains_pending_jobs(self):
+        """Test that shutdown processes jobs that are still pending."""
+        results = []
+        job_queue = JobQueue(InMemoryBackend(max_size=10), workers=1)
+        job_queue.register('test', lambda value: results.append(value))
+        for i in range(5):
+            job_queue.enqueue('test', value=i)
+
+        job_queue.start()
+        job_queue.shutdown(drain=True, timeout=5)
+        self.assertEqual(sorted(results), [0, 1, 2, 3, 4])
+
+        with self.assertRaises(QueueFullError):
+            job_queue.enqueue('test', value=5)
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    """Test cases for the SQLiteBackend class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'jobs.sqlite3')
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.tmpdir.cleanup()
+
+    def count_jobs(self):
+        """Return the number of rows in the jobs table, whatever their status."""
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_jobs_survive_restart(self):
+        """Test that pending jobs are visible to a new backend instance."""
+        SQLiteBackend(self.path).put(Job('test', {'value': 1}))
+
+        backend = SQLiteBackend(self.path)
+        job = backend.get(timeout=0)
+        self.assertEqual(job.name, 'test')
+        self.assertEqual(job.kwargs, {'value': 1})
+        self.assertIsNone(backend.get(timeout=0))
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test that a job abandoned while running is claimed again."""
+        backend = SQLiteBackend(self.path, lease_seconds=0)
+        backend.put(Job('test', {}))
+        first = backend.get(timeout=0)
+
+        second = backend.get(timeout=0)
+        self.assertEqual(first.id, second.id)
+
+        backend.complete(second)
+        self.assertIsNone(backend.get(timeout=0))
+
+    def test_failed_jobs_are_pruned(self):
+        """Test that failed jobs are kept for the retention period, then deleted."""
+        backend = SQLiteBackend(self.path, failed_retention_seconds=60)
+        for _ in range(2):
+            backend.put(Job('test', {}))
+            backend.complete(backend.get(timeout=0), error="boom")
+        self.assertEqual(self.count_jobs(), 2)
+
+        # Opening the database prunes failed jobs past the retention period
+        backend = SQLiteBackend(self.path, failed_retention_seconds=0)
+        self.assertEqual(self.count_jobs(), 0)
+
+        # So does a job failing
+        backend.put(Job('test', {}))
+        backend.complete(backend.get(timeout=0), error="boom")
+        self.assertEqual(self.count_jobs(), 0)
+
+    def test_max_size(self):
+        """Test that the SQLite backend enforces its maximum size."""
+        backend = SQLiteBackend(self.path, max_size=1)
+        backend.put(Job('test', {}))
+        with self.assertRaises(QueueFullError):
+            backend.put(Job('test', {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
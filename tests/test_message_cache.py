@@ -0,0 +1,83 @@
+"""
+Tests for the message cache module.
+"""
+
+import time
+import unittest
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.message_cache import MessageCache
+
+
+class TestMessageCache(unittest.TestCase):
+    """Test cases for the MessageCache class."""
+
+    def test_put_and_get(self):
+        """Test that stored messages are returned and counted as hits."""
+        cache = MessageCache()
+        cache.put('C1', '1.0', {'text': 'A paper'})
+
+        self.assertEqual(cache.get('C1', '1.0'), {'text': 'A paper'})
+        self.assertIsNone(cache.get('C2', '1.0'))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'entries': 1})
+
+    def test_ttl(self):
+        """Test that expired messages are misses."""
+        cache = MessageCache(ttl=0.05)
+        cache.put('C1', '1.0', {'text': 'A paper'})
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get('C1', '1.0'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used message is evicted first."""
+        cache = MessageCache(max_entries=2)
+        cache.put('C1', '1.0', {'text': 'one'})
+        cache.put('C1', '2.0', {'text': 'two'})
+        cache.get('C1', '1.0')
+        cache.put('C1', '3.0', {'text': 'three'})
+
+        self.assertIsNotNone(cache.get('C1', '1.0'))
+        self.assertIsNone(cache.get('C1', '2.0'))
+        self.assertIsNotNone(cache.get('C1', '3.0'))
+
+    def test_observe_new_message(self):
+        """Test that top-level messages are stored and thread replies are not."""
+        cache = MessageCache()
+        cache.observe_event({'type': 'message', 'channel': 'C1', 'ts': '1.0', 'text': 'A paper'})
+        cache.observe_event({'type': 'message', 'channel': 'C1', 'ts': '2.0', 'thread_ts': '1.0', 'text': 'Reply'})
+
+        self.assertEqual(cache.get('C1', '1.0')['text'], 'A paper')
+        self.assertIsNone(cache.get('C1', '2.0'))
+
+    def test_observe_edit_and_delete(self):
+        """Test that edits replace cached messages and deletions remove them."""
+        cache = MessageCache()
+        cache.put('C1', '1.0', {'ts': '1.0', 'text': 'Old link'})
+
+        cache.observe_event({
+            'type': 'message', 'subtype': 'message_changed', 'channel': 'C1',
+            'message': {'ts': '1.0', 'text': 'New link'}
+        })
+        self.assertEqual(cache.get('C1', '1.0')['text'], 'New link')
+
+        cache.observe_event({'type': 'message', 'subtype': 'message_deleted', 'channel': 'C1', 'deleted_ts': '1.0'})
+        self.assertIsNone(cache.get('C1', '1.0'))
+
+    def test_ignores_other_events(self):
+        """Test that non-message events and joins are not cached."""
+        cache = MessageCache()
+        cache.observe_event({'type': 'app_mention', 'channel': 'C1', 'ts': '1.0'})
+        cache.observe_event({'type': 'message', 'subtype': 'channel_join', 'channel': 'C1', 'ts': '2.0'})
+
+        self.assertEqual(cache.stats()['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
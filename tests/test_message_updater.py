@@ -0,0 +1,133 @@
+"""
+Tests for the message updater module.
+"""
+
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.message_updater import ThrottledMessageUpdater, AsyncThrottledMessageUpdater
+
+
+class TestThrottledMessageUpdater(unittest.TestCase):
+    """Test cases for the ThrottledMessageUpdater class."""
+
+    def test_updates_are_batched(self):
+        """Test that rapid updates collapse into a few edits ending with the final text."""
+        slack_client = MagicMock()
+        updater = ThrottledMessageUpdater(slack_client, 'C1', '1.0', min_interval=0.1)
+
+        for i in range(50):
+            updater.update(f"text {i}")
+            time.sleep(0.005)
+        updater.finish("final")
+
+        texts = [call.kwargs['text'] for call in slack_client.update_message.call_args_list]
+        self.assertLess(len(texts), 10)
+        self.assertEqual(texts[0], "text 0")
+        self.assertEqual(texts[-1], "final")
+        self.assertTrue(all(call.kwargs['ts'] == '1.0' for call in slack_client.update_message.call_args_list))
+
+    def test_updates_respect_interval(self):
+        """Test that consecutive edits are at least the interval apart."""
+        sent = []
+        slack_client = MagicMock()
+        slack_client.update_message.side_effect = lambda **kwargs: sent.append(time.monotonic())
+        updater = ThrottledMessageUpdater(slack_client, 'C1', '1.0', min_interval=0.1)
+
+        for i in range(30):
+            updater.update(f"text {i}")
+            time.sleep(0.01)
+        updater.finish("final")
+
+        gaps = [later - earlier for earlier, later in zip(sent, sent[1:])]
+        self.assertTrue(all(gap >= 0.09 for gap in gaps))
+
+    def test_finish_without_updates(self):
+        """Test that finishing straight away sends only the final text."""
+        slack_client = MagicMock()
+        updater = ThrottledMessageUpdater(slack_client, 'C1', '1.0')
+
+        updater.finish("final")
+
+        slack_client.update_message.assert_called_once_with(channel='C1', ts='1.0', text='final')
+
+    def test_errors_do_not_stop_updates(self):
+        """Test that a failed edit is logged and later edits still go out."""
+        slack_client = MagicMock()
+        slack_client.update_message.side_effect = [Exception("ratelimited"), None]
+        updater = ThrottledMessageUpdater(slack_client, 'C1', '1.0', min_interval=0.01)
+
+        updater.update("partial")
+        time.sleep(0.05)
+        self.assertTrue(updater.finish("final"))
+
+        self.assertEqual(updater.updates_sent, 1)
+        self.assertEqual(slack_client.update_message.call_args.kwargs['text'], 'final')
+
+    def test_failed_finish_is_reported(self):
+        """Test that finish() returns False when the final text could not be sent."""
+        slack_client = MagicMock()
+        slack_client.update_message.side_effect = [None, Exception("msg_too_long")]
+        updater = ThrottledMessageUpdater(slack_client, 'C1', '1.0', min_interval=0.01)
+
+        updater.update("partial")
+        time.sleep(0.05)
+
+        self.assertFalse(updater.finish("final"))
+        self.assertEqual(updater.updates_sent, 1)
+
+
+class TestAsyncThrottledMessageUpdater(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the AsyncThrottledMessageUpdater class."""
+
+    async def test_updates_are_batched(self):
+        """Test that rapid updates collapse into a few edits ending with the final text."""
+        slack_client = MagicMock()
+        slack_client.aupdate_message = AsyncMock()
+        updater = AsyncThrottledMessageUpdater(slack_client, 'C1', '1.0', min_interval=0.1)
+
+        for i in range(50):
+            updater.update(f"text {i}")
+            await asyncio.sleep(0.005)
+        await updater.finish("final")
+
+        texts = [call.kwargs['text'] for call in slack_client.aupdate_message.call_args_list]
+        self.assertLess(len(texts), 10)
+        self.assertEqual(texts[0], "text 0")
+        self.assertEqual(texts[-1], "final")
+
+    async def test_cancel(self):
+        """Test that a cancelled updater sends nothing more."""
+        slack_client = MagicMock()
+        slack_client.aupdate_message = AsyncMock()
+        updater = AsyncThrottledMessageUpdater(slack_client, 'C1', '1.0', min_interval=0.1)
+
+        updater.update("first")
+        await asyncio.sleep(0.01)
+        updater.update("second")
+        updater.cancel()
+        await asyncio.sleep(0.15)
+
+        texts = [call.kwargs['text'] for call in slack_client.aupdate_message.call_args_list]
+        self.assertEqual(texts, ["first"])
+
+    async def test_failed_finish_is_reported(self):
+        """Test that finish() returns False when the final text could not be sent."""
+        slack_client = MagicMock()
+        slack_client.aupdate_message = AsyncMock(side_effect=Exception("msg_too_long"))
+
+        self.assertFalse(await AsyncThrottledMessageUpdater(slack_client, 'C1', '1.0').finish("final"))
+
+        slack_client.aupdate_message = AsyncMock()
+        self.assertTrue(await AsyncThrottledMessageUpdater(slack_client, 'C1', '1.0').finish("final"))
+
+
+if __name__ == '__main__':
+    unittest.main()
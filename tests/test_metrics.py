@@ -0,0 +1,127 @@
+"""
+Tests for the metrics module.
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src import metrics
+from src.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for the MetricsRegistry class."""
+
+    def setUp(self):
+        """Set up an empty registry."""
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        """Test that counters add up per label set."""
+        counter = self.registry.counter('requests_total', 'Requests', ['path'])
+        counter.inc(path='/a')
+        counter.inc(2, path='/a')
+        counter.inc(path='/b')
+
+        text = self.registry.render()
+        self.assertIn('# HELP requests_total Requests\n# TYPE requests_total counter\n', text)
+        self.assertIn('requests_total{path="/a"} 3\n', text)
+        self.assertIn('requests_total{path="/b"} 1\n', text)
+
+    def test_gauge_without_labels(self):
+        """Test that a gauge keeps the last value."""
+        gauge = self.registry.gauge('temperature', 'Temperature')
+        gauge.set(3)
+        gauge.set(1.5)
+        self.assertIn('temperature 1.5\n', self.registry.render())
+
+    def test_histogram_buckets(self):
+        """Test that histogram buckets are cumulative and end with +Inf."""
+        histogram = self.registry.histogram('latency_seconds', 'Latency', ['stage'], buckets=(0.1, 1))
+        histogram.observe(0.05, stage='parse')
+        histogram.observe(0.5, stage='parse')
+        histogram.observe(5, stage='parse')
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{stage="parse",le="0.1"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{stage="parse",le="1"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{stage="parse",le="+Inf"} 3\n', text)
+        self.assertIn('latency_seconds_sum{stage="parse"} 5.55\n', text)
+        self.assertIn('latency_seconds_count{stage="parse"} 3\n', text)
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes, backslashes and newlines in label values are escaped."""
+        counter = self.registry.counter('events_total', 'Events', ['name'])
+        counter.inc(name='a "b"\\\n')
+        self.assertIn('events_total{name="a \\"b\\"\\\\\\n"} 1\n', self.registry.render())
+
+    def test_function_values(self):
+        """Test that a metric with a function is computed at collection time."""
+        depth = {'value': 1}
+        gauge = self.registry.gauge('queue_depth', 'Queue depth', ['queue'])
+        gauge.set_function(lambda: {('jobs',): depth['value']})
+
+        self.assertIn('queue_depth{queue="jobs"} 1\n', self.registry.render())
+        depth['value'] = 4
+        self.assertIn('queue_depth{queue="jobs"} 4\n', self.registry.render())
+
+    def test_failing_function_is_skipped(self):
+        """Test that a failing collection function does not break the export."""
+        gauge = self.registry.gauge('broken', 'Broken')
+        gauge.set_function(lambda: 1 / 0)
+        counter = self.registry.counter('working_total', 'Working')
+        counter.inc()
+
+        text = self.registry.render()
+        self.assertIn('# TYPE broken gauge\n', text)
+        self.assertIn('working_total 1\n', text)
+
+    def test_duplicate_names(self):
+        """Test that a metric name can only be registered once."""
+        self.registry.counter('requests_total', 'Requests')
+        with self.assertRaises(ValueError):
+            self.registry.gauge('requests_total', 'Requests')
+
+
+class TestSpan(unittest.TestCase):
+    """Test cases for the span and trace_request context managers."""
+
+    def sample(self, name, stage):
+        """Return the value of a sample of the global registry, or 0 if it is missing."""
+        prefix = f'{name}{{stage="{stage}"}} '
+        for line in metrics.REGISTRY.render().splitlines():
+            if line.startswith(prefix):
+                return float(line[len(prefix):])
+        return 0
+
+    def test_span_records_duration(self):
+        """Test that a span observes its duration under its stage."""
+        with metrics.span('test_stage', url='https://example.com'):
+            pass
+        self.assertEqual(self.sample('paper_summarizer_stage_seconds_count', 'test_stage'), 1)
+        self.assertEqual(self.sample('paper_summarizer_stage_errors_total', 'test_stage'), 0)
+
+    def test_span_counts_errors(self):
+        """Test that a span counts and re-raises errors."""
+        with self.assertRaises(RuntimeError):
+            with metrics.span('failing_stage'):
+                raise RuntimeError('boom')
+        self.assertEqual(self.sample('paper_summarizer_stage_seconds_count', 'failing_stage'), 1)
+        self.assertEqual(self.sample('paper_summarizer_stage_errors_total', 'failing_stage'), 1)
+
+    def test_trace_request(self):
+        """Test that a request is timed like a stage."""
+        with metrics.trace_request('test_request', channel='C1'):
+            with metrics.span('test_inner'):
+                pass
+        self.assertEqual(self.sample('paper_summarizer_stage_seconds_count', 'test_request'), 1)
+        self.assertEqual(self.sample('paper_summarizer_stage_seconds_count', 'test_inner'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+"""
+Tests for the OpenAI Batch API module, against a local stub of the batch endpoints.
+"""
+
+import json
+import threading
+import unittest
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.openai_batch import OpenAIBatchClient, BatchApiError
+from src.http_transport import HttpTransport
+from src.summarizer import Summarizer, FIRST_PASS_ERROR
+
+
+def stub_completion(body):
+    """Answer a chat completion request of the stub batch by the prompt it was given."""
+    system_prompt = body['messages'][0]['content']
+    user_message = body['messages'][1]['content']
+    if 'FAIL' in user_message and 'FIRST PASS' in system_prompt:
+        return 500, {'error': {'message': 'server error'}}
+    if 'one part of a long academic paper' in system_prompt:
+        text = 'chunk notes'
+    elif 'SECOND PASS' in system_prompt:
+        text = 'reduced second pass' if 'chunk notes' in user_message else 'second pass'
+    else:
+        text = 'first pass'
+    return 200, {'choices': [{'message': {'role': 'assistant', 'content': text}}]}
+
+
+class BatchStubHandler(BaseHTTPRequestHandler):
+    """Stands in for the OpenAI files and batches endpoints."""
+
+    protocol_version = 'HTTP/1.1'
+    files = {}
+    batches = {}
+    polls_before_completion = 1
+    lock = threading.Lock()
+
+    def do_POST(self):
+        """Handle file uploads and batch creation."""
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.headers.get('Authorization') != 'Bearer test-key':
+            self._send_json(401, {'error': {'message': 'bad key'}})
+        elif self.path == '/v1/files':
+            message = BytesParser(policy=default_policy).parsebytes(
+                b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + body
+            )
+            fields = {part.get_param('name', header='content-disposition'): part.get_content()
+                      for part in message.iter_parts()}
+            with self.lock:
+                file_id = f"file-{len(self.files)}"
+                self.files[file_id] = fields['file']
+            self._send_json(200, {'id': file_id, 'purpose': fields['purpose']})
+        elif self.path == '/v1/batches':
+            request = json.loads(body)
+            with self.lock:
+                batch_id = f"batch-{len(self.batches)}"
+                self.batches[batch_id] = {
+                    'id': batch_id, 'status': 'validating', 'input_file_id': request['input_file_id'],
+                    'endpoint': request['endpoint'], 'polls': 0
+                }
+            self._send_json(200, self.batches[batch_id])
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_GET(self):
+        """Handle batch retrieval and file downloads."""
+        if self.path.startswith('/v1/batches/'):
+            with self.lock:
+                batch = self.batches[self.path.rsplit('/', 1)[1]]
+                batch['polls'] += 1
+                if batch['polls'] > self.polls_before_completion and batch['status'] != 'completed':
+                    self._complete(batch)
+                elif batch['status'] == 'validating':
+                    batch['status'] = 'in_progress'
+            self._send_json(200, batch)
+        elif self.path.startswith('/v1/files/') and self.path.endswith('/content'):
+            content = self.files[self.path.split('/')[3]]
+            self._send(200, content if isinstance(content, bytes) else content.encode('utf-8'), 'application/jsonl')
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def _complete(self, batch):
+        """Run the requests of a batch and store its output file. Caller holds the lock."""
+        lines = []
+        for line in self.files[batch['input_file_id']].decode('utf-8').splitlines():
+            request = json.loads(line)
+            status, body = stub_completion(request['body'])
+            lines.append(json.dumps({
+                'id': f"resp-{request['custom_id']}", 'custom_id': request['custom_id'],
+                'response': {'status_code': status, 'body': body}, 'error': None
+            }))
+        output_file_id = f"file-{len(self.files)}"
+        self.files[output_file_id] = '\n'.join(lines) + '\n'
+        batch.update({'status': 'completed', 'output_file_id': output_file_id,
+                      'request_counts': {'total': len(lines), 'completed': len(lines), 'failed': 0}})
+
+    def _send_json(self, status, payload):
+        """Send a JSON response."""
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def _send(self, status, body, content_type):
+        """Send a response."""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Silence request logging."""
+
+
+class TestOpenAIBatchClient(unittest.TestCase):
+    """Test cases for the OpenAIBatchClient class and the offline summaries."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the stub batch server."""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), BatchStubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub batch server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Create a client polling the stub quickly."""
+        BatchStubHandler.files.clear()
+        BatchStubHandler.batches.clear()
+        self.client = OpenAIBatchClient(
+            'test-key', base_url=self.base_url, transport=HttpTransport(retries=0), poll_interval=0.01
+        )
+        patcher = patch('src.summarizer.OpenAI')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run_maps_results_by_custom_id(self):
+        """Test that a batch is uploaded, polled and its results matched to the requests."""
+        requests = {
+            'a': {'model': 'm', 'messages': [{'role': 'system', 'content': 'FIRST PASS'},
+                                             {'role': 'user', 'content': 'paper'}]},
+            'b': {'model': 'm', 'messages': [{'role': 'system', 'content': 'FIRST PASS'},
+                                             {'role': 'user', 'content': 'FAIL'}]},
+        }
+
+        results = self.client.run(requests)
+
+        self.assertEqual(results, {'a': 'first pass', 'b': None})
+        batch = BatchStubHandler.batches['batch-0']
+        self.assertEqual(batch['endpoint'], '/v1/chat/completions')
+        self.assertGreater(batch['polls'], 1)
+        uploaded = [json.loads(line) for line in BatchStubHandler.files['file-0'].decode('utf-8').splitlines()]
+        self.assertEqual([line['custom_id'] for line in uploaded], ['a', 'b'])
+        self.assertEqual(uploaded[0]['url'], '/v1/chat/completions')
+
+    def test_api_errors_raise(self):
+        """Test that a rejected request raises BatchApiError."""
+        client = OpenAIBatchClient('wrong-key', base_url=self.base_url, transport=HttpTransport(retries=0))
+
+        with self.assertRaises(BatchApiError):
+            client.run({'a': {'model': 'm', 'messages': []}})
+
+    def test_wait_times_out(self):
+        """Test that waiting gives up after the timeout."""
+        BatchStubHandler.polls_before_completion = 1000
+        self.addCleanup(setattr, BatchStubHandler, 'polls_before_completion', 1)
+
+        with self.assertRaises(BatchApiError):
+            self.client.run({'a': {'model': 'm', 'messages': []}}, timeout=0.05)
+
+    def test_offline_summaries(self):
+        """Test that both passes of several papers run in one batch and are combined as usual."""
+        papers = [
+            {'title': 'Paper One', 'abstract': 'About one.', 'full_text': 'Short text.', 'sections': {}},
+            {'title': 'Paper Two', 'abstract': 'FAIL', 'full_text': 'Short text.', 'sections': {}},
+        ]
+        summarizer = Summarizer(api_key='test')
+
+        summaries = summarizer.generate_summaries_batch(papers, self.client)
+
+        self.assertEqual(len(BatchStubHandler.batches), 1)
+        self.assertIn('# Summary of "Paper One"', summaries[0])
+        self.assertIn('first pass', summaries[0])
+        self.assertIn('second pass', summaries[0])
+        self.assertIn(FIRST_PASS_ERROR, summaries[1])
+        self.assertIn('second pass', summaries[1])
+
+    def test_offline_map_reduce(self):
+        """Test that long papers are mapped in the first batch and reduced in a second one."""
+        sections = []
+        text = 'A Long Survey\n'
+        for i in range(6):
+            heading = f'{i + 1} Part {i + 1}\n'
+            start = len(text) + len(heading)
+            text += heading + f'Content of part {i + 1}. ' * 100 + '\n'
+            sections.append({'key': f'part {i + 1}', 'heading': heading.strip(), 'start': start, 'end': len(text)})
+        papers = [{'title': 'A Long Survey', 'full_text': text, 'sections': sections}]
+        summarizer = Summarizer(api_key='test', map_reduce_threshold=1000, map_chunk_tokens=1200)
+
+        summaries = summarizer.generate_summaries_batch(papers, self.client)
+
+        self.assertEqual(len(BatchStubHandler.batches), 2)
+        self.assertIn('reduced second pass', summaries[0])
+        self.assertIn('first pass', summaries[0])
+
+    def test_cached_summaries_skip_the_batch(self):
+        """Test that papers with a cached summary are not submitted."""
+        cache = MagicMock()
+        cache.get.return_value = 'Cached summary'
+        summarizer = Summarizer(api_key='test', cache=cache)
+
+        summaries = summarizer.generate_summaries_batch([{'title': 'T', 'full_text': 'x'}], self.client)
+
+        self.assertEqual(summaries, ['Cached summary'])
+        self.assertEqual(BatchStubHandler.batches, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
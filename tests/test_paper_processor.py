@@ -6,11 +6,27 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import httpx
 
-# Add the src directory to the path
+# Add the project root and the src directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 from src.paper_processor import PaperProcessor
+from src.http_transport import AsyncHttpTransport
+from tests.pdf_fixtures import make_pdf
+
+
+def make_streaming_response(body, headers=None):
+    """Build a fake streaming response serving the given bytes."""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.raise_for_status.return_value = None
+    response.headers = headers or {}
+    response.iter_content.side_effect = lambda chunk_size: (
+        body[i:i + chunk_size] for i in range(0, len(body), chunk_size)
+    )
+    return response
 
 
 class TestPaperProcessor(unittest.TestCase):
@@ -37,6 +53,27 @@ class TestPaperProcessor(unittest.TestCase):
         url = self.processor.extract_paper_url(text_without_url)
         self.assertIsNone(url)
     
+    def test_extract_paper_urls(self):
+        """Test extracting every paper URL from text, deduplicated."""
+        text = (
+            "Papers for Friday: <https://arxiv.org/abs/1706.03762|Attention>, "
+            "https://arxiv.org/pdf/1706.03762.pdf, https://www.nature.com/articles/nature14539. "
+            "Slides at https://example.com/slides and https://dl.acm.org/doi/10.1145/3292500"
+        )
+        self.assertEqual(self.processor.extract_paper_urls(text), [
+            "https://arxiv.org/abs/1706.03762",
+            "https://www.nature.com/articles/nature14539",
+            "https://dl.acm.org/doi/10.1145/3292500"
+        ])
+        
+        # Without academic links, the first URL is the fallback as in extract_paper_url
+        self.assertEqual(
+            self.processor.extract_paper_urls("See https://example.com/a and https://example.com/b"),
+            ["https://example.com/a"]
+        )
+        self.assertEqual(self.processor.extract_paper_urls("No links here"), [])
+        self.assertEqual(self.processor.extract_paper_urls(""), [])
+    
     @patch('requests.get')
     def test_extract_pdf_paper(self, mock_get):
         """Test extracting content from a PDF paper."""
@@ -62,6 +99,77 @@ class TestPaperProcessor(unittest.TestCase):
         # For now, we'll just test that the method exists
         self.assertTrue(hasattr(self.processor, '_extract_html_paper'))
 
+    @patch('requests.Session.request')
+    def test_extract_pdf_paper_streams_download(self, mock_get):
+        """Test extracting text from a streamed PDF download."""
+        pdf = make_pdf([['A Test Paper', 'Abstract', 'We test things.'], ['INTRODUCTION', 'Some text.']])
+        mock_get.return_value = make_streaming_response(pdf)
+
+        content = self.processor._extract_pdf_paper('https://example.com/paper.pdf')
+
+        self.assertEqual(content['title'], 'A Test Paper')
+        self.assertIn('Some text.', content['full_text'])
+        self.assertTrue(mock_get.call_args.kwargs['stream'])
+        self.assertIsNotNone(mock_get.call_args.kwargs['timeout'])
+
+    @patch('requests.Session.request')
+    def test_extract_pdf_paper_limits(self, mock_get):
+        """Test that oversized downloads are rejected and pages are capped."""
+        pdf = make_pdf([[f'Page {i}'] for i in range(5)])
+
+        mock_get.return_value = make_streaming_response(pdf)
+        processor = PaperProcessor(max_download_bytes=len(pdf) - 1)
+        self.assertIsNone(processor.extract_paper_content('https://example.com/paper.pdf'))
+
+        mock_get.return_value = make_streaming_response(pdf, headers={'Content-Length': str(len(pdf))})
+        self.assertIsNone(processor.extract_paper_content('https://example.com/paper.pdf'))
+
+        mock_get.return_value = make_streaming_response(pdf)
+        processor = PaperProcessor(max_pages=2)
+        content = processor.extract_paper_content('https://example.com/paper.pdf')
+        self.assertIn('Page 1', content['full_text'])
+        self.assertNotIn('Page 2', content['full_text'])
+
+
+class TestAsyncPaperProcessor(unittest.IsolatedAsyncioTestCase):
+    """Test cases for PaperProcessor.aextract_paper_content."""
+
+    async def asyncSetUp(self):
+        """Serve a PDF and an HTML page from a mock httpx transport."""
+        self.pdf = make_pdf([['A Test Paper', 'Abstract', 'We test things.'], ['INTRODUCTION', 'Some text.']])
+
+        def handler(request):
+            if request.url.path.endswith('.pdf'):
+                return httpx.Response(200, content=self.pdf)
+            return httpx.Response(200, html='<html><h1>An HTML Paper</h1><article>Body text.</article></html>')
+
+        self.transport = AsyncHttpTransport()
+        self.transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.processor = PaperProcessor(async_transport=self.transport)
+
+    async def asyncTearDown(self):
+        """Close the transport."""
+        await self.transport.aclose()
+
+    async def test_extract_pdf_paper(self):
+        """Test extracting a PDF through the async transport."""
+        content = await self.processor.aextract_paper_content('https://example.com/paper.pdf')
+
+        self.assertEqual(content['title'], 'A Test Paper')
+        self.assertIn('Some text.', content['full_text'])
+
+    async def test_extract_html_paper(self):
+        """Test extracting an HTML page through the async transport."""
+        content = await self.processor.aextract_paper_content('https://example.com/paper')
+
+        self.assertEqual(content['title'], 'An HTML Paper')
+        self.assertIn('Body text.', content['full_text'])
+
+    async def test_oversized_download(self):
+        """Test that oversized async downloads are rejected."""
+        processor = PaperProcessor(async_transport=self.transport, max_download_bytes=len(self.pdf) - 1)
+        self.assertIsNone(await processor.aextract_paper_content('https://example.com/paper.pdf'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for the PDF extraction engines.
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.pdf_extraction import SerialExtractionEngine, ProcessPoolExtractionEngine, ExtractionLimits
+from tests.pdf_fixtures import make_pdf
+
+
+class TestExtractionEngines(unittest.TestCase):
+    """Test cases for the PDF extraction engines."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Write a multi-page PDF with a references section."""
+        pages = [[f'Body page {i}', 'Some results.'] for i in range(20)]
+        pages[15] = ['6 Conclusion', 'We are done.', 'References', '[1] A cited paper.']
+        cls.pdf_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        cls.pdf_file.write(make_pdf(pages))
+        cls.pdf_file.close()
+        cls.pool_engine = ProcessPoolExtractionEngine(workers=2, batch_size=3, min_pages=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the PDF and stop the worker processes."""
+        cls.pool_engine.shutdown()
+        os.unlink(cls.pdf_file.name)
+
+    def test_engines_produce_the_same_text(self):
+        """Test that parallel extraction keeps pages in document order."""
+        serial = SerialExtractionEngine().extract_text(self.pdf_file.name, max_pages=100)
+        parallel = self.pool_engine.extract_text(self.pdf_file.name, max_pages=100)
+
+        self.assertEqual(serial, parallel)
+        self.assertLess(serial.index('Body page 2\n'), serial.index('Body page 19'))
+
+    def test_stop_at_references(self):
+        """Test that extraction stops after the page with the references heading."""
+        for engine in (SerialExtractionEngine(), self.pool_engine):
+            text = engine.extract_text(
+                self.pdf_file.name, max_pages=100, limits=ExtractionLimits(stop_at_references=True)
+            )
+            self.assertIn('[1] A cited paper.', text)
+            self.assertNotIn('Body page 16', text)
+
+    def test_max_chars_and_pages(self):
+        """Test that the character and page limits are honoured."""
+        text = self.pool_engine.extract_text(
+            self.pdf_file.name, max_pages=100, limits=ExtractionLimits(max_chars=60)
+        )
+        self.assertIn('Body page 1\n', text)
+        self.assertNotIn('Body page 4', text)
+
+        text = self.pool_engine.extract_text(self.pdf_file.name, max_pages=5)
+        self.assertIn('Body page 4', text)
+        self.assertNotIn('Body page 5', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
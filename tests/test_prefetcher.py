@@ -0,0 +1,231 @@
+"""
+Tests for the prefetcher module.
+"""
+
+import time
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.prefetcher import PaperPrefetcher, AsyncPaperPrefetcher, posted_message
+
+
+def message_event(ts, text, channel='C1', **fields):
+    """Build a Slack message event."""
+    event = {'type': 'message', 'channel': channel, 'ts': ts, 'text': text}
+    event.update(fields)
+    return event
+
+
+def make_paper_processor():
+    """Build a fake paper processor that finds arXiv links."""
+    paper_processor = MagicMock()
+    paper_processor.extract_paper_url.side_effect = lambda text: (
+        next((word for word in text.split() if word.startswith('https://arxiv.org/')), None)
+    )
+    paper_processor.extract_paper_content.return_value = {'title': 'A Paper'}
+    paper_processor.aextract_paper_content = AsyncMock(return_value={'title': 'A Paper'})
+    return paper_processor
+
+
+def wait_for(condition, timeout=2.0):
+    """Wait until condition() is true."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestPostedMessage(unittest.TestCase):
+    """Test cases for posted_message."""
+
+    def test_event_kinds(self):
+        """Test that posts, edits and deletions of top-level messages are recognised."""
+        self.assertEqual(posted_message(message_event('1.0', 'Hi')), ('C1', '1.0', 'Hi'))
+        self.assertEqual(
+            posted_message({'type': 'message', 'subtype': 'message_changed', 'channel': 'C1',
+                            'message': {'ts': '1.0', 'text': 'Edited'}}),
+            ('C1', '1.0', 'Edited')
+        )
+        self.assertEqual(
+            posted_message({'type': 'message', 'subtype': 'message_deleted', 'channel': 'C1', 'deleted_ts': '1.0'}),
+            ('C1', '1.0', None)
+        )
+        self.assertIsNone(posted_message(message_event('2.0', 'Reply', thread_ts='1.0')))
+        self.assertIsNone(posted_message(message_event('2.0', 'Joined', subtype='channel_join')))
+
+
+class TestPaperPrefetcher(unittest.TestCase):
+    """Test cases for the PaperPrefetcher class."""
+
+    def setUp(self):
+        """Set up a prefetcher with a short debounce."""
+        self.paper_processor = make_paper_processor()
+        self.prefetcher = PaperPrefetcher(self.paper_processor, debounce=0.05)
+
+    def tearDown(self):
+        """Stop the prefetcher."""
+        self.prefetcher.shutdown()
+
+    def test_prefetches_linked_paper(self):
+        """Test that a posted paper link is extracted after the debounce delay."""
+        self.prefetcher.observe_event(message_event('1.0', 'Read https://arxiv.org/abs/1234.5678'))
+        self.paper_processor.extract_paper_content.assert_not_called()
+
+        wait_for(lambda: self.paper_processor.extract_paper_content.called)
+        self.paper_processor.extract_paper_content.assert_called_once_with('https://arxiv.org/abs/1234.5678')
+
+    def test_edit_within_debounce_replaces_link(self):
+        """Test that an edit during the debounce delay prefetches only the edited link."""
+        self.prefetcher.observe_event(message_event('1.0', 'Read https://arxiv.org/abs/1111.1111'))
+        self.prefetcher.observe_event({
+            'type': 'message', 'subtype': 'message_changed', 'channel': 'C1',
+            'message': {'ts': '1.0', 'text': 'Read https://arxiv.org/abs/2222.2222'}
+        })
+
+        wait_for(lambda: self.prefetcher.stats()['started'] == 1)
+        time.sleep(0.1)
+        self.paper_processor.extract_paper_content.assert_called_once_with('https://arxiv.org/abs/2222.2222')
+        self.assertEqual(self.prefetcher.stats()['scheduled'], 1)
+
+    def test_deletion_cancels_prefetch(self):
+        """Test that deleting the message during the debounce delay cancels its prefetch."""
+        self.prefetcher.observe_event(message_event('1.0', 'Read https://arxiv.org/abs/1234.5678'))
+        self.prefetcher.observe_event(
+            {'type': 'message', 'subtype': 'message_deleted', 'channel': 'C1', 'deleted_ts': '1.0'}
+        )
+
+        time.sleep(0.15)
+        self.paper_processor.extract_paper_content.assert_not_called()
+        self.assertEqual(self.prefetcher.stats()['cancelled'], 1)
+
+    def test_channel_filter(self):
+        """Test that only enabled channels are prefetched."""
+        prefetcher = PaperPrefetcher(self.paper_processor, channels={'C2'}, debounce=0)
+        prefetcher.observe_event(message_event('1.0', 'Read https://arxiv.org/abs/1234.5678', channel='C1'))
+
+        self.assertEqual(prefetcher.stats()['scheduled'], 0)
+        prefetcher.shutdown()
+
+    def test_non_paper_link_is_not_prefetched(self):
+        """Test that a link the processor falls back to is not fetched unless it is on an academic host."""
+        self.paper_processor.extract_paper_url.side_effect = lambda text: text.split()[-1]
+        self.prefetcher.observe_event(message_event('1.0', 'Look http://169.254.169.254/latest/meta-data/'))
+        self.prefetcher.observe_event(message_event('2.0', 'Slides https://example.com/talk.pdf'))
+        self.prefetcher.observe_event(message_event('3.0', 'Read https://www.nature.com/articles/s41586-021-03819-2'))
+
+        wait_for(lambda: self.prefetcher.stats()['started'] == 1)
+        time.sleep(0.1)
+        self.paper_processor.extract_paper_content.assert_called_once_with(
+            'https://www.nature.com/articles/s41586-021-03819-2'
+        )
+        self.assertEqual(self.prefetcher.stats()['scheduled'], 1)
+
+    def test_caps_pending_prefetches(self):
+        """Test that a link-heavy channel cannot schedule more than its share."""
+        prefetcher = PaperPrefetcher(self.paper_processor, debounce=10, max_pending=3, max_pending_per_channel=2)
+        for i in range(4):
+            prefetcher.observe_event(message_event(f"{i}.0", f"https://arxiv.org/abs/{i}"))
+        prefetcher.observe_event(message_event('9.0', 'https://arxiv.org/abs/9', channel='C2'))
+        prefetcher.observe_event(message_event('9.0', 'https://arxiv.org/abs/9', channel='C3'))
+
+        stats = prefetcher.stats()
+        self.assertEqual(stats['pending'], 3)
+        self.assertEqual(stats['skipped'], 3)
+        prefetcher.shutdown()
+
+    def test_repeated_link_is_prefetched_once(self):
+        """Test that a link posted twice is extracted once."""
+        self.prefetcher.observe_event(message_event('1.0', 'https://arxiv.org/abs/1234.5678'))
+        wait_for(lambda: self.paper_processor.extract_paper_content.called)
+        self.prefetcher.observe_event(message_event('2.0', 'https://arxiv.org/abs/1234.5678'))
+
+        time.sleep(0.15)
+        self.assertEqual(self.paper_processor.extract_paper_content.call_count, 1)
+
+    def test_summary_joins_running_prefetch(self):
+        """Test that extracting a paper being prefetched waits for the prefetch."""
+        release = threading.Event()
+
+        def slow_extract(url):
+            release.wait(2)
+            return {'title': 'A Paper'}
+
+        self.paper_processor.extract_paper_content.side_effect = slow_extract
+        self.prefetcher.observe_event(message_event('1.0', 'https://arxiv.org/abs/1234.5678'))
+        wait_for(lambda: self.paper_processor.extract_paper_content.called)
+
+        result = {}
+        thread = threading.Thread(
+            target=lambda: result.update(self.prefetcher.extract_paper_content('https://arxiv.org/abs/1234.5678'))
+        )
+        thread.start()
+        time.sleep(0.05)
+        release.set()
+        thread.join(2)
+
+        self.assertEqual(result, {'title': 'A Paper'})
+        self.assertEqual(self.paper_processor.extract_paper_content.call_count, 1)
+
+
+class TestAsyncPaperPrefetcher(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the AsyncPaperPrefetcher class."""
+
+    async def test_prefetches_with_bounded_concurrency(self):
+        """Test that links are extracted after the debounce delay, a few at a time."""
+        paper_processor = make_paper_processor()
+        running = []
+        peak = []
+
+        async def extract(url):
+            running.append(url)
+            peak.append(len(running))
+            await asyncio.sleep(0.05)
+            running.remove(url)
+            return {'title': url}
+
+        paper_processor.aextract_paper_content = AsyncMock(side_effect=extract)
+        prefetcher = AsyncPaperPrefetcher(paper_processor, debounce=0.02, max_concurrent=2)
+        for i in range(5):
+            prefetcher.observe_event(message_event(f"{i}.0", f"https://arxiv.org/abs/{i}"))
+
+        await asyncio.sleep(0.4)
+
+        self.assertEqual(paper_processor.aextract_paper_content.await_count, 5)
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(prefetcher.stats()['pending'], 0)
+
+    async def test_edit_reschedules(self):
+        """Test that an edit during the debounce delay prefetches only the edited link."""
+        paper_processor = make_paper_processor()
+        prefetcher = AsyncPaperPrefetcher(paper_processor, debounce=0.05)
+        prefetcher.observe_event(message_event('1.0', 'https://arxiv.org/abs/1'))
+        await asyncio.sleep(0.02)
+        prefetcher.observe_event({
+            'type': 'message', 'subtype': 'message_changed', 'channel': 'C1',
+            'message': {'ts': '1.0', 'text': 'https://arxiv.org/abs/2'}
+        })
+
+        await asyncio.sleep(0.15)
+        paper_processor.aextract_paper_content.assert_awaited_once_with('https://arxiv.org/abs/2')
+
+    async def test_aclose_cancels_scheduled(self):
+        """Test that closing the prefetcher drops scheduled prefetches."""
+        paper_processor = make_paper_processor()
+        prefetcher = AsyncPaperPrefetcher(paper_processor, debounce=0.05)
+        prefetcher.observe_event(message_event('1.0', 'https://arxiv.org/abs/1'))
+
+        await prefetcher.aclose()
+        await asyncio.sleep(0.1)
+
+        paper_processor.aextract_paper_content.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
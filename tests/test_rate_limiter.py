@@ -0,0 +1,189 @@
+"""
+Tests for the rate limiter module.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rate_limiter import InMemoryBucketStore, RateLimiter, SQLiteBucketStore, current_requester
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the RateLimiter class."""
+
+    def test_requests_per_minute(self):
+        """Test that calls beyond the request budget wait for the bucket to refill."""
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10 ** 6)
+
+        start = time.monotonic()
+        for _ in range(610):
+            limiter.acquire(1)
+        elapsed = time.monotonic() - start
+
+        # 600 calls fit the full bucket, 10 more take one tenth of a second each
+        self.assertGreater(elapsed, 0.8)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(limiter.stats()['granted'], 610)
+        self.assertGreater(limiter.stats()['throttled'], 0)
+
+    def test_tokens_per_minute(self):
+        """Test that the token budget limits calls with large prompts."""
+        limiter = RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=6000)
+
+        start = time.monotonic()
+        limiter.acquire(6000)
+        limiter.acquire(100)
+        self.assertGreater(time.monotonic() - start, 0.9)
+
+    def test_refund(self):
+        """Test that refunded tokens can be used straight away."""
+        limiter = RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=6000)
+
+        limiter.acquire(6000)
+        limiter.refund(5000)
+        start = time.monotonic()
+        limiter.acquire(4000)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_block(self):
+        """Test that a block after a 429 holds back every caller."""
+        limiter = RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 6)
+
+        limiter.block(0.3)
+        start = time.monotonic()
+        limiter.acquire(1)
+        self.assertGreater(time.monotonic() - start, 0.25)
+        self.assertEqual(limiter.stats()['blocks'], 1)
+
+    def test_fair_across_channels(self):
+        """Test that a channel with many waiting calls does not starve another one."""
+        limiter = RateLimiter(requests_per_minute=1200, tokens_per_minute=10 ** 6)
+        # Drain the bucket so every call below has to queue
+        for _ in range(1200):
+            limiter.acquire(1)
+
+        order = []
+        lock = threading.Lock()
+
+        def call(channel):
+            limiter.acquire(1, requester=(channel, 'U1'))
+            with lock:
+                order.append(channel)
+
+        threads = [threading.Thread(target=call, args=('busy',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        quiet = threading.Thread(target=call, args=('quiet',))
+        quiet.start()
+        for thread in threads + [quiet]:
+            thread.join()
+
+        # The quiet channel is served after at most one more busy call
+        self.assertLessEqual(order.index('quiet'), 2)
+
+    def test_requester_from_context(self):
+        """Test that the requester defaults to the current context."""
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10 ** 6)
+        token = current_requester.set(('C1', 'U1'))
+        try:
+            ticket = limiter._enqueue(None)
+        finally:
+            current_requester.reset(token)
+        self.assertEqual(ticket[:2], ('C1', 'U1'))
+        limiter._discard(ticket)
+        self.assertEqual(limiter.stats()['waiting'], 0)
+
+    def test_shared_between_processes(self):
+        """Test that limiters using one SQLite store share a single budget."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'limits.sqlite3')
+            first = RateLimiter(60, 10 ** 6, store=SQLiteBucketStore(path))
+            second = RateLimiter(60, 10 ** 6, store=SQLiteBucketStore(path))
+
+            for _ in range(30):
+                first.acquire(1)
+            for _ in range(30):
+                second.acquire(1)
+
+            # The shared bucket is empty, so the next call waits about a second
+            start = time.monotonic()
+            second.acquire(1)
+            self.assertGreater(time.monotonic() - start, 0.8)
+
+
+class TestAsyncRateLimiter(unittest.IsolatedAsyncioTestCase):
+    """Test cases for RateLimiter.aacquire."""
+
+    async def test_aacquire_waits_without_blocking(self):
+        """Test that async callers wait for the budget while the loop keeps running."""
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10 ** 6, poll_interval=0.01)
+        for _ in range(600):
+            limiter.acquire(1)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.ensure_future(ticker())
+        start = time.monotonic()
+        await asyncio.gather(*[limiter.aacquire(1, requester=('C1', f'U{i}')) for i in range(3)])
+        elapsed = time.monotonic() - start
+        ticker_task.cancel()
+
+        self.assertGreater(elapsed, 0.2)
+        self.assertGreater(ticks, 10)
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that a cancelled waiter does not block the ones behind it."""
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10 ** 6, poll_interval=0.01)
+        for _ in range(60):
+            limiter.acquire(1)
+
+        waiter = asyncio.ensure_future(limiter.aacquire(1))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(limiter.stats()['waiting'], 0)
+
+    async def test_slow_store_does_not_block_loop(self):
+        """Test that a store waiting on a lock does not stall other tasks."""
+        class SlowStore(InMemoryBucketStore):
+            blocking = True
+
+            def transact(self, name, func):
+                time.sleep(0.3)
+                return super().transact(name, func)
+
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=10 ** 6, store=SlowStore())
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.ensure_future(ticker())
+        await limiter.aacquire(1)
+        ticker_task.cancel()
+
+        self.assertEqual(limiter.stats()['granted'], 1)
+        self.assertGreater(ticks, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
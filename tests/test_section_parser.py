@@ -0,0 +1,86 @@
+"""
+Tests for the section parser module.
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.section_parser import parse_sections, section_text
+
+PAPER_TEXT = """Attention Is All You Need
+Ashish Vaswani
+Abstract
+The dominant sequence transduction models are based on recurrent networks.
+We propose the Transformer.
+Keywords
+attention, transformers
+1 Introduction
+Recurrent neural networks have been firmly established.
+2 Background
+The goal of reducing sequential computation.
+3.1 Model Architecture
+Most competitive models have an encoder-decoder structure.
+6 RESULTS
+We achieve 28.4 BLEU.
+7. Conclusions and Future Work
+In this work we presented the Transformer.
+REFERENCES
+[1] Jimmy Lei Ba.
+"""
+
+
+class TestSectionParser(unittest.TestCase):
+    """Test cases for the section parser."""
+
+    def test_parse_sections(self):
+        """Test indexing the title, abstract and canonical sections."""
+        title, abstract, sections = parse_sections(PAPER_TEXT)
+
+        self.assertEqual(title, 'Attention Is All You Need')
+        self.assertEqual(
+            abstract,
+            'The dominant sequence transduction models are based on recurrent networks. We propose the Transformer.'
+        )
+        self.assertEqual(
+            [section.key for section in sections],
+            ['abstract', 'keywords', 'introduction', 'background', 'model architecture',
+             'results', 'conclusion', 'references']
+        )
+
+        introduction = sections[2]
+        self.assertEqual(introduction.heading, '1 Introduction')
+        self.assertEqual(
+            PAPER_TEXT[introduction.start:introduction.end].strip(),
+            'Recurrent neural networks have been firmly established.'
+        )
+
+    def test_heading_styles(self):
+        """Test that common introduction heading styles are recognized."""
+        for heading in ('Introduction', 'INTRODUCTION', '1 Introduction', '1. Introduction', 'I. INTRODUCTION'):
+            _, _, sections = parse_sections(f"Title\n{heading}\nIntro text.\n")
+            self.assertEqual([section.key for section in sections], ['introduction'], heading)
+
+    def test_inline_abstract(self):
+        """Test an abstract that starts on the same line as its label."""
+        _, abstract, _ = parse_sections("Title\nAbstract—We study things.\nMore detail.\nI. INTRODUCTION\nText.\n")
+        self.assertEqual(abstract, 'We study things. More detail.')
+
+    def test_section_text(self):
+        """Test looking up section text for indexed and legacy paper content."""
+        _, _, sections = parse_sections(PAPER_TEXT)
+        paper_content = {'full_text': PAPER_TEXT, 'sections': [section.to_dict() for section in sections]}
+
+        self.assertEqual(section_text(paper_content, 'conclusion'), 'In this work we presented the Transformer.')
+        self.assertEqual(section_text(paper_content, 'method'), '')
+
+        legacy_content = {'full_text': '', 'sections': {'1 INTRODUCTION': 'Intro text.'}}
+        self.assertEqual(section_text(legacy_content, 'introduction'), 'Intro text.')
+
+
+if __name__ == '__main__':
+    unittest.main()
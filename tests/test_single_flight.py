@@ -0,0 +1,116 @@
+"""
+Tests for the single-flight module.
+"""
+
+import asyncio
+import unittest
+import threading
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.single_flight import SingleFlight, AsyncSingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for the SingleFlight class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    def slow_call(self, value):
+        """Record a call and block until released."""
+        self.calls.append(value)
+        self.release.wait(5)
+        return value * 2
+
+    def run_callers(self, count, func):
+        """Start callers in threads and return their results once finished."""
+        results = [None] * count
+
+        def caller(i):
+            try:
+                results[i] = self.flight.do('paper', func, 21)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=caller, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        while self.flight.in_flight() == 0:
+            threading.Event().wait(0.01)
+        threading.Event().wait(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_calls_are_coalesced(self):
+        """Test that concurrent callers share one execution and its result."""
+        results = self.run_callers(5, self.slow_call)
+
+        self.assertEqual(self.calls, [21])
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_exceptions_are_shared(self):
+        """Test that every waiting caller receives the leader's exception."""
+        def failing_call(value):
+            self.slow_call(value)
+            raise ValueError("download failed")
+
+        results = self.run_callers(3, failing_call)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_later_calls_run_again(self):
+        """Test that a finished key is executed again on the next call."""
+        self.release.set()
+        self.flight.do('paper', self.slow_call, 1)
+        self.flight.do('paper', self.slow_call, 2)
+        self.assertEqual(self.calls, [1, 2])
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the AsyncSingleFlight class."""
+
+    async def test_concurrent_calls_are_coalesced(self):
+        """Test that concurrent coroutines share one execution and its result."""
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow_call(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value * 2
+
+        results = await asyncio.gather(*[flight.do('paper', slow_call, 21) for _ in range(5)])
+
+        self.assertEqual(calls, [21])
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(flight.in_flight(), 0)
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Test that cancelling one waiter leaves the shared call running."""
+        flight = AsyncSingleFlight()
+
+        async def slow_call():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        first = asyncio.ensure_future(flight.do('paper', slow_call))
+        second = asyncio.ensure_future(flight.do('paper', slow_call))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, 'done')
+
+
+if __name__ == '__main__':
+    unittest.main()
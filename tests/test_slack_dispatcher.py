@@ -0,0 +1,179 @@
+"""
+Tests for the Slack dispatcher module.
+"""
+
+import time
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+import sys
+import os
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.slack_dispatcher import SlackDispatcher, split_text, BLOCK_TEXT_LIMIT
+
+
+def make_rate_limited_error(retry_after='0'):
+    """Build the error slack_sdk raises for a 429 response."""
+    response = SlackResponse(
+        client=None, http_verb='POST', api_url='https://slack.com/api/chat.postMessage', req_args={},
+        data={'ok': False, 'error': 'ratelimited'}, headers={'Retry-After': retry_after}, status_code=429
+    )
+    return SlackApiError('ratelimited', response)
+
+
+def make_posting_client():
+    """Build a fake Slack client whose posts return increasing timestamps."""
+    slack_client = MagicMock()
+    counter = iter(range(1, 1000))
+    slack_client.post_message.side_effect = lambda **kwargs: {'ok': True, 'ts': f"{next(counter)}.0"}
+    return slack_client
+
+
+class TestSplitText(unittest.TestCase):
+    """Test cases for split_text."""
+
+    def test_chunks_fit_blocks_and_keep_order(self):
+        """Test that long text is split at paragraph breaks into block-sized chunks."""
+        paragraphs = [f"Paragraph {i} " + 'word ' * 150 for i in range(40)]
+        chunks = split_text('\n\n'.join(paragraphs))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= BLOCK_TEXT_LIMIT for chunk in chunks))
+        self.assertEqual('\n\n'.join(chunks), '\n\n'.join(paragraphs))
+
+    def test_oversized_paragraph(self):
+        """Test that a paragraph longer than a block is cut at spaces."""
+        chunks = split_text('word ' * 2000)
+
+        self.assertTrue(all(len(chunk) <= BLOCK_TEXT_LIMIT for chunk in chunks))
+        self.assertEqual(' '.join(chunks).split(), ['word'] * 2000)
+
+
+class TestSlackDispatcher(unittest.TestCase):
+    """Test cases for the SlackDispatcher class."""
+
+    def setUp(self):
+        """Set up a dispatcher with loose limits."""
+        self.slack_client = make_posting_client()
+        self.dispatcher = SlackDispatcher(self.slack_client, channel_messages_per_minute=6000, channel_burst=100)
+
+    def test_short_message_is_sent_as_text(self):
+        """Test that short messages are posted unchanged."""
+        self.dispatcher.post_message('C1', 'Hello', thread_ts='1.0')
+
+        self.slack_client.post_message.assert_called_once_with(
+            channel='C1', text='Hello', thread_ts='1.0', blocks=None
+        )
+
+    def test_long_message_is_sent_as_blocks_in_order(self):
+        """Test that a long summary becomes section blocks in one message."""
+        text = '\n\n'.join(f"Section {i}\n" + 'text ' * 400 for i in range(10))
+        self.dispatcher.post_message('C1', text, thread_ts='1.0')
+
+        blocks = self.slack_client.post_message.call_args.kwargs['blocks']
+        self.assertEqual(self.slack_client.post_message.call_count, 1)
+        self.assertTrue(all(len(block['text']['text']) <= BLOCK_TEXT_LIMIT for block in blocks))
+        self.assertEqual('\n\n'.join(block['text']['text'] for block in blocks), text)
+
+    def test_very_long_update_overflows_into_thread(self):
+        """Test that text beyond one message is posted in order in the thread of the updated message."""
+        ts = self.dispatcher.post_status('C1', '1.0', 'Working...')
+        text = '\n\n'.join(f"Part {i} " + 'x' * 2900 for i in range(60))
+
+        self.dispatcher.update_message('C1', ts, text)
+
+        update_blocks = self.slack_client.update_message.call_args.kwargs['blocks']
+        overflow = self.slack_client.post_message.call_args_list[1].kwargs
+        self.assertEqual(len(update_blocks), 50)
+        self.assertEqual(overflow['thread_ts'], '1.0')
+        self.assertTrue(overflow['blocks'][0]['text']['text'].startswith('Part 50 '))
+
+    def test_rate_limited_calls_are_retried(self):
+        """Test that a ratelimited error is retried after Retry-After."""
+        self.slack_client.post_message.side_effect = [make_rate_limited_error('0.2'), {'ok': True, 'ts': '2.0'}]
+
+        start = time.monotonic()
+        response = self.dispatcher.post_message('C1', 'Hello')
+
+        self.assertEqual(response['ts'], '2.0')
+        self.assertGreater(time.monotonic() - start, 0.15)
+        self.assertEqual(self.dispatcher.stats(), {'calls': 1, 'retries': 1})
+
+    def test_other_errors_are_raised(self):
+        """Test that errors other than rate limits are not retried."""
+        response = SlackResponse(
+            client=None, http_verb='POST', api_url='https://slack.com/api/chat.postMessage', req_args={},
+            data={'ok': False, 'error': 'channel_not_found'}, headers={}, status_code=200
+        )
+        self.slack_client.post_message.side_effect = SlackApiError('channel_not_found', response)
+
+        with self.assertRaises(SlackApiError):
+            self.dispatcher.post_message('C1', 'Hello')
+        self.assertEqual(self.slack_client.post_message.call_count, 1)
+
+    def test_statuses_are_coalesced(self):
+        """Test that statuses in one thread edit a single message until the status ends."""
+        first = self.dispatcher.post_status('C1', '1.0', 'Analyzing...', key='U1')
+        second = self.dispatcher.post_status('C1', '1.0', 'Could not extract the paper', key='U1')
+        self.dispatcher.end_status('C1', '1.0', key='U1')
+        third = self.dispatcher.post_status('C1', '1.0', 'Analyzing...', key='U1')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual(self.slack_client.post_message.call_count, 2)
+        self.assertEqual(self.slack_client.update_message.call_args.kwargs['ts'], first)
+
+    def test_parent_message_is_cached(self):
+        """Test that repeated parent lookups in one thread make a single API call."""
+        self.slack_client.get_parent_message.return_value = {'ts': '1.0', 'text': 'A paper'}
+
+        first = self.dispatcher.get_parent_message('C1', '1.0')
+        second = self.dispatcher.get_parent_message('C1', '1.0')
+
+        self.assertEqual(first, second)
+        self.slack_client.get_parent_message.assert_called_once_with('C1', '1.0')
+
+    def test_missing_parent_message_is_not_cached(self):
+        """Test that a parent that was not found is looked up again."""
+        self.slack_client.get_parent_message.return_value = {}
+
+        self.dispatcher.get_parent_message('C1', '1.0')
+        self.dispatcher.get_parent_message('C1', '1.0')
+
+        self.assertEqual(self.slack_client.get_parent_message.call_count, 2)
+
+    def test_channel_pacing(self):
+        """Test that posts to one channel are spaced out once the burst is used."""
+        dispatcher = SlackDispatcher(self.slack_client, channel_messages_per_minute=600, channel_burst=1)
+
+        start = time.monotonic()
+        for _ in range(4):
+            dispatcher.post_message('C1', 'Hello')
+        dispatcher.post_message('C2', 'Hello')
+
+        self.assertGreater(time.monotonic() - start, 0.25)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+
+class TestAsyncSlackDispatcher(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the async SlackDispatcher methods."""
+
+    async def test_rate_limited_calls_are_retried(self):
+        """Test that a ratelimited async call is retried after Retry-After."""
+        slack_client = MagicMock()
+        slack_client.apost_message = AsyncMock(side_effect=[make_rate_limited_error('0.1'), {'ok': True, 'ts': '2.0'}])
+        dispatcher = SlackDispatcher(slack_client)
+
+        ts = await dispatcher.apost_status('C1', '1.0', 'Analyzing...')
+
+        self.assertEqual(ts, '2.0')
+        self.assertEqual(slack_client.apost_message.await_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
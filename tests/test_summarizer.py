@@ -0,0 +1,351 @@
+"""
+Tests for the summarizer module.
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import asyncio
+import tempfile
+import time
+import sys
+import os
+import httpx
+from openai import RateLimitError
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.summarizer import Summarizer
+from src.summary_cache import SummaryCache
+from src.rate_limiter import RateLimiter
+
+
+def make_response(text):
+    """Build a fake chat completion response."""
+    response = MagicMock()
+    response.choices[0].message.content = text
+    return response
+
+
+def make_stream(text, size=5):
+    """Build fake streamed chat completion chunks of the given text."""
+    chunks = []
+    for i in range(0, len(text), size):
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = text[i:i + size]
+        chunks.append(chunk)
+    return chunks
+
+
+async def make_async_stream(text, size=5):
+    """Yield fake streamed chat completion chunks of the given text."""
+    for chunk in make_stream(text, size):
+        await asyncio.sleep(0)
+        yield chunk
+
+
+class TestSummarizer(unittest.TestCase):
+    """Test cases for the Summarizer class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        patcher = patch('src.summarizer.OpenAI')
+        self.mock_openai = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.create = self.mock_openai.return_value.chat.completions.create
+        self.paper_content = {
+            'title': 'Test Paper',
+            'abstract': 'An abstract.',
+            'full_text': 'Full text of the paper.',
+            'sections': {}
+        }
+
+    def test_comparison_and_digest(self):
+        """Test that papers shared together are compared and combined into one digest."""
+        self.create.return_value = make_response('Both study attention.')
+        summarizer = Summarizer(api_key='test')
+
+        comparison = summarizer.generate_comparison(['# Summary of "A"', '# Summary of "B"'])
+        digest = summarizer.combine_digest(['# Summary of "A"', '# Summary of "B"'], comparison)
+
+        messages = self.create.call_args.kwargs['messages']
+        self.assertIn('comparison', messages[0]['content'])
+        self.assertIn('Paper 2:\n# Summary of "B"', messages[1]['content'])
+        self.assertTrue(digest.startswith('# Digest of 2 papers\n\n## Comparison\n\nBoth study attention.'))
+        self.assertLess(digest.index('Summary of "A"'), digest.index('Summary of "B"'))
+
+    def test_failed_comparison(self):
+        """Test that a failed comparison leaves the digest without one."""
+        self.create.side_effect = Exception('API down')
+        summarizer = Summarizer(api_key='test')
+
+        self.assertIsNone(summarizer.generate_comparison(['A', 'B']))
+        self.assertEqual(summarizer.combine_digest(['A', 'B'], None), '# Digest of 2 papers\n\nA\n\nB')
+
+    def test_passes_run_concurrently(self):
+        """Test that the first and second pass overlap in time."""
+        def slow_create(**kwargs):
+            time.sleep(0.3)
+            is_first = 'FIRST PASS' in kwargs['messages'][0]['content']
+            return make_response('first' if is_first else 'second')
+
+        self.create.side_effect = slow_create
+        summarizer = Summarizer(api_key='test')
+
+        start = time.monotonic()
+        summary = summarizer.generate_summary(self.paper_content)
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.55)
+        self.assertIn('first', summary)
+        self.assertIn('second', summary)
+
+    def test_pass_timeout_returns_partial_summary(self):
+        """Test that a slow pass does not hold back the other one."""
+        def create(**kwargs):
+            if 'FIRST PASS' in kwargs['messages'][0]['content']:
+                return make_response('first pass text')
+            time.sleep(1)
+            return make_response('second pass text')
+
+        self.create.side_effect = create
+        summarizer = Summarizer(api_key='test', pass_timeout=0.2)
+
+        summary = summarizer.generate_summary(self.paper_content)
+
+        self.assertIn('first pass text', summary)
+        self.assertIn('The second pass summary timed out.', summary)
+
+    def test_summary_cache(self):
+        """Test that cached summaries skip the API until the prompts change."""
+        self.create.return_value = make_response('pass text')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SummaryCache(os.path.join(tmpdir, 'summaries.sqlite3'))
+            summarizer = Summarizer(api_key='test', cache=cache)
+
+            first = summarizer.generate_summary(self.paper_content)
+            second = summarizer.generate_summary(self.paper_content)
+            self.assertEqual(first, second)
+            self.assertEqual(self.create.call_count, 2)
+
+            summarizer.first_pass_prompt += "Also list open questions."
+            summarizer.generate_summary(self.paper_content)
+            self.assertEqual(self.create.call_count, 4)
+
+    def test_failed_summary_is_not_cached(self):
+        """Test that a summary with a failed pass is regenerated next time."""
+        self.create.side_effect = Exception("API error")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SummaryCache(os.path.join(tmpdir, 'summaries.sqlite3'))
+            summarizer = Summarizer(api_key='test', cache=cache)
+
+            summarizer.generate_summary(self.paper_content)
+            self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_map_reduce_for_long_papers(self):
+        """Test that long papers are summarized chunk by chunk and then reduced."""
+        sections = []
+        text = 'A Long Survey\n'
+        for i in range(6):
+            heading = f'{i + 1} Part {i + 1}\n'
+            start = len(text) + len(heading)
+            text += heading + f'Content of part {i + 1}. ' * 100 + '\n'
+            sections.append({'key': f'part {i + 1}', 'heading': heading.strip(), 'start': start, 'end': len(text)})
+        paper_content = {'title': 'A Long Survey', 'full_text': text, 'sections': sections}
+
+        def create(**kwargs):
+            system_prompt = kwargs['messages'][0]['content']
+            if 'one part of a long academic paper' in system_prompt:
+                return make_response('chunk notes')
+            if 'SECOND PASS' in system_prompt:
+                self.assertIn('chunk notes', kwargs['messages'][1]['content'])
+                return make_response('reduced second pass')
+            return make_response('first pass')
+
+        self.create.side_effect = create
+        summarizer = Summarizer(api_key='test', map_reduce_threshold=1000, map_chunk_tokens=1200)
+
+        summary = summarizer.generate_summary(paper_content)
+
+        self.assertIn('reduced second pass', summary)
+        map_calls = [call for call in self.create.call_args_list
+                     if 'one part of a long' in call.kwargs['messages'][0]['content']]
+        self.assertEqual(len(map_calls), 3)
+
+    def test_map_step_is_time_bounded(self):
+        """Test that slow chunks are dropped once the map timeout expires."""
+        def create(**kwargs):
+            user_message = kwargs['messages'][1]['content']
+            if 'one part of a long' in kwargs['messages'][0]['content'] and user_message.count('slow') > 10:
+                time.sleep(2)
+            return make_response('text')
+
+        self.create.side_effect = create
+        summarizer = Summarizer(api_key='test', map_chunk_tokens=100, map_timeout=0.3)
+        paper_content = {'title': 'T', 'full_text': 'fast words here. ' * 23 + 'slow ' * 400, 'sections': {}}
+
+        start = time.monotonic()
+        second_pass = summarizer._generate_map_reduce_pass('message', paper_content)
+
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(second_pass, 'text')
+
+
+    def test_streaming_progress(self):
+        """Test that streamed passes report the partial summary as it grows."""
+        def create(**kwargs):
+            self.assertTrue(kwargs['stream'])
+            if 'FIRST PASS' in kwargs['messages'][0]['content']:
+                return make_stream('The five Cs of the paper.')
+            time.sleep(0.2)
+            return make_stream('A detailed second pass.')
+
+        self.create.side_effect = create
+        summarizer = Summarizer(api_key='test')
+        progress = []
+
+        summary = summarizer.generate_summary(self.paper_content, on_progress=progress.append)
+
+        self.assertIn('The five Cs of the paper.', summary)
+        self.assertIn('A detailed second pass.', summary)
+        # The first pass is shown complete while the second is still pending
+        self.assertTrue(any(
+            'The five Cs of the paper.' in text and 'Working on the second pass' in text for text in progress
+        ))
+        self.assertIn('A detailed second pass.', progress[-1])
+
+
+    def test_rate_limited_calls_are_retried(self):
+        """Test that a 429 pauses the scheduler for Retry-After and the call is retried."""
+        request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+        rate_limited = RateLimitError(
+            'Rate limit reached',
+            response=httpx.Response(429, headers={'retry-after': '0.2'}, request=request),
+            body=None
+        )
+        self.create.side_effect = [rate_limited, make_response('first pass text')]
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=10 ** 6)
+        summarizer = Summarizer(api_key='test', rate_limiter=limiter)
+
+        start = time.monotonic()
+        text = summarizer._generate_first_pass('A paper')
+
+        self.assertEqual(text, 'first pass text')
+        self.assertGreater(time.monotonic() - start, 0.15)
+        self.assertEqual(limiter.stats()['blocks'], 1)
+        self.assertEqual(limiter.stats()['granted'], 2)
+        self.assertEqual(self.mock_openai.call_args.kwargs['max_retries'], 0)
+
+
+class TestAsyncSummarizer(unittest.IsolatedAsyncioTestCase):
+    """Test cases for Summarizer.agenerate_summary."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        for target in ('src.summarizer.OpenAI', 'src.summarizer.AsyncOpenAI'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.paper_content = {
+            'title': 'Test Paper',
+            'abstract': 'An abstract.',
+            'full_text': 'Full text of the paper.',
+            'sections': {}
+        }
+
+    async def test_passes_run_concurrently(self):
+        """Test that the async passes overlap in time."""
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.3)
+            is_first = 'FIRST PASS' in kwargs['messages'][0]['content']
+            return make_response('first' if is_first else 'second')
+
+        summarizer = Summarizer(api_key='test')
+        summarizer.async_client.chat.completions.create = AsyncMock(side_effect=slow_create)
+
+        start = time.monotonic()
+        summary = await summarizer.agenerate_summary(self.paper_content)
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.55)
+        self.assertIn('first', summary)
+        self.assertIn('second', summary)
+
+    async def test_pass_timeout_returns_partial_summary(self):
+        """Test that a slow async pass is replaced by the timeout message."""
+        async def create(**kwargs):
+            if 'FIRST PASS' in kwargs['messages'][0]['content']:
+                return make_response('first pass text')
+            await asyncio.sleep(1)
+            return make_response('second pass text')
+
+        summarizer = Summarizer(api_key='test', pass_timeout=0.2)
+        summarizer.async_client.chat.completions.create = AsyncMock(side_effect=create)
+
+        summary = await summarizer.agenerate_summary(self.paper_content)
+
+        self.assertIn('first pass text', summary)
+        self.assertIn('The second pass summary timed out.', summary)
+
+    async def test_streaming_progress(self):
+        """Test that async streamed passes report the partial summary as it grows."""
+        async def create(**kwargs):
+            if 'FIRST PASS' in kwargs['messages'][0]['content']:
+                return make_async_stream('The five Cs of the paper.')
+            return make_async_stream('A detailed second pass.')
+
+        summarizer = Summarizer(api_key='test')
+        summarizer.async_client.chat.completions.create = AsyncMock(side_effect=create)
+        progress = []
+
+        summary = await summarizer.agenerate_summary(self.paper_content, on_progress=progress.append)
+
+        self.assertIn('A detailed second pass.', summary)
+        self.assertGreater(len(progress), 2)
+        self.assertIn('Working on the second pass', progress[0])
+        self.assertIn('The five Cs of the paper.', progress[-1])
+
+
+class TestSummaryCache(unittest.TestCase):
+    """Test cases for the SummaryCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'summaries.sqlite3')
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.tmpdir.cleanup()
+
+    def test_ttl_expiry(self):
+        """Test that expired summaries are not returned."""
+        cache = SummaryCache(self.path, ttl=0)
+        cache.put('key', 'summary')
+        time.sleep(0.01)
+        self.assertIsNone(cache.get('key'))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used summary is evicted first."""
+        cache = SummaryCache(self.path, max_entries=2)
+        cache.put('a', 'summary a')
+        time.sleep(0.01)
+        cache.put('b', 'summary b')
+        time.sleep(0.01)
+        cache.get('a')
+        time.sleep(0.01)
+        cache.put('c', 'summary c')
+
+        self.assertEqual(cache.get('a'), 'summary a')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'summary c')
+
+    def test_shared_between_instances(self):
+        """Test that a summary stored by one instance is seen by another."""
+        SummaryCache(self.path).put('key', 'summary')
+        self.assertEqual(SummaryCache(self.path).get('key'), 'summary')
+
+
+if __name__ == '__main__':
+    unittest.main()
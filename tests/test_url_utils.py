@@ -0,0 +1,164 @@
+"""
+Tests for the URL scanner and classifier of the url_utils module.
+"""
+
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+import sys
+import os
+
+# Add the project root and the src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from src.url_utils import (
+    scan_urls, scan_links, url_host, host_in_domains, is_academic_url, parse_doi, arxiv_id_from_doi, classify_url,
+    unversioned_arxiv_id, ACADEMIC_DOMAINS, LINK_ARXIV, LINK_DOI, LINK_PDF, LINK_HTML
+)
+from src.paper_processor import PaperProcessor
+
+
+class TestScanUrls(unittest.TestCase):
+    """Test cases for finding links in messages."""
+
+    def test_links_in_slack_markup_and_sentences(self):
+        """Test that labels and sentence punctuation are not part of the links."""
+        text = (
+            "Read <https://arxiv.org/abs/1706.03762|this one>, then www.nature.com/articles/nature14539. "
+            "Also (see https://example.com/a?b=1)! Done"
+        )
+        self.assertEqual(list(scan_urls(text)), [
+            'https://arxiv.org/abs/1706.03762',
+            'www.nature.com/articles/nature14539',
+            'https://example.com/a?b=1)',
+        ])
+        self.assertEqual(list(scan_urls('no links')), [])
+
+    def test_hosts_come_with_links(self):
+        """Test that hosts are lowercased, without "www.", credentials, port or trailing punctuation."""
+        text = "https://user@Export.ArXiv.org:443/abs/1 and www.nature.com. and http://localhost:8000/x"
+        self.assertEqual(list(scan_links(text)), [
+            ('https://user@Export.ArXiv.org:443/abs/1', 'export.arxiv.org'),
+            ('www.nature.com', 'nature.com'),
+            ('http://localhost:8000/x', 'localhost'),
+        ])
+
+
+class TestHostMatching(unittest.TestCase):
+    """Test cases for matching hosts against domains."""
+
+    def test_suffix_lookup(self):
+        """Test that subdomains match and lookalike hosts do not."""
+        self.assertTrue(host_in_domains('arxiv.org', ACADEMIC_DOMAINS))
+        self.assertTrue(host_in_domains('export.arxiv.org', ACADEMIC_DOMAINS))
+        self.assertTrue(host_in_domains('dl.acm.org', ACADEMIC_DOMAINS))
+        self.assertFalse(host_in_domains('notarxiv.org', ACADEMIC_DOMAINS))
+        self.assertFalse(host_in_domains('notarxiv.org.example.com', ACADEMIC_DOMAINS))
+        self.assertFalse(host_in_domains('', ACADEMIC_DOMAINS))
+
+    def test_url_host(self):
+        """Test that hosts are lowercased without "www." and without port or credentials."""
+        self.assertEqual(url_host('https://WWW.Nature.com:443/x'), 'nature.com')
+        self.assertEqual(url_host('www.acm.org/doi'), 'acm.org')
+        self.assertEqual(url_host('https://user@arxiv.org/abs/1'), 'arxiv.org')
+
+    def test_is_academic_url(self):
+        """Test that a domain in the path or query does not make a link academic."""
+        self.assertTrue(is_academic_url('https://link.springer.com/article/10.1007/x'))
+        self.assertFalse(is_academic_url('https://example.com/?next=arxiv.org'))
+        self.assertFalse(is_academic_url('https://example.com/arxiv.org/abs/1'))
+
+
+class TestClassifyUrl(unittest.TestCase):
+    """Test cases for classifying paper links."""
+
+    def test_kinds(self):
+        """Test each kind of link."""
+        self.assertEqual(classify_url('https://arxiv.org/abs/1706.03762'), LINK_ARXIV)
+        self.assertEqual(classify_url('https://export.arxiv.org/pdf/1706.03762.pdf'), LINK_ARXIV)
+        self.assertEqual(classify_url('https://doi.org/10.1145/3292500.3330701'), LINK_DOI)
+        self.assertEqual(classify_url('https://dx.doi.org/10.1038/nature14539'), LINK_DOI)
+        self.assertEqual(classify_url('https://example.com/paper.PDF?download=1'), LINK_PDF)
+        self.assertEqual(classify_url('https://notarxiv.org.example.com/paper.pdf'), LINK_PDF)
+        self.assertEqual(classify_url('https://doi.org/help'), LINK_HTML)
+        self.assertEqual(classify_url('www.nature.com/articles/nature14539'), LINK_HTML)
+
+    def test_parse_doi(self):
+        """Test DOIs in links, with a prefix and bare."""
+        self.assertEqual(parse_doi('https://doi.org/10.1145/3292500.3330701'), '10.1145/3292500.3330701')
+        self.assertEqual(parse_doi('https://dx.doi.org/10.1002/%28SICI%291097'), '10.1002/(SICI)1097')
+        self.assertEqual(parse_doi('doi.org/10.1038/nature14539'), '10.1038/nature14539')
+        self.assertEqual(parse_doi('doi:10.1038/nature14539'), '10.1038/nature14539')
+        self.assertEqual(parse_doi('10.1038/nature14539'), '10.1038/nature14539')
+        self.assertIsNone(parse_doi('https://example.com/10.1038/nature14539'))
+        self.assertIsNone(parse_doi('not a doi'))
+
+    def test_arxiv_doi(self):
+        """Test that DOIs registered by arXiv map to the arXiv identifier."""
+        self.assertEqual(arxiv_id_from_doi('10.48550/arXiv.1706.03762'), '1706.03762')
+        self.assertIsNone(arxiv_id_from_doi('10.1038/nature14539'))
+
+    def test_unversioned_arxiv_id(self):
+        """Test that only arXiv links and DOIs without a version point at the latest version."""
+        self.assertEqual(unversioned_arxiv_id('https://arxiv.org/abs/1706.03762'), '1706.03762')
+        self.assertEqual(unversioned_arxiv_id('https://arxiv.org/pdf/hep-th/9901001.pdf'), 'hep-th/9901001')
+        self.assertEqual(unversioned_arxiv_id('https://doi.org/10.48550/arXiv.1706.03762'), '1706.03762')
+        self.assertIsNone(unversioned_arxiv_id('https://arxiv.org/abs/1706.03762v5'))
+        self.assertIsNone(unversioned_arxiv_id('1706.03762v5'))
+        self.assertIsNone(unversioned_arxiv_id('https://doi.org/10.1038/nature14539'))
+        self.assertIsNone(unversioned_arxiv_id('https://www.nature.com/articles/nature14539'))
+
+
+class TestDoiResolution(unittest.IsolatedAsyncioTestCase):
+    """Test cases for fetching papers linked by DOI."""
+
+    def make_processor(self, final_url):
+        """Build a processor whose transports redirect every request to final_url."""
+        transport = MagicMock()
+        transport.request.return_value.url = final_url
+        async_transport = MagicMock()
+        async_transport.request = AsyncMock(return_value=MagicMock(url=final_url))
+        return PaperProcessor(transport=transport, async_transport=async_transport)
+
+    def test_doi_resolves_to_pdf(self):
+        """Test that a DOI link is fetched by the kind of the page it redirects to."""
+        processor = self.make_processor('https://example.com/paper.pdf')
+        with patch.object(processor, '_extract_pdf_paper', return_value={'title': 'A'}) as extract_pdf:
+            content = processor.extract_paper_content('https://doi.org/10.1234/abcd')
+
+        self.assertEqual(content, {'title': 'A'})
+        extract_pdf.assert_called_once_with('https://example.com/paper.pdf')
+        method, url = processor.transport.request.call_args.args
+        self.assertEqual((method, url), ('HEAD', 'https://doi.org/10.1234/abcd'))
+        self.assertTrue(processor.transport.request.call_args.kwargs['allow_redirects'])
+
+    def test_arxiv_doi_needs_no_request(self):
+        """Test that an arXiv DOI goes to the arXiv paper directly."""
+        processor = self.make_processor('https://example.com/unused')
+        with patch.object(processor, '_extract_arxiv_paper', return_value={'title': 'A'}) as extract_arxiv:
+            processor.extract_paper_content('https://doi.org/10.48550/arXiv.1706.03762')
+
+        extract_arxiv.assert_called_once_with('https://arxiv.org/abs/1706.03762')
+        processor.transport.request.assert_not_called()
+
+    def test_unresolvable_doi_is_fetched_as_page(self):
+        """Test that the doi.org link itself is fetched when resolution fails."""
+        processor = self.make_processor(None)
+        processor.transport.request.side_effect = ConnectionError('offline')
+        with patch.object(processor, '_extract_html_paper', return_value={'title': 'A'}) as extract_html:
+            processor.extract_paper_content('https://doi.org/10.1234/abcd')
+
+        extract_html.assert_called_once_with('https://doi.org/10.1234/abcd')
+
+    async def test_async_doi_resolution(self):
+        """Test that the async path resolves DOIs through the async transport."""
+        processor = self.make_processor('https://www.nature.com/articles/nature14539')
+        with patch.object(processor, '_aextract_html_paper', AsyncMock(return_value={'title': 'A'})) as extract_html:
+            await processor.aextract_paper_content('https://doi.org/10.1038/nature14539')
+
+        extract_html.assert_awaited_once_with('https://www.nature.com/articles/nature14539')
+        self.assertEqual(processor.async_transport.request.call_args.args, ('HEAD', 'https://doi.org/10.1038/nature14539'))
+
+
+if __name__ == '__main__':
+    unittest.main()